@@ -0,0 +1,86 @@
+"""
+.. module:: conserve memory benchmark
+:synopsis: memory high-water mark with and without 'conserve_memory'
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.linear_model
+import sklearn.model_selection
+import sklearn.preprocessing
+
+from simplify.core.caches import transformer_cache
+from simplify.core.dataset import Dataset
+from simplify.core.externals import SklearnModel, SklearnTransformer
+
+
+def create_data(rows: int, floats: int = 30, integers: int = 5,
+                seed: int = 0) -> pd.DataFrame:
+    """Creates a synthetic classification table with float and int columns."""
+    generator = np.random.default_rng(seed)
+    data = pd.DataFrame(
+        generator.normal(size = (rows, floats)),
+        columns = [f'float_{i}' for i in range(floats)])
+    for i in range(integers):
+        data[f'integer_{i}'] = generator.integers(0, 100, size = rows)
+    data['label'] = (data['float_0'] + generator.normal(size = rows) > 0)
+    return data
+
+def run(data: pd.DataFrame, conserve: bool, folds: int) -> dict:
+    """Runs a split -> scale -> model path, returning peak traced memory.
+
+    The Dataset, splitting, scaler, and model are the simplify components, so
+    'conserve_memory' takes effect exactly as it does in a project.
+
+    """
+    settings = {'general': {'conserve_memory': conserve}}
+    transformer_cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    dataset = Dataset.create(data = data.copy(), settings = settings)
+    dataset.create_xy(label = 'label')
+    dataset.splits = tuple(
+        sklearn.model_selection.KFold(n_splits = folds).split(dataset.x))
+    project = types.SimpleNamespace(data = dataset, settings = settings)
+    scores = []
+    for fold in range(folds):
+        dataset.split(fold = fold)
+        SklearnTransformer(
+            name = 'scale',
+            contents = sklearn.preprocessing.StandardScaler).implement(project)
+        model = SklearnModel(
+            name = 'sgd',
+            contents = sklearn.linear_model.SGDClassifier,
+            parameters = {'random_state': 0})
+        model.implement(project)
+        scores.append(model.contents.score(dataset.x_test, dataset.y_test))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    transformer_cache.clear()
+    return {
+        'conserve_memory': conserve,
+        'peak_mb': peak / 2**20,
+        'seconds': elapsed,
+        'accuracy': float(np.mean(scores))}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('--rows', type = int, default = 200000)
+    parser.add_argument('--folds', type = int, default = 5)
+    arguments = parser.parse_args()
+    data = create_data(rows = arguments.rows)
+    print(f'{arguments.rows} rows, {data.memory_usage().sum() / 2**20:.1f} MB')
+    results = pd.DataFrame([
+        run(data = data, conserve = False, folds = arguments.folds),
+        run(data = data, conserve = True, folds = arguments.folds)])
+    print(results.to_string(index = False))
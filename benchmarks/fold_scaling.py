@@ -0,0 +1,76 @@
+"""
+.. module:: fold scaling benchmark
+:synopsis: wall time of cross-validation folds across worker counts
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn.ensemble
+import sklearn.model_selection
+
+from simplify.core.caches import SplitRegistry
+from simplify.core.parallel import Parallelizer
+
+
+def create_data(rows: int, columns: int = 20, seed: int = 0) -> tuple:
+    """Creates a synthetic classification table and label."""
+    generator = np.random.default_rng(seed)
+    x = pd.DataFrame(
+        generator.normal(size = (rows, columns)),
+        columns = [f'float_{i}' for i in range(columns)])
+    y = pd.Series(x['float_0'] + generator.normal(size = rows) > 0)
+    return x, y
+
+def score_fold(shared: tuple, train: np.ndarray, test: np.ndarray) -> float:
+    """Fits a model on one fold and scores it on the held-out rows."""
+    x, y, threads = shared
+    model = sklearn.ensemble.RandomForestClassifier(
+        n_estimators = 50, 
+        n_jobs = threads, 
+        random_state = 0)
+    model.fit(x.iloc[train], y.iloc[train])
+    return model.score(x.iloc[test], y.iloc[test])
+
+def run(x: pd.DataFrame, y: pd.Series, folds: int, cores: int, 
+        backend: str) -> dict:
+    """Times all folds with 'cores' workers."""
+    registry = SplitRegistry()
+    splits = registry.get(
+        splitter = sklearn.model_selection.KFold(n_splits = folds), 
+        x = x, 
+        y = y)
+    parallelizer = Parallelizer(
+        backend = 'serial' if cores == 1 else backend, 
+        cores = cores)
+    threads = parallelizer.threads_per_task(tasks = folds)
+    start = time.perf_counter()
+    scores = parallelizer.starmap(
+        process = score_fold, 
+        arguments = splits, 
+        shared = (x, y, threads))
+    return {
+        'folds': folds,
+        'cores': cores,
+        'backend': parallelizer.backend,
+        'seconds': time.perf_counter() - start,
+        'accuracy': float(np.mean(scores))}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('--rows', type = int, default = 50000)
+    parser.add_argument('--folds', type = int, nargs = '+', default = [5, 10])
+    parser.add_argument('--cores', type = int, nargs = '+', default = [1, 2, 4])
+    parser.add_argument('--backend', default = 'process')
+    arguments = parser.parse_args()
+    x, y = create_data(rows = arguments.rows)
+    results = pd.DataFrame([
+        run(x = x, y = y, folds = folds, cores = cores, 
+            backend = arguments.backend)
+        for folds in arguments.folds for cores in arguments.cores])
+    print(results.to_string(index = False))
@@ -0,0 +1,156 @@
+"""
+.. module:: load generator
+:synopsis: concurrent requests against a local ScoringServer
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                  method: str, target: str, body: bytes = b'') -> tuple:
+    """Sends one HTTP/1.1 request and returns the status and JSON response."""
+    writer.write((
+        f'{method} {target} HTTP/1.1\r\n'
+        f'Host: localhost\r\n'
+        f'Content-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in [b'\r\n', b'']:
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def connect(host: str, port: int, socket: str = None) -> tuple:
+    """Opens a connection to the server."""
+    if socket is None:
+        return await asyncio.open_connection(host, port)
+    return await asyncio.open_unix_connection(socket)
+
+async def wait_for_server(host: str, port: int, socket: str = None,
+                          timeout: float = 30.0) -> list:
+    """Waits until the server answers and returns its columns."""
+    start = time.perf_counter()
+    while True:
+        try:
+            reader, writer = await connect(host, port, socket)
+            break
+        except OSError:
+            if time.perf_counter() - start > timeout:
+                raise
+            await asyncio.sleep(0.1)
+    _, response = await request(reader, writer, 'GET', '/health')
+    writer.close()
+    return response['columns']
+
+async def client(host: str, port: int, socket: str, bodies: list,
+                 stop: float, latencies: list) -> int:
+    """Sends requests on one connection until 'stop' and returns the count."""
+    reader, writer = await connect(host, port, socket)
+    sent = 0
+    while time.perf_counter() < stop:
+        start = time.perf_counter()
+        status, _ = await request(
+            reader, writer, 'POST', '/predict', bodies[sent % len(bodies)])
+        if status != 200:
+            raise RuntimeError(f'server responded with {status}')
+        latencies.append(time.perf_counter() - start)
+        sent += 1
+    writer.close()
+    return sent
+
+async def generate(host: str, port: int, socket: str, concurrency: int,
+                   rows: int, seconds: float, missing: float = 0.05,
+                   seed: int = 0) -> dict:
+    """Runs 'concurrency' clients for 'seconds' seconds and returns metrics."""
+    columns = await wait_for_server(host, port, socket)
+    generator = np.random.default_rng(seed)
+    bodies = []
+    for _ in range(64):
+        values = generator.normal(size = (rows, len(columns)))
+        values[generator.random(values.shape) < missing] = np.nan
+        records = pd.DataFrame(values, columns = columns).to_dict('records')
+        records = [
+            {k: (None if np.isnan(v) else v) for k, v in record.items()}
+            for record in records]
+        bodies.append(json.dumps({'rows': records}).encode())
+    latencies = []
+    start = time.perf_counter()
+    counts = await asyncio.gather(*[
+        client(host, port, socket, bodies, start + seconds, latencies)
+        for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    reader, writer = await connect(host, port, socket)
+    _, server = await request(reader, writer, 'GET', '/metrics')
+    writer.close()
+    percentiles = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {
+        'concurrency': concurrency,
+        'rows/request': rows,
+        'requests/sec': sum(counts) / elapsed,
+        'rows/sec': sum(counts) * rows / elapsed,
+        'p50_ms': percentiles[0],
+        'p95_ms': percentiles[1],
+        'p99_ms': percentiles[2],
+        'server_batch_rows': server.get('mean_batch_rows', np.nan)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8080)
+    parser.add_argument('--socket', default = None)
+    parser.add_argument('--predictor', default = None,
+                        help = 'saved Predictor or ModelStore to serve')
+    parser.add_argument('--name', default = None,
+                        help = 'name of the Predictor in a ModelStore')
+    parser.add_argument('--max-batch', type = int, default = 256)
+    parser.add_argument('--max-delay', type = float, default = 0.002)
+    parser.add_argument('--concurrency', type = int, nargs = '+',
+                        default = [1, 8, 64])
+    parser.add_argument('--rows', type = int, default = 1)
+    parser.add_argument('--seconds', type = float, default = 5.0)
+    arguments = parser.parse_args()
+    server = None
+    if arguments.predictor is not None:
+        command = [
+            sys.executable, '-m', 'simplify.core.server', arguments.predictor,
+            '--host', arguments.host,
+            '--port', str(arguments.port),
+            '--max-batch', str(arguments.max_batch),
+            '--max-delay', str(arguments.max_delay)]
+        if arguments.name is not None:
+            command.extend(['--name', arguments.name])
+        if arguments.socket is not None:
+            command.extend(['--socket', arguments.socket])
+        server = subprocess.Popen(command)
+    try:
+        results = pd.DataFrame([
+            asyncio.run(generate(
+                host = arguments.host,
+                port = arguments.port,
+                socket = arguments.socket,
+                concurrency = concurrency,
+                rows = arguments.rows,
+                seconds = arguments.seconds))
+            for concurrency in arguments.concurrency])
+        print(results.to_string(index = False))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,91 @@
+"""
+.. module:: logit encode benchmark
+:synopsis: wall time of LogitEncoder versus per-column dictionary lookups
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from simplify.analyst.logit_encode import LogitEncoder
+
+
+def create_data(rows: int, columns: int = 3, levels: int = 100000,
+                seed: int = 0) -> tuple:
+    """Creates high-cardinality string columns and a dependent label."""
+    generator = np.random.default_rng(seed)
+    x = pd.DataFrame({
+        f'category_{i}': pd.Series(
+            generator.zipf(1.3, size = rows) % levels).astype(str)
+        for i in range(columns)})
+    effects = generator.normal(size = levels)
+    signal = sum(
+        effects[x[c].astype(int).to_numpy()] for c in x.columns)
+    y = pd.Series(signal + generator.normal(size = rows) > 0).astype(int)
+    return x, y
+
+def encode_with_loops(x: pd.DataFrame, y: pd.Series, folds: int,
+                      threshold: int = 30, smoothing: float = 1.0,
+                      seed: int = 0) -> pd.DataFrame:
+    """Out-of-fold encoding with a groupby and dict lookup per column."""
+    prior = y.mean()
+    groups = np.random.default_rng(seed).permutation(len(x)) % folds
+    encoded = pd.DataFrame(index = x.index)
+    for column in x.columns:
+        values = pd.Series(np.nan, index = x.index)
+        for fold in range(folds):
+            train = groups != fold
+            stats = y[train].groupby(x[column][train]).agg(['sum', 'count'])
+            odds = np.log(
+                (stats['sum'] + smoothing * prior)
+                / (stats['count'] - stats['sum'] + smoothing * (1 - prior)))
+            odds = odds - np.log(prior / (1 - prior))
+            kept = stats['count'] > threshold
+            substitute = np.average(odds[kept], weights = stats['count'][kept])
+            lookup = odds.where(kept, substitute).to_dict()
+            test = ~train
+            values[test] = [
+                lookup.get(v, substitute) for v in x[column][test]]
+        encoded[f'coef_{column}'] = values
+    return encoded
+
+def run(name: str, encode, x: pd.DataFrame, y: pd.Series) -> dict:
+    """Times 'encode' and returns the correlation of its output with 'y'."""
+    start = time.perf_counter()
+    encoded = encode(x, y)
+    elapsed = time.perf_counter() - start
+    return {
+        'encoder': name,
+        'seconds': elapsed,
+        'correlation': float(np.corrcoef(encoded.iloc[:, -1], y)[0, 1])}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('--rows', type = int, default = 1000000)
+    parser.add_argument('--columns', type = int, default = 3)
+    parser.add_argument('--levels', type = int, default = 100000)
+    parser.add_argument('--folds', type = int, default = 5)
+    arguments = parser.parse_args()
+    x, y = create_data(
+        rows = arguments.rows,
+        columns = arguments.columns,
+        levels = arguments.levels)
+    print(f'{arguments.rows} rows, {x.nunique().sum()} levels')
+    results = pd.DataFrame([
+        run(name = 'loops',
+            encode = lambda x, y: encode_with_loops(
+                x, y, folds = arguments.folds),
+            x = x,
+            y = y),
+        run(name = 'LogitEncoder',
+            encode = lambda x, y: LogitEncoder(
+                folds = arguments.folds,
+                seed = 0).fit_transform(x, y),
+            x = x,
+            y = y)])
+    print(results.to_string(index = False))
@@ -0,0 +1,108 @@
+"""
+.. module:: predictor benchmark
+:synopsis: rows per second of a compiled Predictor versus executing the path
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+import argparse
+import copy
+import time
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.impute
+import sklearn.linear_model
+import sklearn.preprocessing
+
+from simplify.analyst.reduce import UnivariateReduce
+from simplify.core.dataset import DataBunch, Dataset
+from simplify.core.externals import SklearnModel, SklearnTransformer
+from simplify.core.predictor import Predictor
+
+
+def create_data(rows: int, columns: int = 20, missing: float = 0.05,
+                seed: int = 0) -> pd.DataFrame:
+    """Creates numeric columns with missing values and a binary label."""
+    generator = np.random.default_rng(seed)
+    x = generator.normal(size = (rows, columns))
+    signal = np.nan_to_num(x[:, :3]).sum(axis = 1)
+    x[generator.random(x.shape) < missing] = np.nan
+    data = pd.DataFrame(x, columns = [f'feature_{i}' for i in range(columns)])
+    data['label'] = (signal + generator.normal(size = rows) > 0).astype(int)
+    return data
+
+def fit_path(data: pd.DataFrame, keep: int) -> list:
+    """Fits fill, scale, reduce, and model techniques on 'data'."""
+    dataset = Dataset.create(data = data)
+    dataset.create_xy(label = 'label')
+    project = types.SimpleNamespace(data = dataset, settings = {})
+    techniques = [
+        SklearnTransformer(
+            name = 'impute',
+            contents = sklearn.impute.SimpleImputer),
+        SklearnTransformer(
+            name = 'standard',
+            contents = sklearn.preprocessing.StandardScaler),
+        UnivariateReduce(parameters = {'k': keep}),
+        SklearnModel(
+            name = 'logit',
+            contents = sklearn.linear_model.LogisticRegression)]
+    for technique in techniques:
+        technique.implement(project)
+    return techniques
+
+def execute_path(techniques: list, x: pd.DataFrame) -> np.ndarray:
+    """Scores 'x' the way executing a workflow path does."""
+    bunch = DataBunch(name = 'score', x = x)
+    *transformers, model = techniques
+    for technique in transformers:
+        technique = copy.deepcopy(technique)
+        technique._transform_bunch(bunch = bunch)
+    return copy.deepcopy(model).contents.predict_proba(bunch.x)
+
+def run(name: str, score, data: pd.DataFrame, batch: int,
+        seconds: float = 2.0) -> dict:
+    """Scores batches of 'batch' rows for about 'seconds' seconds."""
+    x = data.iloc[:batch]
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        score(x)
+        calls += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'scorer': name,
+        'batch': batch,
+        'rows/sec': calls * batch / elapsed}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument('--rows', type = int, default = 100000)
+    parser.add_argument('--columns', type = int, default = 20)
+    parser.add_argument('--keep', type = int, default = 10)
+    parser.add_argument('--batches', type = int, nargs = '+',
+                        default = [1, 100, 10000])
+    arguments = parser.parse_args()
+    data = create_data(rows = arguments.rows, columns = arguments.columns)
+    techniques = fit_path(data = data, keep = arguments.keep)
+    x = data.drop(columns = 'label')
+    predictor = Predictor.from_techniques(
+        techniques = techniques,
+        example = x.iloc[:1000])
+    results = []
+    for batch in arguments.batches:
+        results.append(run(
+            name = 'path',
+            score = lambda x: execute_path(techniques, x),
+            data = x,
+            batch = batch))
+        results.append(run(
+            name = 'Predictor',
+            score = predictor.predict_proba,
+            data = x,
+            batch = batch))
+    results = pd.DataFrame(results)
+    print(results.to_string(index = False))
@@ -41,8 +41,10 @@ importables: Dict[str, str] = {
     'quirks': 'core.quirks',
     'framework': 'core.framework',
     'base': 'core.base',
+    'caches': 'core.caches',
     'components': 'core.components',
     'externals': 'core.externals',
+    'parallel': 'core.parallel',
     'criteria': 'core.criteria',
     'stages': 'core.stages',
     'dataset': 'core.dataset',
@@ -65,6 +67,7 @@ importables: Dict[str, str] = {
     'Study': 'core.components.Study',
     'Survey': 'core.components.Survey',
     'Dataset': 'core.dataset.Dataset',
+    'Parallelizer': 'core.parallel.Parallelizer',
     'Project': 'core.interface.Project'}
 
 
@@ -12,6 +12,8 @@ from __future__ import annotations
 import copy
 import dataclasses
 import functools
+import importlib
+import inspect
 from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping, 
                     Optional, Sequence, Tuple, Type, Union)
 
@@ -120,11 +122,32 @@ class CompareCleaves(TechniqueOutline):
         self.workers.update({cleave_group: columns})
         return self
 
+    def evaluate(self, dataset, estimator, search = None):
+        """Scores cleaves on the current fold without rerunning the pipeline.
+
+        Cleaves are scored by cross-validation of the training rows, so the
+        testing set is left for the final evaluation.
+
+        Args:
+            dataset (Dataset): preprocessed data split into training and 
+                testing sets.
+            estimator (object): scikit-learn compatible estimator.
+            search (str): None to score each cleave alone, or 'forward' or 
+                'backward' for a greedy search. Defaults to None.
+
+        Returns:
+            Union[pd.Series, Tuple[List[str], float]]: score of each cleave
+                or the cleaves chosen by the search and their score.
+
+        """
+        compare = importlib.import_module('simplify.analyst.compare')
+        return compare.evaluate_cleaves(
+            data = dataset,
+            estimator = estimator,
+            cleaves = {k: v for k, v in self.workers.items() if k != 'all'},
+            search = search,
+            settings = getattr(self, 'idea', None))
 
-       self.scorers = {'f_classif': f_classif,
-                       'chi2': chi2,
-                       'mutual_class': mutual_info_classif,
-                       'mutual_regress': mutual_info_regression}
 
 @dataclasses.dataclass
 class CombineCleaves(TechniqueOutline):
@@ -202,12 +225,12 @@ class SearchComposer(AnalystComposer):
     def draft(self) -> None:
         self.bayes = Technique(
             name = 'bayes',
-            module = 'bayes_opt',
-            algorithm = 'BayesianOptimization',
+            module = 'simplify.analyst.search',
+            algorithm = 'BayesianSearch',
             runtime = {
-                'f': 'estimator',
-                'pbounds': 'space',
-                'random_state': 'seed'})
+                'estimator': 'estimator',
+                'space': 'space',
+                'seed': 'seed'})
         self.grid = Technique(
             name = 'grid',
             module = 'sklearn.model_selection',
@@ -224,6 +247,22 @@ class SearchComposer(AnalystComposer):
                 'estimator': 'estimator',
                 'param_distributions': 'space',
                 'random_state': 'seed'})
+        self.halving = Technique(
+            name = 'halving',
+            module = 'simplify.analyst.search',
+            algorithm = 'SuccessiveHalving',
+            runtime = {
+                'estimator': 'estimator',
+                'space': 'space',
+                'seed': 'seed'})
+        self.hyperband = Technique(
+            name = 'hyperband',
+            module = 'simplify.analyst.search',
+            algorithm = 'Hyperband',
+            runtime = {
+                'estimator': 'estimator',
+                'space': 'space',
+                'seed': 'seed'})
         super().draft()
         return self
 
@@ -260,6 +299,10 @@ class SearchAnalystTechnique(AnalystTechnique):
                 X = getattr(dataset, ''.join(['x_', data_to_use])),
                 Y = getattr(dataset, ''.join(['y_', data_to_use])),
                 **kwargs)
+        elif self.step in ['halving', 'hyperband', 'bayes']:
+            return self.algorithm.search(
+                x = getattr(dataset, ''.join(['x_', data_to_use])),
+                y = getattr(dataset, ''.join(['y_', data_to_use])))
 
 
     # @numpy_shield
@@ -267,38 +310,54 @@ class SearchAnalystTechnique(AnalystTechnique):
         if not estimator:
             estimator = plan.model.algorithm
         self._set_parameters(estimator)
-        self.algorithm = self.workers[self.step](**self.parameters)
-        if len(dataset.x_train.columns) > self.num_features:
-            self.algorithm.fit(dataset.x_train, dataset.y_train)
-            mask = ~self.algorithm.get_support()
-            dataset.drop_columns(df = dataset.x_train, mask = mask)
-            dataset.drop_columns(df = dataset.x_test, mask = mask)
+        if len(dataset.train.feature_names) > self.num_features:
+            # Univariate scores are cached per fold and RFE importances are 
+            # computed in parallel by the techniques in analyst.reduce.
+            reduce = importlib.import_module('simplify.analyst.reduce')
+            if self.step in ['rfe']:
+                reduce.RecursiveReduce(
+                    estimator = estimator,
+                    parameters = self.parameters,
+                    parallelizer = simplify.core.Parallelizer(
+                        settings = getattr(self, 'idea', None))).apply(
+                            data = dataset)
+            elif self.step in ['kbest', 'fdr', 'fpr']:
+                reduce.UnivariateReduce(
+                    criterion = self.step,
+                    score_func = self.parameters['score_func'],
+                    parameters = self.parameters).apply(data = dataset)
+            else:
+                self.algorithm = self.workers[self.step](**self.parameters)
+                self.algorithm.fit(dataset.x_train, dataset.y_train)
+                support = self.algorithm.get_support()
+                for bunch in [dataset.train, dataset.test]:
+                    bunch.select(columns = support).materialize()
         return dataset
 
 
     def _set_reduce_parameters(self, estimator):
-       if self.step in ['rfe', 'rfecv']:
-           self.default = {'n_features_to_select': 10,
-                                      'step': 1}
-           self.runtime_parameters = {'estimator': estimator}
-       elif self.step == 'kbest':
-           self.default = {'k': 10,
-                                      'score_func': f_classif}
-           self.runtime_parameters = {}
-       elif self.step in ['fdr', 'fpr']:
-           self.default = {'alpha': 0.05,
-                                      'score_func': f_classif}
-           self.runtime_parameters = {}
-       elif self.step == 'custom':
-           self.default = {'threshold': 'mean'}
-           self.runtime_parameters = {'estimator': estimator}
-       self._publish_parameters()
-       self._select_parameters()
-       self.parameters.update({'estimator': estimator})
-       if 'k' in self.parameters:
-           self.num_features = self.parameters['k']
-       else:
-           self.num_features = self.parameters['n_features_to_select']
+        if self.step in ['rfe', 'rfecv']:
+            self.default = {'n_features_to_select': 10,
+                                       'step': 1}
+            self.runtime_parameters = {'estimator': estimator}
+        elif self.step == 'kbest':
+            self.default = {'k': 10,
+                                       'score_func': f_classif}
+            self.runtime_parameters = {}
+        elif self.step in ['fdr', 'fpr']:
+            self.default = {'alpha': 0.05,
+                                       'score_func': f_classif}
+            self.runtime_parameters = {}
+        elif self.step == 'custom':
+            self.default = {'threshold': 'mean'}
+            self.runtime_parameters = {'estimator': estimator}
+        self._publish_parameters()
+        self._select_parameters()
+        self.parameters.update({'estimator': estimator})
+        if 'k' in self.parameters:
+            self.num_features = self.parameters['k']
+        else:
+            self.num_features = self.parameters['n_features_to_select']
         return self
 
 
@@ -307,63 +366,6 @@ def make_tensorflow_model(step: 'Technique', parameters: dict) -> None:
     return algorithm
 
 
-   def _downcast_features(self, dataset):
-       dataframes = ['x_train', 'x_test']
-       number_types = ['uint', 'int', 'float']
-       feature_bits = ['64', '32', '16']
-       for data in dataframes:
-           for column in data.columns.keys():
-               if (column in dataset.floats
-                       or column in dataset.integers):
-                   for number_type in number_types:
-                       for feature_bit in feature_bits:
-                           try:
-                               data[column] = data[column].astype()
-
-
-   def _set_feature_types(self):
-       self.type_interface = {'boolean': tensorflow.bool,
-                              'float': tensorflow.float16,
-                              'integer': tensorflow.int8,
-                              'string': object,
-                              'categorical': CategoricalDtype,
-                              'list': list,
-                              'datetime': datetime64,
-                              'timedelta': timedelta}
-
-
-   def _tensor_flow_model(self):
-       from keras.models import Sequential
-       from keras.layers import Dense, Dropout, Activation, Flatten
-       classifier = Sequential()
-       classifier.add(Dense(units = 6, kernel_initializer = 'uniform',
-           activation = 'relu', input_dim = 30))
-       classifier.add(Dense(units = 6, kernel_initializer = 'uniform',
-           activation = 'relu'))
-       classifier.add(Dense(units = 1, kernel_initializer = 'uniform',
-           activation = 'sigmoid'))
-       classifier.compile(optimizer = 'adam',
-                          loss = 'binary_crossentropy',
-                          metrics = ['accuracy'])
-       return classifier
-       model = Sequential()
-       model.add(Activation('relu'))
-       model.add(Activation('relu'))
-       model.add(Dropout(0.25))
-       model.add(Flatten())
-       for layer_size in self.parameters['dense_layer_sizes']:
-           model.add(Dense(layer_size))
-           model.add(Activation('relu'))
-       model.add(Dropout(0.5))
-       model.add(Dense(2))
-       model.add(Activation('softmax'))
-       model.compile(loss = 'categorical_crossentropy',
-                     optimizer = 'adadelta',
-                     metrics = ['accuracy'])
-       return model
-
-
-
 def make_torch_model(step: 'Technique', parameters: dict) -> None:
     algorithm = None
     return algorithm
@@ -685,7 +687,7 @@ class AnalystScholar(Scholar):
         # Creates 'Parallelizer' instance to apply 'Chapter' instances, if the
         # option to parallelize has been selected.
         if self.parallelize:
-            self.parallelizer = Parallelizer(idea = self.idea)
+            self.parallelizer = simplify.core.Parallelizer(settings = self.idea)
         return self
 
     """ Private Methods """
@@ -754,7 +756,8 @@ class AnalystFinisher(Finisher):
             technique = technique,
             data = data)
         if technique.name in ['xgboost'] and self.idea['general']['gpu']:
-            technique.parameters['tree_method'] = 'gpu_exact'
+            technique.parameters['tree_method'] = 'hist'
+            technique.parameters['device'] = 'cuda'
         elif step in ['tensorflow']:
             technique.algorithm = algorithms.make_tensorflow_model(
                 technique = technique,
@@ -820,6 +823,8 @@ class AnalystSpecialist(Specialist):
 
         """
         data.create_xy()
+        scaling = importlib.import_module('simplify.analyst.scaling')
+        policy = scaling.ScalingPolicy(idea = self.idea)
         for i, technique in enumerate(manuscript.techniques):
             if self.verbose:
                 print('Applying', technique.name, 'to', data.name)
@@ -827,15 +832,17 @@ class AnalystSpecialist(Specialist):
                 manuscript, data = self._split_loop(
                     chapter = manuscript,
                     index = i,
-                    data = data)
+                    data = data,
+                    policy = policy)
                 break
-            elif technique.step in ['search']:
-                remaining = self._search_loop(
-                    steps = remaining,
+            elif (technique.step in ['search'] 
+                    and hasattr(technique.algorithm, 'search_folds')):
+                manuscript = self._search_loop(
+                    chapter = manuscript,
                     index = i,
                     data = data)
-                data = technique.apply(data = data)
             elif not technique.name in ['none', None]:
+                policy.apply(technique = technique, data = data)
                 data = technique.apply(data = data)
         setattr(manuscript, 'data', data)
         return manuscript
@@ -843,8 +850,15 @@ class AnalystSpecialist(Specialist):
     def _split_loop(self,
             chapter: 'Chapter',
             index: int,
-            data: 'DataSet') -> ('Chapter', 'Dataset'):
-        """Splits 'data' and applies remaining steps in 'chapter'.
+            data: 'DataSet',
+            policy: Optional['ScalingPolicy'] = None) -> ('Chapter', 'Dataset'):
+        """Splits 'data' and applies remaining steps in 'chapter' to each fold.
+
+        Folds are applied by 'analyst.split.apply_folds', which runs each fold
+        as an independent task according to the 'general' settings. Fold 
+        results are stored in 'fold_results' of 'chapter' and out-of-fold 
+        predictions and scores are aggregated in its 'predictions' and 
+        'scores' attributes.
 
         Args:
             chapter ('Chapter'): instance with 'steps' to apply to 'data'.
@@ -852,26 +866,31 @@ class AnalystSpecialist(Specialist):
                 is located. All subsequent steps are completed with data split
                 into training and testing sets.
             data ('Dataset'): data object for 'chapter' to be applied.
+            policy (Optional['ScalingPolicy']): substitutes scalable 
+                estimators for each fold. Defaults to None.
 
         Return:
             'Chapter', 'Dataset': with any changes made.
 
         """
-        data.stages.change('testing')
         split_algorithm = chapter.techniques[index].algorithm
-        for i, (train_index, test_index) in enumerate(
-            split_algorithm.split(data.x, data.y)):
-            if self.verbose:
-                print('Testing data fold', str(i))
-            data.x_train = data.x.iloc[train_index]
-            data.x_test = data.x.iloc[test_index]
-            data.y_train = data.y[train_index]
-            data.y_test = data.y[test_index]
-            for technique in chapter.techniques[index + 1:]:
-                if self.verbose:
-                    print('Applying', technique.name, 'to', data.name)
-                if not technique.name in ['none', None]:
-                    data = technique.apply(data = data)
+        data.splits = simplify.core.split_registry.get(
+            splitter = split_algorithm,
+            x = data.x,
+            y = data.y)
+        techniques = [
+            t for t in chapter.techniques[index + 1:] 
+            if not t.name in ['none', None]]
+        split = importlib.import_module('simplify.analyst.split')
+        results, predictions, scores = split.apply_folds(
+            data = data,
+            techniques = techniques,
+            settings = self.idea,
+            verbose = self.verbose,
+            policy = policy)
+        chapter.fold_results = results
+        chapter.predictions = predictions
+        chapter.scores = scores
         return chapter, data
 
     def _search_loop(self,
@@ -880,6 +899,13 @@ class AnalystSpecialist(Specialist):
             data: 'DataSet') -> ('Chapter', 'Dataset'):
         """Searches hyperparameters for a particular 'algorithm'.
 
+        Built-in searchers (see analyst.search) are used with the first model
+        technique after 'index'. The search uses the folds in 'splits' of 
+        'data' if it has been split and otherwise creates its own folds, and
+        runs candidates with the project's parallel settings. Other searchers
+        (e.g. scikit-learn's GridSearchCV) are applied as ordinary techniques
+        by '_apply_techniques'.
+
         Args:
             chapter ('Chapter'): instance with 'steps' to apply to 'data'.
             index (int): number of step in 'chapter' 'steps' where the search
@@ -891,10 +917,21 @@ class AnalystSpecialist(Specialist):
                 hyperparameters.
 
         """
+        searcher = chapter.techniques[index].algorithm
+        model = next(
+            (t for t in chapter.techniques[index + 1:] if t.step in ['model']),
+            None)
+        if model is None:
+            return chapter
+        search = importlib.import_module('simplify.analyst.search')
+        search.tune(
+            searcher = searcher,
+            estimator = model.algorithm,
+            data = data,
+            settings = self.idea)
         return chapter
 
 
-
 """ Options """
 
 @dataclasses.dataclass
@@ -1330,6 +1367,7 @@ class Tools(SimpleRepository):
                     name = 'xgboost',
                     module = 'xgboost',
                     algorithm = 'XGBClassifier',
+                    default = {'tree_method': 'hist'},
                     # data_dependent = 'scale_pos_weight',
                     transform_method = None)},
             'cluster': {
@@ -1458,6 +1496,7 @@ class Tools(SimpleRepository):
                     name = 'xgboost',
                     module = 'xgboost',
                     algorithm = 'XGBRegressor',
+                    default = {'tree_method': 'hist'},
                     # data_dependent = 'scale_pos_weight',
                     transform_method = None)}}
         gpu_options = {
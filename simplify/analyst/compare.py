@@ -5,6 +5,11 @@ Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Compare (Step): wrapper for a comparison Technique.
+    CleaveEvaluator (object): scores subsets of feature groups (cleaves) on
+        one shared matrix.
+    evaluate_cleaves (Callable): scores cleaves, alone or in a greedy 
+        search, on the current fold of a Dataset.
 
 """
 import dataclasses
@@ -14,7 +19,14 @@ from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
 import numpy as np
 import pandas as pd
 import sklearn
+from sklearn import base as sklearn_base
+from sklearn import metrics
+from sklearn import model_selection
+from scipy import sparse
 import sourdough
+
+import simplify
+from simplify.utilities import memory
     
 
 @dataclasses.dataclass
@@ -48,4 +60,355 @@ class Compare(sourdough.project.Step):
     iterations: Union[int, str] = 1
     parameters: Mapping[Any, Any] = dataclasses.field(default_factory = dict)
     parallel: ClassVar[bool] = True
- 
\ No newline at end of file
+
+
+@dataclasses.dataclass
+class CleaveEvaluator(object):
+    """Scores subsets of cleaves (groups of feature columns).
+
+    The preprocessed training data for a fold is converted to an array (or 
+    CSR matrix) once by 'prepare'. Every subset is then evaluated by 
+    'cv'-fold cross-validation of clones of 'estimator' on column-index 
+    slices of that matrix, so comparing many cleaves does not rerun the 
+    preprocessing for each one. The testing data is never used, so choosing 
+    cleaves does not tune them to it. Row weights of the training data (see 
+    WeightSample) are passed to 'estimator' as 'sample_weight'. Subsets are 
+    evaluated concurrently by a Parallelizer and each score is stored, so no 
+    subset is fit twice.
+
+    Columns in 'cleaves' are matched to the prepared columns by name. A 
+    column renamed by an encoder (e.g. 'color' encoded as 'color_red' and 
+    'color_blue') matches every column whose name starts with it followed 
+    by '_' or '='.
+
+    Args:
+        estimator (Any): scikit-learn compatible estimator to fit to each 
+            subset.
+        cleaves (Mapping[str, Sequence[str]]): names of cleaves and the 
+            columns in each. Defaults to an empty dict.
+        scoring (Optional[Union[str, Callable]]): scikit-learn scorer name or
+            a callable with the signature scorer(estimator, x, y). Defaults to
+            None, in which case the estimator's 'score' method is used.
+        tolerance (float): minimum improvement needed for a greedy search to
+            take another step. Defaults to 0.0.
+        prune (Optional[float]): in greedy searches, a cleave whose addition 
+            (or removal) lowers the score of the current subset by more than
+            'prune' is not evaluated in later rounds. Defaults to None, which 
+            disables pruning.
+        parallelizer (Optional[simplify.core.Parallelizer]): evaluates 
+            subsets. Defaults to None, in which case they are evaluated 
+            serially.
+        cv (int): number of cross-validation folds of the training data used
+            to score each subset. Defaults to 3.
+
+    """
+    estimator: Any
+    cleaves: Mapping[str, Sequence[str]] = dataclasses.field(
+        default_factory = dict)
+    scoring: Optional[Union[str, Callable]] = None
+    tolerance: float = 0.0
+    prune: Optional[float] = None
+    parallelizer: Optional[simplify.core.Parallelizer] = None
+    cv: int = 3
+
+    def __post_init__(self) -> None:
+        """Creates attributes for shared data and results."""
+        if self.parallelizer is None:
+            self.parallelizer = simplify.core.Parallelizer(backend = 'serial')
+        self.matrices = None
+        self.folds = None
+        self.positions = {}
+        self.scores = {}
+        self.history = []
+        return self
+
+    """ Public Methods """
+
+    def prepare(self, data: simplify.core.Dataset) -> 'CleaveEvaluator':
+        """Stores the training data in 'data' and its folds for evaluation.
+
+        Args:
+            data (simplify.core.Dataset): preprocessed data.
+
+        Returns:
+            CleaveEvaluator: with shared matrices and folds set.
+
+        Raises:
+            ValueError: if a column in 'cleaves' matches no prepared column.
+
+        """
+        names = data.train.feature_names
+        self.positions = {name: i for i, name in enumerate(names)}
+        for cleave in self.cleaves:
+            self._get_columns(subset = [cleave])
+        x, y = data.x_train, data.y_train
+        splitter = model_selection.check_cv(
+            self.cv, 
+            y = y, 
+            classifier = sklearn_base.is_classifier(self.estimator))
+        self.folds = simplify.core.split_registry.get(
+            splitter = splitter, 
+            x = x, 
+            y = y)
+        self.matrices = (
+            memory.to_matrix(x), 
+            np.asarray(y),
+            data.train.weights)
+        self.scores = {}
+        self.history = []
+        return self
+
+    def evaluate(self, 
+            subsets: Optional[Mapping[str, Sequence[str]]] = None) -> (
+                pd.Series):
+        """Returns the score of each subset of cleaves.
+
+        Args:
+            subsets (Optional[Mapping[str, Sequence[str]]]): names of subsets
+                and the cleaves in each. Defaults to None, in which case each
+                cleave is evaluated on its own.
+
+        Returns:
+            pd.Series: score of each subset, indexed by its name.
+
+        """
+        if subsets is None:
+            subsets = {name: [name] for name in self.cleaves}
+        scores = self._score(subsets = list(subsets.values()))
+        return pd.Series(scores, index = list(subsets.keys()), name = 'score')
+
+    def forward(self) -> Tuple[List[str], float]:
+        """Adds cleaves one at a time while the score improves.
+
+        Returns:
+            Tuple[List[str], float]: selected cleaves and their score.
+
+        """
+        selected, best = [], -np.inf
+        candidates = list(self.cleaves)
+        while candidates:
+            subsets = [selected + [c] for c in candidates]
+            scores = self._score(subsets = subsets)
+            self._record(subsets = subsets, scores = scores, direction = 'add')
+            top = int(np.argmax(scores))
+            if scores[top] - best <= self.tolerance and selected:
+                break
+            candidates = self._prune(
+                candidates = candidates, 
+                scores = scores, 
+                chosen = top,
+                baseline = best)
+            selected, best = subsets[top], scores[top]
+        return selected, best
+
+    def backward(self) -> Tuple[List[str], float]:
+        """Removes cleaves one at a time while the score does not drop.
+
+        A cleave is removed if the score without it is no more than 
+        'tolerance' below the current score.
+
+        Returns:
+            Tuple[List[str], float]: remaining cleaves and their score.
+
+        """
+        selected = list(self.cleaves)
+        best = self._score(subsets = [selected])[0]
+        candidates = list(selected)
+        while len(selected) > 1 and candidates:
+            subsets = [[c for c in selected if c != r] for r in candidates]
+            scores = self._score(subsets = subsets)
+            self._record(
+                subsets = subsets, 
+                scores = scores, 
+                direction = 'remove')
+            top = int(np.argmax(scores))
+            if best - scores[top] > self.tolerance:
+                break
+            candidates = self._prune(
+                candidates = candidates, 
+                scores = scores, 
+                chosen = top,
+                baseline = best)
+            selected, best = subsets[top], scores[top]
+        return selected, best
+
+    """ Private Methods """
+
+    def _get_columns(self, subset: Sequence[str]) -> np.ndarray:
+        """Returns positions of the columns in the cleaves in 'subset'.
+
+        Args:
+            subset (Sequence[str]): names of cleaves.
+
+        Returns:
+            np.ndarray: sorted positions of the prepared columns.
+
+        Raises:
+            ValueError: if a column matches no prepared column.
+
+        """
+        columns = []
+        for cleave in subset:
+            for column in self.cleaves[cleave]:
+                if column in self.positions:
+                    columns.append(self.positions[column])
+                else:
+                    matches = [
+                        i for name, i in self.positions.items()
+                        if str(name).startswith((f'{column}_', f'{column}='))]
+                    if not matches:
+                        raise ValueError(
+                            f'{column} in cleave {cleave} is not a column of '
+                            f'the prepared data')
+                    columns.extend(matches)
+        return np.unique(np.asarray(columns, dtype = np.intp))
+
+    def _prune(self, 
+            candidates: List[str], 
+            scores: Sequence[float],
+            chosen: int,
+            baseline: float) -> List[str]:
+        """Returns candidates for the next round of a greedy search.
+
+        Args:
+            candidates (List[str]): cleaves evaluated in the current round.
+            scores (Sequence[float]): score of each candidate's subset.
+            chosen (int): position of the chosen candidate.
+            baseline (float): score of the subset before the current round.
+
+        Returns:
+            List[str]: remaining candidates.
+
+        """
+        return [
+            c for i, (c, score) in enumerate(zip(candidates, scores))
+            if i != chosen 
+            and (self.prune is None or baseline - score <= self.prune)]
+
+    def _record(self, 
+            subsets: Sequence[Sequence[str]],
+            scores: Sequence[float],
+            direction: str) -> None:
+        """Adds the results of one round of a greedy search to 'history'."""
+        step = len(set(h['step'] for h in self.history))
+        for subset, score in zip(subsets, scores):
+            self.history.append({
+                'step': step,
+                'direction': direction,
+                'cleaves': tuple(subset),
+                'score': score})
+        return self
+
+    def _score(self, subsets: Sequence[Sequence[str]]) -> List[float]:
+        """Returns the score of each subset, fitting any not yet scored.
+
+        Args:
+            subsets (Sequence[Sequence[str]]): cleaves in each subset.
+
+        Returns:
+            List[float]: score of each subset.
+
+        Raises:
+            ValueError: if 'prepare' has not been called.
+
+        """
+        if self.matrices is None:
+            raise ValueError('prepare must be called before cleaves are scored')
+        keys = [frozenset(subset) for subset in subsets]
+        missing = list(dict.fromkeys(k for k in keys if k not in self.scores))
+        results = self.parallelizer.map(
+            process = _score_columns,
+            items = [self._get_columns(subset = k) for k in missing],
+            shared = (self.estimator, self.scoring, self.matrices, self.folds))
+        self.scores.update(zip(missing, results))
+        return [self.scores[k] for k in keys]
+
+
+def evaluate_cleaves(data: simplify.core.Dataset,
+                     estimator: Any,
+                     cleaves: Mapping[str, Sequence[str]],
+                     search: Optional[str] = None,
+                     settings: Optional[Mapping[str, Any]] = None) -> Union[
+                         pd.Series, Tuple[List[str], float]]:
+    """Scores 'cleaves' on the current fold of 'data'.
+
+    Cleaves are scored by cross-validation of the training rows with a 
+    CleaveEvaluator, so the testing set is left for the final evaluation.
+
+    Args:
+        data (simplify.core.Dataset): preprocessed data split into training 
+            and testing sets.
+        estimator (Any): scikit-learn compatible estimator.
+        cleaves (Mapping[str, Sequence[str]]): names of cleaves and the 
+            columns in each.
+        search (Optional[str]): None to score each cleave alone, or 'forward'
+            or 'backward' for a greedy search. Defaults to None.
+        settings (Optional[Mapping[str, Any]]): project settings used by the
+            Parallelizer. Defaults to None.
+
+    Returns:
+        Union[pd.Series, Tuple[List[str], float]]: score of each cleave or 
+            the cleaves chosen by the search and their score.
+
+    Raises:
+        ValueError: if 'search' is not None, 'forward', or 'backward'.
+
+    """
+    if search not in [None, 'forward', 'backward']:
+        raise ValueError('search must be None, forward, or backward')
+    evaluator = CleaveEvaluator(
+        estimator = estimator,
+        cleaves = cleaves,
+        parallelizer = simplify.core.Parallelizer(settings = settings))
+    evaluator.prepare(data = data)
+    if search in ['forward']:
+        return evaluator.forward()
+    elif search in ['backward']:
+        return evaluator.backward()
+    return evaluator.evaluate()
+
+
+def _score_columns(
+        shared: Tuple[Any, Optional[Union[str, Callable]], Tuple[Any, ...],
+                      simplify.core.caches.Folds],
+        columns: np.ndarray) -> float:
+    """Returns the mean cross-validation score of 'columns'.
+
+    Args:
+        shared (Tuple[Any, Optional[Union[str, Callable]], Tuple[Any, ...],
+            simplify.core.caches.Folds]): estimator, scoring, training 
+            features, labels, and weights, and the training and validation 
+            rows of each fold.
+        columns (np.ndarray): positions of the columns to use.
+
+    Returns:
+        float: mean score on the validation rows (-inf if 'columns' is 
+            empty).
+
+    """
+    estimator, scoring, (x, y, weights), folds = shared
+    if len(columns) == 0:
+        return -np.inf
+    if isinstance(scoring, str):
+        scoring = metrics.get_scorer(scoring)
+    scores = []
+    for train, test in folds:
+        keywords = {} if weights is None else {'sample_weight': weights[train]}
+        fitted = sklearn_base.clone(estimator).fit(
+            _take(x, rows = train, columns = columns), 
+            y[train], 
+            **keywords)
+        x_test = _take(x, rows = test, columns = columns)
+        if scoring is None:
+            scores.append(fitted.score(x_test, y[test]))
+        else:
+            scores.append(scoring(fitted, x_test, y[test]))
+    return float(np.mean(scores))
+
+def _take(x: Union[np.ndarray, sparse.spmatrix],
+          rows: np.ndarray,
+          columns: np.ndarray) -> Union[np.ndarray, sparse.spmatrix]:
+    """Returns 'rows' and 'columns' (by position) of 'x' in one copy."""
+    if sparse.issparse(x):
+        return x[rows][:, columns]
+    return x[np.ix_(rows, columns)]
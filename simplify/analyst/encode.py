@@ -1,16 +1,22 @@
 """
-analyst.steps
+analyst.encode
 Corey Rayburn Yung <coreyrayburnyung@gmail.com>
 Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Encode
+    CategoryEncoder
 
 """
 import dataclasses
 from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping, 
                     Optional, Sequence, Tuple, Type, Union)
 
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn import compose, feature_extraction, pipeline, preprocessing
 import sourdough
 
 from . import base
@@ -53,10 +59,22 @@ class Encode(sourdough.project.Step):
     
     
 @dataclasses.dataclass
-class CategoryEncoder(simplify.quirks.SklearnTransformer, 
-                      sourdough.project.Technique):
+class CategoryEncoder(simplify.externals.SklearnTransformer):
     """Wrapper for an encoder from category-encoders.
 
+    If the encoder is listed in 'sparse_encoders' and the total number of 
+    levels in the encoded columns exceeds 'sparse_threshold', an equivalent
+    scikit-learn encoder which outputs a scipy CSR matrix is used instead so 
+    that high cardinality columns are never densified.
+
+    If 'group_size' is set, the encoded columns are split into groups of that
+    many columns and a separate encoder is fit to each group. Groups are fit 
+    and applied by a Parallelizer using the project settings and the outputs 
+    are written into one preallocated array (or stacked into one CSR matrix) 
+    rather than concatenated DataFrame by DataFrame. This is much faster with 
+    hundreds of categorical columns, but encoders which combine columns (e.g.
+    'hashing') produce one set of outputs per group.
+
     Args:
         name (str): designates the name of a class instance that is used for 
             internal referencing throughout sourdough. For example, if a 
@@ -71,9 +89,21 @@ class CategoryEncoder(simplify.quirks.SklearnTransformer,
             iteration. Defaults to 1.
         parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
             when the 'implement' method is called. Defaults to an empty dict.
+        sparse_threshold (int): total number of levels in the encoded columns
+            above which sparse output is produced. Defaults to 100.
+        n_components (int): number of features produced by the sparse 
+            'hashing' encoder if 'n_components' is not in 'parameters'. 
+            Defaults to 8, the category-encoders default.
+        group_size (Optional[int]): number of columns encoded by each separate
+            encoder. If None, one encoder is fit to all columns. Defaults to 
+            None.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be at the end of a parallel workflow structure. Defaults to 
             False.
+        sparse_encoders (ClassVar[List[str]]): names of encoders which have a
+            sparse equivalent.
+        cache_attributes (ClassVar[Sequence[str]]): attributes which are part
+            of the transformer cache key.
             
     """
     name: str = None
@@ -81,36 +111,381 @@ class CategoryEncoder(simplify.quirks.SklearnTransformer,
     iterations: Union[int, str] = 1
     parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
     module: str = None
+    sparse_threshold: int = 100
+    n_components: int = 8
+    group_size: Optional[int] = None
     parallel: ClassVar[bool] = False 
+    sparse_encoders: ClassVar[List[str]] = ['one_hot', 'hashing']
+    cache_attributes: ClassVar[Sequence[str]] = [
+        'name', 
+        'sparse_threshold', 
+        'n_components',
+        'group_size']
 
     """ Public Methods """
-    
+
     def implement(self, project: sourdough.Project) -> sourdough.Project:
-        """[summary]
+        """Fits the encoder(s) to the training data and encodes all data.
+
+        Column groups are fit and encoded by a Parallelizer created from the
+        project settings. It is only held while encoding, so it is never 
+        copied or pickled with the encoder.
 
         Args:
-            project (sourdough.Project): [description]
+            project (sourdough.Project): project with a Dataset in 'data'.
 
         Returns:
-            sourdough.Project: [description]
+            sourdough.Project: with encoded data.
             
         """
+        self._parallelizer = simplify.core.Parallelizer(
+            settings = getattr(project, 'settings', None))
         try:
-            self.parameters = self.parameters.finalize(project = project)
-        except AttributeError:
-            pass
-        self.contents = self.contents(**self.parameters)
-        data = project.data
-        data.x_train = self.contents.fit[data.x_train, data.y_train]
-        data.x_train = self.contents.transform(data.x_train)
-        if data.x_test is not None:
-            data.x_test = self.contents.transform(data.x_test)
-        if data.x_validate is not None:
-            data.x_validate = self.contents.transform(data.x_validate)
-        project.data = data
-        return project
+            return super().implement(project = project)
+        finally:
+            del self._parallelizer
+
+    """ Private Methods """
+
+    def _fit(self, data: simplify.core.Dataset) -> None:
+        """Creates and fits the encoder with the training data in 'data'.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        """
+        columns = list(self.parameters.get('cols') or data.categoricals)
+        self.feature_names = None
+        is_sparse = (
+            self.name in self.sparse_encoders 
+            and self._get_cardinality(
+                x = data.x_train, 
+                columns = columns) > self.sparse_threshold)
+        if is_sparse:
+            self._check_remainder(x = data.x_train, columns = columns)
+        if self.group_size:
+            self._fit_groups(data = data, columns = columns, is_sparse = is_sparse)
+        elif is_sparse:
+            self.contents = self._create_sparse_encoder(columns = columns)
+            self.contents.fit(data.x_train, data.y_train)
+            self.feature_names = self._get_sparse_names(
+                x = data.x_train,
+                columns = columns)
+        else:
+            self.contents = self.contents(**self.parameters)
+            self.contents.fit(data.x_train, data.y_train)
+        return self
+
+    def _create_sparse_encoder(self, 
+            columns: List[str]) -> compose.ColumnTransformer:
+        """Returns a scikit-learn encoder which outputs a CSR matrix.
+
+        Args:
+            columns (List[str]): names of columns to encode.
+
+        Returns:
+            compose.ColumnTransformer: encodes 'columns' and passes through all
+                other columns.
+
+        """
+        if self.name in ['hashing']:
+            encoder = self._create_hasher()
+        else:
+            encoder = preprocessing.OneHotEncoder(handle_unknown = 'ignore')
+        return compose.ColumnTransformer(
+            [(self.name, encoder, columns)],
+            remainder = 'passthrough',
+            sparse_threshold = 1.0)
+
+    def _create_hasher(self) -> pipeline.Pipeline:
+        """Returns a scikit-learn feature hasher which outputs a CSR matrix.
+
+        Returns:
+            pipeline.Pipeline: tokenizes each row and hashes the tokens into
+                'n_components' features (or the 'n_components' parameter).
+
+        """
+        return pipeline.make_pipeline(
+            preprocessing.FunctionTransformer(_tokenize),
+            feature_extraction.FeatureHasher(
+                n_features = self.parameters.get(
+                    'n_components', 
+                    self.n_components),
+                input_type = 'string'))
+
+    def _check_remainder(self, x: pd.DataFrame, columns: List[str]) -> None:
+        """Raises an error if columns which are not encoded are not numeric.
+
+        Columns which are not encoded are passed through into the sparse 
+        output, which can only hold numbers.
+
+        Args:
+            x (pd.DataFrame): features to encode.
+            columns (List[str]): names of columns to encode.
+
+        Raises:
+            TypeError: if any column which is not in 'columns' is not numeric
+                or boolean.
+
+        """
+        invalid = [
+            c for c in x.columns 
+            if c not in columns 
+            and not (pd.api.types.is_numeric_dtype(x[c]) 
+                     or pd.api.types.is_bool_dtype(x[c]))]
+        if invalid:
+            raise TypeError(
+                f'{self.name} produces sparse output, so columns which are '
+                f'not encoded must be numeric: {invalid} are not. Encode or '
+                f'drop them first.')
+        return self
+
+    def _create_group_encoder(self, 
+            columns: List[str], 
+            is_sparse: bool) -> object:
+        """Returns an unfitted encoder for one group of columns.
+
+        Args:
+            columns (List[str]): names of columns in the group.
+            is_sparse (bool): whether the encoder should output a CSR matrix.
+
+        Returns:
+            object: encoder which is fit to and transforms only 'columns'.
+
+        """
+        if is_sparse and self.name in ['hashing']:
+            return self._create_hasher()
+        elif is_sparse:
+            return preprocessing.OneHotEncoder(handle_unknown = 'ignore')
+        else:
+            parameters = dict(self.parameters)
+            parameters['cols'] = columns
+            return self.contents(**parameters)
+
+    def _fit_groups(self, 
+            data: simplify.core.Dataset, 
+            columns: List[str],
+            is_sparse: bool) -> None:
+        """Fits one encoder to each group of 'group_size' columns.
+
+        After fitting, 'contents' is a list of tuples of the columns in each 
+        group and the encoder fit to them.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+            columns (List[str]): names of columns to encode.
+            is_sparse (bool): whether the encoders should output CSR matrices.
+
+        """
+        groups = [
+            columns[i:i + self.group_size] 
+            for i in range(0, len(columns), self.group_size)]
+        encoders = [
+            self._create_group_encoder(columns = g, is_sparse = is_sparse)
+            for g in groups]
+        fitted = self._get_parallelizer().starmap(
+            process = _fit_group,
+            arguments = zip(encoders, groups),
+            shared = (data.x_train, data.y_train))
+        self.contents = list(zip(groups, fitted))
+        return self
+
+    def _get_cardinality(self, x: pd.DataFrame, columns: List[str]) -> int:
+        """Returns the total number of levels in 'columns' of 'x'.
+
+        Args:
+            x (pd.DataFrame): features to encode.
+            columns (List[str]): names of columns to encode.
+
+        Returns:
+            int: sum of the number of unique values in each column.
+
+        """
+        if not columns:
+            return 0
+        return int(x[columns].nunique().sum())
+
+    def _get_feature_names(self, columns: List[str], width: int) -> List[str]:
+        """Returns column names for encoded data.
+
+        Args:
+            columns (List[str]): column names of the data before encoding.
+            width (int): number of columns after encoding.
+
+        Returns:
+            List[str]: column names for the encoded data.
+
+        """
+        if self.feature_names is not None and len(self.feature_names) == width:
+            return list(self.feature_names)
+        return super()._get_feature_names(columns = columns, width = width)
+
+    def _get_parallelizer(self) -> simplify.core.Parallelizer:
+        """Returns the Parallelizer for column groups.
+
+        Outside of 'implement' (e.g. for batches streamed from a 
+        ChunkedDataset), groups are encoded serially.
+
+        Returns:
+            simplify.core.Parallelizer: runs tasks for each group.
+
+        """
+        parallelizer = getattr(self, '_parallelizer', None)
+        return parallelizer or simplify.core.Parallelizer(backend = 'serial')
+
+    def _get_sparse_names(self, x: pd.DataFrame, columns: List[str]) -> List[str]:
+        """Returns column names produced by the sparse encoder.
+
+        Args:
+            x (pd.DataFrame): features used to fit the encoder.
+            columns (List[str]): names of encoded columns.
+
+        Returns:
+            List[str]: encoded column names followed by passed through columns.
+
+        """
+        encoder = self.contents.named_transformers_[self.name]
+        if self.name in ['hashing']:
+            width = encoder.steps[-1][1].n_features
+            names = [f'{self.name}_{i}' for i in range(width)]
+        else:
+            names = [
+                f'{column}_{level}' 
+                for column, levels in zip(columns, encoder.categories_)
+                for level in levels]
+        return names + [c for c in x.columns if c not in columns]
+
+    def _get_group_names(self, 
+            encoder: object, 
+            columns: List[str], 
+            output: Union[pd.DataFrame, np.ndarray, sparse.spmatrix],
+            index: int) -> List[str]:
+        """Returns column names produced by the encoder for one group.
+
+        Args:
+            encoder (object): fitted encoder for the group.
+            columns (List[str]): names of columns in the group.
+            output (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): encoded
+                group.
+            index (int): position of the group, used to keep generated names
+                from different groups distinct.
+
+        Returns:
+            List[str]: column names for 'output'.
+
+        """
+        if self.name in ['hashing']:
+            return [f'{self.name}_{index}_{i}' for i in range(output.shape[1])]
+        elif hasattr(output, 'columns'):
+            return [str(c) for c in output.columns]
+        elif hasattr(encoder, 'categories_'):
+            return [
+                f'{column}_{level}' 
+                for column, levels in zip(columns, encoder.categories_)
+                for level in levels]
+        return [f'{self.name}_{index}_{i}' for i in range(output.shape[1])]
+
+    def _transform_bunch(self, bunch: simplify.core.DataBunch) -> None:
+        """Encodes 'x' in 'bunch'.
+
+        With 'group_size' set, each group is encoded in parallel and
+        the outputs, followed by the columns which are not encoded, are 
+        written into a single preallocated array or stacked into a single CSR
+        matrix if any encoder output is sparse.
+
+        Args:
+            bunch (simplify.core.DataBunch): bunch to encode.
+
+        """
+        if not self.group_size:
+            return super()._transform_bunch(bunch = bunch)
+        x = bunch.x
+        outputs = self._get_parallelizer().starmap(
+            process = _transform_group,
+            arguments = [(e, c) for c, e in self.contents],
+            shared = x)
+        encoded = set(c for columns, _ in self.contents for c in columns)
+        remainder = [c for c in x.columns if c not in encoded]
+        names = []
+        for i, ((columns, encoder), output) in enumerate(
+                zip(self.contents, outputs)):
+            names.extend(self._get_group_names(
+                encoder = encoder, 
+                columns = columns, 
+                output = output,
+                index = i))
+        names.extend(remainder)
+        if any(sparse.issparse(output) for output in outputs):
+            blocks = [sparse.csr_matrix(output) for output in outputs]
+            if remainder:
+                blocks.append(sparse.csr_matrix(
+                    x[remainder].to_numpy(dtype = np.float64)))
+            bunch.x = sparse.hstack(blocks, format = 'csr')
+        else:
+            arrays = [np.asarray(output) for output in outputs]
+            if remainder:
+                arrays.append(x[remainder].to_numpy())
+            result = np.empty(
+                (len(x), sum(a.shape[1] for a in arrays)),
+                dtype = np.result_type(*arrays))
+            start = 0
+            for array in arrays:
+                result[:, start:start + array.shape[1]] = array
+                start += array.shape[1]
+            bunch.x = pd.DataFrame(result, columns = names, index = x.index)
+        bunch.columns = names
+        return self
                       
 
+def _fit_group(shared: Tuple[pd.DataFrame, pd.Series], 
+        encoder: object, 
+        columns: List[str]) -> object:
+    """Fits 'encoder' to 'columns' of the training data in 'shared'.
+
+    Args:
+        shared (Tuple[pd.DataFrame, pd.Series]): training features and labels.
+        encoder (object): unfitted encoder.
+        columns (List[str]): names of columns to encode.
+
+    Returns:
+        object: fitted encoder.
+
+    """
+    x, y = shared
+    return encoder.fit(x[columns], y)
+
+
+def _transform_group(shared: pd.DataFrame, 
+        encoder: object, 
+        columns: List[str]) -> Union[pd.DataFrame, np.ndarray, sparse.spmatrix]:
+    """Encodes 'columns' of 'shared' with a fitted 'encoder'.
+
+    Args:
+        shared (pd.DataFrame): features to encode.
+        encoder (object): fitted encoder.
+        columns (List[str]): names of columns to encode.
+
+    Returns:
+        Union[pd.DataFrame, np.ndarray, sparse.spmatrix]: encoded columns.
+
+    """
+    return encoder.transform(shared[columns])
+
+
+def _tokenize(x: pd.DataFrame) -> List[List[str]]:
+    """Converts each row of 'x' to 'column=value' tokens for feature hashing.
+
+    Args:
+        x (pd.DataFrame): categorical columns to tokenize.
+
+    Returns:
+        List[List[str]]: one list of tokens per row.
+
+    """
+    prefixes = np.asarray([f'{column}=' for column in x.columns], dtype = object)
+    return (prefixes + x.astype(str).to_numpy(dtype = object)).tolist()
+
+
 category_encoders = {
     'backward': 'BackwardDifferenceEncoder',
     'base_n': 'BaseNEncoder',
@@ -131,7 +506,7 @@ category_encoders = {
     'weight_of_evidence': 'WOEEncoder'}
 
 
-for encoder, algorithm in category_encoders:
+for encoder, algorithm in category_encoders.items():
     kwargs = {
         'name': encoder, 
         'contents': algorithm,
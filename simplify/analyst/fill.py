@@ -12,9 +12,14 @@ import dataclasses
 from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping, 
                     Optional, Sequence, Tuple, Type, Union)
 
+import numpy as np
+import pandas as pd
+from sklearn import base as sklearn_base
+from sklearn import neighbors
 import sourdough
 
 from simplify import base
+import simplify
 
 
 @dataclasses.dataclass
@@ -175,4 +180,384 @@ class KNNImpute(FillTechnique):
         'defaults': {}})
     parallel: ClassVar[bool] = True   
     module: str = 'sklearn.impute'
- 
\ No newline at end of file
+ 
+
+
+class ApproximateKNNImputer(sklearn_base.BaseEstimator, 
+                            sklearn_base.TransformerMixin):
+    """Fills missing values with the mean of the nearest complete rows.
+
+    Distances are measured over the columns which are present in each row 
+    with missing values. Rows are grouped by which columns are missing and a
+    KDTree or BallTree of the complete training rows (restricted to the
+    present columns) is built for each group. For the less common groups 
+    beyond 'max_patterns', the tree only indexes a random sample of 
+    'sample_size' complete rows, so the cost of building trees stays bounded
+    when missing values are scattered.
+
+    Trees for the groups in the training data are built by 'fit' and stored
+    in 'trees_'. Groups which only appear in data passed to 'transform' are
+    given trees for that call only, so 'transform' never changes the fitted
+    imputer.
+
+    Args:
+        n_neighbors (int): number of complete rows used to fill each row.
+            Defaults to 5.
+        weights (str): 'uniform' to average neighbors equally or 'distance' to
+            weight them by inverse distance. Defaults to 'uniform'.
+        algorithm (str): 'kd_tree' or 'ball_tree'. 'ball_tree' is usually
+            faster with many columns. Defaults to 'kd_tree'.
+        leaf_size (int): leaf size of each tree. Defaults to 40.
+        batch_size (int): number of rows in each query task. Defaults to 
+            10000.
+        max_patterns (int): maximum number of missing column patterns which
+            are given a tree of all complete rows. Defaults to 32.
+        sample_size (int): number of complete rows indexed for other missing
+            column patterns. Defaults to 10000.
+        seed (int): random seed for sampling complete rows. Defaults to None.
+        parallelizer (simplify.core.Parallelizer): runs the query tasks. If 
+            None, tasks are run serially. Defaults to None.
+
+    """
+    def __init__(self, n_neighbors = 5, weights = 'uniform', 
+                 algorithm = 'kd_tree', leaf_size = 40, batch_size = 10000,
+                 max_patterns = 32, sample_size = 10000, seed = None,
+                 parallelizer = None):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.batch_size = batch_size
+        self.max_patterns = max_patterns
+        self.sample_size = sample_size
+        self.seed = seed
+        self.parallelizer = parallelizer
+        return
+
+    """ Public Methods """
+
+    def fit(self, 
+            X: Union[pd.DataFrame, np.ndarray], 
+            y: Any = None) -> 'ApproximateKNNImputer':
+        """Stores the complete rows of 'X' and the mean of each column.
+
+        Args:
+            X (Union[pd.DataFrame, np.ndarray]): numeric training data.
+            y (Any): ignored. Defaults to None.
+
+        Raises:
+            ValueError: if 'X' has fewer complete rows than 'n_neighbors' or
+                'sample_size' is less than 'n_neighbors'.
+
+        Returns:
+            ApproximateKNNImputer: fitted instance.
+
+        """
+        if self.sample_size < self.n_neighbors:
+            raise ValueError(
+                f'sample_size ({self.sample_size}) must be at least '
+                f'n_neighbors ({self.n_neighbors})')
+        values = np.asarray(X, dtype = np.float64)
+        missing = np.isnan(values)
+        complete = ~missing.any(axis = 1)
+        if complete.sum() < self.n_neighbors:
+            raise ValueError(
+                f'at least {self.n_neighbors} complete rows are needed')
+        self.complete_ = values[complete]
+        self.means_ = np.nanmean(values, axis = 0)
+        self.n_features_in_ = values.shape[1]
+        self.trees_ = {}
+        patterns = self._get_patterns(
+            missing = missing, 
+            rows = np.flatnonzero(~complete))
+        for _, _, present, sample in patterns:
+            if present.size:
+                self._add_tree(
+                    trees = self.trees_, 
+                    present = present, 
+                    sample = sample)
+        return self
+
+    def transform(self, 
+            X: Union[pd.DataFrame, np.ndarray]) -> Union[
+                pd.DataFrame, np.ndarray]:
+        """Fills missing values in 'X'.
+
+        Args:
+            X (Union[pd.DataFrame, np.ndarray]): numeric data to fill.
+
+        Returns:
+            Union[pd.DataFrame, np.ndarray]: 'X' with missing values filled,
+                of the same type as 'X'.
+
+        """
+        values = np.array(X, dtype = np.float64)
+        missing = np.isnan(values)
+        rows = np.flatnonzero(missing.any(axis = 1))
+        if rows.size:
+            trees = dict(self.trees_)
+            tasks, targets = self._get_tasks(
+                values = values, 
+                missing = missing, 
+                rows = rows,
+                trees = trees)
+            parallelizer = self.parallelizer or simplify.core.Parallelizer(
+                backend = 'serial')
+            results = parallelizer.starmap(
+                process = _impute_batch,
+                arguments = tasks,
+                shared = (
+                    self.complete_, 
+                    trees, 
+                    self.n_neighbors, 
+                    self.weights))
+            for (batch, columns), imputed in zip(targets, results):
+                values[batch[:, None], columns] = imputed
+        if isinstance(X, pd.DataFrame):
+            return pd.DataFrame(values, columns = X.columns, index = X.index)
+        return values
+
+    """ Private Methods """
+
+    def _add_tree(self, 
+            trees: Dict[Tuple[Tuple[int, ...], bool], Any],
+            present: np.ndarray,
+            sample: bool) -> Tuple[Tuple[int, ...], bool]:
+        """Returns the key of a tree over 'present' in 'trees', adding it.
+
+        A tree of all complete rows is used if one exists, even when a tree of
+        a sample would do.
+
+        Args:
+            trees (Dict[Tuple[Tuple[int, ...], bool], Any]): trees (with the 
+                positions of the rows they index) by present columns and 
+                whether the rows are sampled.
+            present (np.ndarray): positions of columns to index.
+            sample (bool): whether a tree of a sample of rows is enough.
+
+        Returns:
+            Tuple[Tuple[int, ...], bool]: key of the tree in 'trees'.
+
+        """
+        key = (tuple(present), False)
+        if sample and key not in trees:
+            key = (tuple(present), True)
+        if key not in trees:
+            trees[key] = self._build_tree(columns = present, sample = key[1])
+        return key
+
+    def _get_patterns(self, 
+            missing: np.ndarray,
+            rows: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray, 
+                                            np.ndarray, bool]]:
+        """Groups 'rows' by missing columns, from the most common group.
+
+        Args:
+            missing (np.ndarray): whether each value is missing.
+            rows (np.ndarray): positions of rows with missing values.
+
+        Returns:
+            List[Tuple[np.ndarray, np.ndarray, np.ndarray, bool]]: for each
+                group, positions of its rows, missing columns, present 
+                columns, and whether it is beyond 'max_patterns'.
+
+        """
+        if not rows.size:
+            return []
+        patterns, inverse = np.unique(
+            missing[rows], 
+            axis = 0, 
+            return_inverse = True)
+        inverse = inverse.ravel()
+        order = np.argsort(-np.bincount(inverse), kind = 'stable')
+        return [
+            (rows[inverse == pattern], 
+             np.flatnonzero(patterns[pattern]),
+             np.flatnonzero(~patterns[pattern]),
+             rank >= self.max_patterns)
+            for rank, pattern in enumerate(order)]
+
+    def _get_tasks(self, 
+            values: np.ndarray, 
+            missing: np.ndarray,
+            rows: np.ndarray,
+            trees: Dict[Tuple[Tuple[int, ...], bool], Any]) -> Tuple[
+                List[Tuple[Any, np.ndarray, np.ndarray]],
+                List[Tuple[np.ndarray, np.ndarray]]]:
+        """Groups 'rows' by missing columns and splits them into batches.
+
+        Rows with every column missing are filled with column means directly.
+        Trees which are needed but not in 'trees' are added to it.
+
+        Args:
+            values (np.ndarray): data to fill.
+            missing (np.ndarray): whether each value in 'values' is missing.
+            rows (np.ndarray): positions of rows with missing values.
+            trees (Dict[Tuple[Tuple[int, ...], bool], Any]): trees available
+                to the query tasks.
+
+        Returns:
+            Tuple[List[Tuple[Any, np.ndarray, np.ndarray]], 
+                List[Tuple[np.ndarray, np.ndarray]]]: query tasks (tree key, 
+                query rows, and columns to fill) and, for each task, the 
+                positions of its rows and columns in 'values'.
+
+        """
+        tasks, targets = [], []
+        for members, columns, present, sample in self._get_patterns(
+                missing = missing, 
+                rows = rows):
+            if not present.size:
+                values[members[:, None], columns] = self.means_[columns]
+                continue
+            key = self._add_tree(
+                trees = trees, 
+                present = present, 
+                sample = sample)
+            query = values[members][:, present]
+            for start in range(0, len(members), self.batch_size):
+                batch = slice(start, start + self.batch_size)
+                tasks.append((key, query[batch], columns))
+                targets.append((members[batch], columns))
+        return tasks, targets
+
+    def _build_tree(self, 
+            columns: np.ndarray,
+            sample: bool) -> Tuple[Union[neighbors.KDTree, 
+                                         neighbors.BallTree],
+                                   Optional[np.ndarray]]:
+        """Returns a tree of the complete training rows over 'columns'.
+
+        Args:
+            columns (np.ndarray): positions of columns to index.
+            sample (bool): whether to index only a random sample of 
+                'sample_size' complete rows.
+
+        Returns:
+            Tuple[Union[neighbors.KDTree, neighbors.BallTree], 
+                Optional[np.ndarray]]: neighbor index and the positions of the
+                indexed rows in 'complete_' (None if all rows are indexed).
+
+        """
+        if self.algorithm in ['ball_tree']:
+            tree = neighbors.BallTree
+        else:
+            tree = neighbors.KDTree
+        rows = None
+        if sample and len(self.complete_) > self.sample_size:
+            generator = np.random.default_rng(self.seed)
+            rows = np.sort(generator.choice(
+                len(self.complete_), 
+                size = self.sample_size, 
+                replace = False))
+            indexed = self.complete_[rows][:, columns]
+        else:
+            indexed = self.complete_[:, columns]
+        return tree(indexed, leaf_size = self.leaf_size), rows
+
+
+@dataclasses.dataclass
+class ApproximateKNNImpute(simplify.externals.SklearnTransformer):
+    """Wrapper for a nearest neighbors imputer which scales to large datasets.
+
+    Unlike KNNImpute, which compares every row with missing values to every
+    row in the training data, a tree index of the complete training rows is
+    built once for each pattern of missing columns and only rows with missing 
+    values are queried, in batches, by a Parallelizer using the project 
+    settings.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. For example, if a 
+            sourdough instance needs settings from a Configuration instance, 
+            'name' should match the appropriate section name in a Configuration 
+            instance. Defaults to None.
+        contents (Union[Callable, Type, object, str]): imputer to fit. Defaults
+            to ApproximateKNNImputer.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. If 'iterations' is 'infinite', the 'implement' 
+            method will continue indefinitely unless the method stops further 
+            iteration. Defaults to 1.
+        parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
+            when the 'implement' method is called. Defaults to an empty dict.
+        parallelizer (Optional[simplify.core.Parallelizer]): runs the batched
+            neighbor queries. If None, it is created from the project settings
+            when 'implement' is called. Defaults to None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            True.
+                                                
+    """  
+    name: str = 'approximate_knn_impute'
+    contents: Union[Callable, Type, object, str] = ApproximateKNNImputer
+    iterations: Union[int, str] = 1
+    parameters: Dict[str, Any] = dataclasses.field(default_factory = dict)
+    parallelizer: Optional[simplify.core.Parallelizer] = None
+    parallel: ClassVar[bool] = True   
+
+    """ Public Methods """
+
+    def implement(self, project: sourdough.Project) -> sourdough.Project:
+        """Fits the imputer to the training data and fills all data.
+
+        Args:
+            project (sourdough.Project): project with a Dataset in 'data'.
+
+        Returns:
+            sourdough.Project: with missing values filled.
+            
+        """
+        if self.parallelizer is None:
+            self.parallelizer = simplify.core.Parallelizer(
+                settings = getattr(project, 'settings', None))
+        return super().implement(project = project)
+
+    """ Private Methods """
+
+    def _fit(self, data: simplify.core.Dataset) -> None:
+        """Creates and fits the imputer with the training data in 'data'.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        """
+        self.contents = self.contents(
+            parallelizer = self.parallelizer, 
+            **self.parameters)
+        self.contents.fit(data.x_train, data.y_train)
+        return self
+
+
+def _impute_batch(
+        shared: Tuple[np.ndarray, 
+                      Dict[Tuple[Tuple[int, ...], bool], Any], 
+                      int, 
+                      str],
+        key: Tuple[Tuple[int, ...], bool],
+        query: np.ndarray,
+        columns: np.ndarray) -> np.ndarray:
+    """Returns imputed 'columns' for a batch of 'query' rows.
+
+    Args:
+        shared (Tuple[np.ndarray, Dict[Tuple[Tuple[int, ...], bool], Any], 
+            int, str]): complete training rows, trees (with the positions of
+            the rows they index), number of neighbors, and weights.
+        key (Tuple[Tuple[int, ...], bool]): key of the tree to query.
+        query (np.ndarray): present values of the rows to fill.
+        columns (np.ndarray): positions of columns to fill.
+
+    Returns:
+        np.ndarray: filled values with shape (len(query), len(columns)).
+
+    """
+    complete, trees, n_neighbors, weights = shared
+    tree, rows = trees[key]
+    distances, indices = tree.query(query, k = n_neighbors)
+    if rows is not None:
+        indices = rows[indices]
+    neighbor_values = complete[indices[:, :, None], columns]
+    if weights in ['distance']:
+        inverse = 1 / np.maximum(distances, 1e-12)
+        inverse = inverse / inverse.sum(axis = 1, keepdims = True)
+        return np.einsum('ij,ijk->ik', inverse, neighbor_values)
+    return neighbor_values.mean(axis = 1)
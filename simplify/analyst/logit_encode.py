@@ -1,149 +1,385 @@
-""" 
-LogitEncoder is a class built on a scikit-learn transformer that encodes 
-levels of categorical variables using logistic regression coefficients or 
+"""
+LogitEncoder is a class built on a scikit-learn transformer that encodes
+levels of categorical variables using logistic regression coefficients or
 marginal effects at each category level. This allows the user to convert high-
 cardinality features, which are problematic for many machine learning
 models (particularly tree methods) into continuous features.
 
-LogitEncoder is computationally expensive but may increase predictive 
-accuracy versus weight of evidence and target encoding because it controls 
-for other features in assigning an encoded value to each category level.
+With the default 'marginal' method, the coefficient for each level is the
+(smoothed) log-odds of the label at that level relative to the overall
+log-odds, which is what a logistic regression of the label on the one-hot
+encoded column estimates. It is computed directly from the count and number of
+positive labels at each level, so no model is fit. The 'joint' method fits one
+sparse logistic regression to all encoded columns at once. It is more
+expensive but may increase predictive accuracy versus weight of evidence and
+target encoding because it controls for other features in assigning an
+encoded value to each category level.
 
-As with any categorical encoder that incorporates the predicted label, it is 
-important that LogitEncoder be applied to an isolated dataset to prevent data
-leakage. 
+As with any categorical encoder that incorporates the predicted label,
+LogitEncoder can leak the label into the training data. So, 'fit_transform'
+encodes each training row with values computed without the fold containing
+that row (out-of-fold encoding) unless 'folds' is less than 2.
 
 """
 #%%
+from typing import Any, Dict, List, Optional, Tuple, Union
+
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.base import BaseEstimator, TransformerMixin
 import sklearn.linear_model as lm
 
-import category_encoders as ce
 
 #%%
 class LogitEncoder(BaseEstimator, TransformerMixin):
-    
-    def __init__(self, encode_cols = None, first_encoder = 'helmert',
-                 col_prefix = 'coef_', verbose = False, threshold = 30, 
-                 below_threshold = 'mean', encoded_values = 'coefficients'):
-
-        """ Parameters:
-            
-        encode_cols: list 
-        A list of columns to encode.
-        
-        first_encoder: str
-        To apply the logistic regression encoding, the data needs to first 
-        be converted from categorical to a usable format. This parameter
-        sets which of the encoders to use from the category_encoders package.
-        
-        new_col: str
-        If set to a string, a new column, with the string as the header,
-        will be created to store the encoded values.
-        
-        verbose: bool 
-        A value of True will include progress updates. verbose of False 
-        will not include any progress updates.
-    
-        threshold: int
-        A value which sets the number of instances for a value to appear
-        in a single column from the encode_cols list in order to be 
-        encoded. If there are the number of instances is equal to or 
-        below the threshold setting, an encoded value will not be used.
-            
-        below_threshold: str
-        If threshold is greater than 0 then below_threshold sets what 
-        value should be used in place of a logistic-regression-based 
-        value for that particular instance. If set to 'mean', the mean
-        of the column will be used. If set to 'zero', the value of 0 
-        will be used.
-            
-        encoded_values: str
-        If values is set to 'coefficients', the logistic regression 
-        coefficient for each categorical level shall be encoded.
-        If values is set to 'effects', the estimated marginal effect
-        of each categorical level shall be encoded. Selecting 'effects'
-        is substantially more computationally expensive than using 
-        coefficients.
-        """
-        self.cols = encode_cols
-        self.first = first_encoder
+    """Encodes categorical levels with logistic regression coefficients.
+
+    Each encoded column is converted to integer codes once and all per-level
+    values are looked up with 'take' on arrays, so the cost of encoding grows
+    with the number of rows rather than the number of levels.
+
+    Args:
+        encode_cols (Union[List[str], str]): columns to encode. If None, all
+            categorical and object columns are encoded. Defaults to None.
+        col_prefix (str): prefix added to each encoded column name. Defaults
+            to 'coef_'.
+        verbose (bool): whether to print progress updates. Defaults to False.
+        threshold (int): levels which appear this many times or fewer in the
+            training data are given the 'below_threshold' value instead of an
+            encoded value. Defaults to 30.
+        below_threshold (str): value used for levels at or below 'threshold'
+            and for levels not seen in training. If 'mean', the mean encoded
+            value of the column is used. If 'zero', 0 is used. Defaults to
+            'mean'.
+        encoded_values (str): if 'coefficients', the logistic regression
+            coefficient for each level is encoded. If 'effects', the marginal
+            effect of each level on the predicted probability is encoded.
+            Defaults to 'coefficients'.
+        method (str): 'marginal' to compute coefficients for each column
+            separately from grouped label counts or 'joint' to fit a single
+            logistic regression to all encoded columns. Defaults to 'marginal'.
+        smoothing (float): number of pseudo-observations at the overall label
+            rate added to each level with the 'marginal' method. Defaults to
+            1.0.
+        folds (int): number of folds used for out-of-fold encoding in
+            'fit_transform'. Defaults to 5.
+        drop (bool): whether to drop the original columns after encoding.
+            Defaults to False.
+        seed (int): random seed for assigning rows to folds. Defaults to None.
+
+    """
+    def __init__(self, encode_cols = None, col_prefix = 'coef_',
+                 verbose = False, threshold = 30, below_threshold = 'mean',
+                 encoded_values = 'coefficients', method = 'marginal',
+                 smoothing = 1.0, folds = 5, drop = False, seed = None):
+        self.encode_cols = encode_cols
         self.col_prefix = col_prefix
         self.verbose = verbose
         self.threshold = threshold
         self.below_threshold = below_threshold
         self.encoded_values = encoded_values
-        self.X = pd.DataFrame
-        self.y = pd.Series
-        self.feature_names = None       
+        self.method = method
+        self.smoothing = smoothing
+        self.folds = folds
+        self.drop = drop
+        self.seed = seed
         return
-   
-    def fit_transform(self, X, y, **kwargs):
-        """ To fit LogitEncoder, pass features, X, and label, y with any 
-        arguments accepted by scikit-learn LogisticRegression
-        """
-        self.X = X
-        self.y = y
-        
-        """ If a single value or no value is passed for encoded_cols, generate
-        a list of either all columns or the single listed column.
+
+    """ Public Methods """
+
+    def fit(self, X: pd.DataFrame, y: pd.Series,
+            **kwargs) -> 'LogitEncoder':
+        """Computes encoded values for each level from all of 'X' and 'y'.
+
+        Args:
+            X (pd.DataFrame): features with columns to encode.
+            y (pd.Series): binary label.
+            kwargs: arguments passed to scikit-learn LogisticRegression when
+                'method' is 'joint'.
+
+        Returns:
+            LogitEncoder: fitted instance.
+
         """
-        if self.cols is None:
-            self._cat_cols()
-        elif isinstance(self.cols, str):
-            self.cols = self.cols.tolist()
-            
-        self._set_first_encoder()
-        self._logit_encode()
-        
-        if self.threshold > 0:
-            self._cutoff()
-        return self.X
-
-    def _cat_cols(self):
-        cat_cols = []
-        for col in self.cols:
-            if pd.is_category(self.X[col]):
-                cat_cols.append(col)
-        return cat_cols
-    
-    def _set_first_encoder(self):
-        if self.first == 'backward':
-            self.first_encoder = ce.BackwardDifferenceEncoder(cols = self.cols)
-        if self.first == 'binary':
-            self.first_encoder= ce.BinaryEncoder(cols = self.cols)
-        if self.first == 'sum':
-            self.first_encoder = ce.SumEncoder(cols = self.cols)
-        if self.first == 'helmert':
-            self.first_encoder = ce.HelmertEncoder(cols = self.cols) 
-        return self   
-    
-    def _logit_encode(self, **kwargs):
-        self.first_encoder.fit_transform(self.X, self.y)
-        print(self.X.head())
-        self.logit = lm.LogisticRegression()
-        self.logit.fit(self.X, self.y)
-        for col in self.cols:
-            col_name = self.col_prefix + col
-            self.coefs = pd.DataFrame(list(zip(self.X.columns, 
-                                               self.logit.coef_)))
-            self.coef_dict = self.coefs.to_dict()
-            self.X[col_name] = self.coef_dict.get(self.X[col])
-#        self.X.drop(self.cols, axis = 1, inplace = True)
-        return self
-  
-    def _cutoff(self):           
-        for col in self.cols:
-            col_name = self.col_prefix + col
-            if self.below_threshold == 'zero':
-                substitute_value = 0
-            elif self.below_threshold == 'mean':
-                substitute_value = np.mean(self.X[self.col_name])
-            value_counts = self.X[col].value_counts()
-            self.X[col_name] = np.where(value_counts <= self.threshold,
-                                   substitute_value,
-                                   self.X[col_name])            
+        self.cols_ = self._get_columns(X = X)
+        self.categories_ = {}
+        codes = []
+        for col in self.cols_:
+            col_codes, self.categories_[col] = pd.factorize(X[col])
+            col_codes[col_codes < 0] = len(self.categories_[col])
+            codes.append(col_codes)
+        y = np.asarray(y, dtype = np.float64)
+        self.prior_ = float(y.mean())
+        groups = np.zeros(len(y), dtype = np.int64)
+        tables = self._get_tables(
+            codes = codes,
+            y = y,
+            groups = groups,
+            n_groups = 1,
+            **kwargs)
+        self.encodings_ = dict(zip(self.cols_, [t[0] for t in tables]))
         return self
 
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        """Encodes 'X' with the values computed in 'fit'.
+
+        Args:
+            X (pd.DataFrame): features with columns to encode.
+
+        Returns:
+            pd.DataFrame: 'X' with encoded columns added.
+
+        """
+        encoded = {}
+        for col in self.cols_:
+            codes = self._get_codes(
+                values = X[col],
+                categories = self.categories_[col])
+            encoded[col] = self.encodings_[col].take(codes)
+        return self._add_encoded(X = X, encoded = encoded)
+
+    def fit_transform(self, X: pd.DataFrame, y: pd.Series,
+                      **kwargs) -> pd.DataFrame:
+        """Fits to 'X' and 'y' and returns out-of-fold encoded 'X'.
+
+        The fitted values (used by later calls to 'transform') are computed
+        from all of 'X'. Each row in the returned data is instead encoded
+        with values computed from the other 'folds' - 1 folds, so the label
+        of a row never contributes to its own encoded value.
+
+        Args:
+            X (pd.DataFrame): features with columns to encode.
+            y (pd.Series): binary label.
+            kwargs: arguments passed to scikit-learn LogisticRegression when
+                'method' is 'joint'.
+
+        Returns:
+            pd.DataFrame: 'X' with encoded columns added.
+
+        """
+        self.fit(X, y, **kwargs)
+        if not self.folds or self.folds < 2:
+            return self.transform(X)
+        generator = np.random.default_rng(self.seed)
+        groups = generator.permutation(len(X)) % self.folds
+        codes = [
+            self._get_codes(values = X[col], categories = self.categories_[col])
+            for col in self.cols_]
+        tables = self._get_tables(
+            codes = codes,
+            y = np.asarray(y, dtype = np.float64),
+            groups = groups,
+            n_groups = self.folds,
+            out_of_fold = True,
+            **kwargs)
+        encoded = {
+            col: table[groups, col_codes]
+            for col, col_codes, table in zip(self.cols_, codes, tables)}
+        return self._add_encoded(X = X, encoded = encoded)
+
+    """ Private Methods """
+
+    def _add_encoded(self, X: pd.DataFrame,
+                     encoded: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Returns 'X' with 'encoded' columns added in a single concatenation.
+
+        Args:
+            X (pd.DataFrame): features with columns to encode.
+            encoded (Dict[str, np.ndarray]): encoded values for each column.
+
+        Returns:
+            pd.DataFrame: 'X' with encoded columns added.
+
+        """
+        if self.drop:
+            X = X.drop(columns = self.cols_)
+        encoded = pd.DataFrame(
+            {self.col_prefix + col: values for col, values in encoded.items()},
+            index = X.index)
+        self.feature_names = list(X.columns) + list(encoded.columns)
+        return pd.concat([X, encoded], axis = 1)
+
+    def _get_codes(self, values: pd.Series,
+                   categories: pd.Index) -> np.ndarray:
+        """Returns codes of 'values' in 'categories'.
+
+        Missing and unseen values are given the code len(categories), which
+        is the position of the 'below_threshold' value in each encoding table.
+
+        Args:
+            values (pd.Series): column to encode.
+            categories (pd.Index): levels seen in training.
+
+        Returns:
+            np.ndarray: integer code for each value.
+
+        """
+        codes = categories.get_indexer(values)
+        codes[codes < 0] = len(categories)
+        return codes
+
+    def _get_columns(self, X: pd.DataFrame) -> List[str]:
+        """Returns the columns of 'X' to encode.
+
+        Args:
+            X (pd.DataFrame): features with columns to encode.
+
+        Returns:
+            List[str]: names of columns to encode.
+
+        """
+        if self.encode_cols is None:
+            return list(X.select_dtypes(
+                include = ['category', 'object', 'string']).columns)
+        elif isinstance(self.encode_cols, str):
+            return [self.encode_cols]
+        else:
+            return list(self.encode_cols)
+
+    def _get_coefficients(self, codes: List[np.ndarray], y: np.ndarray,
+                          mask: np.ndarray, **kwargs) -> List[np.ndarray]:
+        """Fits one logistic regression to all encoded columns.
+
+        The one-hot design matrix is built directly from 'codes' as a CSR
+        matrix, so no intermediate DataFrame is created.
+
+        Args:
+            codes (List[np.ndarray]): codes for each encoded column.
+            y (np.ndarray): binary label.
+            mask (np.ndarray): rows to fit.
+            kwargs: arguments passed to scikit-learn LogisticRegression.
+
+        Returns:
+            List[np.ndarray]: coefficient for each level of each column.
+
+        """
+        widths = [len(self.categories_[col]) for col in self.cols_]
+        offsets = np.concatenate([[0], np.cumsum(widths)])
+        rows = int(mask.sum())
+        indices = np.column_stack(
+            [c[mask] + o for c, o in zip(codes, offsets[:-1])])
+        known = np.column_stack(
+            [c[mask] < w for c, w in zip(codes, widths)])
+        design = sparse.csr_matrix(
+            (known.ravel().astype(np.float64),
+             np.where(known, indices, 0).ravel(),
+             np.arange(0, rows * len(codes) + 1, len(codes))),
+            shape = (rows, offsets[-1]))
+        design.eliminate_zeros()
+        model = lm.LogisticRegression(**kwargs)
+        model.fit(design, y[mask])
+        coefficients = model.coef_[0]
+        return [
+            coefficients[start:end]
+            for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def _get_tables(self, codes: List[np.ndarray], y: np.ndarray,
+                    groups: np.ndarray, n_groups: int,
+                    out_of_fold: bool = False,
+                    **kwargs) -> List[np.ndarray]:
+        """Returns encoding tables for each column.
+
+        Level counts and positive labels are computed for every group at once
+        with 'np.bincount'. With 'out_of_fold', the table for each group uses
+        the statistics of all other groups.
+
+        Args:
+            codes (List[np.ndarray]): codes for each encoded column.
+            y (np.ndarray): binary label.
+            groups (np.ndarray): group (fold) of each row.
+            n_groups (int): number of groups.
+            out_of_fold (bool): whether each group's table excludes that
+                group. Defaults to False.
+            kwargs: arguments passed to scikit-learn LogisticRegression when
+                'method' is 'joint'.
+
+        Returns:
+            List[np.ndarray]: array for each column with shape (n_groups,
+                levels + 1). The last value in each row is used for rare,
+                missing, and unseen levels.
+
+        """
+        if self.method in ['joint']:
+            coefficients = [
+                self._get_coefficients(
+                    codes = codes,
+                    y = y,
+                    mask = (groups != g) if out_of_fold else (groups == g),
+                    **kwargs)
+                for g in range(n_groups)]
+        tables = []
+        for i, (col, col_codes) in enumerate(zip(self.cols_, codes)):
+            if self.verbose:
+                print(f'Encoding {col}')
+            levels = len(self.categories_[col])
+            bins = groups * (levels + 1) + col_codes
+            size = n_groups * (levels + 1)
+            counts = np.bincount(bins, minlength = size)
+            positives = np.bincount(bins, weights = y, minlength = size)
+            counts = counts.reshape(n_groups, levels + 1)[:, :levels]
+            positives = positives.reshape(n_groups, levels + 1)[:, :levels]
+            if out_of_fold:
+                counts = counts.sum(axis = 0) - counts
+                positives = positives.sum(axis = 0) - positives
+            if self.method in ['joint']:
+                values = np.vstack([c[i] for c in coefficients])
+            else:
+                values = self._get_marginal(
+                    counts = counts,
+                    positives = positives)
+            if self.encoded_values in ['effects'] and self.method in ['joint']:
+                values = values * self.prior_ * (1 - self.prior_)
+            tables.append(self._apply_threshold(
+                values = values,
+                counts = counts))
+        return tables
+
+    def _get_marginal(self, counts: np.ndarray,
+                      positives: np.ndarray) -> np.ndarray:
+        """Returns smoothed per-level coefficients or effects.
+
+        Args:
+            counts (np.ndarray): number of rows at each level.
+            positives (np.ndarray): number of positive labels at each level.
+
+        Returns:
+            np.ndarray: encoded value for each level.
+
+        """
+        prior = min(max(self.prior_, 1e-6), 1 - 1e-6)
+        if self.encoded_values in ['effects']:
+            return ((positives + self.smoothing * prior)
+                    / (counts + self.smoothing) - prior)
+        with np.errstate(divide = 'ignore'):
+            odds = np.log(
+                (positives + self.smoothing * prior)
+                / (counts - positives + self.smoothing * (1 - prior)))
+        return odds - np.log(prior / (1 - prior))
+
+    def _apply_threshold(self, values: np.ndarray,
+                         counts: np.ndarray) -> np.ndarray:
+        """Substitutes the 'below_threshold' value for rare levels.
+
+        Args:
+            values (np.ndarray): encoded values with shape (groups, levels).
+            counts (np.ndarray): number of rows at each level.
+
+        Returns:
+            np.ndarray: 'values' with rare levels replaced and the substitute
+                value appended to each row.
+
+        """
+        kept = (counts > self.threshold) & np.isfinite(values)
+        if self.below_threshold in ['zero']:
+            substitute = np.zeros(len(values))
+        else:
+            weights = np.where(kept, counts, 0)
+            totals = weights.sum(axis = 1)
+            substitute = np.divide(
+                (np.where(kept, values, 0) * weights).sum(axis = 1),
+                totals,
+                out = np.zeros(len(values)),
+                where = totals > 0)
+        values = np.where(kept, values, substitute[:, None])
+        return np.column_stack([values, substitute])
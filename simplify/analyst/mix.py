@@ -5,6 +5,10 @@ Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Mix (Step): wrapper for a feature mixing Technique.
+    InteractionMixer (BaseEstimator, TransformerMixin): pairwise interactions
+        generated in column blocks from screened pairs.
+    InteractionMix (SklearnTransformer): wrapper for InteractionMixer.
 
 """
 import dataclasses
@@ -14,8 +18,17 @@ from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
 import numpy as np
 import pandas as pd
 import sklearn
+from sklearn import base as sklearn_base
+from scipy import sparse
 import sourdough
 
+from . import base
+import simplify
+from simplify.utilities import memory
+
+
+mixers = sourdough.types.Library()
+
 
 @dataclasses.dataclass
 class Mix(sourdough.project.Step):
@@ -48,4 +61,311 @@ class Mix(sourdough.project.Step):
     iterations: Union[int, str] = 1
     parameters: Mapping[Any, Any] = dataclasses.field(default_factory = dict)
     parallel: ClassVar[bool] = True
-    
\ No newline at end of file
+
+
+class InteractionMixer(sklearn_base.BaseEstimator, 
+                       sklearn_base.TransformerMixin):
+    """Creates pairwise products of columns without materializing every pair.
+
+    Unlike scikit-learn's PolynomialFeatures, which creates every product at 
+    once, candidate pairs are screened when fitting and only the most 
+    promising are kept. With 'screen' set to 'correlation', the absolute 
+    correlation of each product with the label is computed on a sample of 
+    rows, 'block_size' pairs at a time, and the best 'max_interactions' pairs 
+    (or those above 'threshold') are kept. With 'screen' set to None, every 
+    pair is kept unless 'max_interactions' is set. When transforming, products are
+    written one block at a time into a single preallocated output, and sparse
+    input produces CSR output, so memory grows with the kept pairs rather than
+    with the square of the number of columns.
+
+    Args:
+        interaction_only (bool): whether to exclude squares of columns. 
+            Defaults to True.
+        include_original (bool): whether the original columns are included 
+            in the output. Defaults to True.
+        screen (Optional[str]): 'correlation' or None (keep every pair, up to 
+            'max_interactions'). Defaults to 'correlation'.
+        max_interactions (Optional[Union[int, str]]): maximum number of pairs
+            kept, None to keep every pair, or 'auto' to keep 100 pairs if 
+            'screen' is set and every pair if it is not. Defaults to 'auto'.
+        threshold (Optional[float]): minimum absolute correlation of a kept
+            pair. Defaults to None.
+        block_size (int): number of pairs computed at a time. Defaults to 256.
+        sample_size (Optional[int]): number of rows used for screening. 
+            Defaults to 20000. If None, every row is used.
+        dtype (Any): numpy dtype of dense output. Defaults to np.float64.
+        seed (Optional[int]): random seed for sampling rows. Defaults to None.
+
+    """
+    def __init__(self,
+            interaction_only: bool = True,
+            include_original: bool = True,
+            screen: Optional[str] = 'correlation',
+            max_interactions: Optional[Union[int, str]] = 'auto',
+            threshold: Optional[float] = None,
+            block_size: int = 256,
+            sample_size: Optional[int] = 20000,
+            dtype: Any = np.float64,
+            seed: Optional[int] = None) -> None:
+        self.interaction_only = interaction_only
+        self.include_original = include_original
+        self.screen = screen
+        self.max_interactions = max_interactions
+        self.threshold = threshold
+        self.block_size = block_size
+        self.sample_size = sample_size
+        self.dtype = dtype
+        self.seed = seed
+
+    """ Public Methods """
+
+    def fit(self, 
+            x: Union[pd.DataFrame, np.ndarray, sparse.spmatrix], 
+            y: Optional[Union[pd.Series, np.ndarray]] = None) -> (
+                'InteractionMixer'):
+        """Chooses the pairs of columns to multiply.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): numeric 
+                training features.
+            y (Optional[Union[pd.Series, np.ndarray]]): training labels. 
+                Required if 'screen' is 'correlation'.
+
+        Returns:
+            InteractionMixer: fitted instance.
+
+        Raises:
+            ValueError: if 'screen' is 'correlation' and 'y' is None, or if 
+                'screen' is not a supported value.
+
+        """
+        if isinstance(x, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(x.columns, dtype = object)
+        self.n_features_in_ = x.shape[1]
+        left, right = np.triu_indices(
+            x.shape[1], 
+            k = 1 if self.interaction_only else 0)
+        if self.screen is None:
+            self.pairs_ = np.column_stack([left, right])[
+                :self._get_limit(screened = False)]
+        elif self.screen in ['correlation']:
+            if y is None:
+                raise ValueError('y is needed to screen interactions')
+            self.pairs_ = self._screen(x = x, y = y, left = left, right = right)
+        else:
+            raise ValueError('screen must be correlation or None')
+        return self
+
+    def get_feature_names_out(self, 
+            input_features: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Returns names of the output columns.
+
+        Args:
+            input_features (Optional[Sequence[str]]): names of the input 
+                columns. Defaults to None.
+
+        Returns:
+            np.ndarray: original column names (if included) followed by 
+                'a*b' for each pair.
+
+        """
+        if input_features is None:
+            input_features = getattr(
+                self, 
+                'feature_names_in_', 
+                [f'x{i}' for i in range(self.n_features_in_)])
+        names = [str(name) for name in input_features]
+        mixed = [f'{names[a]}*{names[b]}' for a, b in self.pairs_]
+        if self.include_original:
+            mixed = names + mixed
+        return np.asarray(mixed, dtype = object)
+
+    def iter_blocks(self, 
+            x: Union[pd.DataFrame, np.ndarray, sparse.spmatrix]) -> Iterable[
+                Tuple[slice, Union[np.ndarray, sparse.spmatrix]]]:
+        """Yields blocks of interaction columns for 'x'.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): features.
+
+        Yields:
+            Tuple[slice, Union[np.ndarray, sparse.spmatrix]]: positions of the
+                block among the interaction columns and its values.
+
+        """
+        values = memory.to_matrix(
+            x, 
+            sparse_format = 'csc', 
+            dtype = np.float64)
+        for start in range(0, len(self.pairs_), self.block_size):
+            block = self.pairs_[start:start + self.block_size]
+            yield (
+                slice(start, start + len(block)), 
+                _multiply(values, block[:, 0], block[:, 1]))
+
+    def transform(self, 
+            x: Union[pd.DataFrame, np.ndarray, sparse.spmatrix]) -> Union[
+                np.ndarray, sparse.spmatrix]:
+        """Returns 'x' with the chosen interactions added.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): features.
+
+        Returns:
+            Union[np.ndarray, sparse.spmatrix]: CSR matrix if 'x' is sparse,
+                otherwise an array of 'dtype'.
+
+        """
+        offset = x.shape[1] if self.include_original else 0
+        if sparse.issparse(x):
+            blocks = [block for _, block in self.iter_blocks(x = x)]
+            if self.include_original:
+                blocks.insert(0, x)
+            if not blocks:
+                return sparse.csr_matrix((x.shape[0], 0))
+            return sparse.hstack(blocks, format = 'csr')
+        output = np.empty(
+            (x.shape[0], offset + len(self.pairs_)), 
+            dtype = self.dtype)
+        if self.include_original:
+            output[:, :offset] = x
+        for positions, block in self.iter_blocks(x = x):
+            output[:, offset + positions.start:offset + positions.stop] = block
+        return output
+
+    """ Private Methods """
+
+    def _get_limit(self, screened: bool) -> Optional[int]:
+        """Returns the maximum number of pairs kept, or None for no limit."""
+        if self.max_interactions in ['auto']:
+            return 100 if screened else None
+        return self.max_interactions
+
+    def _screen(self, 
+            x: Union[pd.DataFrame, np.ndarray, sparse.spmatrix],
+            y: Union[pd.Series, np.ndarray],
+            left: np.ndarray,
+            right: np.ndarray) -> np.ndarray:
+        """Returns the pairs whose products correlate most with 'y'.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): features.
+            y (Union[pd.Series, np.ndarray]): labels.
+            left (np.ndarray): first column of each candidate pair.
+            right (np.ndarray): second column of each candidate pair.
+
+        Returns:
+            np.ndarray: kept pairs, one per row, from best to worst.
+
+        """
+        values = memory.to_matrix(
+            x, 
+            sparse_format = 'csc', 
+            dtype = np.float64)
+        y = np.asarray(y)
+        if y.dtype.kind not in ['b', 'i', 'u', 'f']:
+            y = pd.factorize(y)[0]
+        y = y.astype(np.float64)
+        if self.sample_size and values.shape[0] > self.sample_size:
+            rows = np.sort(np.random.default_rng(self.seed).choice(
+                values.shape[0], 
+                self.sample_size, 
+                replace = False))
+            values, y = values[rows], y[rows]
+        count = values.shape[0]
+        y = y - y.mean()
+        y_norm = np.sqrt(y @ y)
+        kept_scores = np.empty(0)
+        kept_pairs = np.empty(0, dtype = np.intp)
+        limit = self._get_limit(screened = True) or len(left)
+        for start in range(0, len(left), self.block_size):
+            stop = start + self.block_size
+            products = _multiply(values, left[start:stop], right[start:stop])
+            sums = np.asarray(products.sum(axis = 0)).ravel()
+            if sparse.issparse(products):
+                squares = np.asarray(
+                    products.multiply(products).sum(axis = 0)).ravel()
+            else:
+                squares = np.einsum('ij,ij->j', products, products)
+            covariances = np.asarray(products.T @ y).ravel()
+            norms = np.sqrt(np.maximum(squares - sums ** 2 / count, 0))
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                scores = np.abs(covariances / (norms * y_norm))
+            scores = np.nan_to_num(scores, nan = 0.0)
+            candidates = np.arange(start, start + len(scores))
+            if self.threshold is not None:
+                passed = scores >= self.threshold
+                scores, candidates = scores[passed], candidates[passed]
+            kept_scores = np.concatenate([kept_scores, scores])
+            kept_pairs = np.concatenate([kept_pairs, candidates])
+            if len(kept_scores) > limit:
+                best = np.argpartition(-kept_scores, limit - 1)[:limit]
+                kept_scores, kept_pairs = kept_scores[best], kept_pairs[best]
+        order = np.argsort(-kept_scores, kind = 'mergesort')
+        kept_pairs = kept_pairs[order]
+        return np.column_stack([left[kept_pairs], right[kept_pairs]])
+
+
+@dataclasses.dataclass
+class InteractionMix(simplify.externals.SklearnTransformer):
+    """Wrapper for InteractionMixer.
+
+    For a ChunkedDataset, pairs are screened on the first 'sample_size' rows
+    of its source and the interactions are created for each batch as it is
+    streamed to the model (see ChunkedDataset.transforms), so they are never 
+    stored for the whole dataset.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. For example, if a 
+            sourdough instance needs settings from a Configuration instance, 
+            'name' should match the appropriate section name in a Configuration 
+            instance. Defaults to 'interactions'.
+        contents (Union[Callable, Type, object, str]): mixer to fit. Defaults
+            to InteractionMixer.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
+            when the 'implement' method is called. Defaults to an empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+                                                
+    """  
+    name: str = 'interactions'
+    contents: Union[Callable, Type, object, str] = InteractionMixer
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    module: str = None
+    parallel: ClassVar[bool] = False
+
+    """ Private Methods """
+
+    def _fit(self, data: simplify.core.Dataset) -> None:
+        """Creates and fits 'contents' with the training data in 'data'.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        """
+        if not isinstance(data, simplify.core.dataset.ChunkedDataset):
+            return super()._fit(data = data)
+        self.contents = self.contents(**self.parameters)
+        size = self.contents.sample_size or data.batch_size
+        x, y = next(iter(data.iter_xy(size = size, training = True)))
+        self.contents.fit(x, y)
+        return self
+
+
+def _multiply(x: Union[np.ndarray, sparse.spmatrix], 
+        left: np.ndarray, 
+        right: np.ndarray) -> Union[np.ndarray, sparse.spmatrix]:
+    """Returns the products of columns 'left' and 'right' of 'x'."""
+    if sparse.issparse(x):
+        return x[:, left].multiply(x[:, right]).tocsr()
+    return x[:, left] * x[:, right]
+
+
+mixers['interactions'] = InteractionMix()
@@ -5,17 +5,33 @@ Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Model
+    XGBoostModel
+    BoosterEstimator
 
 """
+from __future__ import annotations
 import dataclasses
+import importlib
+import pathlib
+import shutil
+import tempfile
+import weakref
 from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping, 
                     Optional, Sequence, Tuple, Type, Union)
 
 import numpy as np
 import pandas as pd
 import sklearn
+import sklearn.metrics
 import sourdough
 
+from . import base
+import simplify
+
+
+models = sourdough.types.Library()
+
 
 @dataclasses.dataclass
 class Model(sourdough.project.Step):
@@ -48,4 +64,424 @@ class Model(sourdough.project.Step):
     iterations: Union[int, str] = 1
     parameters: Mapping[Any, Any] = dataclasses.field(default_factory = dict)
     parallel: ClassVar[bool] = True
-    
\ No newline at end of file
+
+
+@dataclasses.dataclass
+class XGBoostModel(simplify.externals.SklearnModel):
+    """Wrapper for xgboost which reuses its training matrices.
+
+    The training data for each fold is converted to an xgboost matrix once 
+    and stored in 'simplify.core.caches.matrix_cache', so training with other 
+    hyperparameters (see 'fit_candidates') or in other workflow branches 
+    reuses it. With the default 'hist' tree method, a QuantileDMatrix is used,
+    which stores each value as a histogram bin index instead of a float. For
+    a ChunkedDataset, the matrix is built from training batches streamed from
+    its source by an xgboost DataIter, so the raw data never needs to fit in
+    memory. 
+
+    Each booster uses the number of threads available to it when the 
+    project's Parallelizer runs folds concurrently, so xgboost does not 
+    oversubscribe the CPUs. If 'gpu' is set in the project settings, boosters
+    are trained on a CUDA device.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. For example, if a 
+            sourdough instance needs settings from a Configuration instance, 
+            'name' should match the appropriate section name in a Configuration 
+            instance. Defaults to 'xgboost'.
+        contents (Union[Callable, Type, object, str]): 'XGBClassifier' or 
+            'XGBRegressor' (used to choose the objective) before 'implement'
+            is called and a fitted BoosterEstimator after. Defaults to 
+            'XGBClassifier'.
+        parameters (Union[Mapping[str, Any], base.Parameters]): xgboost 
+            parameters, in scikit-learn (e.g. 'n_estimators' and 
+            'random_state') or native form. Defaults to an empty Parameters
+            instance.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        module (str): name of module where 'contents' is located. Defaults to
+            'xgboost'.
+        batch_size (Optional[int]): number of rows in each batch streamed from
+            a ChunkedDataset. Defaults to None. If not passed, the 'batch_size'
+            of the data is used.
+        quantile (bool): whether to build a QuantileDMatrix when using the 
+            'hist' tree method. Defaults to True.
+        external_memory (bool): whether a ChunkedDataset is kept in an 
+            on-disk cache instead of a QuantileDMatrix in memory. Defaults to
+            False.
+        max_bin (int): number of histogram bins for each feature. Defaults to
+            256.
+        parallelizer (Optional[simplify.core.Parallelizer]): used to divide 
+            threads among concurrent tasks. If None, it is created from the 
+            project settings when 'implement' is called. Defaults to None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+                                                
+    """
+    name: str = 'xgboost'
+    contents: Union[Callable, Type, object, str] = 'XGBClassifier'
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    iterations: Union[int, str] = 1
+    module: str = 'xgboost'
+    batch_size: Optional[int] = None
+    quantile: bool = True
+    external_memory: bool = False
+    max_bin: int = 256
+    parallelizer: Optional[simplify.core.Parallelizer] = None
+    parallel: ClassVar[bool] = False
+
+    """ Public Methods """
+
+    def implement(self, project: sourdough.Project) -> sourdough.Project:
+        """Trains a booster on the training data.
+
+        Args:
+            project (sourdough.Project): project with a Dataset in 'data'.
+
+        Returns:
+            sourdough.Project: with 'contents' fitted.
+            
+        """
+        try:
+            self.parameters = self.parameters.finalize(project = project)
+        except AttributeError:
+            pass
+        settings = getattr(project, 'settings', None)
+        if self.parallelizer is None:
+            self.parallelizer = simplify.core.Parallelizer(settings = settings)
+        self.contents = self.fit_candidates(
+            data = project.data,
+            candidates = [dict(self.parameters)],
+            settings = settings)[0]
+        return project
+
+    def fit_candidates(self, 
+            data: simplify.core.Dataset,
+            candidates: Sequence[Mapping[str, Any]],
+            settings: Optional[Mapping[str, Mapping[str, Any]]] = None) -> List[
+                BoosterEstimator]:
+        """Trains one booster for each set of parameters in 'candidates'.
+
+        Every booster is trained on the same cached matrix for the current 
+        fold of 'data'. 'max_bin' is part of the matrix and cannot vary 
+        between candidates.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+            candidates (Sequence[Mapping[str, Any]]): xgboost parameters for
+                each booster.
+            settings (Optional[Mapping[str, Mapping[str, Any]]]): project 
+                settings. Defaults to None.
+
+        Returns:
+            List[BoosterEstimator]: fitted booster for each candidate.
+
+        """
+        xgboost = importlib.import_module('xgboost')
+        if self.parallelizer is None:
+            self.parallelizer = simplify.core.Parallelizer(settings = settings)
+        matrix, classes = self._get_matrix(data = data)
+        estimators = []
+        for candidate in candidates:
+            parameters, rounds = self._get_parameters(
+                candidate = candidate,
+                classes = classes,
+                data = data,
+                settings = settings)
+            booster = xgboost.train(
+                parameters, 
+                matrix, 
+                num_boost_round = rounds)
+            estimators.append(BoosterEstimator(
+                booster = booster, 
+                classes = classes))
+        return estimators
+
+    """ Private Methods """
+
+    def _build_matrix(self, 
+            data: simplify.core.Dataset,
+            classes: Optional[np.ndarray]) -> Any:
+        """Returns an xgboost matrix of the training data in 'data'.
+
+        Rows resampled or weighted by a sampler (see analyst.sample) are 
+        applied, with any row weights passed to the matrix. An external memory
+        matrix keeps its cache in a temporary folder, which is deleted when
+        the matrix is (once it is dropped from the matrix cache and no longer
+        used).
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+            classes (Optional[np.ndarray]): label values for classifiers.
+
+        Returns:
+            Any: xgboost DMatrix or QuantileDMatrix.
+
+        """
+        xgboost = importlib.import_module('xgboost')
+        if isinstance(data, simplify.core.dataset.ChunkedDataset):
+            size = self.batch_size or data.batch_size
+            if self.quantile and not self.external_memory:
+                iterator = _create_iterator(
+                    data = data,
+                    size = size,
+                    classes = classes,
+                    cache_prefix = None)
+                return xgboost.QuantileDMatrix(iterator, max_bin = self.max_bin)
+            folder = tempfile.mkdtemp(prefix = 'xgboost_')
+            iterator = _create_iterator(
+                data = data,
+                size = size,
+                classes = classes,
+                cache_prefix = str(pathlib.Path(folder).joinpath('cache')))
+            matrix = xgboost.DMatrix(iterator)
+            weakref.finalize(matrix, shutil.rmtree, folder, True)
+            return matrix
+        x = data.x_train
+        label = _encode_labels(y = data.y_train, classes = classes)
+        weight = data.train.weights
+        if self.quantile:
+            return xgboost.QuantileDMatrix(
+                x, 
+                label = label, 
+                weight = weight,
+                max_bin = self.max_bin)
+        return xgboost.DMatrix(x, label = label, weight = weight)
+
+    def _count_tasks(self, data: simplify.core.Dataset) -> int:
+        """Returns the number of boosters which may train at the same time.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        Returns:
+            int: number of folds if they are run concurrently, otherwise 1.
+
+        """
+        splits = getattr(data, 'splits', None)
+        if self.parallelizer.backend in ['serial'] or not splits:
+            return 1
+        return len(splits)
+
+    def _get_matrix(self, 
+            data: simplify.core.Dataset) -> Tuple[Any, Optional[np.ndarray]]:
+        """Returns the cached training matrix for 'data' and label values.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        Returns:
+            Tuple[Any, Optional[np.ndarray]]: xgboost matrix and label values
+                (None for regressors).
+
+        """
+        key = simplify.core.caches.matrix_cache.key(
+            transformer = type(self),
+            parameters = {
+                'classifier': self._is_classifier(),
+                'quantile': self.quantile,
+                'external_memory': self.external_memory,
+                'max_bin': self.max_bin},
+            fold = data.fold,
+            upstream = data.fingerprint())
+        cached = simplify.core.caches.matrix_cache.get(key = key)
+        if cached is None:
+            classes = self._get_classes(data = data)
+            cached = (self._build_matrix(data = data, classes = classes), classes)
+            simplify.core.caches.matrix_cache.add(key = key, value = cached)
+        return cached
+
+    def _get_parameters(self, 
+            candidate: Mapping[str, Any],
+            classes: Optional[np.ndarray],
+            data: simplify.core.Dataset,
+            settings: Optional[Mapping[str, Mapping[str, Any]]]) -> Tuple[
+                Dict[str, Any], int]:
+        """Returns native xgboost parameters and the number of rounds.
+
+        Args:
+            candidate (Mapping[str, Any]): parameters for one booster.
+            classes (Optional[np.ndarray]): label values for classifiers.
+            data (simplify.core.Dataset): data container with training data.
+            settings (Optional[Mapping[str, Mapping[str, Any]]]): project 
+                settings.
+
+        Returns:
+            Tuple[Dict[str, Any], int]: parameters for 'xgboost.train' and 
+                the number of boosting rounds.
+
+        """
+        parameters = dict(candidate)
+        rounds = parameters.pop('n_estimators', 100)
+        if 'random_state' in parameters:
+            parameters['seed'] = parameters.pop('random_state')
+        parameters.pop('n_jobs', None)
+        parameters.setdefault('tree_method', 'hist')
+        parameters['max_bin'] = self.max_bin
+        parameters['nthread'] = self.parallelizer.threads_per_task(
+            tasks = self._count_tasks(data = data))
+        try:
+            if settings['general']['gpu']:
+                parameters.setdefault('device', 'cuda')
+        except (KeyError, TypeError):
+            pass
+        if classes is None:
+            parameters.setdefault('objective', 'reg:squarederror')
+        elif len(classes) > 2:
+            parameters.setdefault('objective', 'multi:softprob')
+            parameters['num_class'] = len(classes)
+        else:
+            parameters.setdefault('objective', 'binary:logistic')
+        return parameters, rounds
+
+    def _is_classifier(self) -> bool:
+        """Returns whether 'contents' names an xgboost classifier."""
+        name = getattr(self.contents, '__name__', self.contents)
+        if not isinstance(name, str):
+            return isinstance(self.contents, BoosterEstimator) and (
+                self.contents.classes is not None)
+        return 'Regressor' not in name
+
+
+@dataclasses.dataclass
+class BoosterEstimator(object):
+    """Trained xgboost booster with a scikit-learn style interface.
+
+    Predictions use 'inplace_predict', so no DMatrix is built for new data.
+
+    Args:
+        booster (Any): trained xgboost Booster.
+        classes (Optional[np.ndarray]): label values in the order of the 
+            booster's outputs. None for regressors. Defaults to None.
+
+    """
+    booster: Any
+    classes: Optional[np.ndarray] = None
+
+    """ Properties """
+
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        """Returns the normalized total gain of each feature."""
+        names = self.booster.feature_names or [
+            f'f{i}' for i in range(self.booster.num_features())]
+        scores = self.booster.get_score(importance_type = 'total_gain')
+        importances = np.asarray([scores.get(n, 0.0) for n in names])
+        total = importances.sum()
+        return importances / total if total > 0 else importances
+
+    """ Public Methods """
+
+    def get_booster(self) -> Any:
+        """Returns the xgboost Booster."""
+        return self.booster
+
+    def predict(self, x: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """Returns predicted labels or values for 'x'.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray]): features.
+
+        Returns:
+            np.ndarray: predicted label values for classifiers, otherwise 
+                predicted values.
+
+        """
+        if self.classes is None:
+            return self.booster.inplace_predict(x)
+        return self.classes[np.argmax(self.predict_proba(x), axis = 1)]
+
+    def predict_proba(self, x: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """Returns the probability of each class for 'x'.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray]): features.
+
+        Returns:
+            np.ndarray: array with one column for each of 'classes'.
+
+        """
+        probabilities = self.booster.inplace_predict(x)
+        if probabilities.ndim == 1:
+            return np.column_stack([1 - probabilities, probabilities])
+        return probabilities
+
+    def score(self, 
+            x: Union[pd.DataFrame, np.ndarray], 
+            y: Union[pd.Series, np.ndarray]) -> float:
+        """Returns accuracy for classifiers or R^2 for regressors.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray]): features.
+            y (Union[pd.Series, np.ndarray]): true labels or values.
+
+        Returns:
+            float: score of predictions for 'x'.
+
+        """
+        if self.classes is None:
+            return sklearn.metrics.r2_score(y, self.predict(x))
+        return sklearn.metrics.accuracy_score(y, self.predict(x))
+
+
+def _create_iterator(data: simplify.core.Dataset,
+        size: int,
+        classes: Optional[np.ndarray],
+        cache_prefix: Optional[str]) -> Any:
+    """Returns an xgboost DataIter over batches of a ChunkedDataset.
+
+    The class is created when needed so that xgboost is only imported if it
+    is used.
+
+    Args:
+        data (simplify.core.Dataset): ChunkedDataset to stream.
+        size (int): number of rows in each batch.
+        classes (Optional[np.ndarray]): label values for classifiers.
+        cache_prefix (Optional[str]): path prefix for xgboost's external 
+            memory cache, or None to keep batches in memory.
+
+    Returns:
+        Any: xgboost DataIter instance.
+
+    """
+    xgboost = importlib.import_module('xgboost')
+
+    class BatchIterator(xgboost.DataIter):
+        """Feeds transformed batches of a ChunkedDataset to xgboost."""
+
+        def __init__(self) -> None:
+            self.batches = None
+            super().__init__(cache_prefix = cache_prefix)
+
+        def next(self, input_data: Callable) -> bool:
+            """Passes the next batch to 'input_data'."""
+            if self.batches is None:
+                self.reset()
+            try:
+                x, y = next(self.batches)
+            except StopIteration:
+                return False
+            input_data(data = x, label = _encode_labels(y = y, classes = classes))
+            return True
+
+        def reset(self) -> None:
+            """Restarts from the first batch."""
+            self.batches = iter(data.iter_xy(size = size, training = True))
+            return
+
+    return BatchIterator()
+
+def _encode_labels(y: Union[pd.Series, np.ndarray],
+        classes: Optional[np.ndarray]) -> np.ndarray:
+    """Returns positions of 'y' in 'classes' (or 'y' if 'classes' is None)."""
+    if classes is None:
+        return np.asarray(y)
+    return np.searchsorted(classes, np.asarray(y))
+
+
+for model, algorithm in {
+        'xgboost_classify': 'XGBClassifier',
+        'xgboost_regress': 'XGBRegressor'}.items():
+    models[model] = XGBoostModel(name = model, contents = algorithm)
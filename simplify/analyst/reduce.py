@@ -5,6 +5,16 @@ Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Reduce (Step): wrapper for a feature selection Technique.
+    ColumnSelector (BaseEstimator, SelectorMixin): fitted column mask.
+    SelectionReduce (SklearnTransformer): base class for feature selection
+        which drops columns through DataBunch selections.
+    UnivariateReduce (SelectionReduce): selects features from univariate
+        scores which are cached for each fold.
+    RecursiveReduce (SelectionReduce): recursive feature elimination with
+        importances computed in parallel.
+    CrossValidatedReduce (RecursiveReduce): recursive feature elimination 
+        with the number of features chosen on folds run in parallel.
 
 """
 import dataclasses
@@ -14,8 +24,20 @@ from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
 import numpy as np
 import pandas as pd
 import sklearn
+from sklearn import base as sklearn_base
+from sklearn import feature_selection
+from sklearn import metrics
+from sklearn import model_selection
+from scipy import sparse
 import sourdough
 
+from . import base
+import simplify
+from simplify.utilities import memory
+
+
+reducers = sourdough.types.Library()
+
 
 @dataclasses.dataclass
 class Reduce(sourdough.project.Step):
@@ -48,4 +70,763 @@ class Reduce(sourdough.project.Step):
     iterations: Union[int, str] = 1
     parameters: Mapping[Any, Any] = dataclasses.field(default_factory = dict)
     parallel: ClassVar[bool] = True
-    
\ No newline at end of file
+
+
+class ColumnSelector(sklearn_base.BaseEstimator, 
+                     feature_selection.SelectorMixin):
+    """Fitted mask of the columns kept by a SelectionReduce technique.
+
+    Args:
+        support (Optional[np.ndarray]): boolean mask of selected columns.
+            Defaults to None.
+        ranking (Optional[np.ndarray]): rank of each column, where selected
+            columns have rank 1. Defaults to None.
+        scores (Optional[Dict[int, float]]): mean cross-validated score for 
+            each number of columns, if the number was chosen by 
+            cross-validation. Defaults to None.
+
+    """
+    def __init__(self, 
+            support: Optional[np.ndarray] = None,
+            ranking: Optional[np.ndarray] = None,
+            scores: Optional[Dict[int, float]] = None) -> None:
+        self.support = support
+        self.ranking = ranking
+        self.scores = scores
+
+    def fit(self, 
+            x: Union[pd.DataFrame, np.ndarray], 
+            y: Optional[Union[pd.Series, np.ndarray]] = None) -> (
+                'ColumnSelector'):
+        """Records the number of columns in 'x'."""
+        self.n_features_in_ = x.shape[1]
+        return self
+
+    def _get_support_mask(self) -> np.ndarray:
+        return np.asarray(self.support, dtype = bool)
+
+
+@dataclasses.dataclass
+class SelectionReduce(simplify.externals.SklearnTransformer):
+    """Base class for feature selection which does not copy intermediate data.
+
+    Subclasses set 'contents' to a fitted ColumnSelector in '_fit'. Columns
+    are then dropped from each DataBunch by narrowing its 'selected' column 
+    positions, and 'x' is copied once, when the bunch is materialized (by the
+    next step which reads it), instead of once for every dropped column or 
+    selection step. Only the fitted ColumnSelector is stored in the 
+    transformer cache, since reapplying it copies nothing.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to None.
+        contents (Union[Callable, Type, object, str]): ColumnSelector class 
+            before fitting and a fitted instance after. Defaults to 
+            ColumnSelector.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
+            when the 'implement' method is called. Defaults to an empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+            
+    """
+    name: str = None
+    contents: Union[Callable, Type, object, str] = ColumnSelector
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    module: str = None
+    parallel: ClassVar[bool] = False
+
+    """ Public Methods """
+
+    def apply(self, data: simplify.core.Dataset) -> simplify.core.Dataset:
+        """Selects features in 'data' without a project or the shared caches.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        Returns:
+            simplify.core.Dataset: with unselected columns dropped.
+
+        """
+        self._fit(data = data)
+        for bunch in self._get_bunches(data = data):
+            self._transform_bunch(bunch = bunch)
+        return data
+
+    """ Private Methods """
+
+    def _get_matrix(self, 
+            data: simplify.core.Dataset) -> Union[np.ndarray, sparse.spmatrix]:
+        """Returns the training features as an array or CSR matrix.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        Returns:
+            Union[np.ndarray, sparse.spmatrix]: training features.
+
+        """
+        return memory.to_matrix(data.x_train)
+
+    def _transform_bunch(self, bunch: simplify.core.DataBunch) -> None:
+        """Drops the unselected columns from 'bunch'.
+
+        Args:
+            bunch (simplify.core.DataBunch): bunch to transform.
+
+        """
+        bunch.select(columns = self.contents.get_support())
+        return self
+
+    def _restore_outputs(self, 
+            bunches: List[simplify.core.DataBunch],
+            outputs: None) -> None:
+        """Drops the unselected columns from 'bunches' after a cache hit.
+
+        Args:
+            bunches (List[simplify.core.DataBunch]): bunches to transform.
+            outputs (None): unused.
+
+        """
+        for bunch in bunches:
+            self._transform_bunch(bunch = bunch)
+        return self
+
+    def _store_outputs(self, bunches: List[simplify.core.DataBunch]) -> None:
+        """Returns None, since only the fitted selector is cached."""
+        return None
+
+
+@dataclasses.dataclass
+class UnivariateReduce(SelectionReduce):
+    """Selects features by univariate scores.
+
+    Scores and p-values are computed once for each fold of the data and 
+    stored in 'simplify.core.caches.score_cache', so trying another 'k', 
+    percentile, or alpha (or another 'criterion') does not rescore features.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to 'kbest'.
+        contents (Union[Callable, Type, object, str]): ColumnSelector class 
+            before fitting and a fitted instance after. Defaults to 
+            ColumnSelector.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        parameters (Mapping[Any, Any]]): 'k' (for 'kbest'), 'percentile' (for
+            'percentile'), or 'alpha' (for 'fpr', 'fdr', and 'fwe'). Defaults 
+            to an empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        criterion (str): 'kbest', 'percentile', 'fpr', 'fdr', or 'fwe', which 
+            match the scikit-learn selectors of the same names. Defaults to 
+            'kbest'.
+        score_func (Union[Callable, str]): scoring function or the name of one
+            in sklearn.feature_selection. Defaults to 'f_classif'.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+        criteria (ClassVar[Sequence[str]]): supported values of 'criterion'.
+        cache_attributes (ClassVar[Sequence[str]]): attributes which are part
+            of the transformer cache key.
+            
+    """
+    name: str = 'kbest'
+    contents: Union[Callable, Type, object, str] = ColumnSelector
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    module: str = None
+    criterion: str = 'kbest'
+    score_func: Union[Callable, str] = 'f_classif'
+    parallel: ClassVar[bool] = False
+    criteria: ClassVar[Sequence[str]] = [
+        'kbest', 'percentile', 'fpr', 'fdr', 'fwe']
+    cache_attributes: ClassVar[Sequence[str]] = ['criterion', 'score_func']
+
+    """ Public Methods """
+
+    def score(self, 
+            data: simplify.core.Dataset) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns scores and p-values of the training features in 'data'.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: score and p-value for each column.
+                P-values are NaN if 'score_func' only returns scores.
+
+        """
+        score_func = self._get_score_func()
+        key = simplify.core.caches.score_cache.key(
+            transformer = UnivariateReduce,
+            parameters = {'score_func': _get_name(score_func)},
+            fold = data.fold,
+            upstream = data.fingerprint())
+        cached = simplify.core.caches.score_cache.get(key = key)
+        if cached is None:
+            result = score_func(self._get_matrix(data = data), data.y_train)
+            if isinstance(result, tuple):
+                scores, pvalues = result
+            else:
+                scores, pvalues = result, np.full(len(result), np.nan)
+            cached = (np.asarray(scores), np.asarray(pvalues))
+            simplify.core.caches.score_cache.add(key = key, value = cached)
+        return cached
+
+    """ Private Methods """
+
+    def _fit(self, data: simplify.core.Dataset) -> None:
+        """Selects columns from the (possibly cached) scores for 'data'.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        """
+        scores, pvalues = self.score(data = data)
+        self.contents = ColumnSelector(
+            support = self._get_support(scores = scores, pvalues = pvalues))
+        self.contents.fit(data.x_train)
+        return self
+
+    def _get_score_func(self) -> Callable:
+        """Returns 'score_func', importing it if it is a name."""
+        if isinstance(self.score_func, str):
+            return getattr(feature_selection, self.score_func)
+        return self.score_func
+
+    def _get_support(self, 
+            scores: np.ndarray, 
+            pvalues: np.ndarray) -> np.ndarray:
+        """Returns a boolean mask of the columns meeting 'criterion'.
+
+        Args:
+            scores (np.ndarray): score for each column.
+            pvalues (np.ndarray): p-value for each column.
+
+        Returns:
+            np.ndarray: boolean mask of selected columns.
+
+        Raises:
+            ValueError: if 'criterion' is not in 'criteria'.
+
+        """
+        if self.criterion not in self.criteria:
+            raise ValueError(
+                f'criterion must be one of {", ".join(self.criteria)}')
+        count = len(scores)
+        support = np.zeros(count, dtype = bool)
+        if self.criterion in ['kbest', 'percentile']:
+            if self.criterion in ['kbest']:
+                k = self.parameters.get('k', 10)
+                k = count if k in ['all'] else min(k, count)
+            else:
+                percentile = self.parameters.get('percentile', 10)
+                k = int(np.ceil(count * percentile / 100))
+            if k > 0:
+                scores = np.where(np.isnan(scores), -np.inf, scores)
+                support[np.argsort(scores, kind = 'mergesort')[-k:]] = True
+            return support
+        alpha = self.parameters.get('alpha', 0.05)
+        if self.criterion in ['fpr']:
+            return pvalues < alpha
+        elif self.criterion in ['fwe']:
+            return pvalues < alpha / count
+        ordered = np.sort(pvalues)
+        passed = ordered[ordered <= alpha * np.arange(1, count + 1) / count]
+        if passed.size == 0:
+            return support
+        return pvalues <= passed.max()
+
+
+@dataclasses.dataclass
+class RecursiveReduce(SelectionReduce):
+    """Recursive feature elimination with importances computed in parallel.
+
+    At each step 'estimator' is fit to the remaining columns and the columns 
+    with the lowest importances are eliminated. Importances are either the 
+    model's own ('coef_' or 'feature_importances_') or permutation 
+    importances, which are computed for blocks of columns concurrently by a
+    Parallelizer using the project settings. Each step fits on positions of
+    the training array rather than on a DataFrame with columns dropped. Row 
+    weights of the training data (see WeightSample) are passed to 'estimator'
+    as 'sample_weight'.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to 'rfe'.
+        contents (Union[Callable, Type, object, str]): ColumnSelector class 
+            before fitting and a fitted instance after. Defaults to 
+            ColumnSelector.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        parameters (Mapping[Any, Any]]): 'n_features_to_select' (a number of 
+            columns or a fraction of them) and 'step' (columns eliminated at 
+            each step, or a fraction of the remaining columns). Defaults to an 
+            empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        estimator (Any): scikit-learn compatible estimator (or its class) 
+            which is cloned at every step. Defaults to None.
+        importance (str): 'model' or 'permutation'. Defaults to 'model'.
+        repeats (int): number of shuffles of each column for permutation 
+            importance. Defaults to 5.
+        seed (Optional[int]): random seed for permutations. Defaults to None.
+        parallelizer (Optional[simplify.core.Parallelizer]): computes 
+            permutation importances. If None, it is created from the project 
+            settings when 'implement' is called. Defaults to None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+        cache_attributes (ClassVar[Sequence[str]]): attributes which are part
+            of the transformer cache key.
+            
+    """
+    name: str = 'rfe'
+    contents: Union[Callable, Type, object, str] = ColumnSelector
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    module: str = None
+    estimator: Any = None
+    importance: str = 'model'
+    repeats: int = 5
+    seed: Optional[int] = None
+    parallelizer: Optional[simplify.core.Parallelizer] = None
+    parallel: ClassVar[bool] = False
+    cache_attributes: ClassVar[Sequence[str]] = [
+        'estimator', 
+        'importance', 
+        'repeats', 
+        'seed']
+
+    """ Public Methods """
+
+    def implement(self, project: sourdough.Project) -> sourdough.Project:
+        """Eliminates features using the training data.
+
+        Args:
+            project (sourdough.Project): project with a Dataset in 'data'.
+
+        Returns:
+            sourdough.Project: with unselected columns dropped.
+            
+        """
+        if self.parallelizer is None:
+            self.parallelizer = simplify.core.Parallelizer(
+                settings = getattr(project, 'settings', None))
+        return super().implement(project = project)
+
+    """ Private Methods """
+
+    def _fit(self, data: simplify.core.Dataset) -> None:
+        """Eliminates columns until 'n_features_to_select' remain.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        Raises:
+            ValueError: if 'estimator' is not set.
+
+        """
+        if self.estimator is None:
+            raise ValueError('estimator must be set for feature elimination')
+        if self.parallelizer is None:
+            self.parallelizer = simplify.core.Parallelizer(backend = 'serial')
+        x = self._get_matrix(data = data)
+        target = self._get_count(
+            value = self.parameters.get('n_features_to_select', 10),
+            total = x.shape[1])
+        return self._select(
+            x = x, 
+            y = np.asarray(data.y_train), 
+            weights = data.train.weights, 
+            target = target)
+
+    def _select(self,
+            x: Union[np.ndarray, sparse.spmatrix], 
+            y: np.ndarray,
+            weights: Optional[np.ndarray],
+            target: int,
+            scores: Optional[Dict[int, float]] = None) -> None:
+        """Sets 'contents' to the 'target' columns left by elimination.
+
+        Args:
+            x (Union[np.ndarray, sparse.spmatrix]): training features.
+            y (np.ndarray): training labels.
+            weights (Optional[np.ndarray]): weight of each training row. 
+            target (int): number of columns to select.
+            scores (Optional[Dict[int, float]]): cross-validated score for 
+                each number of columns. Defaults to None.
+
+        """
+        count = x.shape[1]
+        path, _ = self._eliminate(
+            x = x, 
+            y = y, 
+            weights = weights, 
+            target = target,
+            parallelizer = self.parallelizer)
+        ranking = np.ones(count, dtype = int)
+        for active in path[1:]:
+            support = np.zeros(count, dtype = bool)
+            support[active] = True
+            ranking[~support] += 1
+        support = np.zeros(count, dtype = bool)
+        support[path[-1]] = True
+        self.contents = ColumnSelector(
+            support = support, 
+            ranking = ranking, 
+            scores = scores)
+        self.contents.fit(x)
+        return self
+
+    def _eliminate(self,
+            x: Union[np.ndarray, sparse.spmatrix], 
+            y: np.ndarray,
+            weights: Optional[np.ndarray],
+            target: int,
+            parallelizer: simplify.core.Parallelizer,
+            test: Optional[Tuple[Any, np.ndarray]] = None,
+            scorer: Optional[Callable] = None) -> Tuple[
+                List[np.ndarray], List[float]]:
+        """Eliminates columns of 'x' until 'target' remain.
+
+        Args:
+            x (Union[np.ndarray, sparse.spmatrix]): training features.
+            y (np.ndarray): training labels.
+            weights (Optional[np.ndarray]): weight of each training row. 
+            target (int): number of columns to keep.
+            parallelizer (simplify.core.Parallelizer): computes permutation
+                importances.
+            test (Optional[Tuple[Any, np.ndarray]]): features and labels on 
+                which the estimator fit to each set of remaining columns is 
+                scored. Defaults to None.
+            scorer (Optional[Callable]): scikit-learn scorer used with 'test'.
+                Defaults to None.
+
+        Returns:
+            Tuple[List[np.ndarray], List[float]]: positions of the remaining
+                columns before and after each step and, if 'test' is passed, 
+                the score for each of them.
+
+        """
+        keywords = {} if weights is None else {'sample_weight': weights}
+        active = np.arange(x.shape[1])
+        path = [active]
+        scores = []
+        while True:
+            finished = len(active) <= target
+            if finished and test is None:
+                break
+            subset = x[:, active]
+            estimator = self._create_estimator().fit(subset, y, **keywords)
+            if test is not None:
+                x_test, y_test = test
+                scores.append(
+                    float(scorer(estimator, x_test[:, active], y_test)))
+            if finished:
+                break
+            step = self._get_count(
+                value = self.parameters.get('step', 1),
+                total = len(active))
+            importances = self._get_importances(
+                estimator = estimator,
+                x = subset, 
+                y = y, 
+                weights = weights,
+                parallelizer = parallelizer)
+            eliminated = np.argsort(importances, kind = 'mergesort')[
+                :min(step, len(active) - target)]
+            active = np.delete(active, eliminated)
+            path.append(active)
+        return path, scores
+
+    def _create_estimator(self) -> Any:
+        """Returns a new, unfitted copy of 'estimator'."""
+        if isinstance(self.estimator, type):
+            return self.estimator()
+        return sklearn_base.clone(self.estimator)
+
+    def _get_count(self, value: Union[int, float], total: int) -> int:
+        """Returns 'value' as a number of columns out of 'total'."""
+        if isinstance(value, float) and 0 < value < 1:
+            return max(1, int(value * total))
+        return max(1, min(int(value), total))
+
+    def _get_importances(self, 
+            estimator: Any,
+            x: Union[np.ndarray, sparse.spmatrix], 
+            y: np.ndarray,
+            weights: Optional[np.ndarray],
+            parallelizer: simplify.core.Parallelizer) -> np.ndarray:
+        """Returns the importance of each column in 'x'.
+
+        Args:
+            estimator (Any): estimator fit to 'x'.
+            x (Union[np.ndarray, sparse.spmatrix]): remaining training 
+                features.
+            y (np.ndarray): training labels.
+            weights (Optional[np.ndarray]): weight of each training row. 
+            parallelizer (simplify.core.Parallelizer): computes permutation
+                importances.
+
+        Returns:
+            np.ndarray: importance of each column.
+
+        Raises:
+            ValueError: if 'importance' is 'model' and the estimator has 
+                neither 'coef_' nor 'feature_importances_'.
+
+        """
+        if self.importance in ['permutation']:
+            blocks = np.array_split(
+                np.arange(x.shape[1]), 
+                parallelizer.workers(tasks = x.shape[1]))
+            results = parallelizer.map(
+                process = _permutation_importance,
+                items = blocks,
+                shared = (
+                    estimator, x, y, weights, self.repeats, self.seed,
+                    parallelizer.backend not in ['thread']))
+            return np.concatenate(results)
+        elif hasattr(estimator, 'coef_'):
+            coefficients = np.abs(np.asarray(estimator.coef_))
+            if coefficients.ndim > 1:
+                return coefficients.sum(axis = 0)
+            return coefficients
+        elif hasattr(estimator, 'feature_importances_'):
+            return np.asarray(estimator.feature_importances_)
+        raise ValueError(
+            'estimator must have coef_ or feature_importances_ unless '
+            'importance is permutation')
+
+
+@dataclasses.dataclass
+class CrossValidatedReduce(RecursiveReduce):
+    """Recursive feature elimination with the count chosen by cross-validation.
+
+    Each fold of the training data is eliminated down to 
+    'min_features_to_select' columns, scoring the estimator fit to every
+    set of remaining columns on the fold's held-out rows. Folds are 
+    independent tasks run by the Parallelizer, so they are eliminated 
+    concurrently with either kind of importance (permutation importances
+    within a fold are then computed serially). The number of columns with 
+    the best mean score (the fewest, if tied) is then selected by 
+    eliminating on all of the training data. Folds come from the shared 
+    split registry.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to 'rfecv'.
+        contents (Union[Callable, Type, object, str]): ColumnSelector class 
+            before fitting and a fitted instance after. Defaults to 
+            ColumnSelector.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        parameters (Mapping[Any, Any]]): 'min_features_to_select' (a number 
+            of columns or a fraction of them) and 'step' (columns eliminated 
+            at each step, or a fraction of the remaining columns). Defaults to
+            an empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        estimator (Any): scikit-learn compatible estimator (or its class) 
+            which is cloned at every step. Defaults to None.
+        importance (str): 'model' or 'permutation'. Defaults to 'model'.
+        repeats (int): number of shuffles of each column for permutation 
+            importance. Defaults to 5.
+        seed (Optional[int]): random seed for permutations. Defaults to None.
+        parallelizer (Optional[simplify.core.Parallelizer]): runs the folds. 
+            If None, it is created from the project settings when 'implement'
+            is called. Defaults to None.
+        cv (Any): number of folds or a scikit-learn splitter. Defaults to 5.
+        scoring (Optional[Union[str, Callable]]): scikit-learn scoring name or
+            scorer. Defaults to None, which uses the estimator's 'score' 
+            method.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+        cache_attributes (ClassVar[Sequence[str]]): attributes which are part
+            of the transformer cache key.
+            
+    """
+    name: str = 'rfecv'
+    contents: Union[Callable, Type, object, str] = ColumnSelector
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    module: str = None
+    estimator: Any = None
+    importance: str = 'model'
+    repeats: int = 5
+    seed: Optional[int] = None
+    parallelizer: Optional[simplify.core.Parallelizer] = None
+    cv: Any = 5
+    scoring: Optional[Union[str, Callable]] = None
+    parallel: ClassVar[bool] = False
+    cache_attributes: ClassVar[Sequence[str]] = [
+        'estimator', 
+        'importance', 
+        'repeats', 
+        'seed',
+        'cv',
+        'scoring']
+
+    """ Private Methods """
+
+    def _fit(self, data: simplify.core.Dataset) -> None:
+        """Selects the number of columns with the best cross-validated score.
+
+        The mean score for each number of columns is stored in 'scores' of
+        'contents'.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        Raises:
+            ValueError: if 'estimator' is not set.
+
+        """
+        if self.estimator is None:
+            raise ValueError('estimator must be set for feature elimination')
+        if self.parallelizer is None:
+            self.parallelizer = simplify.core.Parallelizer(backend = 'serial')
+        x = self._get_matrix(data = data)
+        y = np.asarray(data.y_train)
+        weights = data.train.weights
+        minimum = self._get_count(
+            value = self.parameters.get('min_features_to_select', 1),
+            total = x.shape[1])
+        splitter = model_selection.check_cv(
+            self.cv, 
+            y, 
+            classifier = sklearn_base.is_classifier(self._create_estimator()))
+        folds = simplify.core.split_registry.get(
+            splitter = splitter, 
+            x = x, 
+            y = y)
+        results = self.parallelizer.map(
+            process = _eliminate_fold,
+            items = folds,
+            shared = (self, x, y, weights, minimum))
+        counts = [len(active) for active in results[0][0]]
+        means = np.mean([scores for _, scores in results], axis = 0)
+        scores = dict(zip(counts, means.tolist()))
+        best = max(counts, key = lambda c: (scores[c], -c))
+        return self._select(
+            x = x, 
+            y = y, 
+            weights = weights, 
+            target = best, 
+            scores = scores)
+
+
+def _eliminate_fold(
+        shared: Tuple[CrossValidatedReduce, Union[np.ndarray, sparse.spmatrix], 
+                      np.ndarray, Optional[np.ndarray], int],
+        fold: Tuple[np.ndarray, np.ndarray]) -> Tuple[
+            List[np.ndarray], List[float]]:
+    """Eliminates columns on one fold and scores each set of columns.
+
+    This is a module-level function so that it can be sent to worker 
+    processes.
+
+    Args:
+        shared (Tuple[CrossValidatedReduce, Union[np.ndarray, 
+            sparse.spmatrix], np.ndarray, Optional[np.ndarray], int]): the
+            reducer, training features, labels, row weights, and the number
+            of columns to eliminate down to.
+        fold (Tuple[np.ndarray, np.ndarray]): train and test row positions.
+
+    Returns:
+        Tuple[List[np.ndarray], List[float]]: positions of the remaining 
+            columns before and after each step and the held-out score for 
+            each of them.
+
+    """
+    reducer, x, y, weights, minimum = shared
+    train, test = fold
+    return reducer._eliminate(
+        x = x[train], 
+        y = y[train], 
+        weights = None if weights is None else np.asarray(weights)[train],
+        target = minimum,
+        parallelizer = simplify.core.Parallelizer(backend = 'serial'),
+        test = (x[test], y[test]),
+        scorer = metrics.check_scoring(
+            reducer._create_estimator(), 
+            scoring = reducer.scoring))
+
+def _get_name(item: Any) -> str:
+    """Returns a qualified name for a function or other object."""
+    try:
+        return '.'.join([item.__module__, item.__qualname__])
+    except AttributeError:
+        return repr(item)
+
+def _permutation_importance(
+        shared: Tuple[Any, Union[np.ndarray, sparse.spmatrix], np.ndarray, 
+                      Optional[np.ndarray], int, Optional[int], bool], 
+        columns: np.ndarray) -> np.ndarray:
+    """Returns the drop in score when each of 'columns' is shuffled.
+
+    Dense features are shuffled one column at a time in place and restored,
+    so only that column is copied. If the features are shared with tasks 
+    running in other threads, the task first takes its own copy. Sparse 
+    features are never changed or densified: each shuffle is scored on the
+    sum of the features and a sparse matrix of the changes to the column.
+
+    Args:
+        shared (Tuple[Any, Union[np.ndarray, sparse.spmatrix], np.ndarray, 
+            Optional[np.ndarray], int, Optional[int], bool]): fitted 
+            estimator, features, labels, row weights, number of repeats, 
+            random seed, and whether the features are private to the task 
+            (not shared with other threads).
+        columns (np.ndarray): positions of the columns to shuffle.
+
+    Returns:
+        np.ndarray: mean decrease in score for each of 'columns'.
+
+    """
+    estimator, x, y, weights, repeats, seed, private = shared
+    is_sparse = sparse.issparse(x)
+    if not is_sparse and not private:
+        x = np.array(x)
+    keywords = {} if weights is None else {'sample_weight': weights}
+    baseline = estimator.score(x, y, **keywords)
+    generator = np.random.default_rng(seed)
+    importances = np.empty(len(columns))
+    for i, column in enumerate(columns):
+        if is_sparse:
+            original = x[:, [column]].toarray().ravel()
+        else:
+            original = x[:, column].copy()
+        drops = []
+        for _ in range(repeats):
+            shuffled = generator.permutation(original)
+            if is_sparse:
+                changed = np.flatnonzero(shuffled != original)
+                changes = sparse.csr_matrix(
+                    (shuffled[changed] - original[changed], 
+                     (changed, np.full(len(changed), column))),
+                    shape = x.shape)
+                score = estimator.score(x + changes, y, **keywords)
+            else:
+                x[:, column] = shuffled
+                score = estimator.score(x, y, **keywords)
+            drops.append(baseline - score)
+        if not is_sparse:
+            x[:, column] = original
+        importances[i] = np.mean(drops)
+    return importances
+
+
+for criterion in UnivariateReduce.criteria:
+    reducers[criterion] = UnivariateReduce(
+        name = criterion, 
+        criterion = criterion)
+reducers['rfe'] = RecursiveReduce()
+reducers['rfecv'] = CrossValidatedReduce()
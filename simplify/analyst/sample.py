@@ -5,8 +5,17 @@ Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Sample (Step): wrapper for a resampling Technique.
+    IndexSample (Technique): base class for resampling which selects rows of
+        the training data by position instead of copying them.
+    RandomUnderSample, RandomOverSample (IndexSample): random resampling of
+        each class.
+    WeightSample (IndexSample): weights rows by class instead of resampling.
+    ChunkedSMOTE (IndexSample): SMOTE which synthesizes minority rows in 
+        batches.
 
 """
+import abc
 import dataclasses
 from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping, 
                     Optional, Sequence, Tuple, Type, Union)
@@ -14,7 +23,15 @@ from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
 import numpy as np
 import pandas as pd
 import sklearn
+from sklearn import neighbors
+from scipy import sparse
 import sourdough
+
+from . import base
+import simplify
+
+
+samplers = sourdough.types.Library()
     
 
 @dataclasses.dataclass
@@ -48,4 +65,493 @@ class Sample(sourdough.project.Step):
     iterations: Union[int, str] = 1
     parameters: Mapping[Any, Any] = dataclasses.field(default_factory = dict)
     parallel: ClassVar[bool] = True
-    
\ No newline at end of file
+
+
+@dataclasses.dataclass
+class IndexSample(simplify.core.Technique, abc.ABC):
+    """Base class for resampling the training data by row positions.
+
+    Subclasses return an array of row positions (which may repeat) from 
+    '_get_rows' and the training DataBunch is resampled with it lazily (see
+    DataBunch.resample), so no copy of the training data is made for each 
+    fold. The rows are gathered once when a model is fit, or batch by batch 
+    if the model is trained in batches. The testing data is never resampled.
+
+    'parameters' are read like those of the imbalanced-learn samplers they 
+    replace: 'sampling_strategy' is 'auto' (balance every class with the 
+    majority or minority class), a float (the ratio of minority to majority
+    rows for binary labels), or a dict of the number of rows for each class,
+    and 'random_state' is the random seed.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to None.
+        contents (Union[Callable, Type, object, str]): unused. Defaults to 
+            None.
+        parameters (Union[Mapping[str, Any], base.Parameters]): sampling
+            parameters. Defaults to an empty Parameters instance.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+            
+    """
+    name: str = None
+    contents: Union[Callable, Type, object, str] = None
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    iterations: Union[int, str] = 1
+    module: str = None
+    parallel: ClassVar[bool] = False
+
+    """ Public Methods """
+
+    def implement(self, project: sourdough.Project) -> sourdough.Project:
+        """Resamples the training data in 'project'.
+
+        Args:
+            project (sourdough.Project): project with a Dataset in 'data'.
+
+        Returns:
+            sourdough.Project: with resampled training data.
+            
+        """
+        try:
+            self.parameters = self.parameters.finalize(project = project)
+        except AttributeError:
+            pass
+        data = project.data
+        upstream = data.fingerprint()
+        self._resample(bunch = data.train)
+        data.lineage = simplify.core.caches.fingerprint(
+            upstream, 
+            self.name, 
+            sorted((str(k), repr(v)) for k, v in dict(self.parameters).items()))
+        project.data = data
+        return project
+
+    """ Private Methods """
+
+    @abc.abstractmethod
+    def _get_rows(self, y: np.ndarray) -> np.ndarray:
+        """Returns positions of the rows of the resampled training data.
+
+        Args:
+            y (np.ndarray): training labels.
+
+        Returns:
+            np.ndarray: row positions, which may repeat.
+
+        """
+        pass
+
+    def _get_targets(self, 
+            classes: np.ndarray, 
+            counts: np.ndarray,
+            over: bool) -> Dict[Any, int]:
+        """Returns the number of rows wanted for each class.
+
+        Args:
+            classes (np.ndarray): label values.
+            counts (np.ndarray): number of rows of each class.
+            over (bool): whether rows are added to smaller classes (True) or
+                removed from larger classes (False).
+
+        Returns:
+            Dict[Any, int]: number of rows for each class.
+
+        Raises:
+            ValueError: if a float 'sampling_strategy' is used with more than
+                two classes.
+
+        """
+        strategy = self.parameters.get('sampling_strategy', 'auto')
+        if isinstance(strategy, Mapping):
+            targets = dict(zip(classes, counts))
+            targets.update(strategy)
+            return targets
+        elif isinstance(strategy, float):
+            if len(classes) != 2:
+                raise ValueError(
+                    'a float sampling_strategy requires binary labels')
+            minority, majority = np.argmin(counts), np.argmax(counts)
+            targets = dict(zip(classes, counts))
+            if over:
+                targets[classes[minority]] = max(
+                    counts[minority], int(strategy * counts[majority]))
+            else:
+                targets[classes[majority]] = min(
+                    counts[majority], int(counts[minority] / strategy))
+            return targets
+        target = counts.max() if over else counts.min()
+        return {c: target for c in classes}
+
+    def _resample(self, bunch: simplify.core.DataBunch) -> None:
+        """Resamples the rows of 'bunch' by position.
+
+        Args:
+            bunch (simplify.core.DataBunch): training data.
+
+        """
+        bunch.resample(rows = self._get_rows(y = _get_labels(bunch = bunch)))
+        return self
+
+
+@dataclasses.dataclass
+class RandomUnderSample(IndexSample):
+    """Removes random rows from larger classes.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to 
+            'random_under'.
+        contents (Union[Callable, Type, object, str]): unused. Defaults to 
+            None.
+        parameters (Union[Mapping[str, Any], base.Parameters]): sampling
+            parameters. Defaults to an empty Parameters instance.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+            
+    """
+    name: str = 'random_under'
+    contents: Union[Callable, Type, object, str] = None
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    iterations: Union[int, str] = 1
+    module: str = None
+    parallel: ClassVar[bool] = False
+
+    """ Private Methods """
+
+    def _get_rows(self, y: np.ndarray) -> np.ndarray:
+        """Returns positions of a random subset of each class.
+
+        Args:
+            y (np.ndarray): training labels.
+
+        Returns:
+            np.ndarray: sorted row positions.
+
+        """
+        generator = np.random.default_rng(self.parameters.get('random_state'))
+        classes, codes, counts = np.unique(
+            y, 
+            return_inverse = True, 
+            return_counts = True)
+        targets = self._get_targets(
+            classes = classes, 
+            counts = counts, 
+            over = False)
+        rows = []
+        for i, label in enumerate(classes):
+            positions = np.flatnonzero(codes == i)
+            count = min(targets[label], counts[i])
+            rows.append(generator.choice(positions, count, replace = False))
+        return np.sort(np.concatenate(rows))
+
+
+@dataclasses.dataclass
+class RandomOverSample(IndexSample):
+    """Repeats random rows of smaller classes.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to 
+            'random_over'.
+        contents (Union[Callable, Type, object, str]): unused. Defaults to 
+            None.
+        parameters (Union[Mapping[str, Any], base.Parameters]): sampling
+            parameters. Defaults to an empty Parameters instance.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+            
+    """
+    name: str = 'random_over'
+    contents: Union[Callable, Type, object, str] = None
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    iterations: Union[int, str] = 1
+    module: str = None
+    parallel: ClassVar[bool] = False
+
+    """ Private Methods """
+
+    def _get_rows(self, y: np.ndarray) -> np.ndarray:
+        """Returns every row position followed by repeated minority rows.
+
+        Args:
+            y (np.ndarray): training labels.
+
+        Returns:
+            np.ndarray: row positions.
+
+        """
+        generator = np.random.default_rng(self.parameters.get('random_state'))
+        classes, codes, counts = np.unique(
+            y, 
+            return_inverse = True, 
+            return_counts = True)
+        targets = self._get_targets(
+            classes = classes, 
+            counts = counts, 
+            over = True)
+        rows = [np.arange(len(y))]
+        for i, label in enumerate(classes):
+            extra = targets[label] - counts[i]
+            if extra > 0:
+                positions = np.flatnonzero(codes == i)
+                rows.append(generator.choice(positions, extra, replace = True))
+        return np.concatenate(rows)
+
+
+@dataclasses.dataclass
+class WeightSample(IndexSample):
+    """Weights rows so each class has equal total weight.
+
+    This is an alternative to resampling which leaves the training data 
+    unchanged: the weights are passed to the model as 'sample_weight'. 
+    'sampling_strategy' may also be a dict of the weight for each class.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to 
+            'class_weight'.
+        contents (Union[Callable, Type, object, str]): unused. Defaults to 
+            None.
+        parameters (Union[Mapping[str, Any], base.Parameters]): sampling
+            parameters. Defaults to an empty Parameters instance.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+            
+    """
+    name: str = 'class_weight'
+    contents: Union[Callable, Type, object, str] = None
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    iterations: Union[int, str] = 1
+    module: str = None
+    parallel: ClassVar[bool] = False
+
+    """ Private Methods """
+
+    def _get_rows(self, y: np.ndarray) -> np.ndarray:
+        """Returns every row position (rows are weighted, not resampled)."""
+        return np.arange(len(y))
+
+    def _get_weights(self, y: np.ndarray) -> np.ndarray:
+        """Returns the weight of each row.
+
+        Args:
+            y (np.ndarray): training labels.
+
+        Returns:
+            np.ndarray: weight of each row.
+
+        """
+        classes, codes, counts = np.unique(
+            y, 
+            return_inverse = True, 
+            return_counts = True)
+        strategy = self.parameters.get('sampling_strategy', 'auto')
+        if isinstance(strategy, Mapping):
+            weights = np.asarray([strategy.get(c, 1.0) for c in classes])
+        else:
+            weights = len(y) / (len(classes) * counts)
+        return weights[codes].astype(np.float64)
+
+    def _resample(self, bunch: simplify.core.DataBunch) -> None:
+        """Sets 'weights' of 'bunch'.
+
+        Args:
+            bunch (simplify.core.DataBunch): training data.
+
+        """
+        bunch.weights = self._get_weights(y = _get_labels(bunch = bunch))
+        return self
+
+
+@dataclasses.dataclass
+class ChunkedSMOTE(IndexSample):
+    """SMOTE which synthesizes minority rows in batches.
+
+    A nearest neighbors index is built from the rows of each smaller class 
+    only. Synthetic rows are created 'batch_size' at a time, each between a 
+    random row and one of its 'k_neighbors' nearest neighbors in the same 
+    class, and written directly into the preallocated resampled matrix, so 
+    the training data is copied once rather than converted, stacked, and 
+    rebuilt. Sparse data is kept sparse. All features must be numeric. If 
+    the rows have weights (see WeightSample), each synthetic row is weighted
+    by interpolating the weights of its two rows in the same way.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to 'smote'.
+        contents (Union[Callable, Type, object, str]): unused. Defaults to 
+            None.
+        parameters (Union[Mapping[str, Any], base.Parameters]): sampling
+            parameters, which may also include 'k_neighbors'. Defaults to an
+            empty Parameters instance.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        batch_size (int): number of synthetic rows created at a time. 
+            Defaults to 10000.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+            
+    """
+    name: str = 'smote'
+    contents: Union[Callable, Type, object, str] = None
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    iterations: Union[int, str] = 1
+    module: str = None
+    batch_size: int = 10000
+    parallel: ClassVar[bool] = False
+
+    """ Private Methods """
+
+    def _get_rows(self, y: np.ndarray) -> np.ndarray:
+        """Returns every row position (new rows are synthesized instead)."""
+        return np.arange(len(y))
+
+    def _iter_synthetic(self, 
+            x: Union[np.ndarray, sparse.spmatrix], 
+            count: int,
+            generator: np.random.Generator,
+            weights: Optional[np.ndarray] = None) -> Iterable[Tuple[
+                Union[np.ndarray, sparse.spmatrix], Optional[np.ndarray]]]:
+        """Yields batches of rows synthesized from the rows of 'x'.
+
+        Args:
+            x (Union[np.ndarray, sparse.spmatrix]): rows of one class.
+            count (int): number of rows to synthesize.
+            generator (np.random.Generator): random number generator.
+            weights (Optional[np.ndarray]): weight of each row of 'x'. 
+                Defaults to None.
+
+        Yields:
+            Tuple[Union[np.ndarray, sparse.spmatrix], Optional[np.ndarray]]: 
+                the next batch of rows and their weights (None if 'weights' is
+                None).
+
+        """
+        k = min(self.parameters.get('k_neighbors', 5), x.shape[0] - 1)
+        if k < 1:
+            raise ValueError('SMOTE needs at least 2 rows in each class')
+        index = neighbors.NearestNeighbors(n_neighbors = k + 1).fit(x)
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            samples = generator.integers(0, x.shape[0], size = size)
+            _, nearest = index.kneighbors(x[samples])
+            chosen = nearest[
+                np.arange(size), 
+                generator.integers(1, k + 1, size = size)]
+            gaps = generator.random(size)[:, np.newaxis]
+            batch_weights = None
+            if weights is not None:
+                batch_weights = weights[samples] + gaps.ravel() * (
+                    weights[chosen] - weights[samples])
+            if sparse.issparse(x):
+                gaps = sparse.diags(gaps.ravel())
+                yield (
+                    (x[samples] + gaps @ (x[chosen] - x[samples])).tocsr(),
+                    batch_weights)
+            else:
+                yield (
+                    x[samples] + gaps * (x[chosen] - x[samples]), 
+                    batch_weights)
+
+    def _resample(self, bunch: simplify.core.DataBunch) -> None:
+        """Adds synthetic rows of the smaller classes to 'bunch'.
+
+        Args:
+            bunch (simplify.core.DataBunch): training data.
+
+        """
+        bunch.materialize()
+        generator = np.random.default_rng(self.parameters.get('random_state'))
+        y = _get_labels(bunch = bunch)
+        classes, codes, counts = np.unique(
+            y, 
+            return_inverse = True, 
+            return_counts = True)
+        targets = self._get_targets(
+            classes = classes, 
+            counts = counts, 
+            over = True)
+        extras = {
+            i: targets[c] - counts[i] 
+            for i, c in enumerate(classes) if targets[c] > counts[i]}
+        if not extras:
+            return self
+        x = bunch.x
+        values = x if sparse.issparse(x) else np.asarray(x, dtype = np.float64)
+        total = len(y) + sum(extras.values())
+        labels = np.empty(total, dtype = y.dtype)
+        labels[:len(y)] = y
+        weights = None
+        if bunch.weights is not None:
+            weights = np.empty(total, dtype = np.float64)
+            weights[:len(y)] = bunch.weights
+        if sparse.issparse(x):
+            batches = [x]
+        else:
+            output = np.empty((total, x.shape[1]), dtype = np.float64)
+            output[:len(y)] = values
+        position = len(y)
+        for i, count in extras.items():
+            members = np.flatnonzero(codes == i)
+            for batch, batch_weights in self._iter_synthetic(
+                    x = values[members], 
+                    count = count, 
+                    generator = generator,
+                    weights = None if weights is None else weights[members]):
+                stop = position + batch.shape[0]
+                if sparse.issparse(x):
+                    batches.append(batch)
+                else:
+                    output[position:stop] = batch
+                labels[position:stop] = classes[i]
+                if weights is not None:
+                    weights[position:stop] = batch_weights
+                position = stop
+        if sparse.issparse(x):
+            bunch.x = sparse.vstack(batches, format = 'csr')
+        elif isinstance(x, pd.DataFrame):
+            bunch.x = pd.DataFrame(output, columns = x.columns)
+        else:
+            bunch.x = output
+        if isinstance(bunch.y, pd.Series):
+            bunch.y = pd.Series(labels, name = bunch.y.name)
+        else:
+            bunch.y = labels
+        bunch.weights = weights
+        return self
+
+
+def _get_labels(bunch: simplify.core.DataBunch) -> np.ndarray:
+    """Returns the labels of the current rows of 'bunch'."""
+    y = np.asarray(bunch.y)
+    if bunch.rows is not None:
+        y = y[bunch.rows]
+    return y
+
+
+for sampler in [RandomUnderSample, RandomOverSample, WeightSample, ChunkedSMOTE]:
+    samplers[sampler.name] = sampler()
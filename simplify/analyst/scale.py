@@ -5,6 +5,13 @@ Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Scale (Step): wrapper for a scaling Technique.
+    StreamingScale (SklearnTransformer): base class for scalers which can be
+        fit and applied in batches.
+    SketchScale (StreamingScale): base class for scalers fit on a sample of
+        rows when streaming.
+    MinMaxScale, MaxAbsoluteScale, NormalizeScale, QuantileScale, 
+        RobustScale, StandardScale: scikit-learn scalers.
 
 """
 import abc
@@ -14,6 +21,7 @@ from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
 import sourdough
 
 from . import base
@@ -49,7 +57,252 @@ class Scale(sourdough.project.Step):
     
 
 @dataclasses.dataclass
-class MinMaxScale(simplify.components.SklearnTransformer):
+class StreamingScale(simplify.externals.SklearnTransformer):
+    """Base class for scalers which can be fit and applied in batches.
+
+    In streaming mode, 'contents' is fit with 'partial_fit' on one batch of 
+    training rows at a time and data is transformed batch by batch into a 
+    float32 buffer, so a full float64 copy of the data is never made. 
+    Streaming is always used for a ChunkedDataset, in which case the scaler 
+    is fit on every training row of its source file (see 'iter_transform' to
+    apply it to the same rows).
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to None.
+        contents (Union[Callable, Type, object, str]): scaler class or its
+            name in 'module'. Defaults to None.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
+            when the 'implement' method is called. Defaults to an empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None, in which case the 'batch_size' of the Dataset is used.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+                                                
+    """  
+    name: str = None
+    contents: Union[Callable, Type, object, str] = None
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    module: str = None
+    streaming: bool = False
+    batch_size: Optional[int] = None
+    parallel: ClassVar[bool] = False
+    cache_attributes: ClassVar[Sequence[str]] = ['streaming', 'batch_size']
+
+    """ Public Methods """
+
+    def implement(self, project: sourdough.Project) -> sourdough.Project:
+        """Fits 'contents' to the training data and transforms all data.
+
+        Whether to stream is decided once from the project Dataset, so fitting
+        and transforming use the same mode.
+
+        Args:
+            project (sourdough.Project): project with a Dataset in 'data'.
+
+        Returns:
+            sourdough.Project: with transformed data.
+            
+        """
+        self.batched = self._is_streaming(data = project.data)
+        return super().implement(project = project)
+
+    def iter_transform(self, 
+            data: simplify.core.Dataset) -> Iterable[pd.DataFrame]:
+        """Yields transformed float32 batches of the features in 'data'.
+
+        Args:
+            data (simplify.core.Dataset): data container with features. For a
+                ChunkedDataset, the training rows in its source file are 
+                transformed.
+
+        Yields:
+            pd.DataFrame: the next batch of transformed features.
+
+        """
+        for batch in self._iter_batches(data = data):
+            yield pd.DataFrame(
+                self.contents.transform(batch.astype(np.float32)),
+                columns = batch.columns,
+                index = batch.index)
+
+    """ Private Methods """
+
+    def _fit(self, data: simplify.core.Dataset) -> None:
+        """Creates and fits 'contents', in batches if streaming.
+
+        Args:
+            data (simplify.core.Dataset): data container with training data.
+
+        """
+        if not self._is_streaming(data = data):
+            return super()._fit(data = data)
+        self.contents = self.contents(**self.parameters)
+        self.batch_size = self.batch_size or data.batch_size
+        self._fit_batches(batches = self._iter_batches(data = data))
+        return self
+
+    def _fit_batches(self, batches: Iterable[pd.DataFrame]) -> None:
+        """Fits 'contents' with 'partial_fit' on each batch.
+
+        Stateless scalers without 'partial_fit' (such as Normalizer) are fit 
+        on the first batch only.
+
+        Args:
+            batches (Iterable[pd.DataFrame]): batches of training rows.
+
+        """
+        for batch in batches:
+            if hasattr(self.contents, 'partial_fit'):
+                self.contents.partial_fit(batch.astype(np.float32))
+            else:
+                self.contents.fit(batch.astype(np.float32))
+                break
+        return self
+
+    def _is_streaming(self, data: simplify.core.Dataset) -> bool:
+        """Returns whether 'data' should be fit and transformed in batches."""
+        return self.streaming or isinstance(
+            data, simplify.core.dataset.ChunkedDataset)
+
+    def _iter_batches(self, 
+            data: simplify.core.Dataset) -> Iterable[pd.DataFrame]:
+        """Yields batches of training features from 'data'.
+
+        Args:
+            data (simplify.core.Dataset): data container with features.
+
+        Yields:
+            pd.DataFrame: the next batch of features.
+
+        """
+        size = self.batch_size or data.batch_size
+        if isinstance(data, simplify.core.dataset.ChunkedDataset):
+            for x, _ in data.iter_xy(size = size, training = True):
+                yield x
+        else:
+            x = data.x_train
+            for start in range(0, len(x), size):
+                yield x.iloc[start:start + size]
+
+    def _transform_bunch(self, bunch: simplify.core.DataBunch) -> None:
+        """Transforms 'x' in 'bunch', in batches if streaming.
+
+        Batches are written into a new float32 buffer, so the array passed in
+        is never changed.
+
+        Args:
+            bunch (simplify.core.DataBunch): bunch to transform.
+
+        """
+        if not getattr(self, 'batched', self.streaming) or sparse.issparse(
+                bunch.x):
+            return super()._transform_bunch(bunch = bunch)
+        x = bunch.x
+        buffer = np.empty(x.shape, dtype = np.float32)
+        size = self.batch_size or len(x) or 1
+        for start in range(0, len(x), size):
+            rows = slice(start, start + size)
+            batch = x.iloc[rows] if hasattr(x, 'iloc') else x[rows]
+            buffer[rows] = self.contents.transform(batch.astype(np.float32))
+        if isinstance(x, pd.DataFrame):
+            bunch.x = pd.DataFrame(
+                buffer, 
+                columns = x.columns, 
+                index = x.index, 
+                copy = False)
+        else:
+            bunch.x = buffer
+        return self
+
+
+@dataclasses.dataclass
+class SketchScale(StreamingScale):
+    """Base class for scalers fit on a uniform sample of rows when streaming.
+
+    Scalers based on quantiles cannot be fit incrementally, so in streaming
+    mode they are fit on a reservoir sample of 'sketch_size' training rows 
+    drawn in a single pass over the batches.
+
+    Args:
+        name (str): designates the name of a class instance that is used for 
+            internal referencing throughout sourdough. Defaults to None.
+        contents (Union[Callable, Type, object, str]): scaler class or its
+            name in 'module'. Defaults to None.
+        iterations (Union[int, str]): number of times the 'implement' method 
+            should  be called. Defaults to 1.
+        parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
+            when the 'implement' method is called. Defaults to an empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None, in which case the 'batch_size' of the Dataset is used.
+        sketch_size (int): number of sampled rows used for fitting. Defaults 
+            to 100000.
+        seed (Optional[int]): random seed for sampling. Defaults to None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to 
+            False.
+                                                
+    """  
+    name: str = None
+    contents: Union[Callable, Type, object, str] = None
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    module: str = None
+    streaming: bool = False
+    batch_size: Optional[int] = None
+    sketch_size: int = 100000
+    seed: Optional[int] = None
+    parallel: ClassVar[bool] = False
+    cache_attributes: ClassVar[Sequence[str]] = [
+        'streaming', 'batch_size', 'sketch_size', 'seed']
+
+    """ Private Methods """
+
+    def _fit_batches(self, batches: Iterable[pd.DataFrame]) -> None:
+        """Fits 'contents' on a uniform sample of rows from 'batches'.
+
+        Each row is given a random priority and the 'sketch_size' rows with
+        the smallest priorities are kept, which is a uniform sample without
+        replacement regardless of how many rows there are.
+
+        Args:
+            batches (Iterable[pd.DataFrame]): batches of training rows.
+
+        """
+        generator = np.random.default_rng(self.seed)
+        sketch = None
+        priorities = np.empty(0)
+        columns = None
+        for batch in batches:
+            columns = batch.columns
+            values = batch.to_numpy(dtype = np.float32)
+            keys = generator.random(len(values))
+            if sketch is not None:
+                values = np.concatenate([sketch, values])
+                keys = np.concatenate([priorities, keys])
+            if len(keys) > self.sketch_size:
+                kept = np.argpartition(keys, self.sketch_size)[
+                    :self.sketch_size]
+                values, keys = values[kept], keys[kept]
+            sketch, priorities = values, keys
+        self.contents.fit(pd.DataFrame(sketch, columns = columns))
+        return self
+
+
+@dataclasses.dataclass
+class MinMaxScale(StreamingScale):
     """Wrapper for a Technique.
 
     Args:
@@ -66,6 +319,10 @@ class MinMaxScale(simplify.components.SklearnTransformer):
             iteration. Defaults to 1.
         parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
             when the 'implement' method is called. Defaults to an empty dict.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be at the end of a parallel workflow structure. Defaults to 
             False.
@@ -88,7 +345,7 @@ scalers = sourdough.types.Library()
 
 
 @dataclasses.dataclass
-class MaxAbsoluteScale(simplify.components.SklearnTransformer):
+class MaxAbsoluteScale(StreamingScale):
     """Wrapper for a Technique.
 
     Args:
@@ -105,6 +362,10 @@ class MaxAbsoluteScale(simplify.components.SklearnTransformer):
             iteration. Defaults to 1.
         parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
             when the 'implement' method is called. Defaults to an empty dict.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be at the end of a parallel workflow structure. Defaults to 
             False.
@@ -123,7 +384,7 @@ class MaxAbsoluteScale(simplify.components.SklearnTransformer):
 
 
 @dataclasses.dataclass
-class NormalizeScale(simplify.components.SklearnTransformer):
+class NormalizeScale(StreamingScale):
     """Wrapper for a Technique.
 
     Args:
@@ -140,6 +401,10 @@ class NormalizeScale(simplify.components.SklearnTransformer):
             iteration. Defaults to 1.
         parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
             when the 'implement' method is called. Defaults to an empty dict.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be at the end of a parallel workflow structure. Defaults to 
             False.
@@ -158,7 +423,7 @@ class NormalizeScale(simplify.components.SklearnTransformer):
 
 
 @dataclasses.dataclass
-class QuantileScale(simplify.components.SklearnTransformer):
+class QuantileScale(SketchScale):
     """Wrapper for a Technique.
 
     Args:
@@ -175,6 +440,13 @@ class QuantileScale(simplify.components.SklearnTransformer):
             iteration. Defaults to 1.
         parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
             when the 'implement' method is called. Defaults to an empty dict.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None.
+        sketch_size (int): number of sampled rows used for fitting when
+            streaming. Defaults to 100000.
+        seed (Optional[int]): random seed for sampling. Defaults to None.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be at the end of a parallel workflow structure. Defaults to 
             False.
@@ -193,7 +465,7 @@ class QuantileScale(simplify.components.SklearnTransformer):
 
 
 @dataclasses.dataclass
-class RobustScale(simplify.components.SklearnTransformer):
+class RobustScale(SketchScale):
     """Wrapper for a Technique.
 
     Args:
@@ -210,6 +482,13 @@ class RobustScale(simplify.components.SklearnTransformer):
             iteration. Defaults to 1.
         parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
             when the 'implement' method is called. Defaults to an empty dict.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None.
+        sketch_size (int): number of sampled rows used for fitting when
+            streaming. Defaults to 100000.
+        seed (Optional[int]): random seed for sampling. Defaults to None.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be at the end of a parallel workflow structure. Defaults to 
             False.
@@ -228,7 +507,7 @@ class RobustScale(simplify.components.SklearnTransformer):
 
 
 @dataclasses.dataclass
-class StandardScale(simplify.components.SklearnTransformer):
+class StandardScale(StreamingScale):
     """Wrapper for a Technique.
 
     Args:
@@ -245,6 +524,10 @@ class StandardScale(simplify.components.SklearnTransformer):
             iteration. Defaults to 1.
         parameters (Mapping[Any, Any]]): parameters to be attached to 'contents' 
             when the 'implement' method is called. Defaults to an empty dict.
+        streaming (bool): whether to fit and transform in batches. Defaults to
+            False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be at the end of a parallel workflow structure. Defaults to 
             False.
@@ -263,7 +546,7 @@ class StandardScale(simplify.components.SklearnTransformer):
 
 
 # @dataclasses.dataclass
-# class GaussScale(simplify.components.SklearnTransformer):
+# class GaussScale(simplify.externals.SklearnTransformer):
 #     """Transforms data columns to more gaussian distribution.
 
 #     The particular method applied is chosen between 'box-cox' and 'yeo-johnson'
@@ -0,0 +1,323 @@
+"""
+analyst.scaling
+Corey Rayburn Yung <coreyrayburnyung@gmail.com>
+Copyright 2021, Corey Rayburn Yung
+License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+
+Contents:
+    ScalingPolicy (object): substitutes scalable variants of estimators for
+        large datasets.
+    KernelApproximation (Nystroem): Nystroem feature map which resolves
+        'scale' and 'auto' kernel coefficients on the data it is fit to.
+
+"""
+import dataclasses
+import importlib
+from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
+                    Optional, Sequence, Tuple, Type, Union)
+
+import numpy as np
+import scipy.sparse
+import sklearn.kernel_approximation
+import sklearn.utils
+import sklearn.utils._param_validation
+
+
+@dataclasses.dataclass
+class ScalingPolicy(object):
+    """Substitutes scalable variants of estimators for large datasets.
+
+    Estimators whose fit time grows quickly with the number of rows (or, for
+    PCA, columns) are replaced with scalable counterparts when a Dataset is
+    larger than 'rows' or 'features'. Parameters with the same meaning are
+    copied to the substitute. 'apply' should be called just before a
+    technique is applied, so that the size is that of the data the technique
+    actually receives (e.g. after encoding).
+
+    The 'analyst' section of 'idea' may set 'scaling_rows' and
+    'scaling_features' and, for any technique, '{name}_scaling' to 'auto'
+    (substitute based upon size), 'always', or 'none' (never substitute).
+
+    Args:
+        idea (Optional[Mapping[str, Mapping[str, Any]]]): project settings.
+            Defaults to None.
+        rows (int): number of rows above which estimators are substituted.
+            Defaults to 100000.
+        features (int): number of columns above which PCA uses a randomized
+            solver. Defaults to 1000.
+        components (int): number of components used to approximate kernels
+            for support vector machines. Defaults to 300.
+        overrides (Dict[str, str]): 'auto', 'always', or 'none' for technique
+            names. Defaults to an empty dict.
+        verbose (bool): whether to print substitutions. Defaults to False.
+        substitutes (ClassVar[Dict[str, str]]): names of methods which create
+            a substitute, keyed by the class name of the estimator they
+            replace.
+
+    """
+    idea: Optional[Mapping[str, Mapping[str, Any]]] = None
+    rows: int = 100000
+    features: int = 1000
+    components: int = 300
+    overrides: Dict[str, str] = dataclasses.field(default_factory = dict)
+    verbose: bool = False
+    substitutes: ClassVar[Dict[str, str]] = {
+        'GradientBoostingClassifier': '_substitute_boosting',
+        'GradientBoostingRegressor': '_substitute_boosting',
+        'KMeans': '_substitute_kmeans',
+        'KNNImputer': '_substitute_knn_impute',
+        'PCA': '_substitute_pca',
+        'SVC': '_substitute_svm',
+        'SVR': '_substitute_svm'}
+
+    def __post_init__(self) -> None:
+        """Sets thresholds and overrides from 'idea'."""
+        try:
+            analyst = self.idea['analyst']
+        except (KeyError, TypeError):
+            analyst = {}
+        try:
+            self.verbose = self.idea['general'].get('verbose', self.verbose)
+        except (KeyError, TypeError, AttributeError):
+            pass
+        self.rows = int(analyst.get('scaling_rows', self.rows))
+        self.features = int(analyst.get('scaling_features', self.features))
+        for key, value in analyst.items():
+            if key.endswith('_scaling'):
+                self.overrides[key[:-len('_scaling')]] = str(value).lower()
+        return self
+
+    """ Public Methods """
+
+    def apply(self, technique: Any, data: Any) -> Any:
+        """Replaces the algorithm of 'technique' if 'data' is large.
+
+        The number of rows is the length of 'data', so a ChunkedDataset (whose
+        'x' only previews its rows) is measured by all of its rows.
+
+        Args:
+            technique (Any): Technique with an instanced 'algorithm'.
+            data (Any): Dataset to which 'technique' is about to be applied.
+
+        Returns:
+            Any: 'technique' with a scalable 'algorithm', if one applies.
+
+        """
+        estimator = getattr(technique, 'algorithm', None)
+        method = self.substitutes.get(type(estimator).__name__)
+        override = self.overrides.get(technique.name, 'auto')
+        if method is None or override in ['none', 'false', 'off']:
+            return technique
+        rows = len(data)
+        features = np.shape(data.x)[1]
+        if override in ['always', 'true', 'on']:
+            rows = max(rows, self.rows + 1)
+            features = max(features, self.features + 1)
+        substitute = getattr(self, method)(
+            estimator = estimator,
+            rows = rows,
+            features = features)
+        if substitute is not None:
+            if self.verbose:
+                print(
+                    'Substituting', _describe(substitute), 'for',
+                    type(estimator).__name__, 'in', technique.name,
+                    f'({rows} rows, {features} features)')
+            technique.algorithm = substitute
+        return technique
+
+    """ Private Methods """
+
+    def _copy_parameters(self,
+            estimator: object,
+            substitute: Type,
+            names: Sequence[str],
+            **kwargs) -> object:
+        """Returns 'substitute' with the 'names' parameters of 'estimator'.
+
+        Args:
+            estimator (object): estimator being replaced.
+            substitute (Type): class of the replacement.
+            names (Sequence[str]): parameters with the same meaning in both
+                classes.
+            kwargs: other parameters for 'substitute'.
+
+        Returns:
+            object: instance of 'substitute'.
+
+        """
+        current = estimator.get_params(deep = False)
+        parameters = {k: current[k] for k in names if k in current}
+        parameters.update(kwargs)
+        return substitute(**parameters)
+
+    def _substitute_boosting(self,
+            estimator: object,
+            rows: int,
+            features: int) -> Optional[object]:
+        """Returns histogram-based gradient boosting for large datasets."""
+        if rows <= self.rows:
+            return None
+        ensemble = importlib.import_module('sklearn.ensemble')
+        name = type(estimator).__name__.replace(
+            'GradientBoosting',
+            'HistGradientBoosting')
+        return self._copy_parameters(
+            estimator = estimator,
+            substitute = getattr(ensemble, name),
+            names = ['learning_rate', 'max_depth', 'random_state'],
+            max_iter = estimator.n_estimators)
+
+    def _substitute_kmeans(self,
+            estimator: object,
+            rows: int,
+            features: int) -> Optional[object]:
+        """Returns mini-batch k-means for large datasets."""
+        if rows <= self.rows:
+            return None
+        cluster = importlib.import_module('sklearn.cluster')
+        return self._copy_parameters(
+            estimator = estimator,
+            substitute = cluster.MiniBatchKMeans,
+            names = ['n_clusters', 'init', 'n_init', 'tol', 'random_state'])
+
+    def _substitute_knn_impute(self,
+            estimator: object,
+            rows: int,
+            features: int) -> Optional[object]:
+        """Returns the tree-based nearest neighbors imputer for large data."""
+        if rows <= self.rows:
+            return None
+        fill = importlib.import_module('simplify.analyst.fill')
+        return self._copy_parameters(
+            estimator = estimator,
+            substitute = fill.ApproximateKNNImputer,
+            names = ['n_neighbors', 'weights'])
+
+    def _substitute_pca(self,
+            estimator: object,
+            rows: int,
+            features: int) -> Optional[object]:
+        """Returns incremental or randomized PCA for many rows or features.
+
+        Neither substitute supports a fraction of explained variance or 'mle'
+        for 'n_components', so PCA is kept in those cases.
+
+        """
+        if isinstance(estimator.n_components, (str, float)):
+            return None
+        decomposition = importlib.import_module('sklearn.decomposition')
+        if rows > self.rows:
+            return self._copy_parameters(
+                estimator = estimator,
+                substitute = decomposition.IncrementalPCA,
+                names = ['n_components', 'whiten', 'copy'])
+        elif features > self.features and estimator.svd_solver in ['auto']:
+            return self._copy_parameters(
+                estimator = estimator,
+                substitute = decomposition.PCA,
+                names = ['n_components', 'whiten', 'copy', 'random_state'],
+                svd_solver = 'randomized')
+        return None
+
+    def _substitute_svm(self,
+            estimator: object,
+            rows: int,
+            features: int) -> Optional[object]:
+        """Returns a stochastic gradient descent linear model for large data.
+
+        Non-linear kernels are approximated with a KernelApproximation of
+        'components' components ahead of the linear model. The regularization
+        strength is converted from 'C' for the number of rows.
+
+        """
+        if rows <= self.rows:
+            return None
+        linear_model = importlib.import_module('sklearn.linear_model')
+        if type(estimator).__name__ in ['SVC']:
+            # 'modified_huber' supports 'predict_proba' like SVC with
+            # 'probability' set.
+            model = linear_model.SGDClassifier(
+                loss = 'modified_huber',
+                alpha = 1 / (estimator.C * rows),
+                class_weight = estimator.class_weight,
+                random_state = estimator.random_state)
+        else:
+            model = linear_model.SGDRegressor(
+                loss = 'epsilon_insensitive',
+                alpha = 1 / (estimator.C * rows),
+                epsilon = estimator.epsilon)
+        if estimator.kernel in ['linear']:
+            return model
+        pipeline = importlib.import_module('sklearn.pipeline')
+        return pipeline.make_pipeline(
+            KernelApproximation(
+                kernel = estimator.kernel,
+                gamma = estimator.gamma,
+                degree = estimator.degree,
+                coef0 = estimator.coef0,
+                n_components = min(self.components, rows),
+                random_state = getattr(estimator, 'random_state', None)),
+            model)
+
+
+class KernelApproximation(sklearn.kernel_approximation.Nystroem):
+    """Nystroem feature map with the kernel coefficients of an SVM.
+
+    'gamma' may also be 'scale' or 'auto', which are computed as scikit-learn's
+    support vector machines do from the (encoded) matrix passed to 'fit'. The
+    resolved value is stored in 'gamma_'.
+
+    """
+    _parameter_constraints: ClassVar[Dict[str, List[Any]]] = {
+        **sklearn.kernel_approximation.Nystroem._parameter_constraints,
+        'gamma': [
+            *sklearn.kernel_approximation.Nystroem._parameter_constraints[
+                'gamma'],
+            sklearn.utils._param_validation.StrOptions({'scale', 'auto'})]}
+
+    def fit(self, X: Any, y: Any = None) -> 'KernelApproximation':
+        """Resolves 'gamma' for 'X' and fits the feature map to 'X'."""
+        self.gamma_ = _get_gamma(
+            gamma = self.gamma,
+            x = sklearn.utils.check_array(
+                X,
+                accept_sparse = ['csr', 'csc'],
+                dtype = np.float64))
+        return super().fit(X, y)
+
+    def _get_kernel_params(self) -> Dict[str, Any]:
+        """Returns kernel parameters with 'gamma' resolved."""
+        parameters = dict(super()._get_kernel_params())
+        if 'gamma' in parameters:
+            parameters['gamma'] = self.gamma_
+        return parameters
+
+
+def _describe(estimator: object) -> str:
+    """Returns the class names in 'estimator', including pipeline steps."""
+    steps = getattr(estimator, 'steps', None)
+    if steps:
+        return ' + '.join(type(step).__name__ for _, step in steps)
+    return type(estimator).__name__
+
+def _get_gamma(gamma: Union[str, float, None], x: Any) -> Optional[float]:
+    """Returns the kernel coefficient an SVM would use for 'x'.
+
+    Args:
+        gamma (Union[str, float, None]): 'scale', 'auto', or a coefficient.
+        x (Any): numeric array or sparse matrix the kernel is fit to.
+
+    Returns:
+        Optional[float]: kernel coefficient.
+
+    """
+    if gamma in ['scale']:
+        if scipy.sparse.issparse(x):
+            variance = x.multiply(x).mean() - x.mean() ** 2
+        else:
+            variance = x.var()
+        return 1.0 / (x.shape[1] * variance) if variance != 0 else 1.0
+    elif gamma in ['auto']:
+        return 1.0 / x.shape[1]
+    return gamma
@@ -0,0 +1,1310 @@
+"""
+analyst.search
+Corey Rayburn Yung <coreyrayburnyung@gmail.com>
+Copyright 2021, Corey Rayburn Yung
+License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+
+Contents:
+    Search (Step): wrapper for a hyperparameter search Technique.
+    WarmStarter (object): starts fits from the nearest previously fitted 
+        model.
+    Searcher (ABC): base class for built-in hyperparameter searches.
+    SuccessiveHalving (Searcher): successive-halving hyperparameter search.
+    Hyperband (SuccessiveHalving): hyperband hyperparameter search.
+    BayesianSearch (Searcher): batched Bayesian hyperparameter search.
+    FoldSearch (Technique): searches hyperparameters of a model Technique
+        on the folds of the project data with a Searcher.
+    tune (function): searches and sets the hyperparameters of an estimator.
+    searchers (Library): built-in search techniques.
+
+"""
+from __future__ import annotations
+import abc
+import copy
+import dataclasses
+import math
+import warnings
+from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
+                    Optional, Sequence, Tuple, Type, Union)
+
+import numpy as np
+import pandas as pd
+import scipy.stats
+import sklearn.base
+import sklearn.gaussian_process
+import sklearn.metrics
+import sklearn.model_selection
+import sourdough
+
+from . import base
+import simplify
+
+
+FoldData = Tuple[Any, Any, Any, Any]
+
+
+@dataclasses.dataclass
+class Search(sourdough.project.Step):
+    """Wrapper for a Technique.
+
+    An instance will try to return attributes from 'contents' if the attribute
+    is not found in the Step instance.
+
+    Args:
+        name (str): designates the name of a class instance that is used for
+            internal referencing throughout sourdough. For example, if a
+            sourdough instance needs settings from a Configuration instance,
+            'name' should match the appropriate section name in a Configuration
+            instance. Defaults to None.
+        contents (Technique): stored Technique instance used by the 'implement'
+            method.
+        parameters (Mapping[Any, Any]]): parameters to be attached to 'contents'
+            when the 'implement' method is called. Defaults to an empty dict.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to
+            True.
+
+    """
+    name: str = 'search'
+    contents: sourdough.project.Technique = None
+    parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
+    parallel: ClassVar[bool] = True
+
+
+@dataclasses.dataclass
+class WarmStarter(object):
+    """Starts fits from the nearest model already fit to the same data.
+
+    Models are grouped by the fold (and number of training rows) they were 
+    fit to. A stored model can start a new fit if every parameter matches,
+    except parameters in 'growing' (which may only have been smaller, such as
+    the number of boosting rounds) and parameters in 'relaxed' (which only 
+    affect where optimization starts, such as the regularization of a convex
+    model). The nearest such model, by parameter distance, is then:
+        returned as is, if every parameter matches;
+        copied and refit with 'warm_start' if the estimator supports it;
+        or continued with the 'xgb_model' fit argument for xgboost models.
+
+    Models are kept in 'store', so with a persistent TrialStore they are 
+    reused by later project runs on the same data.
+
+    Args:
+        growing (Sequence[str]): parameters which can be continued from a
+            smaller value. Defaults to 'n_estimators' and 'max_iter'.
+        relaxed (Sequence[str]): parameters which may differ from the stored
+            model. Defaults to an empty list.
+        store (Optional[simplify.core.caches.TrialStore]): where models are
+            stored. Defaults to None, in which case the store is created from
+            the settings passed to 'prepare' (see TrialStore.from_settings).
+
+    """
+    growing: Sequence[str] = dataclasses.field(
+        default_factory = lambda: ['n_estimators', 'max_iter'])
+    relaxed: Sequence[str] = dataclasses.field(default_factory = list)
+    store: Optional[simplify.core.caches.TrialStore] = None
+
+    def __post_init__(self) -> None:
+        """Sets initial attributes."""
+        self.fold_keys = []
+        return self
+
+    """ Public Methods """
+
+    def add(self, 
+            model: Any, 
+            fold: int, 
+            rows: Optional[int] = None) -> None:
+        """Stores fitted 'model' for 'fold' unless an identical one is stored.
+
+        Args:
+            model (Any): fitted model.
+            fold (int): index of the fold 'model' was fit to.
+            rows (Optional[int]): number of training rows used, if not all 
+                rows were used. Defaults to None.
+
+        """
+        key = self.key(fold = fold, rows = rows)
+        _, distance = self.nearest(
+            parameters = model.get_params(deep = False),
+            models = self.store.load_models(key = key))
+        if distance != 0:
+            self.store.add_model(key = key, model = model)
+        return self
+
+    def fit(self, 
+            model: Any, 
+            x: Union[pd.DataFrame, np.ndarray], 
+            y: Union[pd.Series, np.ndarray],
+            fold: int,
+            rows: Optional[int] = None) -> Any:
+        """Fits 'model', starting from the nearest stored model if possible.
+
+        Args:
+            model (Any): unfitted scikit-learn compatible model.
+            x (Union[pd.DataFrame, np.ndarray]): training features.
+            y (Union[pd.Series, np.ndarray]): training label.
+            fold (int): index of the fold 'x' and 'y' are from.
+            rows (Optional[int]): number of training rows used, if not all 
+                rows are used. Defaults to None.
+
+        Returns:
+            Any: fitted model.
+
+        """
+        parameters = model.get_params(deep = False)
+        previous, distance = self.nearest(
+            parameters = parameters, 
+            models = self.store.load_models(
+                key = self.key(fold = fold, rows = rows)))
+        if previous is None:
+            return model.fit(x, y)
+        elif distance == 0:
+            return copy.deepcopy(previous)
+        elif 'warm_start' in parameters:
+            started = copy.deepcopy(previous)
+            started.set_params(**parameters)
+            started.set_params(warm_start = True)
+            started.fit(x, y)
+            return started.set_params(warm_start = parameters['warm_start'])
+        elif hasattr(previous, 'get_booster'):
+            rounds = parameters['n_estimators'] - previous.n_estimators
+            if rounds > 0:
+                model.set_params(n_estimators = rounds)
+                model.fit(x, y, xgb_model = previous.get_booster())
+                return model.set_params(
+                    n_estimators = parameters['n_estimators'])
+        return model.fit(x, y)
+
+    def key(self, fold: int, rows: Optional[int] = None) -> str:
+        """Returns the 'store' key for models fit to 'fold'.
+
+        Args:
+            fold (int): index of the fold.
+            rows (Optional[int]): number of training rows used, if not all 
+                rows were used. Defaults to None.
+
+        Returns:
+            str: key for 'store'.
+
+        """
+        return simplify.core.caches.fingerprint(self.fold_keys[fold], rows)
+
+    def nearest(self, 
+            parameters: Mapping[str, Any],
+            models: Sequence[Any]) -> Tuple[Optional[Any], Optional[float]]:
+        """Returns the stored model nearest to 'parameters' and its distance.
+
+        Args:
+            parameters (Mapping[str, Any]): parameters of the model to fit.
+            models (Sequence[Any]): fitted models which may be used.
+
+        Returns:
+            Tuple[Optional[Any], Optional[float]]: the nearest usable model and
+                its distance, or None and None if no model can be used.
+
+        """
+        best, best_distance = None, None
+        for previous in models:
+            distance = self._get_distance(
+                parameters = parameters,
+                previous = previous.get_params(deep = False))
+            if distance is not None and (
+                    best_distance is None or distance < best_distance):
+                best, best_distance = previous, distance
+        return best, best_distance
+
+    def prepare(self, 
+            estimator: Any, 
+            fold_data: Sequence[FoldData],
+            settings: Optional[Mapping[str, Mapping[str, Any]]] = None) -> None:
+        """Identifies the folds in 'fold_data' for 'estimator'.
+
+        Args:
+            estimator (Any): estimator being searched.
+            fold_data (Sequence[FoldData]): data for each fold.
+            settings (Optional[Mapping[str, Mapping[str, Any]]]): project 
+                settings used to create 'store' if it is not set. Defaults to
+                None.
+
+        """
+        if self.store is None:
+            self.store = simplify.core.caches.TrialStore.from_settings(
+                settings = settings)
+        name = '.'.join([
+            estimator.__class__.__module__, estimator.__class__.__qualname__])
+        self.fold_keys = [
+            simplify.core.caches.fingerprint(name, fold[0], fold[1])
+            for fold in fold_data]
+        return self
+
+    """ Private Methods """
+
+    def _get_distance(self, 
+            parameters: Mapping[str, Any],
+            previous: Mapping[str, Any]) -> Optional[float]:
+        """Returns the distance between parameters, if 'previous' is usable.
+
+        Args:
+            parameters (Mapping[str, Any]): parameters of the model to fit.
+            previous (Mapping[str, Any]): parameters of a fitted model.
+
+        Returns:
+            Optional[float]: distance (0 if all parameters match) or None if
+                the fitted model cannot be used.
+
+        """
+        distance = 0.0
+        for name, value in parameters.items():
+            old = previous.get(name)
+            if name in ['warm_start'] or _same(value, old):
+                continue
+            numeric = all(
+                isinstance(v, (int, float, np.number)) 
+                and not isinstance(v, bool) for v in [value, old])
+            if name in self.growing and numeric and old < value:
+                distance += (value - old) / value
+            elif name in self.relaxed and numeric:
+                if value > 0 and old > 0:
+                    distance += abs(math.log(value / old))
+                else:
+                    distance += abs(value - old)
+            else:
+                return None
+        return distance
+
+
+@dataclasses.dataclass
+class Searcher(abc.ABC):
+    """Base class for built-in hyperparameter searches.
+
+    Subclasses evaluate candidate parameters on every fold through a
+    Parallelizer using 'settings' and must provide a 'search_folds' method.
+
+    If 'estimator' is a model Technique with a 'fit_candidates' method (such
+    as XGBoostModel), it is not cloned. Instead, every candidate evaluated on
+    a fold in the same round is passed to one call of 'fit_candidates' with
+    the Dataset of that fold in 'datasets', so the fold's training matrix is
+    built once for all of them. Its 'parameters' are the defaults for every
+    candidate and 'warm_starter' is not used.
+
+    Args:
+        estimator (Any): scikit-learn compatible estimator (or class) which is
+            cloned for every evaluation. Defaults to None.
+        space (Mapping[str, Any]): parameter names mapped to lists of values or
+            scipy.stats distributions. Defaults to an empty dict.
+        scoring (Optional[Union[str, Callable]]): scikit-learn scoring name or
+            scorer. Defaults to None, which uses the estimator's 'score' method.
+        cv (int): number of folds created by 'search' if folds are not passed.
+            Defaults to 3.
+        seed (Optional[int]): random seed for sampling candidates and rows.
+            Defaults to None.
+        settings (Optional[Mapping[str, Mapping[str, Any]]]): project settings
+            used by the Parallelizer. Defaults to None.
+        warm_starter (Optional[WarmStarter]): starts fits from the nearest
+            previously fitted model. Defaults to None.
+        datasets (Optional[Sequence[simplify.core.Dataset]]): Dataset of each
+            fold in 'fold_data', required if 'estimator' has a 
+            'fit_candidates' method. Defaults to None.
+
+    """
+    estimator: Any = None
+    space: Mapping[str, Any] = dataclasses.field(default_factory = dict)
+    scoring: Optional[Union[str, Callable]] = None
+    cv: int = 3
+    seed: Optional[int] = None
+    settings: Optional[Mapping[str, Mapping[str, Any]]] = None
+    warm_starter: Optional[WarmStarter] = None
+    datasets: Optional[Sequence[simplify.core.Dataset]] = None
+
+    def __post_init__(self) -> None:
+        """Creates an estimator instance if needed."""
+        if isinstance(self.estimator, type):
+            self.estimator = self.estimator()
+        self.results = []
+        self.best_params = None
+        self.best_score = None
+        return self
+
+    """ Required Subclass Methods """
+
+    @abc.abstractmethod
+    def search_folds(self, fold_data: Sequence[FoldData]) -> None:
+        """Searches 'space' using already prepared training and testing sets.
+
+        Args:
+            fold_data (Sequence[FoldData]): x_train, y_train, x_test, and
+                y_test for each fold.
+
+        """
+        pass
+
+    """ Public Methods """
+
+    def search(self,
+            x: Union[pd.DataFrame, np.ndarray],
+            y: Union[pd.Series, np.ndarray],
+            folds: Optional[simplify.core.caches.Folds] = None) -> None:
+        """Searches 'space' using 'folds' of 'x' and 'y'.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray]): features.
+            y (Union[pd.Series, np.ndarray]): label.
+            folds (Optional[simplify.core.caches.Folds]): train and test
+                indices for each fold. Defaults to None, in which case 'cv'
+                shuffled folds are drawn from the shared split registry.
+
+        """
+        if folds is None:
+            splitter = sklearn.model_selection.KFold(
+                n_splits = self.cv,
+                shuffle = True,
+                random_state = self.seed)
+            folds = simplify.core.split_registry.get(
+                splitter = splitter,
+                x = x,
+                y = y)
+        fold_data = [
+            (_take(x, train), _take(y, train), _take(x, test), _take(y, test))
+            for train, test in folds]
+        return self.search_folds(fold_data = fold_data)
+
+    """ Private Methods """
+
+    def _evaluate_tasks(self,
+            parallelizer: simplify.core.Parallelizer,
+            tasks: Sequence[Tuple[int, int, int]],
+            candidates: List[Dict[str, Any]],
+            fold_data: Sequence[FoldData],
+            orders: Optional[List[np.ndarray]] = None,
+            kind: str = 'folds') -> List[float]:
+        """Returns scores for (candidate, fold, resource) 'tasks'.
+
+        Models fit by the tasks are added to 'warm_starter', if it is set.
+        Estimators with a 'fit_candidates' method are trained by 
+        '_fit_candidates' instead.
+
+        Args:
+            parallelizer (simplify.core.Parallelizer): runs evaluations.
+            tasks (Sequence[Tuple[int, int, int]]): candidate index, fold 
+                index, and budget of each evaluation.
+            candidates (List[Dict[str, Any]]): parameters of each candidate.
+            fold_data (Sequence[FoldData]): data for each fold.
+            orders (Optional[List[np.ndarray]]): row order of each training
+                set if the budget is 'rows'. Defaults to None.
+            kind (str): type of budget. Defaults to 'folds'.
+
+        Returns:
+            List[float]: score of each task.
+
+        """
+        if hasattr(self.estimator, 'fit_candidates'):
+            return self._fit_candidates(
+                tasks = tasks,
+                candidates = candidates,
+                fold_data = fold_data,
+                kind = kind)
+        results = parallelizer.starmap(
+            process = _evaluate,
+            arguments = tasks,
+            shared = (
+                self.estimator, candidates, fold_data, orders, kind,
+                self.scoring, self.warm_starter))
+        if self.warm_starter is not None:
+            for (_, fold, resource), (_, model) in zip(tasks, results):
+                if model is not None:
+                    self.warm_starter.add(
+                        model = model,
+                        fold = fold,
+                        rows = resource if kind in ['rows'] else None)
+        return [score for score, _ in results]
+
+    def _fit_candidates(self,
+            tasks: Sequence[Tuple[int, int, int]],
+            candidates: List[Dict[str, Any]],
+            fold_data: Sequence[FoldData],
+            kind: str = 'folds') -> List[float]:
+        """Returns scores for 'tasks' trained with 'fit_candidates'.
+
+        Tasks with the same fold and budget are trained together by one call
+        to the 'fit_candidates' method of 'estimator'.
+
+        Args:
+            tasks (Sequence[Tuple[int, int, int]]): candidate index, fold 
+                index, and budget of each evaluation.
+            candidates (List[Dict[str, Any]]): parameters of each candidate.
+            fold_data (Sequence[FoldData]): data for each fold.
+            kind (str): type of budget. Defaults to 'folds'.
+
+        Returns:
+            List[float]: score of each task.
+
+        Raises:
+            ValueError: if 'datasets' is not set or 'kind' is 'rows'.
+
+        """
+        if self.datasets is None:
+            raise ValueError(
+                'datasets must be set to search an estimator with '
+                'fit_candidates')
+        if kind in ['rows']:
+            raise ValueError(
+                'rows budgets cannot be used with an estimator with '
+                'fit_candidates')
+        defaults = dict(getattr(self.estimator, 'parameters', None) or {})
+        groups = {}
+        for position, (candidate, fold, resource) in enumerate(tasks):
+            groups.setdefault((fold, resource), []).append(
+                (position, candidate))
+        scores = [None] * len(tasks)
+        for (fold, resource), members in groups.items():
+            parameters = []
+            for _, candidate in members:
+                parameters.append({**defaults, **candidates[candidate]})
+                if not kind in ['folds']:
+                    parameters[-1][kind] = resource
+            models = self.estimator.fit_candidates(
+                data = self.datasets[fold],
+                candidates = parameters,
+                settings = self.settings)
+            _, _, x_test, y_test = fold_data[fold]
+            for (position, _), model in zip(members, models):
+                # Fitted models need not be scikit-learn estimators (e.g.
+                # xgboost boosters), so 'check_scoring' is not used.
+                if self.scoring is None:
+                    score = model.score(x_test, y_test)
+                else:
+                    scorer = sklearn.metrics.get_scorer(self.scoring)
+                    score = scorer(model, x_test, y_test)
+                scores[position] = float(score)
+        return scores
+
+
+@dataclasses.dataclass
+class SuccessiveHalving(Searcher):
+    """Searches hyperparameters by successive halving.
+
+    All candidates are first evaluated with a small budget. Only the best
+    1 / 'factor' of them are evaluated again with 'factor' times the budget,
+    until a single candidate remains or the full budget is reached. The budget
+    ('resource') may be:
+        'rows': number of training rows used in each fold. Each fold uses a
+            fixed random ordering of its rows, so larger budgets add rows to
+            those already used.
+        'folds': number of folds evaluated. Scores of folds evaluated at a
+            smaller budget are reused rather than refit.
+        any other str: name of an estimator parameter, such as 'n_estimators'
+            for the number of boosting rounds.
+
+    Every (candidate, fold) evaluation in a round is an independent task run
+    by a Parallelizer using 'settings'.
+
+    Args:
+        estimator (Any): scikit-learn compatible estimator (or class) which is
+            cloned for every evaluation. Defaults to None.
+        space (Mapping[str, Any]): parameter names mapped to lists of values or
+            scipy.stats distributions. Defaults to an empty dict.
+        scoring (Optional[Union[str, Callable]]): scikit-learn scoring name or
+            scorer. Defaults to None, which uses the estimator's 'score' method.
+        cv (int): number of folds created by 'search' if folds are not passed.
+            Defaults to 3.
+        seed (Optional[int]): random seed for sampling candidates and rows.
+            Defaults to None.
+        settings (Optional[Mapping[str, Mapping[str, Any]]]): project settings
+            used by the Parallelizer. Defaults to None.
+        warm_starter (Optional[WarmStarter]): starts fits from the nearest
+            previously fitted model. Defaults to None.
+        datasets (Optional[Sequence[simplify.core.Dataset]]): Dataset of each
+            fold in 'fold_data', required if 'estimator' has a 
+            'fit_candidates' method. Defaults to None.
+        resource (str): type of budget. Defaults to 'rows'.
+        min_resource (Optional[int]): budget of the first round. Defaults to
+            None, in which case it is 1 for 'folds' and otherwise
+            'max_resource' divided by 'factor' cubed.
+        max_resource (Optional[int]): largest budget. Defaults to None, in
+            which case it is the number of folds, the size of the smallest
+            training set, or the estimator's current value of 'resource'.
+        factor (int): proportion of candidates dropped and budget increase in
+            each round. Defaults to 3.
+        candidates (Optional[int]): number of candidates sampled from 'space'.
+            Defaults to None, in which case there are enough candidates for
+            the number of rounds between 'min_resource' and 'max_resource'.
+
+    """
+    resource: str = 'rows'
+    min_resource: Optional[int] = None
+    max_resource: Optional[int] = None
+    factor: int = 3
+    candidates: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        """Validates 'factor' and creates an estimator instance if needed."""
+        if self.factor < 2:
+            raise ValueError('factor must be at least 2')
+        super().__post_init__()
+        return self
+
+    """ Public Methods """
+
+    def search_folds(self, fold_data: Sequence[FoldData]) -> None:
+        """Searches 'space' using already prepared training and testing sets.
+
+        Args:
+            fold_data (Sequence[FoldData]): x_train, y_train, x_test, and
+                y_test for each fold.
+
+        """
+        generator = np.random.RandomState(self.seed)
+        minimum, maximum = self._get_resource_range(fold_data = fold_data)
+        if self.warm_starter is not None:
+            self.warm_starter.prepare(
+                estimator = self.estimator, 
+                fold_data = fold_data,
+                settings = self.settings)
+        orders = None
+        if self.resource in ['rows']:
+            orders = [generator.permutation(len(f[1])) for f in fold_data]
+        parallelizer = simplify.core.Parallelizer(settings = self.settings)
+        self.results = []
+        brackets = self._get_brackets(minimum = minimum, maximum = maximum)
+        for bracket, (count, budget) in enumerate(brackets):
+            candidates = list(sklearn.model_selection.ParameterSampler(
+                self.space,
+                n_iter = count,
+                random_state = generator))
+            self._run_bracket(
+                bracket = bracket,
+                candidates = candidates,
+                budget = budget,
+                maximum = maximum,
+                fold_data = fold_data,
+                orders = orders,
+                parallelizer = parallelizer)
+        best = max(self.results, key = lambda r: (r['resource'], r['score']))
+        self.best_params = best['parameters']
+        self.best_score = best['score']
+        return self
+
+    """ Private Methods """
+
+    def _get_brackets(self,
+            minimum: int,
+            maximum: int) -> List[Tuple[int, int]]:
+        """Returns the number of candidates and first budget of each bracket.
+
+        Args:
+            minimum (int): smallest budget.
+            maximum (int): largest budget.
+
+        Returns:
+            List[Tuple[int, int]]: a single bracket starting at 'minimum'.
+
+        """
+        rounds = self._get_rounds(minimum = minimum, maximum = maximum)
+        return [(self.candidates or self.factor ** rounds, minimum)]
+
+    def _get_rounds(self, minimum: int, maximum: int) -> int:
+        """Returns how many times 'minimum' can grow by 'factor' to 'maximum'."""
+        rounds = 0
+        while minimum * self.factor ** (rounds + 1) <= maximum:
+            rounds += 1
+        return rounds
+
+    def _get_resource_range(self,
+            fold_data: Sequence[FoldData]) -> Tuple[int, int]:
+        """Returns the smallest and largest budget.
+
+        Args:
+            fold_data (Sequence[FoldData]): data for each fold.
+
+        Returns:
+            Tuple[int, int]: 'min_resource' and 'max_resource' with defaults
+                filled in.
+
+        Raises:
+            ValueError: if the budget range is empty.
+
+        """
+        if self.resource in ['folds']:
+            maximum = self.max_resource or len(fold_data)
+            minimum = self.min_resource or 1
+        else:
+            if self.max_resource:
+                maximum = self.max_resource
+            elif self.resource in ['rows']:
+                maximum = min(len(f[1]) for f in fold_data)
+            elif hasattr(self.estimator, 'fit_candidates'):
+                maximum = dict(self.estimator.parameters)[self.resource]
+            else:
+                maximum = self.estimator.get_params()[self.resource]
+            minimum = self.min_resource or max(1, maximum // self.factor ** 3)
+        if not 0 < minimum <= maximum:
+            raise ValueError(
+                'min_resource must be positive and at most max_resource')
+        return int(minimum), int(maximum)
+
+    def _run_bracket(self,
+            bracket: int,
+            candidates: List[Dict[str, Any]],
+            budget: int,
+            maximum: int,
+            fold_data: Sequence[FoldData],
+            orders: Optional[List[np.ndarray]],
+            parallelizer: simplify.core.Parallelizer) -> None:
+        """Runs successive halving rounds for 'candidates'.
+
+        Args:
+            bracket (int): index of the bracket, stored with the results.
+            candidates (List[Dict[str, Any]]): parameters of each candidate.
+            budget (int): budget of the first round.
+            maximum (int): largest budget.
+            fold_data (Sequence[FoldData]): data for each fold.
+            orders (Optional[List[np.ndarray]]): row order of each training
+                set if the budget is 'rows'.
+            parallelizer (simplify.core.Parallelizer): runs evaluations.
+
+        """
+        scores = {}
+        remaining = list(range(len(candidates)))
+        rung = 0
+        while remaining:
+            level = min(int(budget), maximum)
+            if self.resource in ['folds']:
+                folds = list(range(level))
+                keys = {(c, f): (c, f, level) for c in remaining for f in folds}
+            else:
+                folds = list(range(len(fold_data)))
+                keys = {
+                    (c, f, level): (c, f, level)
+                    for c in remaining for f in folds}
+            missing = [k for k in keys if k not in scores]
+            evaluated = self._evaluate_tasks(
+                parallelizer = parallelizer,
+                tasks = [keys[k] for k in missing],
+                candidates = candidates,
+                fold_data = fold_data,
+                orders = orders,
+                kind = self.resource)
+            scores.update(zip(missing, evaluated))
+            means = {c: [] for c in remaining}
+            for key in keys:
+                means[key[0]].append(scores[key])
+            means = {c: np.mean(values) for c, values in means.items()}
+            for candidate in remaining:
+                self.results.append({
+                    'bracket': bracket,
+                    'rung': rung,
+                    'candidate': candidate,
+                    'parameters': candidates[candidate],
+                    'resource': level,
+                    'score': float(means[candidate])})
+            if level >= maximum or len(remaining) < 2:
+                break
+            keep = max(1, len(remaining) // self.factor)
+            remaining = sorted(
+                remaining, key = lambda c: means[c], reverse = True)[:keep]
+            budget = budget * self.factor
+            rung += 1
+        return self
+
+
+@dataclasses.dataclass
+class Hyperband(SuccessiveHalving):
+    """Searches hyperparameters with hyperband.
+
+    Hyperband runs several successive halving brackets which trade off the
+    number of candidates against the budget each starts with, so it does not
+    depend on choosing 'min_resource' well. 'candidates' is ignored.
+
+    Args:
+        estimator (Any): scikit-learn compatible estimator (or class) which is
+            cloned for every evaluation. Defaults to None.
+        space (Mapping[str, Any]): parameter names mapped to lists of values or
+            scipy.stats distributions. Defaults to an empty dict.
+        scoring (Optional[Union[str, Callable]]): scikit-learn scoring name or
+            scorer. Defaults to None.
+        cv (int): number of folds created by 'search' if folds are not passed.
+            Defaults to 3.
+        seed (Optional[int]): random seed. Defaults to None.
+        settings (Optional[Mapping[str, Mapping[str, Any]]]): project settings
+            used by the Parallelizer. Defaults to None.
+        warm_starter (Optional[WarmStarter]): starts fits from the nearest
+            previously fitted model. Defaults to None.
+        datasets (Optional[Sequence[simplify.core.Dataset]]): Dataset of each
+            fold in 'fold_data', required if 'estimator' has a 
+            'fit_candidates' method. Defaults to None.
+        resource (str): type of budget (see SuccessiveHalving). Defaults to
+            'rows'.
+        min_resource (Optional[int]): smallest budget. Defaults to None.
+        max_resource (Optional[int]): largest budget. Defaults to None.
+        factor (int): proportion of candidates dropped and budget increase in
+            each round. Defaults to 3.
+        candidates (Optional[int]): not used. Defaults to None.
+
+    """
+
+    """ Private Methods """
+
+    def _get_brackets(self,
+            minimum: int,
+            maximum: int) -> List[Tuple[int, int]]:
+        """Returns the number of candidates and first budget of each bracket.
+
+        Args:
+            minimum (int): smallest budget.
+            maximum (int): largest budget.
+
+        Returns:
+            List[Tuple[int, int]]: brackets from the most candidates with the
+                smallest budget to the fewest with the full budget.
+
+        """
+        rounds = self._get_rounds(minimum = minimum, maximum = maximum)
+        brackets = []
+        for bracket in reversed(range(rounds + 1)):
+            count = math.ceil(
+                (rounds + 1) / (bracket + 1) * self.factor ** bracket)
+            budget = max(minimum, maximum // self.factor ** bracket)
+            brackets.append((count, budget))
+        return brackets
+
+
+@dataclasses.dataclass
+class BayesianSearch(Searcher):
+    """Searches hyperparameters with batched Bayesian optimization.
+
+    After 'initial' random candidates, a gaussian process is fit to the scores
+    of completed trials and candidates are proposed in batches by expected
+    improvement. Within a batch, each proposal is added to the surrogate with
+    a 'constant liar' score before the next is chosen, so the batch spreads
+    out instead of repeating the same point. Batches default to the number of
+    workers, keeping every worker busy.
+
+    Every completed trial is added to 'store' under a key identifying the
+    estimator, space, scoring, and data. If the store has a 'folder', a search
+    which is interrupted resumes from its completed trials. Trials record the
+    position of each list value in 'space', since values such as tuples or 
+    objects do not survive the store's json files unchanged. The search stops
+    early if every point of a space made only of lists has been tried.
+
+    Args:
+        estimator (Any): scikit-learn compatible estimator (or class) which is
+            cloned for every evaluation. Defaults to None.
+        space (Mapping[str, Any]): parameter names mapped to lists of values or
+            scipy.stats distributions. Lists are treated as ordered values.
+            Defaults to an empty dict.
+        scoring (Optional[Union[str, Callable]]): scikit-learn scoring name or
+            scorer. Defaults to None.
+        cv (int): number of folds created by 'search' if folds are not passed.
+            Defaults to 3.
+        seed (Optional[int]): random seed. Defaults to None.
+        settings (Optional[Mapping[str, Mapping[str, Any]]]): project settings
+            used by the Parallelizer. Defaults to None.
+        warm_starter (Optional[WarmStarter]): starts fits from the nearest
+            previously fitted model. Defaults to None.
+        datasets (Optional[Sequence[simplify.core.Dataset]]): Dataset of each
+            fold in 'fold_data', required if 'estimator' has a 
+            'fit_candidates' method. Defaults to None.
+        trials (int): total number of trials, including any resumed trials.
+            Defaults to 50.
+        initial (int): number of random trials before proposals use the
+            surrogate. Defaults to 10.
+        batch_size (Optional[int]): number of proposals evaluated together.
+            Defaults to None, in which case it is the number of workers.
+        liar (str): score assumed for pending proposals: 'min', 'mean', or
+            'max' of completed scores. Defaults to 'min'.
+        pool (int): number of random candidates scored by expected improvement
+            for each proposal. Defaults to 1000.
+        store (Optional[simplify.core.caches.TrialStore]): trial history.
+            Defaults to None, in which case the store is created from 
+            'settings' (see TrialStore.from_settings).
+
+    """
+    trials: int = 50
+    initial: int = 10
+    batch_size: Optional[int] = None
+    liar: str = 'min'
+    pool: int = 1000
+    store: Optional[simplify.core.caches.TrialStore] = None
+    liars: ClassVar[Mapping[str, Callable]] = {
+        'min': np.min, 
+        'mean': np.mean, 
+        'max': np.max}
+
+    def __post_init__(self) -> None:
+        """Validates 'liar'."""
+        if self.liar not in self.liars:
+            raise ValueError(f'liar must be one of {", ".join(self.liars)}')
+        super().__post_init__()
+        return self
+
+    """ Public Methods """
+
+    def search_folds(self, fold_data: Sequence[FoldData]) -> None:
+        """Searches 'space' using already prepared training and testing sets.
+
+        Args:
+            fold_data (Sequence[FoldData]): x_train, y_train, x_test, and
+                y_test for each fold.
+
+        """
+        if self.store is None:
+            self.store = simplify.core.caches.TrialStore.from_settings(
+                settings = self.settings)
+        key = self._get_key(fold_data = fold_data)
+        self.results = self.store.load(key = key)
+        if self.warm_starter is not None:
+            self.warm_starter.prepare(
+                estimator = self.estimator, 
+                fold_data = fold_data,
+                settings = self.settings)
+        parallelizer = simplify.core.Parallelizer(settings = self.settings)
+        batch_size = self.batch_size or parallelizer.workers(
+            tasks = self.trials)
+        while len(self.results) < self.trials:
+            count = min(batch_size, self.trials - len(self.results))
+            generator = np.random.RandomState(
+                None if self.seed is None else [self.seed, len(self.results)])
+            if len(self.results) < self.initial:
+                candidates = self._sample_untried(
+                    count = count, 
+                    generator = generator)
+            else:
+                candidates = self._propose(
+                    count = count, 
+                    generator = generator)
+            if not candidates:
+                break
+            folds = range(len(fold_data))
+            scores = self._evaluate_tasks(
+                parallelizer = parallelizer,
+                tasks = [
+                    (c, f, 0) for c in range(len(candidates)) for f in folds],
+                candidates = candidates,
+                fold_data = fold_data)
+            for candidate, parameters in enumerate(candidates):
+                trial = {
+                    'parameters': parameters,
+                    'positions': self._get_positions(parameters = parameters),
+                    'score': float(np.mean(scores[
+                        candidate * len(fold_data):
+                        (candidate + 1) * len(fold_data)]))}
+                self.store.add(key = key, trial = trial)
+            self.results = self.store.load(key = key)
+        best = max(self.results, key = lambda r: r['score'])
+        self.best_params = self._restore(trial = best)
+        self.best_score = best['score']
+        return self
+
+    """ Private Methods """
+
+    def _encode(self, trial: Mapping[str, Any]) -> np.ndarray:
+        """Returns the parameters of 'trial' as a point in the unit hypercube.
+
+        Distributions are mapped through their cumulative distribution 
+        function and list values by their position in the list.
+
+        Args:
+            trial (Mapping[str, Any]): trial or candidate with 'parameters' and
+                'positions'.
+
+        Returns:
+            np.ndarray: coordinates between 0 and 1 for each name in 'space'.
+
+        """
+        positions = trial.get('positions') or self._get_positions(
+            parameters = trial['parameters'])
+        point = []
+        for name in sorted(self.space):
+            values = self.space[name]
+            if hasattr(values, 'cdf'):
+                point.append(float(values.cdf(trial['parameters'][name])))
+            else:
+                point.append(positions[name] / max(1, len(values) - 1))
+        return np.array(point)
+
+    def _get_positions(self, parameters: Mapping[str, Any]) -> Dict[str, int]:
+        """Returns the position of each list value of 'parameters' in 'space'.
+
+        Args:
+            parameters (Mapping[str, Any]): candidate parameters.
+
+        Returns:
+            Dict[str, int]: names of list parameters mapped to positions.
+
+        """
+        return {
+            name: list(values).index(parameters[name]) 
+            for name, values in self.space.items() 
+            if not hasattr(values, 'cdf')}
+
+    def _get_key(self, fold_data: Sequence[FoldData]) -> str:
+        """Returns the 'store' key identifying this search and its data."""
+        caches = simplify.core.caches
+        return caches.fingerprint(
+            caches._describe_value(value = self.estimator.__class__),
+            repr(caches._describe_parameters(item = self.estimator)),
+            repr(sorted(
+                (k, caches._describe_value(value = v)) 
+                for k, v in self.space.items())),
+            caches._describe_value(value = self.scoring),
+            *[item for fold in fold_data for item in fold])
+
+    def _propose(self, 
+            count: int, 
+            generator: np.random.RandomState) -> List[Dict[str, Any]]:
+        """Returns 'count' candidates chosen by expected improvement.
+
+        Args:
+            count (int): number of candidates.
+            generator (np.random.RandomState): random number generator.
+
+        Returns:
+            List[Dict[str, Any]]: candidate parameters.
+
+        """
+        points = np.array([self._encode(trial = r) for r in self.results])
+        scores = np.array([r['score'] for r in self.results], dtype = float)
+        finite = np.isfinite(scores)
+        scores[~finite] = scores[finite].min() if finite.any() else 0.0
+        lie = self.liars[self.liar](scores)
+        pool = self._sample(count = self.pool, generator = generator)
+        pool_points = np.array(
+            [self._encode(trial = {'parameters': p}) for p in pool])
+        surrogate = sklearn.gaussian_process.GaussianProcessRegressor(
+            kernel = sklearn.gaussian_process.kernels.Matern(nu = 2.5),
+            alpha = 1e-6,
+            normalize_y = True,
+            random_state = generator)
+        proposals = []
+        available = np.ones(len(pool), dtype = bool)
+        for point in points:
+            available &= ~np.all(np.isclose(pool_points, point), axis = 1)
+        for _ in range(count):
+            if not available.any():
+                break
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                surrogate.fit(points, scores)
+            mean, deviation = surrogate.predict(pool_points, return_std = True)
+            improvement = _expected_improvement(
+                mean = mean, 
+                deviation = deviation, 
+                best = scores.max())
+            improvement[~available] = -np.inf
+            chosen = int(np.argmax(improvement))
+            proposals.append(pool[chosen])
+            available &= ~np.all(
+                np.isclose(pool_points, pool_points[chosen]), axis = 1)
+            points = np.vstack([points, pool_points[chosen]])
+            scores = np.append(scores, lie)
+        return proposals
+
+    def _restore(self, trial: Mapping[str, Any]) -> Dict[str, Any]:
+        """Returns the parameters of 'trial' with list values from 'space'.
+
+        Args:
+            trial (Mapping[str, Any]): completed trial, possibly loaded from 
+                json.
+
+        Returns:
+            Dict[str, Any]: parameters with the original list values.
+
+        """
+        parameters = dict(trial['parameters'])
+        for name, position in trial.get('positions', {}).items():
+            parameters[name] = list(self.space[name])[position]
+        return parameters
+
+    def _sample(self, 
+            count: int, 
+            generator: np.random.RandomState) -> List[Dict[str, Any]]:
+        """Returns 'count' random candidates from 'space'."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return list(sklearn.model_selection.ParameterSampler(
+                self.space, 
+                n_iter = count, 
+                random_state = generator))
+
+    def _sample_untried(self, 
+            count: int, 
+            generator: np.random.RandomState) -> List[Dict[str, Any]]:
+        """Returns up to 'count' random candidates not in 'results'.
+
+        A resumed search draws from a new random state, so candidates are
+        taken from a sample of 'pool' and any which were already evaluated 
+        (or appear twice) are skipped.
+
+        Args:
+            count (int): number of candidates.
+            generator (np.random.RandomState): random number generator.
+
+        Returns:
+            List[Dict[str, Any]]: candidate parameters.
+
+        """
+        tried = [self._encode(trial = r) for r in self.results]
+        candidates = []
+        for candidate in self._sample(count = self.pool, generator = generator):
+            point = self._encode(trial = {'parameters': candidate})
+            if not any(np.allclose(point, t) for t in tried):
+                candidates.append(candidate)
+                tried.append(point)
+                if len(candidates) == count:
+                    break
+        return candidates
+
+
+@dataclasses.dataclass
+class FoldSearch(sourdough.project.Technique):
+    """Searches hyperparameters of a model on the folds of the project data.
+
+    Folds are taken from the project Dataset's 'splits'. Techniques in
+    'preprocessing' are applied to each fold once, through the shared
+    transformer cache, and the results are reused by every candidate and
+    round. After searching, the best parameters are added to the parameters of
+    'estimator' if it is a Technique. A Technique with a 'fit_candidates' 
+    method (such as XGBoostModel) is searched directly, with the Dataset of
+    each fold (see Searcher).
+
+    Args:
+        name (str): designates the name of a class instance that is used for
+            internal referencing throughout sourdough. For example, if a
+            sourdough instance needs settings from a Configuration instance,
+            'name' should match the appropriate section name in a Configuration
+            instance. Defaults to None.
+        contents (Union[Callable, Type, object, str]): Searcher subclass. 
+            Defaults to None.
+        iterations (Union[int, str]): number of times the 'implement' method
+            should  be called. If 'iterations' is 'infinite', the 'implement'
+            method will continue indefinitely unless the method stops further
+            iteration. Defaults to 1.
+        parameters (Mapping[Any, Any]]): parameters to be attached to 'contents'
+            when the 'implement' method is called. Defaults to an empty dict.
+        module (str): name of module where 'contents' is located. Defaults to
+            None.
+        estimator (Any): model Technique or scikit-learn compatible estimator
+            to search. Defaults to None.
+        space (Mapping[str, Any]): parameter names mapped to lists of values or
+            scipy.stats distributions. Defaults to an empty dict.
+        preprocessing (Sequence[sourdough.project.Technique]): transformer
+            techniques applied to each fold before the estimator. Defaults to
+            an empty list.
+        warm_starter (Optional[WarmStarter]): starts fits from the nearest
+            previously fitted model. Defaults to None.
+        parallel (ClassVar[bool]): indicates whether this Component design is
+            meant to be at the end of a parallel workflow structure. Defaults to
+            False.
+
+    """
+    name: str = None
+    contents: Union[Callable, Type, object, str] = None
+    iterations: Union[int, str] = 1
+    parameters: Union[Mapping[str, Any],
+                      base.Parameters] = base.Parameters()
+    module: str = None
+    estimator: Any = None
+    space: Mapping[str, Any] = dataclasses.field(default_factory = dict)
+    preprocessing: Sequence[sourdough.project.Technique] = dataclasses.field(
+        default_factory = list)
+    warm_starter: Optional[WarmStarter] = None
+    parallel: ClassVar[bool] = False
+
+    """ Public Methods """
+
+    def implement(self, project: sourdough.Project) -> sourdough.Project:
+        """Searches 'space' using the folds of the project data.
+
+        Args:
+            project (sourdough.Project): project with a split Dataset in 'data'.
+
+        Returns:
+            sourdough.Project: unchanged, with the search results stored in
+                'contents'.
+
+        Raises:
+            ValueError: if the project data has not been split.
+
+        """
+        try:
+            self.parameters = self.parameters.finalize(project = project)
+        except AttributeError:
+            pass
+        data = project.data
+        if not data.splits:
+            raise ValueError('data must be split before searching')
+        datasets = [
+            self._prepare_fold(project = project, fold = fold)
+            for fold in range(len(data.splits))]
+        fold_data = [
+            (d.x_train, d.y_train, d.x_test, d.y_test) for d in datasets]
+        self.contents = self.contents(
+            estimator = self._get_estimator(),
+            space = self.space,
+            settings = project.settings,
+            warm_starter = self.warm_starter,
+            datasets = datasets,
+            **self.parameters)
+        self.contents.search_folds(fold_data = fold_data)
+        if hasattr(self.estimator, 'parameters'):
+            self.estimator.parameters.update(self.contents.best_params)
+        return project
+
+    """ Private Methods """
+
+    def _get_estimator(self) -> Any:
+        """Returns an estimator instance from 'estimator'."""
+        if hasattr(self.estimator, 'fit_candidates'):
+            return self.estimator
+        elif hasattr(self.estimator, 'parameters'):
+            parameters = dict(self.estimator.parameters)
+            return self.estimator.contents(**parameters)
+        return self.estimator
+
+    def _prepare_fold(self,
+            project: sourdough.Project,
+            fold: int) -> simplify.core.Dataset:
+        """Returns preprocessed training and testing data for 'fold'.
+
+        Args:
+            project (sourdough.Project): project with a split Dataset in 'data'.
+            fold (int): index of the fold.
+
+        Returns:
+            simplify.core.Dataset: copy of the project data set to 'fold'.
+
+        """
+        fold_project = copy.copy(project)
+        fold_project.data = project.data.fold_copy(fold = fold)
+        for technique in self.preprocessing:
+            fold_project = copy.deepcopy(technique).implement(
+                project = fold_project)
+        return fold_project.data
+
+
+def tune(searcher: Searcher,
+         estimator: Any,
+         data: simplify.core.Dataset,
+         settings: Optional[Mapping[str, Mapping[str, Any]]] = None) -> Any:
+    """Searches hyperparameters of 'estimator' and sets the best of them.
+
+    The search uses the folds in 'splits' of 'data' if it has been split and
+    otherwise creates 'cv' folds of its own.
+
+    Args:
+        searcher (Searcher): built-in search with a 'space' to search.
+        estimator (Any): scikit-learn compatible estimator to search and 
+            update.
+        data (simplify.core.Dataset): data with 'x' and 'y' to search with.
+        settings (Optional[Mapping[str, Mapping[str, Any]]]): project settings
+            used by the Parallelizer. Defaults to None.
+
+    Returns:
+        Any: 'estimator' with the best found parameters set.
+
+    """
+    searcher.estimator = estimator
+    searcher.settings = settings
+    searcher.search(x = data.x, y = data.y, folds = data.splits or None)
+    return estimator.set_params(**searcher.best_params)
+
+
+def _same(first: Any, second: Any) -> bool:
+    """Returns whether two parameter values are the same."""
+    try:
+        return bool(first == second)
+    except (TypeError, ValueError):
+        return repr(first) == repr(second)
+
+def _take(item: Any, rows: np.ndarray) -> Any:
+    """Returns 'rows' (by position) of a pandas object, array or matrix."""
+    if hasattr(item, 'iloc'):
+        return item.iloc[rows]
+    return item[rows]
+
+def _expected_improvement(mean: np.ndarray,
+                          deviation: np.ndarray,
+                          best: float) -> np.ndarray:
+    """Returns the expected improvement over 'best' of predicted scores."""
+    deviation = np.maximum(deviation, 1e-12)
+    improvement = mean - best
+    z = improvement / deviation
+    return (improvement * scipy.stats.norm.cdf(z) 
+            + deviation * scipy.stats.norm.pdf(z))
+
+def _evaluate(shared: Tuple,
+              candidate: int,
+              fold: int,
+              resource: int) -> Tuple[float, Optional[Any]]:
+    """Fits and scores one candidate on one fold with a 'resource' budget.
+
+    This is a module-level function so that it can be sent to worker
+    processes. Candidates which fail to fit (for example, a small subset of
+    rows with a single class) score negative infinity.
+
+    Args:
+        shared (Tuple): estimator, candidate parameters, fold data, training
+            row orders, type of budget, scoring, and WarmStarter (or None).
+        candidate (int): index of the candidate parameters.
+        fold (int): index of the fold.
+        resource (int): budget for the evaluation.
+
+    Returns:
+        Tuple[float, Optional[Any]]: score of the candidate and, if there is
+            a WarmStarter, the fitted model so it can be reused.
+
+    """
+    estimator, candidates, fold_data, orders, kind, scoring, starter = shared
+    x_train, y_train, x_test, y_test = fold_data[fold]
+    model = sklearn.base.clone(estimator).set_params(**candidates[candidate])
+    rows = None
+    if kind in ['rows']:
+        rows = resource
+        x_train = _take(x_train, orders[fold][:resource])
+        y_train = _take(y_train, orders[fold][:resource])
+    elif not kind in ['folds']:
+        model.set_params(**{kind: resource})
+    try:
+        if starter is None:
+            model.fit(x_train, y_train)
+        else:
+            model = starter.fit(
+                model = model, 
+                x = x_train, 
+                y = y_train, 
+                fold = fold, 
+                rows = rows)
+    except ValueError as error:
+        warnings.warn(f'candidate {candidate} failed to fit: {error}')
+        return -np.inf, None
+    scorer = sklearn.metrics.check_scoring(model, scoring = scoring)
+    return float(scorer(model, x_test, y_test)), (
+        None if starter is None else model)
+
+
+searchers = sourdough.types.Library(
+    contents = {
+        'halving': FoldSearch(
+            name = 'successive halving',
+            contents = 'SuccessiveHalving',
+            parameters = base.Parameters(
+                name = 'halving',
+                default = {'resource': 'rows', 'factor': 3},
+                runtime = {'seed': 'seed'}),
+            module = 'simplify.analyst.search'),
+        'hyperband': FoldSearch(
+            name = 'hyperband',
+            contents = 'Hyperband',
+            parameters = base.Parameters(
+                name = 'hyperband',
+                default = {'resource': 'rows', 'factor': 3},
+                runtime = {'seed': 'seed'}),
+            module = 'simplify.analyst.search'),
+        'bayes': FoldSearch(
+            name = 'bayes',
+            contents = 'BayesianSearch',
+            parameters = base.Parameters(
+                name = 'bayes',
+                default = {'trials': 50, 'initial': 10, 'liar': 'min'},
+                runtime = {'seed': 'seed'}),
+            module = 'simplify.analyst.search')})
@@ -5,16 +5,25 @@ Copyright 2021, Corey Rayburn Yung
 License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0) 
 
 Contents:
+    Split (Step): wrapper for a splitter Technique.
+    SklearnSplitter (Technique): wrapper for a scikit-learn data splitter.
+    FoldResult (object): results of applying techniques to one fold.
+    apply_folds (Callable): applies techniques to every fold of a Dataset as
+        independent tasks.
 
 """
+import copy
 import dataclasses
 from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping, 
                     Optional, Sequence, Tuple, Type, Union)
 
+import numpy as np
+import pandas as pd
 import sourdough
 
 from . import base
 import simplify
+from simplify.utilities import memory
 
 
 @dataclasses.dataclass
@@ -80,13 +89,17 @@ class SklearnSplitter(sourdough.project.Technique):
     """ Public Methods """
     
     def implement(self, project: sourdough.Project) -> sourdough.Project:
-        """[summary]
+        """Sets fold indices for the project data and selects the first fold.
+
+        Folds are drawn from the shared 'caches.split_registry', so identical
+        splits are computed once per project regardless of how many paths
+        include this technique.
 
         Args:
-            project (sourdough.Project): [description]
+            project (sourdough.Project): project with a Dataset in 'data'.
 
         Returns:
-            sourdough.Project: [description]
+            sourdough.Project: with 'splits' set and 'data' split.
             
         """
         try:
@@ -94,8 +107,13 @@ class SklearnSplitter(sourdough.project.Technique):
         except AttributeError:
             pass
         self.contents = self.contents(**self.parameters)
-        project.data.splits = tuple(self.contents.split(project.data.x))
-        project.data.split()
+        data = project.data
+        data.splits = simplify.caches.split_registry.get(
+            splitter = self.contents,
+            x = data.x,
+            y = data.y,
+            groups = data.groups)
+        data.split()
         return project
 
 splitters = sourdough.types.Library(
@@ -140,3 +158,147 @@ splitters = sourdough.types.Library(
                 default = {'n_splits': 5, 'shuffle': True},  
                 runtime = {'random_state': 'seed'}),
             module = 'sklearn.model_selection')})
+
+
+@dataclasses.dataclass
+class FoldResult(object):
+    """Results of applying techniques to one fold of a split Dataset.
+
+    Args:
+        fold (int): index of the fold.
+        test_index (np.ndarray): positions of the testing rows in the full data.
+        predictions (Optional[np.ndarray]): predictions of the final technique
+            for the testing rows. Defaults to None.
+        score (Optional[float]): score of the final technique on the testing
+            rows. Defaults to None.
+
+    """
+    fold: int
+    test_index: np.ndarray
+    predictions: Optional[np.ndarray] = None
+    score: Optional[float] = None
+
+
+def apply_folds(data: 'Dataset',
+        techniques: Sequence['Technique'],
+        settings: Optional[Mapping[str, Any]] = None,
+        verbose: bool = False,
+        policy: Optional[Any] = None) -> Tuple[
+            List[FoldResult], pd.Series, Dict[str, Any]]:
+    """Applies 'techniques' to every fold in 'splits' of 'data'.
+
+    Each fold is an independent task, run serially or in a process or thread
+    pool according to the 'general' section of 'settings' (see 
+    Parallelizer). Every task works on its own copy of the fold and of 
+    'techniques', so no fold overwrites another. Unless memory is being 
+    conserved, 'data' is left split to its last fold.
+
+    Args:
+        data ('Dataset'): data with 'splits' set.
+        techniques (Sequence['Technique']): techniques with an 'apply' method
+            to apply to each fold in order. If the last one has an 
+            'algorithm' with a 'predict' method, its predictions and score on
+            the testing rows are collected.
+        settings (Optional[Mapping[str, Any]]): project settings. Defaults to
+            None.
+        verbose (bool): whether to print progress. Defaults to False.
+        policy (Optional[Any]): ScalingPolicy (see analyst.scaling) applied
+            to each technique just before it is applied to a fold. Defaults to
+            None.
+
+    Returns:
+        Tuple[List[FoldResult], pd.Series, Dict[str, Any]]: results of each 
+            fold, out-of-fold predictions, and a summary of the fold scores.
+
+    Raises:
+        ValueError: if 'splits' of 'data' has not been set.
+
+    """
+    if not data.splits:
+        raise ValueError('splits must be set before folds can be applied')
+    conserve = memory.is_conserving(settings)
+    parallelizer = simplify.core.Parallelizer(settings = settings)
+    results = parallelizer.map(
+        process = _run_fold,
+        items = range(len(data.splits)),
+        shared = (data, list(techniques), verbose, conserve, policy))
+    predictions, scores = _aggregate_folds(results = results, data = data)
+    # Leaves the last fold in 'data', as a serial loop would, unless memory
+    # is being conserved.
+    if not conserve:
+        data.split(fold = len(data.splits) - 1)
+    return results, predictions, scores
+
+
+def _run_fold(shared: Tuple['Dataset', List['Technique'], bool, bool, Any],
+              fold: int) -> FoldResult:
+    """Applies techniques to one fold of a Dataset.
+
+    This is a module-level function so that it can be sent to worker 
+    processes.
+
+    Args:
+        shared (Tuple['Dataset', List['Technique'], bool, bool, Any]): the 
+            Dataset with 'splits' set, techniques to apply, whether to print
+            progress, whether memory is being conserved, and an optional
+            ScalingPolicy.
+        fold (int): index of the fold in 'splits'.
+
+    Returns:
+        FoldResult: predictions and score of the final technique.
+
+    """
+    data, techniques, verbose, conserve, policy = shared
+    if verbose:
+        print('Testing data fold', str(fold))
+    data = data.fold_copy(fold = fold)
+    techniques = copy.deepcopy(techniques)
+    for technique in techniques:
+        if verbose:
+            print('Applying', technique.name, 'to', data.name)
+        if policy is not None:
+            policy.apply(technique = technique, data = data)
+        data = technique.apply(data = data)
+    result = FoldResult(
+        fold = fold, 
+        test_index = np.asarray(data.splits[fold][1]))
+    estimator = getattr(techniques[-1], 'algorithm', None) if techniques else None
+    if hasattr(estimator, 'predict'):
+        result.predictions = np.asarray(estimator.predict(data.x_test))
+        if hasattr(estimator, 'score'):
+            result.score = estimator.score(data.x_test, data.y_test)
+    if conserve:
+        del data, techniques
+        memory.collect()
+    return result
+
+
+def _aggregate_folds(results: Sequence[FoldResult], 
+                     data: 'Dataset') -> Tuple[pd.Series, Dict[str, Any]]:
+    """Combines fold results into out-of-fold predictions and score summaries.
+
+    Args:
+        results (Sequence[FoldResult]): results for each fold.
+        data ('Dataset'): the Dataset which was split.
+
+    Returns:
+        Tuple[pd.Series, Dict[str, Any]]: predictions indexed like 'data.x' 
+            (if a row is in several testing sets, the last prediction is kept)
+            and a dict with the 'mean', 'std', and per-fold 'folds' scores.
+
+    """
+    predicted = [r for r in results if r.predictions is not None]
+    if predicted:
+        positions = np.concatenate([r.test_index for r in predicted])
+        values = np.concatenate([r.predictions for r in predicted])
+        predictions = pd.Series(values, index = data.x.index[positions])
+        predictions = predictions[
+            ~predictions.index.duplicated(keep = 'last')].sort_index()
+    else:
+        predictions = pd.Series(dtype = 'float64')
+    folds = [r.score for r in results if r.score is not None]
+    scores = {
+        'mean': float(np.mean(folds)) if folds else None,
+        'std': float(np.std(folds)) if folds else None,
+        'folds': folds}
+    return predictions, scores
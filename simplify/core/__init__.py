@@ -11,12 +11,16 @@ Contents:
 from .quirks import *
 from .framework import *
 from .base import *
+from .caches import *
 from .components import *
 from .externals import *
+from .parallel import *
 from .stages import *
 from .criteria import *
 from .dataset import *
 from .interface import *
+from .predictor import *
+from .server import *
 
 
 __version__ = '0.1.1'
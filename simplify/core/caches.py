@@ -0,0 +1,755 @@
+"""
+caches: shared stores for expensive, reusable intermediate results
+Corey Rayburn Yung <coreyrayburnyung@gmail.com>
+Copyright 2021, Corey Rayburn Yung
+License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+
+Contents:
+    fingerprint (function): creates a compact hash identifying data.
+    SplitRegistry (object): computes fold indices once and shares them.
+    TransformerCache (object): least-recently-used store of fitted 
+        transformers and their outputs.
+    TrialStore (object): persistent history of hyperparameter search trials
+        and fitted models.
+    split_registry (SplitRegistry): default registry shared by a process.
+    transformer_cache (TransformerCache): default transformer cache shared by
+        a process.
+    matrix_cache (TransformerCache): training matrices built for xgboost,
+        shared by a process.
+    score_cache (TransformerCache): univariate feature scores, shared by a
+        process.
+    ModelStore (object): persistent store of fitted models whose large
+        arrays are saved as separate files and memory-mapped when loaded.
+    trial_store (TrialStore): default trial store shared by a process.
+
+"""
+from __future__ import annotations
+import collections
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import pickle
+import threading
+from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
+                    Optional, Sequence, Tuple, Type, Union)
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+Folds = Tuple[Tuple[np.ndarray, np.ndarray], ...]
+
+
+def fingerprint(*items: Any) -> str:
+    """Returns a hash which identifies the contents of 'items'.
+
+    pandas objects are hashed with their index, numpy arrays and sparse 
+    matrices with their shape and dtype, and anything else by its string 
+    representation. None values
+    are hashed as placeholders so that positions remain significant.
+
+    Args:
+        items (Any): objects to include in the fingerprint.
+
+    Returns:
+        str: hexadecimal blake2b digest.
+
+    """
+    digest = hashlib.blake2b(digest_size = 16)
+    for item in items:
+        if item is None:
+            digest.update(b'none')
+        elif isinstance(item, (pd.DataFrame, pd.Series, pd.Index)):
+            digest.update(str(getattr(item, 'shape', len(item))).encode())
+            digest.update(
+                pd.util.hash_pandas_object(item, index = True).values.tobytes())
+        elif isinstance(item, np.ndarray):
+            digest.update(f'{item.shape}{item.dtype}'.encode())
+            digest.update(np.ascontiguousarray(item).tobytes())
+        elif sparse.issparse(item):
+            item = item.tocsr()
+            digest.update(f'{item.shape}{item.dtype}'.encode())
+            for array in [item.data, item.indices, item.indptr]:
+                digest.update(np.ascontiguousarray(array).tobytes())
+        else:
+            digest.update(repr(item).encode())
+    return digest.hexdigest()
+
+
+@dataclasses.dataclass
+class SplitRegistry(object):
+    """Computes fold indices once and shares them across a project.
+
+    Folds are keyed by the splitter (its class and parameters, including any
+    random seed) and a fingerprint of the data which can affect the split (the
+    row index, the label, and any groups). Feature values do not affect
+    splitting, so they are not hashed. Indices are stored as int32 arrays.
+
+    If 'folder' is set, folds are also saved there as .npy files and later
+    loaded as read-only memory maps, so separate worker processes share a
+    single copy through the page cache.
+
+    Args:
+        folder (Optional[Union[str, pathlib.Path]]): folder where folds are
+            persisted. Defaults to None, in which case folds are only stored in
+            memory.
+        contents (Dict[str, Folds]): stored folds keyed by the value returned
+            by the 'key' method. Defaults to an empty dict.
+
+    """
+    folder: Optional[Union[str, pathlib.Path]] = None
+    contents: Dict[str, Folds] = dataclasses.field(default_factory = dict)
+
+    """ Public Methods """
+
+    def get(self,
+            splitter: Any,
+            x: Union[pd.DataFrame, np.ndarray],
+            y: Optional[Union[pd.Series, np.ndarray]] = None,
+            groups: Optional[Union[pd.Series, np.ndarray]] = None) -> Folds:
+        """Returns folds for 'x' from 'splitter', computing them if needed.
+
+        Args:
+            splitter (Any): scikit-learn compatible splitter with a 'split'
+                method.
+            x (Union[pd.DataFrame, np.ndarray]): features to split.
+            y (Optional[Union[pd.Series, np.ndarray]]): label used by
+                stratified splitters. Defaults to None.
+            groups (Optional[Union[pd.Series, np.ndarray]]): group labels used
+                by group splitters. Defaults to None.
+
+        Returns:
+            Folds: tuple of (train indices, test indices) for each fold.
+
+        """
+        key = self.key(splitter = splitter, x = x, y = y, groups = groups)
+        if key not in self.contents:
+            folds = self._load(key = key)
+            if folds is None:
+                folds = tuple(
+                    (np.asarray(train, dtype = np.int32),
+                     np.asarray(test, dtype = np.int32))
+                    for train, test in splitter.split(x, y, groups))
+                self._save(key = key, folds = folds)
+            self.contents[key] = folds
+        return self.contents[key]
+
+    def key(self,
+            splitter: Any,
+            x: Union[pd.DataFrame, np.ndarray],
+            y: Optional[Union[pd.Series, np.ndarray]] = None,
+            groups: Optional[Union[pd.Series, np.ndarray]] = None) -> str:
+        """Returns the key identifying folds for 'splitter' and the data.
+
+        Args:
+            splitter (Any): scikit-learn compatible splitter.
+            x (Union[pd.DataFrame, np.ndarray]): features to split.
+            y (Optional[Union[pd.Series, np.ndarray]]): label. Defaults to None.
+            groups (Optional[Union[pd.Series, np.ndarray]]): group labels.
+                Defaults to None.
+
+        Returns:
+            str: key for 'contents' and persisted file names.
+
+        """
+        index = getattr(x, 'index', None)
+        if index is None:
+            index = x.shape[0]
+        return fingerprint(
+            splitter.__class__.__name__, 
+            _describe_parameters(item = splitter), 
+            index, 
+            y, 
+            groups)
+
+    def clear(self) -> None:
+        """Removes all folds stored in memory."""
+        self.contents = {}
+        return self
+
+    """ Private Methods """
+
+    def _load(self, key: str) -> Optional[Folds]:
+        """Returns persisted folds for 'key' as memory maps, if they exist.
+
+        Args:
+            key (str): key for the folds.
+
+        Returns:
+            Optional[Folds]: folds or None if they have not been persisted.
+
+        """
+        if self.folder is None:
+            return None
+        indices_path = pathlib.Path(self.folder).joinpath(f'{key}_indices.npy')
+        offsets_path = pathlib.Path(self.folder).joinpath(f'{key}_offsets.npy')
+        if not (indices_path.exists() and offsets_path.exists()):
+            return None
+        indices = np.load(indices_path, mmap_mode = 'r')
+        offsets = np.load(offsets_path)
+        arrays = [
+            indices[start:stop] for start, stop in zip(offsets, offsets[1:])]
+        return tuple(zip(arrays[::2], arrays[1::2]))
+
+    def _save(self, key: str, folds: Folds) -> None:
+        """Persists 'folds' in 'folder' as one flat array and its offsets.
+
+        Args:
+            key (str): key for the folds.
+            folds (Folds): folds to persist.
+
+        """
+        if self.folder is not None:
+            folder = pathlib.Path(self.folder)
+            folder.mkdir(parents = True, exist_ok = True)
+            arrays = [array for fold in folds for array in fold]
+            offsets = np.cumsum([0] + [len(array) for array in arrays])
+            # Offsets are written last because '_load' requires both files.
+            _save_array(
+                path = folder.joinpath(f'{key}_indices.npy'),
+                array = np.concatenate(arrays).astype(np.int32))
+            _save_array(
+                path = folder.joinpath(f'{key}_offsets.npy'), 
+                array = offsets)
+        return self
+
+
+@dataclasses.dataclass
+class TransformerCache(object):
+    """Stores fitted transformers and their outputs for reuse.
+
+    When several branches of a workflow share the same preprocessing, each
+    transformer only needs to be fit and applied once per fold. Entries are
+    keyed by the transformer, its finalized parameters, the fold, and a 
+    fingerprint of the data it receives (see Dataset.fingerprint), so a 
+    transformer is never reused on different data. The least recently used
+    entry is dropped once there are more than 'max_entries'.
+
+    Args:
+        max_entries (int): maximum number of stored entries. Defaults to 32.
+        contents (collections.OrderedDict): stored entries from least to most
+            recently used. Defaults to an empty OrderedDict.
+
+    """
+    max_entries: int = 32
+    contents: collections.OrderedDict = dataclasses.field(
+        default_factory = collections.OrderedDict)
+
+    def __post_init__(self) -> None:
+        """Sets counters and a lock for use from several threads."""
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        return self
+
+    """ Public Methods """
+
+    def add(self, key: str, value: Any) -> None:
+        """Stores 'value' under 'key', dropping the oldest entries if needed.
+
+        Args:
+            key (str): key returned by the 'key' method.
+            value (Any): fitted transformer and outputs to store.
+
+        """
+        with self.lock:
+            self.contents[key] = value
+            self.contents.move_to_end(key)
+            while len(self.contents) > self.max_entries:
+                self.contents.popitem(last = False)
+        return self
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the value stored under 'key' or None if there is none.
+
+        Args:
+            key (str): key returned by the 'key' method.
+
+        Returns:
+            Optional[Any]: stored value or None.
+
+        """
+        with self.lock:
+            if key in self.contents:
+                self.hits += 1
+                self.contents.move_to_end(key)
+                return self.contents[key]
+            self.misses += 1
+            return None
+
+    def key(self,
+            transformer: Any,
+            parameters: Optional[Mapping[str, Any]],
+            fold: Optional[int],
+            upstream: str) -> str:
+        """Returns the key identifying a fitted transformer.
+
+        Args:
+            transformer (Any): transformer class or instance.
+            parameters (Optional[Mapping[str, Any]]): finalized parameters.
+            fold (Optional[int]): index of the fold, if the data is split.
+            upstream (str): fingerprint of the data passed to 'transformer'.
+
+        Returns:
+            str: key for 'contents'.
+
+        """
+        if not isinstance(transformer, type):
+            transformer = transformer.__class__
+        name = '.'.join([transformer.__module__, transformer.__qualname__])
+        try:
+            parameters = sorted(
+                (str(k), repr(v)) for k, v in dict(parameters).items())
+        except (TypeError, ValueError):
+            parameters = repr(parameters)
+        return fingerprint(name, parameters, fold, upstream)
+
+    def clear(self) -> None:
+        """Removes all stored entries."""
+        with self.lock:
+            self.contents = collections.OrderedDict()
+        return self
+
+
+@dataclasses.dataclass
+class TrialStore(object):
+    """Stores the history of hyperparameter search trials and fitted models.
+
+    Trials are dicts (for example, parameters and score) grouped by a key 
+    which identifies the search. Fitted models are grouped by a key which 
+    identifies the data they were fit to. If 'folder' is set, each trial is 
+    appended to a .jsonl file as soon as it is added and each model is saved
+    with joblib, so a search which is interrupted can resume from the trials 
+    already completed and later project runs can reuse fitted models. Only 
+    the 'max_models' most recently added models are kept for each key; older 
+    models (and their files) are removed.
+
+    Args:
+        folder (Optional[Union[str, pathlib.Path]]): folder where trials and
+            models are persisted. Defaults to None, in which case they are 
+            only stored in memory.
+        max_models (Optional[int]): number of models kept for each key, or 
+            None to keep every model. Defaults to 10.
+        contents (Dict[str, List[Dict[str, Any]]]): stored trials for each key.
+            Defaults to an empty dict.
+        models (Dict[str, List[Any]]): stored fitted models for each key.
+            Defaults to an empty dict.
+
+    """
+    folder: Optional[Union[str, pathlib.Path]] = None
+    max_models: Optional[int] = 10
+    contents: Dict[str, List[Dict[str, Any]]] = dataclasses.field(
+        default_factory = dict)
+    models: Dict[str, List[Any]] = dataclasses.field(default_factory = dict)
+
+    """ Class Methods """
+
+    @classmethod
+    def from_settings(cls, 
+            settings: Optional[Mapping[str, Mapping[str, Any]]]) -> TrialStore:
+        """Returns the TrialStore described by the 'general' settings.
+
+        'trial_folder' sets where trials and models are persisted and 
+        'max_models' how many models are kept for each key.
+
+        Args:
+            settings (Optional[Mapping[str, Mapping[str, Any]]]): project 
+                settings.
+
+        Returns:
+            TrialStore: a store using 'trial_folder', or the shared 
+                'trial_store' if no folder is set.
+
+        """
+        try:
+            general = settings['general']
+        except (KeyError, TypeError):
+            general = {}
+        folder = general.get('trial_folder')
+        if not folder:
+            return trial_store
+        return cls(
+            folder = folder, 
+            max_models = general.get('max_models', cls.max_models))
+
+    """ Public Methods """
+
+    def add(self, key: str, trial: Mapping[str, Any]) -> None:
+        """Stores 'trial' under 'key'.
+
+        Args:
+            key (str): key identifying the search.
+            trial (Mapping[str, Any]): JSON serializable trial. numpy scalars
+                and arrays are converted to python types.
+
+        """
+        trial = json.loads(json.dumps(trial, default = _to_json))
+        self.load(key = key)
+        self.contents[key].append(trial)
+        if self.folder is not None:
+            with open(self._get_path(f'{key}_trials.jsonl'), 'a') as file:
+                file.write(json.dumps(trial) + '\n')
+        return self
+
+    def add_model(self, key: str, model: Any) -> None:
+        """Stores fitted 'model' under 'key'.
+
+        Args:
+            key (str): key identifying the data 'model' was fit to.
+            model (Any): fitted model which can be pickled.
+
+        """
+        self.load_models(key = key)
+        self.models[key].append(model)
+        if self.folder is not None:
+            names = self._get_model_names(key = key)
+            name = f'{key}_model_{os.urandom(8).hex()}.joblib'
+            joblib.dump(model, self._get_path(name))
+            names.append(name)
+            removed = self._trim(items = names)
+            if removed:
+                self._write_model_names(key = key, names = names)
+                for old in removed:
+                    self._get_path(old).unlink(missing_ok = True)
+            else:
+                with open(self._get_path(f'{key}_models.jsonl'), 'a') as file:
+                    file.write(json.dumps(name) + '\n')
+        self._trim(items = self.models[key])
+        return self
+
+    def load(self, key: str) -> List[Dict[str, Any]]:
+        """Returns the trials stored under 'key', reading them if persisted.
+
+        Args:
+            key (str): key identifying the search.
+
+        Returns:
+            List[Dict[str, Any]]: trials in the order they were added.
+
+        """
+        if key not in self.contents:
+            self.contents[key] = [
+                json.loads(line) 
+                for line in self._read_lines(f'{key}_trials.jsonl')]
+        return list(self.contents[key])
+
+    def load_models(self, key: str) -> List[Any]:
+        """Returns the models stored under 'key', reading them if persisted.
+
+        Args:
+            key (str): key identifying the data models were fit to.
+
+        Returns:
+            List[Any]: fitted models in the order they were added.
+
+        """
+        if key not in self.models:
+            names = self._get_model_names(key = key)
+            self._trim(items = names)
+            self.models[key] = [
+                joblib.load(self._get_path(name)) for name in names]
+        return list(self.models[key])
+
+    def clear(self) -> None:
+        """Removes all trials and models stored in memory."""
+        self.contents = {}
+        self.models = {}
+        return self
+
+    """ Private Methods """
+
+    def _get_model_names(self, key: str) -> List[str]:
+        """Returns the names of model files persisted under 'key'."""
+        return [
+            json.loads(line) 
+            for line in self._read_lines(f'{key}_models.jsonl')]
+
+    def _get_path(self, name: str) -> pathlib.Path:
+        """Returns the path of 'name' in 'folder', creating 'folder'."""
+        folder = pathlib.Path(self.folder)
+        folder.mkdir(parents = True, exist_ok = True)
+        return folder.joinpath(name)
+
+    def _read_lines(self, name: str) -> List[str]:
+        """Returns the non-empty lines of 'name' in 'folder', if it exists."""
+        if self.folder is None:
+            return []
+        path = pathlib.Path(self.folder).joinpath(name)
+        if not path.exists():
+            return []
+        with open(path, 'r') as file:
+            return [line for line in file if line.strip()]
+
+    def _trim(self, items: List[Any]) -> List[Any]:
+        """Removes and returns all but the last 'max_models' of 'items'."""
+        if self.max_models is None or len(items) <= self.max_models:
+            return []
+        removed = items[:len(items) - self.max_models]
+        del items[:len(items) - self.max_models]
+        return removed
+
+    def _write_model_names(self, key: str, names: Sequence[str]) -> None:
+        """Replaces the list of model files persisted under 'key'."""
+        path = self._get_path(f'{key}_models.jsonl')
+        temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temporary, 'w') as file:
+            file.writelines(json.dumps(name) + '\n' for name in names)
+        os.replace(temporary, path)
+        return
+
+
+@dataclasses.dataclass
+class ModelStore(object):
+    """Persists fitted models with their large arrays in separate files.
+
+    Pickling a fitted model copies every array into the pickle, so each 
+    process which loads the model holds its own copy. A ModelStore instead 
+    saves each numeric array of at least 'minimum' bytes (for example, the 
+    data indexed by a KDTree or the coefficients of a wide linear model) as 
+    an .npy file named by a hash of its contents and pickles the rest of the 
+    model with references to those files. When loaded, the arrays are 
+    memory-mapped read-only, so loading is fast, pages are only read when 
+    they are used, and several scoring processes share one copy of each 
+    array in the page cache. Identical arrays in different models are only 
+    stored once. Objects which copy arrays when they are unpickled (such as 
+    scikit-learn trees) are still saved and loaded this way but hold their 
+    own copy in memory.
+
+    Models are loaded the first time they are requested and then kept in
+    'contents'.
+
+    Args:
+        folder (Union[str, pathlib.Path]): folder where models are persisted.
+        minimum (int): size in bytes at which an array is saved separately.
+            Defaults to 65536.
+        mmap_mode (Optional[str]): mode used to memory-map arrays, or None to 
+            read them into memory. Defaults to 'r'.
+        contents (Dict[str, Any]): loaded models. Defaults to an empty dict.
+
+    """
+    folder: Union[str, pathlib.Path]
+    minimum: int = 65536
+    mmap_mode: Optional[str] = 'r'
+    contents: Dict[str, Any] = dataclasses.field(default_factory = dict)
+
+    def __post_init__(self) -> None:
+        """Sets a lock for use from several threads."""
+        self.folder = pathlib.Path(self.folder)
+        self.lock = threading.Lock()
+        return self
+
+    """ Public Methods """
+
+    def save(self, name: str, model: Any) -> None:
+        """Persists fitted 'model' as 'name', replacing any earlier model.
+
+        Args:
+            name (str): name of the model.
+            model (Any): fitted model which can be pickled.
+
+        """
+        arrays = self.folder.joinpath('arrays')
+        arrays.mkdir(parents = True, exist_ok = True)
+        path = self._get_path(name = name)
+        temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temporary, 'wb') as file:
+            _ArrayPickler(
+                file = file, 
+                folder = arrays, 
+                minimum = self.minimum).dump(model)
+        os.replace(temporary, path)
+        with self.lock:
+            self.contents[name] = model
+        return self
+
+    def load(self, name: str) -> Any:
+        """Returns the model saved as 'name', loading it if needed.
+
+        Args:
+            name (str): name of the model.
+
+        Returns:
+            Any: fitted model. Its large arrays are read-only memory maps 
+                unless 'mmap_mode' is None.
+
+        Raises:
+            KeyError: if no model is saved as 'name'.
+
+        """
+        with self.lock:
+            if name not in self.contents:
+                path = self._get_path(name = name)
+                if not path.exists():
+                    raise KeyError(f'{name} is not in {self.folder}')
+                with open(path, 'rb') as file:
+                    self.contents[name] = _ArrayUnpickler(
+                        file = file,
+                        folder = self.folder.joinpath('arrays'),
+                        mmap_mode = self.mmap_mode).load()
+            return self.contents[name]
+
+    def names(self) -> List[str]:
+        """Returns the names of the saved models without loading them."""
+        return sorted(path.stem for path in self.folder.glob('*.model'))
+
+    def clear(self) -> None:
+        """Removes all loaded models from memory."""
+        with self.lock:
+            self.contents = {}
+        return self
+
+    """ Dunder Methods """
+
+    def __contains__(self, name: str) -> bool:
+        return self._get_path(name = name).exists()
+
+    """ Private Methods """
+
+    def _get_path(self, name: str) -> pathlib.Path:
+        """Returns the path of the pickle for 'name'."""
+        return self.folder.joinpath(f'{name}.model')
+
+
+class _ArrayPickler(pickle.Pickler):
+    """Pickler which saves large numeric arrays to separate .npy files."""
+
+    def __init__(self, 
+            file: Any, 
+            folder: pathlib.Path, 
+            minimum: int) -> None:
+        super().__init__(file, protocol = pickle.HIGHEST_PROTOCOL)
+        self.folder = folder
+        self.minimum = minimum
+
+    def persistent_id(self, item: Any) -> Optional[Tuple[str, str]]:
+        """Returns a reference to the file for large arrays."""
+        if (isinstance(item, np.ndarray) 
+                and not item.dtype.hasobject
+                and item.nbytes >= self.minimum):
+            return ('array', self._save(array = item))
+        return None
+
+    def _save(self, array: np.ndarray) -> str:
+        """Saves 'array' unless it was saved before and returns its name."""
+        digest = hashlib.blake2b(digest_size = 16)
+        digest.update(str((array.dtype.descr, array.shape)).encode())
+        digest.update(np.ascontiguousarray(array).data)
+        name = f'{digest.hexdigest()}.npy'
+        path = self.folder.joinpath(name)
+        if not path.exists():
+            _save_array(path = path, array = np.asarray(array))
+        return name
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """Unpickler which memory-maps arrays saved by _ArrayPickler."""
+
+    def __init__(self, 
+            file: Any, 
+            folder: pathlib.Path, 
+            mmap_mode: Optional[str]) -> None:
+        super().__init__(file)
+        self.folder = folder
+        self.mmap_mode = mmap_mode
+
+    def persistent_load(self, reference: Tuple[str, str]) -> np.ndarray:
+        """Returns the array for a reference from _ArrayPickler."""
+        kind, name = reference
+        if kind != 'array':
+            raise pickle.UnpicklingError(f'unknown reference {kind}')
+        return np.load(
+            self.folder.joinpath(name), 
+            mmap_mode = self.mmap_mode, 
+            allow_pickle = False)
+
+
+def _describe_parameters(item: Any) -> List[Tuple[str, str]]:
+    """Returns the parameters of 'item' with random states resolved.
+
+    Args:
+        item (Any): object with 'get_params' or instance attributes (e.g. a 
+            scikit-learn splitter).
+
+    Returns:
+        List[Tuple[str, str]]: sorted names and descriptions of parameters.
+
+    """
+    if hasattr(item, 'get_params'):
+        parameters = item.get_params(deep = False)
+    else:
+        parameters = vars(item)
+    return sorted(
+        (str(name), _describe_value(value = value)) 
+        for name, value in parameters.items())
+
+def _describe_value(value: Any) -> str:
+    """Returns a description of 'value' which is the same in every process.
+
+    The reprs of numpy random states, functions and frozen scipy distributions
+    show their addresses, so random states are described by a hash of their
+    current state, functions and classes by their import path, distributions
+    by their name and arguments, and estimators by their class and 
+    parameters.
+
+    Args:
+        value (Any): parameter value to describe.
+
+    Returns:
+        str: description of 'value'.
+
+    """
+    if isinstance(value, np.random.RandomState):
+        kind, keys, position, *_ = value.get_state()
+        value = ('RandomState', fingerprint(keys, str(position)))
+    elif isinstance(value, np.random.Generator):
+        value = ('Generator', fingerprint(
+            json.dumps(value.bit_generator.state, default = str)))
+    elif isinstance(value, type) or inspect.isroutine(value):
+        value = '.'.join([value.__module__, value.__qualname__])
+    elif hasattr(value, 'dist') and hasattr(value, 'kwds'):
+        value = (
+            value.dist.name, 
+            [_describe_value(value = a) for a in value.args],
+            [(k, _describe_value(value = v)) 
+             for k, v in sorted(value.kwds.items())])
+    elif hasattr(value, 'get_params'):
+        value = (
+            _describe_value(value = value.__class__), 
+            _describe_parameters(item = value))
+    return repr(value)
+
+def _save_array(path: pathlib.Path, array: np.ndarray) -> None:
+    """Saves 'array' to 'path' so that readers never see a partial file.
+
+    The array is written to a temporary file which then replaces 'path'.
+
+    Args:
+        path (pathlib.Path): path of the .npy file to create.
+        array (np.ndarray): array to save.
+
+    """
+    temporary = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temporary, 'wb') as file:
+        np.save(file, array, allow_pickle = False)
+    os.replace(temporary, path)
+    return
+
+def _to_json(item: Any) -> Any:
+    """Converts numpy values for json serialization."""
+    if isinstance(item, np.generic):
+        return item.item()
+    elif isinstance(item, np.ndarray):
+        return item.tolist()
+    return str(item)
+
+
+split_registry = SplitRegistry()
+transformer_cache = TransformerCache()
+matrix_cache = TransformerCache(max_entries = 4)
+score_cache = TransformerCache(max_entries = 64)
+trial_store = TrialStore()
@@ -6,9 +6,11 @@ License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0)
 
 Contents:
     Dataset
+    ChunkedDataset
     DataBunch
     DataStates
     DataState
+    DataSnapshot
     
 """
 from __future__ import annotations
@@ -23,8 +25,11 @@ from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
 import more_itertools
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
 from . import base
+from . import caches
+from ..utilities import memory
 import sourdough
 import simplify
 
@@ -47,12 +52,16 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             sourdough instance needs settings from a Configuration instance, 
             'name' should match the appropriate section name in a Configuration 
             instance. Defaults to None.
+        batch_size (int): default number of rows in each batch yielded by the
+            'iter_batches' method (and used internally by '__iter__'). Defaults
+            to 10000.
 
     """
     data: Union[pd.DataFrame, np.ndarray, pathlib.Path, str] = None
     datatypes: Dict[str, str] = dataclasses.field(default_factory = dict)
     prefixes: Dict[str, str] = dataclasses.field(default_factory = dict)
     name: str = None
+    batch_size: int = 10000
     needs: ClassVar[Sequence[str]] = ['data', 'settings', 'filer']
 
     def __post_init__(self) -> None:
@@ -63,6 +72,10 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
         self.types = DataTypes()
         self._initialize_datatypes()
         self.states = DataStates(parent = self)
+        self.splits = None
+        self.fold = None
+        self.lineage = None
+        self.source_fingerprint = None
         return self
 
     """ Factory and Validation Class Methods """
@@ -80,8 +93,8 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                         np.ndarray, 
                         pathlib.Path,
                         str] = None,
-            datatypes: Mapping[str, str] = lambda: {},
-            prefixes: Mapping[str, str] = lambda: {},
+            datatypes: Mapping[str, str] = None,
+            prefixes: Mapping[str, str] = None,
             name: str = None,
             settings: base.Settings = None,
             filer: base.Filer = None) -> Dataset:
@@ -109,7 +122,8 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                 values are siMpLify proxy datatypes. Defaults to an empty
                 dictionary.
             settings (Optional[Idea]): shared 'Idea' instance with project
-                settings.
+                settings. If 'conserve_memory' is activated in its 'general'
+                section, numeric columns are downcast when loaded.
             filer (Optional['Clerk']): shared 'Clerk' instance with
                 project file management settings.
 
@@ -129,11 +143,17 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             data[settings['analyst']['label']] = y
         # Creates 'Dataset' based upon argumnets passed.
         elif isinstance(data, (pd.DataFrame, np.ndarray, pathlib.Path, str)):
-            return cls(
-                data = cls._validate_data(data = data, filer = filer),
-                datatypes = datatypes,
-                prefixes = prefixes,
+            data = cls._validate_data(data = data, filer = filer)
+            # Downcasts on load if 'conserve_memory' is activated.
+            if memory.is_conserving(settings):
+                data = memory.shrink(data)
+            created = cls(
+                data = data,
+                datatypes = dict(datatypes or {}),
+                prefixes = dict(prefixes or {}),
                 name = name)
+            created.settings = settings
+            return created
         elif isinstance(data, pd.Series):
             # To do add row to DataFrame.
             pass
@@ -195,6 +215,7 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                     if self.data[column].nunique() < threshold:
                         self.data[column] = self.data[column].astype('category')
                         self.datatypes[column] = 'categorical'
+                        self.states.record(columns = column)
             except KeyError:
                 raise KeyError(' '.join([column, 'is not in data']))
         return self
@@ -227,6 +248,7 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                 frequencies = (counts/counts.sum() * 100).lt(1)
                 rare = frequencies[frequencies <= threshold].index
                 self.data[column].replace(rare , 'rare', inplace = True)
+                self.states.record(columns = column)
             except KeyError:
                 raise KeyError(' '.join([column, 'is not in data']))
         return self
@@ -312,6 +334,7 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                 self.data[column].fillna(default_value, inplace = True)
             except KeyError:
                 raise KeyError(' '.join([column, 'is not in data']))
+            self.states.record(columns = column)
         return self
 
     def add(self, data: Union[pd.DataFrame, pd.Series]) -> None:
@@ -348,6 +371,7 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                 proxy_type = datatype,
                 column = self.data[name])
             self.datatypes[name] = datatype
+            self.states.record(columns = name)
         return self
 
     def create_xy(self,
@@ -375,8 +399,8 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                 label = 'label'
         x_columns = list(self.data.columns.values)
         x_columns.remove(label)
-        self.full_bunch.x = self.data[x_columns]
-        self.full_bunch.y = self.data[label]
+        self.x = self.data[x_columns]
+        self.y = self.data[label]
         if not hasattr(self, 'label_datatype'):
             self.label_datatype = self.datatypes[label]
             del self.datatypes[label]
@@ -396,6 +420,7 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             self.data[name] = self.types.downcast(
                 proxy_type = self.datatypes[name],
                 column = self.data[name])
+            self.states.record(columns = name)
         return self
 
     def drop_columns(self,
@@ -410,8 +435,37 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             self.data.drop(columns, axis = 'columns', inplace = True)
         except TypeError:
             self.data.drop(columns, inplace = True)
+        self.states.record(columns = columns)
         return self
 
+    def fingerprint(self) -> str:
+        """Returns a hash identifying the current training and testing data.
+
+        The full 'x' and 'y' are hashed once (until either is replaced) and 
+        combined with the current state and fold. Transformers which use the
+        shared 'caches.transformer_cache' then set 'lineage' to their cache 
+        key, so the fingerprint reflects every transformation applied since 
+        the data was last split without hashing the transformed values.
+
+        Returns:
+            str: fingerprint of the current data.
+
+        """
+        if self.lineage is None:
+            if self.source_fingerprint is None:
+                self.source_fingerprint = caches.fingerprint(
+                    self.full_bunch.x, 
+                    self.full_bunch.y)
+            indices = ()
+            if self.splits and self.fold is not None:
+                indices = self.splits[self.fold]
+            self.lineage = caches.fingerprint(
+                self.source_fingerprint, 
+                self.states.current,
+                self.fold,
+                *indices)
+        return self.lineage
+
     def get_series(self,
             columns: Optional[Union[List[str], str]] = None) -> None:
         """Creates a Series (row) with the 'datatypes' dict.
@@ -449,6 +503,255 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             self.datatypes[name] = self.types.infer(column = self.data[name])
         return self
 
+    def iter_batches(self,
+            size: Optional[int] = None,
+            columns: Optional[Union[List[str], str]] = None,
+            as_records: Optional[bool] = False) -> Iterable[
+                Union[pd.DataFrame, np.recarray]]:
+        """Yields consecutive row batches of 'data'.
+
+        Each batch is a positional slice of 'data', so no rows are copied until
+        a consumer modifies a batch.
+
+        Args:
+            size (Optional[int]): number of rows in each batch. Defaults to
+                None. If not passed, 'batch_size' is used.
+            columns (Optional[Union[List[str], str]]): columns to include in
+                each batch. Defaults to None. If not passed, all columns are
+                included.
+            as_records (Optional[bool]): whether to yield numpy record arrays
+                instead of pandas DataFrames. Defaults to False.
+
+        Yields:
+            Union[pd.DataFrame, np.recarray]: the next batch of rows.
+
+        Raises:
+            ValueError: if 'size' is less than 1.
+
+        """
+        if size is None:
+            size = self.batch_size
+        if size < 1:
+            raise ValueError('size must be a positive integer')
+        if columns:
+            data = self.data[list(more_itertools.always_iterable(columns))]
+        else:
+            data = self.data
+        for start in range(0, len(data), size):
+            batch = data.iloc[start:start + size]
+            if as_records:
+                yield batch.to_records(index = False)
+            else:
+                yield batch
+
+    def itertuples(self,
+            columns: Optional[Union[List[str], str]] = None,
+            index: Optional[bool] = True,
+            name: Optional[str] = 'Row') -> Iterable[Tuple]:
+        """Yields rows of 'data' as namedtuples.
+
+        Rows are produced batch by batch with the pandas 'itertuples' method,
+        which avoids the per-row Series construction of 'iterrows'.
+
+        Args:
+            columns (Optional[Union[List[str], str]]): columns to include in
+                each row. Defaults to None. If not passed, all columns are
+                included.
+            index (Optional[bool]): whether the row index should be the first
+                item in each tuple. Defaults to True.
+            name (Optional[str]): name of the returned namedtuples. If None,
+                plain tuples are returned. Defaults to 'Row'.
+
+        Yields:
+            Tuple: the next row of 'data'.
+
+        """
+        for batch in self.iter_batches(columns = columns):
+            yield from batch.itertuples(index = index, name = name)
+
+    def sample_view(self,
+            n: int,
+            stratify: Optional[str] = None,
+            seed: Optional[int] = None,
+            columns: Optional[Union[List[str], str]] = None) -> pd.DataFrame:
+        """Returns a uniform random sample of 'n' rows from a single pass.
+
+        Rows are streamed with 'iter_batches', so the full table is never
+        copied and datasets which do not fit in memory can be sampled. Each row
+        gets a random key and the rows with the smallest keys are kept, which
+        is equivalent to reservoir sampling. If 'stratify' is passed, a 
+        reservoir is kept for each of its values and rows are allocated to 
+        each stratum in proportion to its size.
+
+        Args:
+            n (int): number of rows to sample. If 'data' has fewer rows, all 
+                rows are returned.
+            stratify (Optional[str]): name of column to stratify the sample by.
+                Defaults to None.
+            seed (Optional[int]): seed for the random number generator. 
+                Defaults to None.
+            columns (Optional[Union[List[str], str]]): columns to include in 
+                the sample. Defaults to None. If not passed, all columns are 
+                included.
+
+        Returns:
+            pd.DataFrame: sampled rows in their original order.
+
+        """
+        key, position = '__sample_key__', '__sample_position__'
+        if columns and stratify:
+            columns = list(more_itertools.always_iterable(columns))
+            if stratify not in columns:
+                columns.append(stratify)
+        generator = np.random.default_rng(seed)
+        kept = None
+        counts = pd.Series(dtype = 'int64')
+        thresholds = pd.Series(dtype = 'float64')
+        start = 0
+        for batch in self.iter_batches(columns = columns):
+            batch = batch.assign(**{
+                key: generator.random(len(batch)),
+                position: np.arange(start, start + len(batch))})
+            start += len(batch)
+            if stratify:
+                counts = counts.add(
+                    batch[stratify].value_counts(dropna = False), 
+                    fill_value = 0)
+                limits = batch[stratify].map(thresholds).fillna(np.inf)
+            else:
+                limits = thresholds.get('all', np.inf)
+            batch = batch[batch[key] < limits]
+            kept = pd.concat([kept, batch]) if kept is not None else batch
+            kept = kept.sort_values(key)
+            if stratify:
+                kept = kept.groupby(
+                    stratify, 
+                    sort = False, 
+                    dropna = False).head(n)
+                full = kept.groupby(
+                    stratify, 
+                    sort = False, 
+                    dropna = False)[key]
+                thresholds = full.max()[full.size() >= n]
+            else:
+                kept = kept.head(n)
+                if len(kept) >= n:
+                    thresholds = pd.Series({'all': kept[key].iloc[-1]})
+        if kept is None:
+            return pd.DataFrame(columns = columns)
+        if stratify:
+            # A Series is used for lookups because missing values are only
+            # matched as index labels, not as dict keys.
+            allocation = pd.Series(self._allocate(counts = counts, n = n))
+            kept = pd.concat([
+                group.head(int(allocation.get(name, 0)))
+                for name, group in kept.groupby(
+                    stratify, 
+                    sort = False, 
+                    dropna = False)])
+        return kept.sort_values(position).drop(columns = [key, position])
+
+    def exploration_view(self,
+            threshold: Optional[int] = None,
+            size: Optional[int] = None) -> Dataset:
+        """Returns this Dataset or, if it is large, a sampled copy of it.
+
+        Summaries and plots of large datasets can be computed from the 
+        returned representative sample.
+
+        Args:
+            threshold (Optional[int]): number of rows above which a sample is
+                returned. Defaults to None. If not passed, 'sample_threshold' 
+                in the 'general' section of 'settings' is used.
+            size (Optional[int]): number of rows in the sample. Defaults to 
+                None. If not passed, 'sample_size' in the 'general' section of 
+                'settings' is used.
+
+        Returns:
+            Dataset: this instance or a new Dataset with sampled 'data'. If 
+                'create_xy' was called, the sample is split the same way and 
+                stratified by the label.
+
+        """
+        try:
+            general = self.settings['general']
+        except (KeyError, TypeError):
+            general = {}
+        threshold = threshold or general.get('sample_threshold', 100000)
+        size = size or general.get('sample_size', 10000)
+        if len(self) <= threshold:
+            return self
+        label = getattr(self.full_bunch.y, 'name', None)
+        sample = self.sample_view(
+            n = size, 
+            stratify = label, 
+            seed = general.get('seed'))
+        view = Dataset(
+            data = sample,
+            datatypes = {
+                k: v for k, v in self.datatypes.items() if k in sample.columns},
+            prefixes = self.prefixes,
+            name = f'{self.name}_sample')
+        view.settings = self.settings
+        if label is not None:
+            view.datatypes[label] = self.label_datatype
+            view.create_xy(label = label)
+        return view
+
+    def split(self, fold: Optional[int] = 0) -> None:
+        """Sets the training and testing sets to 'fold' in 'splits'.
+
+        'splits' is usually set by a splitter technique from a shared
+        SplitRegistry, so the indices are never recomputed. Rows are taken
+        from 'x' and 'y' in the 'full_bunch'.
+
+        Args:
+            fold (Optional[int]): index of the fold in 'splits'. Defaults to 0.
+
+        Raises:
+            ValueError: if 'splits' has not been set.
+
+        """
+        if not self.splits:
+            raise ValueError('splits must be set before data can be split')
+        train_index, test_index = self.splits[fold]
+        # Drops the previous fold's bunches before the next fold is taken so
+        # that only one fold is held in memory at a time.
+        if memory.is_conserving(self):
+            for bunch in ['train_bunch', 'test_bunch']:
+                self.__dict__.pop(bunch, None)
+            memory.collect()
+        self.train_bunch = self.full_bunch.take(
+            rows = train_index, 
+            name = 'training')
+        self.test_bunch = self.full_bunch.take(
+            rows = test_index, 
+            name = 'testing')
+        self.fold = fold
+        self.lineage = None
+        self.states.change('testing')
+        return self
+
+    def fold_copy(self, fold: int) -> Dataset:
+        """Returns a shallow copy of this Dataset split to 'fold'.
+
+        The copy shares 'data' and the 'full_bunch' with this instance but has
+        its own training and testing bunches and states, so folds can be 
+        processed independently (including concurrently in threads).
+
+        Args:
+            fold (int): index of the fold in 'splits'.
+
+        Returns:
+            Dataset: copy with training and testing sets for 'fold'.
+
+        """
+        copied = self.__class__.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+        copied.states = DataStates(parent = copied)
+        copied.split(fold = fold)
+        return copied
+
     def uniquify(self,
             name: Optional[str] = 'index_universal',
             assign_index: Optional[bool] = False) -> None:
@@ -471,6 +774,9 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             self.datatypes.update({name: 'integer'})
             if assign_index:
                 self.data.set_index(name, inplace = True)
+                self.states.record()
+            else:
+                self.states.record(columns = name)
         except (TypeError, AttributeError):
             raise TypeError('To add an index, data must be a pandas DataFrame')
         return self
@@ -480,26 +786,25 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
 
     def __getattr__(self,
             attribute: str) -> Union['DataBunch', pd.DataFrame, pd.Series]:
-        if attribute in ['x']:
-            return self.__dict__['full_bunch'].x
-        elif attribute in ['y']:
-            return self.__dict__['full_bunch'].y
+        # Special methods are looked up by copy and pickle and must raise an
+        # AttributeError when missing.
+        if attribute.startswith('__') and attribute.endswith('__'):
+            raise AttributeError(attribute)
         elif attribute in ['train', 'training']:
             return self.__dict__[self.__dict__['train_set']]
         elif attribute in ['test', 'testing']:
             return self.__dict__[self.__dict__['test_set']]
-        elif attribute in ['x_train']:
-            return self.__dict__[self.__dict__['train_set']].x
-        elif attribute in ['y_train']:
-            return self.__dict__[self.__dict__['train_set']].y
-        elif attribute in ['x_test']:
-            return self.__dict__[self.__dict__['test_set']].x
-        elif attribute in ['y_test']:
-            return self.__dict__[self.__dict__['test_set']].y
-        elif attribute in ['x_val']:
-            return self.__dict__['val_bunch'].x
-        elif attribute in ['y_val']:
-            return self.__dict__['val_bunch'].y
+        # Features and labels are taken from materialized bunches so that 
+        # rows resampled and columns selected lazily are always applied. Row 
+        # weights, if any, remain in 'weights' of the bunch.
+        elif attribute in ['x', 'y']:
+            bunch = self.__dict__['full_bunch']
+        elif attribute in ['x_train', 'y_train']:
+            bunch = self.__dict__[self.__dict__['train_set']]
+        elif attribute in ['x_test', 'y_test']:
+            bunch = self.__dict__[self.__dict__['test_set']]
+        elif attribute in ['x_val', 'y_val']:
+            bunch = self.__dict__['val_bunch']
         # Returns appropriate lists of columns with datatype 'attribute'.
         else:
             try:
@@ -514,14 +819,21 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
                 except (AttributeError, KeyError):
                     raise KeyError(' '.join(
                         [attribute, 'is not in', self.__class__.__name__]))
+            return None
+        if bunch is None:
+            return None
+        bunch.materialize()
+        return bunch.x if attribute.startswith('x') else bunch.y
 
     def __setattr__(self,
             attribute: str,
             value: Union['DataBunch', pd.DataFrame, pd.Series]) -> None:
         if attribute in ['x']:
             self.__dict__['full_bunch'].x = value
+            self._reset_fingerprint()
         elif attribute in ['y']:
             self.__dict__['full_bunch'].y = value
+            self._reset_fingerprint()
         elif attribute in ['train', 'training']:
             self.__dict__[self.__dict__['train_set']] = value
         elif attribute in ['test', 'testing']:
@@ -540,16 +852,20 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             self.__dict__['val_bunch'].y = value
         else:
             self.__dict__[attribute] = value
+            if attribute in ['data'] and 'states' in self.__dict__:
+                self.__dict__['states'].record()
 
     def __getitem__(self, item: str) -> pd.Series:
         return self.data[item]
 
     def __setitem__(self, item: str, value: pd.Series) -> None:
         self.data[item] = value
+        self.states.record(columns = item)
         return self
 
     def __delitem__(self, item: str) -> None:
         self.data.drop(item, axis = 'columns', inplace = True)
+        self.states.record(columns = item)
         return self
 
     def __len__(self) -> int:
@@ -562,13 +878,14 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
         return len(self.data)
 
     def __iter__(self) -> Iterable:
-        """Returns iterable of 'data'.
+        """Returns iterable of rows in 'data'.
 
         Returns:
-            Iterable: of pandas data object stored in 'data'.
+            Iterable: of namedtuples (with the row index first) produced by the
+                'itertuples' method.
 
         """
-        return iter(self.data.iterrows())
+        return self.itertuples()
 
     def __add__(self, other: Union[pd.DataFrame, pd.Series]) -> None:
         """Adds 'other' to stored data.
@@ -612,6 +929,12 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
         self.test_set = 'test_bunch'
         return self
 
+    def _reset_fingerprint(self) -> None:
+        """Clears stored fingerprints after the full data changes."""
+        self.__dict__['lineage'] = None
+        self.__dict__['source_fingerprint'] = None
+        return self
+
     def _set_folder_defaults(self) -> None:
         """Creates default folders to use for importing and exporting data."""
         self.import_folder = 'processed'
@@ -636,9 +959,10 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
 
     def _crosscheck_columns(self) -> None:
         """Harmonizes 'datatypes' dictionary with 'data' columns attribute."""
-        for column in list(self.data.columns.values()):
+        for column in list(self.data.columns.values):
             if column not in self.datatypes:
-                self.datatypes[column] = self._infer_type(column = column)
+                self.datatypes[column] = self.types.infer(
+                    column = self.data[column])
         for column in list(self.datatypes.keys()):
             if column not in self.data.columns:
                 del self.datatypes[column]
@@ -679,31 +1003,248 @@ class Dataset(sourdough.quirks.Needy, sourdough.quirks.Element):
             self._crosscheck_columns()
         return self
 
+    @staticmethod
+    def _allocate(counts: pd.Series, n: int) -> Dict[Any, int]:
+        """Allocates 'n' sampled rows to strata in proportion to 'counts'.
+
+        Uses the largest remainder method so that the allocations sum to 'n'
+        (or to the total of 'counts' if it is smaller).
+
+        Args:
+            counts (pd.Series): number of rows in each stratum.
+            n (int): total number of rows to allocate.
+
+        Returns:
+            Dict[Any, int]: keys are strata and values are numbers of rows.
+
+        """
+        n = min(n, int(counts.sum()))
+        quotas = counts / counts.sum() * n
+        allocation = np.floor(quotas).astype(int)
+        remainders = (quotas - allocation).sort_values(ascending = False)
+        for name in remainders.index[:n - allocation.sum()]:
+            allocation[name] += 1
+        return allocation.to_dict()
+
+
+@dataclasses.dataclass
+class ChunkedDataset(Dataset):
+    """Dataset which streams its rows from a csv file in chunks.
+
+    Only the first chunk is held in 'data' (which is used to infer datatypes).
+    Methods built on 'iter_batches' (including 'itertuples', 'sample_view', and
+    iteration) read the full file one chunk at a time, so the file never needs
+    to fit in memory.
+
+    Args:
+        data (Optional[pd.DataFrame]): preview of the first rows in 'source'.
+            Defaults to None. If not passed, it is read from 'source'.
+        datatypes (Optional[Dict[str, str]]): keys are column names and values
+            are siMpLify proxy datatypes. Defaults to an empty dictionary.
+        prefixes (Optional[Dict[str, str]]): keys are column prefixes and
+            values are siMpLify proxy datatypes. Defaults to an empty
+            dictionary.
+        name (str): designates the name of a class instance that is used for
+            internal referencing throughout sourdough. Defaults to None.
+        batch_size (int): number of rows read in each chunk. Defaults to 
+            100000.
+        source (Union[str, pathlib.Path]): path of the csv file to stream.
+            Defaults to None.
+        read_parameters (Dict[str, Any]): keyword arguments passed to 
+            'pd.read_csv'. Defaults to an empty dictionary.
+        transforms (List[Callable]): functions applied, in order, to each
+            batch of features yielded by 'iter_xy'. Transformers fit to the
+            dataset add themselves so that streamed batches are transformed 
+            like the in-memory preview. Defaults to an empty list.
+
+    """
+    data: Optional[pd.DataFrame] = None
+    datatypes: Dict[str, str] = dataclasses.field(default_factory = dict)
+    prefixes: Dict[str, str] = dataclasses.field(default_factory = dict)
+    name: str = None
+    batch_size: int = 100000
+    source: Union[str, pathlib.Path] = None
+    read_parameters: Dict[str, Any] = dataclasses.field(default_factory = dict)
+    transforms: List[Callable] = dataclasses.field(default_factory = list)
+
+    def __post_init__(self) -> None:
+        """Sets instance attributes."""
+        if self.data is None:
+            self.data = next(self._read(size = self.batch_size))
+        self.rows = None
+        super().__post_init__()
+        return self
+
+    """ Public Methods """
+
+    def iter_batches(self,
+            size: Optional[int] = None,
+            columns: Optional[Union[List[str], str]] = None,
+            as_records: Optional[bool] = False) -> Iterable[
+                Union[pd.DataFrame, np.recarray]]:
+        """Yields consecutive row batches read from 'source'.
+
+        Args:
+            size (Optional[int]): number of rows in each batch. Defaults to
+                None. If not passed, 'batch_size' is used.
+            columns (Optional[Union[List[str], str]]): columns to include in
+                each batch. Defaults to None. If not passed, all columns are
+                included.
+            as_records (Optional[bool]): whether to yield numpy record arrays
+                instead of pandas DataFrames. Defaults to False.
+
+        Yields:
+            Union[pd.DataFrame, np.recarray]: the next batch of rows.
+
+        Raises:
+            ValueError: if 'size' is less than 1.
+
+        """
+        if size is None:
+            size = self.batch_size
+        if size < 1:
+            raise ValueError('size must be a positive integer')
+        if columns:
+            columns = list(more_itertools.always_iterable(columns))
+        for batch in self._read(size = size, columns = columns):
+            if columns:
+                batch = batch[columns]
+            if as_records:
+                yield batch.to_records(index = False)
+            else:
+                yield batch
+
+    def iter_xy(self, 
+            size: Optional[int] = None,
+            training: Optional[bool] = False) -> Iterable[Tuple[pd.DataFrame, 
+                                                                pd.Series]]:
+        """Yields consecutive batches of features and label from 'source'.
+
+        Each batch of features is passed through 'transforms' in order.
+
+        The preview in 'data' is the start of 'source', so once the Dataset is
+        split, the testing rows of the current fold are also rows of 
+        'source'. With 'training' set, those rows are skipped, so estimators 
+        trained on 'source' are never trained on the rows they are tested on.
+
+        Args:
+            size (Optional[int]): number of rows in each batch. Defaults to
+                None. If not passed, 'batch_size' is used.
+            training (Optional[bool]): whether to skip the testing rows of the
+                current fold. Defaults to False.
+
+        Yields:
+            Tuple[pd.DataFrame, pd.Series]: the next batch of features and
+                label. The label is None if 'create_xy' has not been called.
+
+        """
+        label = getattr(self.y, 'name', None)
+        columns = [c for c in self.data.columns if c != label]
+        held_out = None
+        if training and self.splits and self.fold is not None:
+            held_out = np.asarray(self.splits[self.fold][1])
+        start = 0
+        for batch in self.iter_batches(size = size):
+            if held_out is not None:
+                positions = np.arange(start, start + len(batch))
+                start += len(batch)
+                batch = batch[~np.isin(positions, held_out)]
+                if batch.empty:
+                    continue
+            x = batch[columns]
+            for transform in self.transforms:
+                x = transform(x)
+            yield x, batch[label] if label is not None else None
+
+    """ Dunder Methods """
+
+    def __len__(self) -> int:
+        """Returns number of rows in 'source', counting them on first use.
+
+        Returns:
+            int: number of rows in 'source'.
+
+        """
+        if self.rows is None:
+            first = self.data.columns[:1].tolist()
+            self.rows = sum(
+                len(batch) for batch in self.iter_batches(columns = first))
+        return self.rows
+
+    """ Private Methods """
+
+    def _read(self, 
+            size: int, 
+            columns: Optional[List[str]] = None) -> Iterable[pd.DataFrame]:
+        """Returns an iterator of DataFrame chunks from 'source'.
+
+        Args:
+            size (int): number of rows in each chunk.
+            columns (Optional[List[str]]): columns to read. Defaults to None.
+
+        Returns:
+            Iterable[pd.DataFrame]: chunks of 'source'.
+
+        """
+        return iter(pd.read_csv(
+            self.source, 
+            chunksize = size, 
+            usecols = columns, 
+            **self.read_parameters))
+
 
 @dataclasses.dataclass
 class DataBunch(object):
     """Stores one set of features and label.
 
+    'x' may be a scipy sparse matrix (stored in CSR format) so that wide,
+    mostly-zero encoded data is never densified. Because sparse matrices do not
+    carry column names, those are kept in 'columns'.
+
+    Columns can be dropped without copying 'x' by setting 'selected' (see the
+    'select' and 'view' methods). 'feature_names' then only lists the selected
+    columns, and 'x' is narrowed to them once when 'materialize' is called.
+    Rows can likewise be resampled by setting 'rows' (see 'resample'), which
+    may repeat positions. 'iter_batches' gathers batches of the selected rows
+    and columns without materializing the whole bunch.
+
     Args:
         name (str): name used for internal referencing. This should usually be
             'training', 'testing', 'validation', or 'full'.
-        x (Optional[pd.DataFrame]): feature/independent variables. Defaults to
-            None.
+        x (Optional[Union[pd.DataFrame, sparse.spmatrix]]): feature/independent
+            variables. Defaults to None.
         y (Optional[pd.Series]): label/dependent variables. Defaults to None.
+        columns (Optional[List[str]]): names of the columns in 'x'. Defaults to
+            None. If not passed and 'x' is a DataFrame, its column names are
+            used.
+        selected (Optional[np.ndarray]): positions of the columns in 'x' which
+            have not been dropped. Defaults to None, meaning all columns.
+        rows (Optional[np.ndarray]): positions of the rows in 'x' and 'y' which
+            make up the bunch. Defaults to None, meaning all rows.
+        weights (Optional[np.ndarray]): weight of each row (after 'rows' is
+            applied) for estimators which accept 'sample_weight'. Defaults to
+            None.
 
     """
     name: str
-    x: Optional[pd.DataFrame] = None
+    x: Optional[Union[pd.DataFrame, sparse.spmatrix]] = None
     y: Optional[pd.Series] = None
+    columns: Optional[List[str]] = None
+    selected: Optional[np.ndarray] = None
+    rows: Optional[np.ndarray] = None
+    weights: Optional[np.ndarray] = None
 
     def __post_init__(self) -> None:
         """Creates initial attributes."""
-        if self.x is not None:
-            self._start_columns = self.x.columns.values
-        else:
-            self._start_columns = []
+        if sparse.issparse(self.x):
+            self.x = self.x.tocsr()
+            if self.columns is None:
+                self.columns = [str(i) for i in range(self.x.shape[1])]
+        self._start_columns = list(self.feature_names)
         return self
 
+    """ Properties """
+
     @property
     def dropped_columns(self) -> List[str]:
         """Returns list of dropped columns for 'x'.
@@ -711,10 +1252,240 @@ class DataBunch(object):
         This property only works in 'x' was passed when the class was instanced.
 
         """
-        if self._start_columns:
-            return self._start_columns - self.x.columns.values
+        remaining = set(self.feature_names)
+        return [c for c in self._start_columns if c not in remaining]
+
+    @property
+    def feature_names(self) -> List[str]:
+        """Returns names of the columns in 'x'."""
+        if isinstance(self.x, pd.DataFrame):
+            names = list(self.x.columns.values)
+        elif self.columns is not None:
+            names = list(self.columns)
         else:
             return []
+        if self.selected is not None:
+            names = [names[i] for i in self.selected]
+        return names
+
+    @property
+    def is_sparse(self) -> bool:
+        """Returns whether 'x' is a scipy sparse matrix."""
+        return sparse.issparse(self.x)
+
+    """ Public Methods """
+
+    def iter_batches(self, size: int) -> Iterable[Tuple[
+            Union[pd.DataFrame, sparse.spmatrix], pd.Series, 
+            Optional[np.ndarray]]]:
+        """Yields batches of the selected rows and columns.
+
+        Only one batch is copied from 'x' at a time, so a resampled bunch can
+        be used for training without materializing it.
+
+        Args:
+            size (int): number of rows in each batch.
+
+        Yields:
+            Tuple[Union[pd.DataFrame, sparse.spmatrix], pd.Series, 
+                Optional[np.ndarray]]: features, labels, and weights (or None)
+                for the next batch.
+
+        """
+        count = self.x.shape[0] if self.rows is None else len(self.rows)
+        for start in range(0, count, size):
+            if self.rows is None:
+                positions = np.arange(start, min(start + size, count))
+            else:
+                positions = self.rows[start:start + size]
+            batch = DataBunch(
+                name = self.name,
+                x = self.x,
+                y = self.y,
+                columns = self.columns,
+                selected = self.selected,
+                rows = positions)
+            batch.materialize()
+            weights = None
+            if self.weights is not None:
+                weights = self.weights[start:start + size]
+            yield batch.x, batch.y, weights
+
+    def materialize(self) -> DataBunch:
+        """Narrows 'x' and 'y' to the selected 'rows' and columns.
+
+        This is the only point at which dropping columns or resampling rows 
+        copies 'x'.
+
+        Returns:
+            DataBunch: this instance with 'selected' and 'rows' cleared.
+
+        """
+        if self.rows is not None:
+            if self.x is not None:
+                if self.is_sparse or isinstance(self.x, np.ndarray):
+                    x = self.x[self.rows]
+                else:
+                    x = self.x.iloc[self.rows]
+                if self.selected is not None:
+                    if self.is_sparse or isinstance(self.x, np.ndarray):
+                        x = x[:, self.selected]
+                    else:
+                        x = x.iloc[:, self.selected]
+                    names = self.feature_names
+                    self.selected = None
+                    if self.columns is not None:
+                        self.columns = names
+                self.x = x
+            if isinstance(self.y, np.ndarray):
+                self.y = self.y[self.rows]
+            elif self.y is not None:
+                self.y = self.y.iloc[self.rows]
+            self.rows = None
+        if self.selected is not None:
+            names = self.feature_names
+            if self.x is not None:
+                if self.is_sparse or isinstance(self.x, np.ndarray):
+                    self.x = self.x[:, self.selected]
+                else:
+                    self.x = self.x.iloc[:, self.selected]
+            if self.columns is not None:
+                self.columns = names
+            self.selected = None
+        return self
+
+    def resample(self, rows: Union[np.ndarray, Sequence[int]]) -> DataBunch:
+        """Sets the bunch to the rows at positions 'rows' without copying 'x'.
+
+        Args:
+            rows (Union[np.ndarray, Sequence[int]]): positions of rows (which
+                may repeat) relative to the current rows of the bunch.
+
+        Returns:
+            DataBunch: this instance with 'rows' narrowed.
+
+        """
+        rows = np.asarray(rows, dtype = np.intp)
+        if self.weights is not None:
+            self.weights = self.weights[rows]
+        if self.rows is not None:
+            rows = self.rows[rows]
+        self.rows = rows
+        return self
+
+    def select(self, 
+            columns: Union[np.ndarray, Sequence[int], Sequence[str]]) -> (
+                DataBunch):
+        """Drops every column not in 'columns' without copying 'x'.
+
+        Args:
+            columns (Union[np.ndarray, Sequence[int], Sequence[str]]): columns
+                to keep, as a boolean mask or positions relative to 
+                'feature_names', or as column names.
+
+        Returns:
+            DataBunch: this instance with 'selected' narrowed.
+
+        """
+        positions = self._get_positions(columns = columns)
+        if self.selected is not None:
+            positions = self.selected[positions]
+        self.selected = positions
+        return self
+
+    def take(self, 
+            rows: Union[np.ndarray, Sequence[int]], 
+            name: Optional[str] = None) -> DataBunch:
+        """Returns a new DataBunch with the rows at positions 'rows'.
+
+        Args:
+            rows (Union[np.ndarray, Sequence[int]]): positional row indices.
+            name (Optional[str]): name of the new DataBunch. Defaults to None.
+                If not passed, 'name' of this instance is used.
+
+        Returns:
+            DataBunch: with selected rows of 'x' and 'y'.
+
+        """
+        weights = None if self.weights is None else self.weights[rows]
+        if self.rows is not None:
+            rows = self.rows[rows]
+        if self.x is None:
+            x = None
+        elif self.is_sparse or isinstance(self.x, np.ndarray):
+            x = self.x[rows]
+        else:
+            x = self.x.iloc[rows]
+        if self.y is None:
+            y = None
+        elif isinstance(self.y, np.ndarray):
+            y = self.y[rows]
+        else:
+            y = self.y.iloc[rows]
+        return DataBunch(
+            name = name or self.name, 
+            x = x, 
+            y = y, 
+            columns = self.columns,
+            selected = self.selected,
+            weights = weights)
+
+    def view(self, 
+            columns: Optional[Union[
+                np.ndarray, Sequence[int], Sequence[str]]] = None,
+            rows: Optional[Union[np.ndarray, Sequence[int]]] = None,
+            name: Optional[str] = None) -> DataBunch:
+        """Returns a DataBunch sharing 'x' and 'y' with a subset selected.
+
+        Args:
+            columns (Optional[Union[np.ndarray, Sequence[int], 
+                Sequence[str]]]): columns to keep, in any form accepted by 
+                'select'. Defaults to None, meaning all columns.
+            rows (Optional[Union[np.ndarray, Sequence[int]]]): rows to keep, 
+                as accepted by 'resample'. Defaults to None, meaning all rows.
+            name (Optional[str]): name of the new DataBunch. Defaults to None.
+                If not passed, 'name' of this instance is used.
+
+        Returns:
+            DataBunch: view of this instance.
+
+        """
+        view = DataBunch(
+            name = name or self.name, 
+            x = self.x, 
+            y = self.y, 
+            columns = self.columns,
+            selected = self.selected,
+            rows = self.rows,
+            weights = self.weights)
+        if columns is not None:
+            view.select(columns = columns)
+        if rows is not None:
+            view.resample(rows = rows)
+        return view
+
+    """ Private Methods """
+
+    def _get_positions(self, 
+            columns: Union[np.ndarray, Sequence[int], Sequence[str]]) -> (
+                np.ndarray):
+        """Returns positions in 'feature_names' for 'columns'.
+
+        Args:
+            columns (Union[np.ndarray, Sequence[int], Sequence[str]]): boolean
+                mask, positions, or names of columns.
+
+        Returns:
+            np.ndarray: positions of 'columns'.
+
+        """
+        columns = np.asarray(columns)
+        if columns.dtype == bool:
+            return np.flatnonzero(columns)
+        elif columns.dtype.kind in ['i', 'u']:
+            return columns.astype(np.intp)
+        names = {n: i for i, n in enumerate(self.feature_names)}
+        return np.asarray([names[c] for c in columns], dtype = np.intp)
 
 
 @dataclasses.dataclass
@@ -819,7 +1590,13 @@ class DataTypes(collections.abc.Container):
 
 @dataclasses.dataclass
 class DataStates(object):
-    """Base class for data state management."""
+    """Base class for data state management.
+
+    Columns written through 'parent' (by item assignment, replacing 'data', or
+    its column methods) are recorded, so snapshots and restores copy only 
+    those columns without comparing stored and current values.
+
+    """
 
     parent: object
     states: Optional[Union[List[str], Dict[str, DataState]]] = dataclasses.field(
@@ -830,6 +1607,10 @@ class DataStates(object):
         """Initializes class instance attributes."""
         self._create_states()
         self._set_current()
+        self.snapshots = {}
+        self.history = []
+        self.synced = None
+        self.written = set()
         return self
 
     """ Factory Method """
@@ -898,9 +1679,19 @@ class DataStates(object):
 
     """ Public Methods """
 
+    @property
+    def dirty(self) -> bool:
+        """Returns whether 'parent' data has changed since it was synced."""
+        return self.synced is None or bool(self.written)
+
     def change(self, new_state: str) -> None:
         """Changes 'state' to 'new_state'.
 
+        If 'new_state' has a snapshot, it is restored. Any changes made since 
+        the last snapshot or restore are first stored in a snapshot named for
+        the current state, so they are restored when that state is changed 
+        back to.
+
         Args:
             new_state(str): name of new state matching a string in 'states'.
 
@@ -909,11 +1700,112 @@ class DataStates(object):
 
         """
         if new_state in self.states:
+            if new_state != self.current:
+                if new_state in self.snapshots:
+                    if (self.dirty 
+                            and isinstance(self.parent.data, pd.DataFrame)):
+                        self.snapshot(name = self.current)
+                    self._restore_data(snapshot = self.snapshots[new_state])
+                self.parent.lineage = None
             self.previous = self.current
             self.current = new_state
             self.states[self.current].apply(instance = self.parent)
         else:
             raise ValueError(' '.join([new_state, 'is not a recognized state']))
+        return self
+
+    def record(self, 
+            columns: Optional[Union[List[str], str]] = None) -> None:
+        """Records that 'columns' of the data in 'parent' were written.
+
+        Args:
+            columns (Optional[Union[List[str], str]]): names of written 
+                columns. Defaults to None. If not passed, the whole DataFrame
+                is treated as replaced.
+
+        """
+        if columns is None:
+            self.synced = None
+            self.written = set()
+        else:
+            self.written.update(more_itertools.always_iterable(columns))
+        return self
+
+    def snapshot(self, name: Optional[str] = None) -> DataSnapshot:
+        """Stores a versioned snapshot of the data in 'parent'.
+
+        Columns which have not been written since the snapshot 'parent' was
+        last synced with are shared with it by reference, so each snapshot 
+        only stores changed columns.
+
+        Args:
+            name (Optional[str]): name of the snapshot. Defaults to None. If not
+                passed, 'current' is used.
+
+        Returns:
+            DataSnapshot: the stored snapshot.
+
+        """
+        name = name or self.current
+        self.snapshots[name] = DataSnapshot.create(
+            name = name,
+            data = self.parent.data,
+            datatypes = self.parent.datatypes,
+            base = self.snapshots.get(self.synced),
+            written = self.written)
+        if name in self.history:
+            self.history.remove(name)
+        self.history.append(name)
+        self.synced = name
+        self.written = set()
+        return self.snapshots[name]
+
+    def restore(self, name: str) -> None:
+        """Restores the data in 'parent' from the snapshot named 'name'.
+
+        Only columns which differ from the snapshot are copied into 'parent'.
+        If 'name' is also a state, it becomes the 'current' state.
+
+        Args:
+            name (str): name of a stored snapshot.
+
+        Raises:
+            KeyError: if 'name' is not a stored snapshot.
+
+        """
+        try:
+            snapshot = self.snapshots[name]
+        except KeyError:
+            raise KeyError(' '.join([name, 'is not a stored snapshot']))
+        self._restore_data(snapshot = snapshot)
+        if name in self.states:
+            self.previous = self.current
+            self.current = name
+            self.states[self.current].apply(instance = self.parent)
+        return self
+
+    def rollback(self, steps: Optional[int] = 1) -> None:
+        """Restores the snapshot taken 'steps' snapshots before the last one.
+
+        Snapshots after the restored one are discarded.
+
+        Args:
+            steps (Optional[int]): number of snapshots to roll back. Defaults
+                to 1.
+
+        Raises:
+            ValueError: if there are not enough snapshots to roll back 'steps'.
+
+        """
+        if steps < 0 or steps >= len(self.history):
+            raise ValueError(
+                f'cannot roll back {steps} of {len(self.history)} snapshots')
+        target = self.history[-(steps + 1)]
+        for name in self.history[-steps:] if steps else []:
+            del self.snapshots[name]
+        self.history = self.history[:len(self.history) - steps]
+        self.restore(name = target)
+        return self
 
     """ Core siMpLify Methods """
 
@@ -922,6 +1814,41 @@ class DataStates(object):
         self.states[self.current].apply(instance = self.parent)
         return self
 
+    """ Private Methods """
+
+    def _restore_data(self, snapshot: DataSnapshot) -> None:
+        """Copies columns which may differ from 'snapshot' into 'parent'.
+
+        Columns written since the last sync, and columns not shared by 
+        reference between 'snapshot' and the synced snapshot, are copied. If
+        'parent' has not been synced, all of its data is replaced.
+
+        Args:
+            snapshot (DataSnapshot): snapshot to restore.
+
+        """
+        data = self.parent.data
+        synced = self.snapshots.get(self.synced)
+        if (data is None 
+                or synced is None 
+                or synced.index is not snapshot.index):
+            self.parent.data = snapshot.to_dataframe()
+        else:
+            extras = [c for c in data.columns if c not in snapshot.columns]
+            if extras:
+                data.drop(extras, axis = 'columns', inplace = True)
+            for column, values in snapshot.columns.items():
+                if (column in self.written
+                        or column not in data.columns
+                        or synced.columns.get(column) is not values):
+                    data[column] = values.copy()
+            if list(data.columns) != list(snapshot.columns):
+                self.parent.data = data[list(snapshot.columns)]
+        self.parent.datatypes = dict(snapshot.datatypes)
+        self.synced = snapshot.name
+        self.written = set()
+        return self
+
 
 @dataclasses.dataclass
 class DataState(object):
@@ -958,3 +1885,112 @@ class DataState(object):
                 'export_folder']:
             setattr(instance, attribute, getattr(self, attribute))
         return instance
+
+
+@dataclasses.dataclass
+class DataSnapshot(object):
+    """A versioned copy of a Dataset's data which shares unchanged columns.
+
+    Args:
+        name (str): name of the snapshot, usually matching a state in a
+            'DataStates' instance.
+        columns (Dict[str, pd.Series]): keys are column names and values are
+            the stored columns. Columns may be shared with other snapshots and
+            should never be modified in place. Defaults to an empty dict.
+        index (Optional[pd.Index]): row index of the stored data. Defaults to
+            None.
+        datatypes (Dict[str, str]): keys are column names and values are
+            siMpLify proxy datatypes. Defaults to an empty dict.
+
+    """
+    name: str
+    columns: Dict[str, pd.Series] = dataclasses.field(default_factory = dict)
+    index: Optional[pd.Index] = None
+    datatypes: Dict[str, str] = dataclasses.field(default_factory = dict)
+
+    """ Factory Method """
+
+    @classmethod
+    def create(cls,
+            name: str,
+            data: pd.DataFrame,
+            datatypes: Optional[Mapping[str, str]] = None,
+            base: Optional[DataSnapshot] = None,
+            written: Optional[Iterable[str]] = None) -> DataSnapshot:
+        """Creates a snapshot of 'data', sharing unchanged columns with 'base'.
+
+        Args:
+            name (str): name of the snapshot.
+            data (pd.DataFrame): data to store.
+            datatypes (Optional[Mapping[str, str]]): proxy datatypes of 'data'.
+                Defaults to None.
+            base (Optional[DataSnapshot]): earlier snapshot whose columns are
+                reused when they match 'data'. Defaults to None.
+            written (Optional[Iterable[str]]): columns of 'data' known to 
+                have been written since it matched 'base'. Defaults to None. 
+                If not passed, the columns of 'base' are compared with 'data'.
+
+        Returns:
+            DataSnapshot: with only changed columns copied.
+
+        """
+        if base is not None and data.index.equals(base.index):
+            index = base.index
+            if written is None:
+                written = base.changed(data = data)
+            unchanged = set(base.columns) - set(written)
+        else:
+            index = data.index.copy()
+            unchanged = set()
+        columns = {}
+        for column in data.columns:
+            if column in unchanged:
+                columns[column] = base.columns[column]
+            else:
+                columns[column] = data[column].copy()
+        return cls(
+            name = name,
+            columns = columns,
+            index = index,
+            datatypes = dict(datatypes or {}))
+
+    """ Public Methods """
+
+    def changed(self, data: pd.DataFrame) -> List[str]:
+        """Returns names of stored columns which differ from 'data'.
+
+        Args:
+            data (pd.DataFrame): data to compare with the stored columns.
+
+        Returns:
+            List[str]: stored columns missing from or different in 'data'.
+
+        """
+        return [
+            column for column, values in self.columns.items()
+            if column not in data.columns or not values.equals(data[column])]
+
+    def shared(self, other: DataSnapshot) -> List[str]:
+        """Returns names of columns stored by reference in both snapshots.
+
+        Args:
+            other (DataSnapshot): another snapshot.
+
+        Returns:
+            List[str]: columns shared with 'other'.
+
+        """
+        return [
+            column for column, values in self.columns.items()
+            if other.columns.get(column) is values]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns a new DataFrame built from copies of the stored columns.
+
+        Returns:
+            pd.DataFrame: with the stored columns and index.
+
+        """
+        return pd.DataFrame(
+            {column: values.copy() for column, values in self.columns.items()},
+            index = self.index)
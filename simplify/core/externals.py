@@ -14,17 +14,37 @@ from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
                     Optional, Sequence, Tuple, Type, Union)
 
 import more_itertools
+import numpy as np
+import pandas as pd
+from scipy import sparse
+import sklearn.base
 import sourdough
 
 from . import base
+from . import caches
 from . import components
+from . import dataset
 from . import stages
+from ..utilities import memory
 
 
 @dataclasses.dataclass
 class SklearnModel(components.Technique):
     """Wrapper for a scikit-learn model (an algorithm that doesn't transform).
 
+    If 'streaming' is True or the project data is a ChunkedDataset, 'contents'
+    is trained in batches of 'batch_size' rows, so the training data never 
+    needs to fit in memory. Estimators with a 'partial_fit' method (e.g. 
+    SGDClassifier, MultinomialNB, PassiveAggressiveClassifier, or 
+    MiniBatchKMeans) are updated with each batch. xgboost estimators instead 
+    continue boosting from the model trained on the previous batches. With a 
+    ChunkedDataset, every row of its 'source' is used for training except the
+    testing rows of the current fold (see ChunkedDataset.iter_xy).
+
+    Rows resampled lazily in the training DataBunch (see DataBunch.resample)
+    are gathered once before fitting, or batch by batch when streaming, and
+    any row 'weights' are passed as 'sample_weight'.
+
     Args:
         name (str): designates the name of a class instance that is used for 
             internal referencing throughout siMpLify. For example, if a siMpLify 
@@ -46,6 +66,14 @@ class SklearnModel(components.Technique):
         module (str): name of module where 'contents' is located if 'contents'
             is a string. It can either be a siMpLify or external module, as
             long as it is available to the python environment. Defaults to None.
+        accepts_float32 (bool): whether 'contents' can be fit with float32 
+            features when 'conserve_memory' is activated. Defaults to True.
+        streaming (bool): whether to train in batches even if the data is in
+            memory. Defaults to False.
+        batch_size (Optional[int]): number of rows in each batch. Defaults to 
+            None. If not passed, the 'batch_size' of the data is used.
+        epochs (int): number of passes over the training data when training 
+            in batches. Defaults to 1.
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be part of a parallel workflow structure. Defaults to 
             False.
@@ -56,18 +84,25 @@ class SklearnModel(components.Technique):
     parameters: Union[Mapping[str, Any], base.Parameters] = base.Parameters()
     iterations: Union[int, str] = 1
     module: str = None
+    accepts_float32: bool = True
+    streaming: bool = False
+    batch_size: Optional[int] = None
+    epochs: int = 1
     parallel: ClassVar[bool] = False  
     
     """ Public Methods """
     
     def implement(self, project: sourdough.Project) -> sourdough.Project:
-        """[summary]
+        """Fits 'contents' to the training data.
+
+        If 'conserve_memory' is activated in the project settings and 
+        'accepts_float32' is True, float features are passed as float32.
 
         Args:
-            project (sourdough.Project): [description]
+            project (sourdough.Project): project with a Dataset in 'data'.
 
         Returns:
-            sourdough.Project: [description]
+            sourdough.Project: with 'contents' fitted.
             
         """
         try:
@@ -75,9 +110,135 @@ class SklearnModel(components.Technique):
         except AttributeError:
             pass
         self.contents = self.contents(**self.parameters)
-        self.contents.fit[project.data.x_train]
+        conserve = memory.is_conserving(project) and self.accepts_float32
+        if self._is_streaming(data = project.data):
+            self._fit_batches(data = project.data, conserve = conserve)
+        else:
+            train = project.data.train.materialize()
+            x_train = train.x
+            if conserve:
+                x_train = memory.to_float32(x_train)
+            if train.weights is None:
+                self.contents.fit(x_train, train.y)
+            else:
+                self.contents.fit(x_train, train.y, sample_weight = train.weights)
         return project
 
+    """ Private Methods """
+
+    def _fit_batch(self, 
+            x: Union[pd.DataFrame, sparse.spmatrix], 
+            y: pd.Series,
+            classes: Optional[np.ndarray],
+            first: bool,
+            weights: Optional[np.ndarray] = None) -> None:
+        """Updates 'contents' with one batch of training data.
+
+        Args:
+            x (Union[pd.DataFrame, sparse.spmatrix]): batch of features.
+            y (pd.Series): batch of labels.
+            classes (Optional[np.ndarray]): every label value, which 
+                classifiers need for 'partial_fit'.
+            first (bool): whether this is the first batch.
+            weights (Optional[np.ndarray]): weight of each row in the batch.
+                Defaults to None.
+
+        Raises:
+            TypeError: if 'contents' cannot be trained in batches.
+
+        """
+        keywords = {}
+        if weights is not None:
+            keywords['sample_weight'] = weights
+        if hasattr(self.contents, 'partial_fit'):
+            if classes is not None:
+                keywords['classes'] = classes
+            self.contents.partial_fit(x, y, **keywords)
+        elif hasattr(self.contents, 'get_booster'):
+            if not first:
+                keywords['xgb_model'] = self.contents.get_booster()
+            self.contents.fit(x, y, **keywords)
+        else:
+            raise TypeError(
+                f'{type(self.contents).__name__} cannot be trained in batches '
+                f'because it has no partial_fit method')
+        return self
+
+    def _fit_batches(self, data: dataset.Dataset, conserve: bool) -> None:
+        """Trains 'contents' with batches of training data from 'data'.
+
+        Args:
+            data (dataset.Dataset): data container with training data.
+            conserve (bool): whether to pass float features as float32.
+
+        """
+        classes = self._get_classes(data = data)
+        first = True
+        for _ in range(self.epochs):
+            for x, y, weights in self._iter_batches(data = data):
+                if conserve:
+                    x = memory.to_float32(x)
+                self._fit_batch(
+                    x = x, 
+                    y = y, 
+                    classes = classes, 
+                    first = first,
+                    weights = weights)
+                first = False
+        return self
+
+    def _get_classes(self, data: dataset.Dataset) -> Optional[np.ndarray]:
+        """Returns every label value if 'contents' is a classifier.
+
+        For a ChunkedDataset, only the label column is read from 'source'.
+
+        Args:
+            data (dataset.Dataset): data container with training data.
+
+        Returns:
+            Optional[np.ndarray]: sorted label values or None if 'contents' is
+                not a classifier.
+
+        """
+        if not self._is_classifier():
+            return None
+        if isinstance(data, dataset.ChunkedDataset):
+            label = data.y.name
+            return np.unique(np.concatenate([
+                pd.unique(batch[label]) 
+                for batch in data.iter_batches(columns = label)]))
+        return np.unique(data.y_train)
+
+    def _is_classifier(self) -> bool:
+        """Returns whether 'contents' is a classifier."""
+        return sklearn.base.is_classifier(self.contents)
+
+    def _is_streaming(self, data: dataset.Dataset) -> bool:
+        """Returns whether 'contents' should be trained in batches."""
+        return self.streaming or isinstance(data, dataset.ChunkedDataset)
+
+    def _iter_batches(self, 
+            data: dataset.Dataset) -> Iterable[Tuple[
+                Union[pd.DataFrame, sparse.spmatrix], pd.Series, 
+                Optional[np.ndarray]]]:
+        """Yields batches of training features, labels, and weights.
+
+        Args:
+            data (dataset.Dataset): data container with training data.
+
+        Yields:
+            Tuple[Union[pd.DataFrame, sparse.spmatrix], pd.Series, 
+                Optional[np.ndarray]]: the next batch of features, labels, and
+                row weights (or None).
+
+        """
+        size = self.batch_size or data.batch_size
+        if isinstance(data, dataset.ChunkedDataset):
+            for x, y in data.iter_xy(size = size, training = True):
+                yield x, y, None
+        else:
+            yield from data.train.iter_batches(size = size)
+
 
 @dataclasses.dataclass
 class SklearnSplitter(components.Technique):
@@ -119,13 +280,17 @@ class SklearnSplitter(components.Technique):
     """ Public Methods """
     
     def implement(self, project: sourdough.Project) -> sourdough.Project:
-        """[summary]
+        """Sets fold indices for the project data and selects the first fold.
+
+        Folds are drawn from the shared 'caches.split_registry', so identical
+        splits are computed once per project regardless of how many paths
+        include this technique.
 
         Args:
-            project (sourdough.Project): [description]
+            project (sourdough.Project): project with a Dataset in 'data'.
 
         Returns:
-            sourdough.Project: [description]
+            sourdough.Project: with 'splits' set and 'data' split.
             
         """
         try:
@@ -133,8 +298,13 @@ class SklearnSplitter(components.Technique):
         except AttributeError:
             pass
         self.contents = self.contents(**self.parameters)
-        project.data.splits = tuple(self.contents.split(project.data.x))
-        project.data.split()
+        data = project.data
+        data.splits = caches.split_registry.get(
+            splitter = self.contents,
+            x = data.x,
+            y = data.y,
+            groups = data.groups)
+        data.split()
         return project
     
     
@@ -166,6 +336,9 @@ class SklearnTransformer(components.Technique):
         parallel (ClassVar[bool]): indicates whether this Component design is
             meant to be part of a parallel workflow structure. Defaults to 
             False.
+        cache_attributes (ClassVar[Sequence[str]]): names of attributes, other
+            than 'parameters', which affect how 'contents' is fit and are 
+            therefore part of its cache key. Defaults to an empty list.
                                                 
     """  
     name: str = None
@@ -174,31 +347,212 @@ class SklearnTransformer(components.Technique):
     iterations: Union[int, str] = 1
     module: str = None
     parallel: ClassVar[bool] = False  
+    cache_attributes: ClassVar[Sequence[str]] = []
     
     """ Public Methods """
     
     def implement(self, project: sourdough.Project) -> sourdough.Project:
-        """[summary]
+        """Fits 'contents' to the training data and transforms all data.
+
+        Fitted transformers and their outputs are stored in the shared
+        'caches.transformer_cache', so when several workflow branches apply
+        the same transformer (with the same parameters) to the same fold of
+        the same data, it is only fit and applied once. Outputs are copied
+        into and out of the cache so that later in-place changes to a bunch 
+        cannot alter cached results. The cache is skipped when 
+        'conserve_memory' is activated.
 
         Args:
-            project (sourdough.Project): [description]
+            project (sourdough.Project): project with a Dataset in 'data'.
 
         Returns:
-            sourdough.Project: [description]
+            sourdough.Project: with transformed data.
             
         """
         try:
             self.parameters = self.parameters.finalize(project = project)
         except AttributeError:
             pass
-        self.contents = self.contents(**self.parameters)
         data = project.data
-        data.x_train = self.contents.fit[data.x_train]
-        data.x_train = self.contents.transform(data.x_train)
-        if data.x_test is not None:
-            data.x_test = self.contents.transform(data.x_test)
-        if data.x_validate is not None:
-            data.x_validate = self.contents.transform(data.x_validate)
+        conserve = memory.is_conserving(project)
+        bunches = self._get_bunches(data = data)
+        key = self._get_cache_key(data = data)
+        cached = None if conserve else caches.transformer_cache.get(key = key)
+        if cached is None:
+            self._fit(data = data)
+            for bunch in bunches:
+                self._transform_bunch(bunch = bunch)
+            if not conserve:
+                caches.transformer_cache.add(
+                    key = key, 
+                    value = (
+                        self.contents, 
+                        self._store_outputs(bunches = bunches)))
+        else:
+            self.contents, outputs = cached
+            self._restore_outputs(bunches = bunches, outputs = outputs)
+        data.lineage = key
+        if isinstance(data, dataset.ChunkedDataset):
+            # Batches streamed from 'source' need the fitted transformer.
+            data.transforms.append(self.transform_batch)
+        elif conserve:
+            # Fitted transformers are not used for reporting, so they are 
+            # released when 'conserve_memory' is activated.
+            memory.release(self, 'contents')
         project.data = data
         return project
+
+    def transform_batch(self, 
+            x: Union[pd.DataFrame, sparse.spmatrix]) -> Union[
+                pd.DataFrame, sparse.spmatrix]:
+        """Returns a batch of features transformed by the fitted 'contents'.
+
+        Args:
+            x (Union[pd.DataFrame, sparse.spmatrix]): features to transform.
+
+        Returns:
+            Union[pd.DataFrame, sparse.spmatrix]: transformed features.
+
+        """
+        bunch = dataset.DataBunch(name = 'batch', x = x)
+        self._transform_bunch(bunch = bunch)
+        return bunch.materialize().x
+
+    """ Private Methods """
+
+    def _fit(self, data: dataset.Dataset) -> None:
+        """Creates and fits 'contents' with the training data in 'data'.
+
+        Args:
+            data (dataset.Dataset): data container with training data.
+
+        """
+        self.contents = self.contents(**self.parameters)
+        self.contents.fit(data.x_train, data.y_train)
+        return self
+
+    def _get_cache_key(self, data: dataset.Dataset) -> str:
+        """Returns the 'caches.transformer_cache' key for 'data'.
+
+        Attributes listed in 'cache_attributes' which change how 'contents' is
+        fit are included with the parameters.
+
+        Args:
+            data (dataset.Dataset): data container to be transformed.
+
+        Returns:
+            str: key for the shared transformer cache.
+
+        """
+        parameters = dict(self.parameters)
+        for attribute in self.cache_attributes:
+            parameters[attribute] = getattr(self, attribute)
+        return caches.transformer_cache.key(
+            transformer = self.contents,
+            parameters = parameters,
+            fold = data.fold,
+            upstream = data.fingerprint())
+
+    def _get_bunches(self, 
+            data: dataset.Dataset) -> List[dataset.DataBunch]:
+        """Returns the distinct DataBunch instances in 'data' with features.
+
+        The training and testing sets may be the same DataBunch (e.g. in the
+        'full' state), so each bunch is only returned once. Bunches are 
+        materialized, so columns dropped lazily by an earlier step are not
+        transformed.
+
+        Args:
+            data (dataset.Dataset): data container with DataBunch instances.
+
+        Returns:
+            List[dataset.DataBunch]: bunches to transform.
+
+        """
+        bunches = []
+        for bunch in [data.train, data.test, data.val_bunch]:
+            if (bunch is not None 
+                    and bunch.x is not None
+                    and all(bunch is not b for b in bunches)):
+                bunches.append(bunch.materialize())
+        return bunches
+
+    def _get_feature_names(self, columns: List[str], width: int) -> List[str]:
+        """Returns column names for transformed data.
+
+        Args:
+            columns (List[str]): column names of the data before transformation.
+            width (int): number of columns after transformation.
+
+        Returns:
+            List[str]: column names for the transformed data.
+
+        """
+        if width == len(columns):
+            return list(columns)
+        for method in ['get_feature_names_out', 'get_feature_names']:
+            try:
+                names = list(getattr(self.contents, method)())
+                if len(names) == width:
+                    return [str(n) for n in names]
+            except (AttributeError, TypeError, ValueError):
+                pass
+        return [f'{self.name}_{i}' for i in range(width)]
+
+    def _restore_outputs(self, 
+            bunches: List[dataset.DataBunch],
+            outputs: List[Tuple[Any, Optional[List[str]]]]) -> None:
+        """Sets 'bunches' to copies of outputs stored in the cache.
+
+        Args:
+            bunches (List[dataset.DataBunch]): bunches to transform.
+            outputs (List[Tuple[Any, Optional[List[str]]]]): values returned 
+                by '_store_outputs'.
+
+        """
+        for bunch, (x, columns) in zip(bunches, outputs):
+            bunch.x = x.copy()
+            bunch.columns = columns
+        return self
+
+    def _store_outputs(self, 
+            bunches: List[dataset.DataBunch]) -> List[
+                Tuple[Any, Optional[List[str]]]]:
+        """Returns copies of transformed 'bunches' to store in the cache.
+
+        Args:
+            bunches (List[dataset.DataBunch]): transformed bunches.
+
+        Returns:
+            List[Tuple[Any, Optional[List[str]]]]: features and column names
+                of each bunch.
+
+        """
+        return [(b.x.copy(), b.columns) for b in bunches]
+
+    def _transform_bunch(self, bunch: dataset.DataBunch) -> None:
+        """Transforms 'x' in 'bunch', keeping sparse output sparse.
+
+        Args:
+            bunch (dataset.DataBunch): bunch to transform.
+
+        """
+        columns = bunch.feature_names
+        index = getattr(bunch.x, 'index', None)
+        result = self.contents.transform(bunch.x)
+        if sparse.issparse(result):
+            bunch.x = result.tocsr()
+            bunch.columns = self._get_feature_names(
+                columns = columns, 
+                width = result.shape[1])
+        elif isinstance(result, np.ndarray):
+            names = self._get_feature_names(
+                columns = columns, 
+                width = result.shape[1])
+            bunch.x = pd.DataFrame(result, columns = names, index = index)
+            bunch.columns = names
+        else:
+            bunch.x = result
+            bunch.columns = list(getattr(result, 'columns', columns))
+        return self
                
\ No newline at end of file
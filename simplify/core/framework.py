@@ -31,7 +31,14 @@ class Settings(sourdough.Configuration):
         defaults (Mapping[str, Mapping[str]]): any default options that should
             be used when a user does not provide the corresponding options in 
             their configuration settings. Defaults to a dict with 'general', 
-            'files', and 'simplify' sections listed.
+            'files', and 'simplify' sections listed. In 'general', 
+            'sample_threshold' is the number of rows above which 
+            Dataset.exploration_view returns a sample of 'sample_size' rows and
+            'parallel_backend' ('process' or 'thread') is the pool used for
+            independent tasks, such as folds, when 'parallelize' is True.
+            'trial_folder', if set, is where hyperparameter search trials and
+            fitted models are persisted and 'max_models' is how many models 
+            are kept for each fold (see TrialStore).
         skip (Sequence[str]): names of suffixes to skip when constructing nodes
             for a simplify project. Defaults to a list with 'general', 'files',
             'simplify', and 'parameters'. 
@@ -43,9 +50,12 @@ class Settings(sourdough.Configuration):
     defaults: Mapping[str, Mapping[str, Any]] = dataclasses.field(
         default_factory = lambda: {'general': {'verbose': False,
                                                'parallelize': False,
+                                               'parallel_backend': 'process',
                                                'conserve_memory': False,
                                                'gpu': False,
-                                               'seed': random.randrange(1000)},
+                                               'seed': random.randrange(1000),
+                                               'sample_threshold': 100000,
+                                               'sample_size': 10000},
                                    'files': {'source_format': 'csv',
                                              'interim_format': 'csv',
                                              'final_format': 'csv',
@@ -0,0 +1,170 @@
+"""
+parallel: settings-driven execution of independent tasks
+Corey Rayburn Yung <coreyrayburnyung@gmail.com>
+Copyright 2021, Corey Rayburn Yung
+License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+
+Contents:
+    Parallelizer (object): runs tasks serially or in a process or thread pool.
+
+"""
+from __future__ import annotations
+import dataclasses
+import multiprocessing
+import multiprocessing.pool
+import os
+from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
+                    Optional, Sequence, Tuple, Type, Union)
+
+
+""" Worker Process State """
+
+# Object shared with every task in a worker, set once per worker process.
+_shared: Any = None
+
+
+def _set_shared(shared: Any) -> None:
+    """Stores 'shared' in a worker so it is not pickled for every task."""
+    global _shared
+    _shared = shared
+    return
+
+def _call_with_shared(process: Callable, arguments: Sequence[Any]) -> Any:
+    """Calls 'process' with the worker's shared object and 'arguments'."""
+    return process(_shared, *arguments)
+
+
+@dataclasses.dataclass
+class Parallelizer(object):
+    """Runs independent tasks using the project's parallel settings.
+
+    The 'general' section of 'settings' is used to fill in any arguments which
+    are not passed: 'parallelize' (whether to use a pool at all),
+    'parallel_backend' ('process' or 'thread'), and 'cores' (maximum number of
+    workers, defaulting to the number of CPUs).
+
+    Args:
+        settings (Optional[Mapping[str, Mapping[str, Any]]]): project settings.
+            Defaults to None.
+        backend (Optional[str]): 'process', 'thread', or 'serial'. Defaults to
+            None.
+        cores (Optional[int]): maximum number of workers. Defaults to None.
+
+    """
+    settings: Optional[Mapping[str, Mapping[str, Any]]] = None
+    backend: Optional[str] = None
+    cores: Optional[int] = None
+    backends: ClassVar[Sequence[str]] = ['process', 'thread', 'serial']
+
+    def __post_init__(self) -> None:
+        """Sets 'backend' and 'cores' from 'settings' if not passed."""
+        try:
+            general = self.settings['general']
+        except (KeyError, TypeError):
+            general = {}
+        if self.backend is None:
+            if general.get('parallelize', False):
+                self.backend = general.get('parallel_backend', 'process')
+            else:
+                self.backend = 'serial'
+        if self.backend not in self.backends:
+            raise ValueError(
+                f'backend must be one of {", ".join(self.backends)}')
+        self.cores = self.cores or general.get('cores') or os.cpu_count() or 1
+        return self
+
+    """ Public Methods """
+
+    def map(self,
+            process: Callable,
+            items: Iterable[Any],
+            shared: Any = None) -> List[Any]:
+        """Applies 'process' to each item in 'items'.
+
+        Args:
+            process (Callable): function to apply. If 'shared' is passed, it is
+                called as process(shared, item). With the 'process' backend, it
+                must be picklable (e.g. a module-level function).
+            items (Iterable[Any]): arguments for each task.
+            shared (Any): object needed by every task. With the 'process'
+                backend it is sent once to each worker instead of with every
+                task. Defaults to None.
+
+        Returns:
+            List[Any]: results in the same order as 'items'.
+
+        """
+        return self.starmap(
+            process = process,
+            arguments = [(item,) for item in items],
+            shared = shared)
+
+    def starmap(self,
+            process: Callable,
+            arguments: Iterable[Sequence[Any]],
+            shared: Any = None) -> List[Any]:
+        """Applies 'process' to each sequence of positional 'arguments'.
+
+        Args:
+            process (Callable): function to apply. If 'shared' is passed, it is
+                called as process(shared, *arguments). With the 'process'
+                backend, it must be picklable (e.g. a module-level function).
+            arguments (Iterable[Sequence[Any]]): positional arguments for each
+                task.
+            shared (Any): object needed by every task. With the 'process'
+                backend it is sent once to each worker instead of with every
+                task. Defaults to None.
+
+        Returns:
+            List[Any]: results in the same order as 'arguments'.
+
+        """
+        tasks = [tuple(a) for a in arguments]
+        workers = self.workers(tasks = len(tasks))
+        if shared is not None:
+            tasks = [(shared,) + task for task in tasks]
+        if workers < 2:
+            return [process(*task) for task in tasks]
+        elif self.backend in ['thread']:
+            with multiprocessing.pool.ThreadPool(workers) as pool:
+                return pool.starmap(process, tasks)
+        elif shared is not None:
+            tasks = [(process, task[1:]) for task in tasks]
+            with multiprocessing.Pool(
+                    workers,
+                    initializer = _set_shared,
+                    initargs = (shared,)) as pool:
+                return pool.starmap(_call_with_shared, tasks)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                return pool.starmap(process, tasks)
+
+    def threads_per_task(self, tasks: int) -> int:
+        """Returns the number of threads each concurrent task may use.
+
+        This keeps libraries with their own thread pools (e.g. xgboost or
+        BLAS) from oversubscribing the CPUs when tasks run in parallel.
+
+        Args:
+            tasks (int): number of tasks to be run.
+
+        Returns:
+            int: threads available to each task (at least 1).
+
+        """
+        return max(1, self.cores // self.workers(tasks = tasks))
+
+    def workers(self, tasks: int) -> int:
+        """Returns the number of workers to use for 'tasks' tasks.
+
+        Args:
+            tasks (int): number of tasks to be run.
+
+        Returns:
+            int: 1 for the 'serial' backend, otherwise the lesser of 'cores'
+                and 'tasks'.
+
+        """
+        if self.backend in ['serial']:
+            return 1
+        return max(1, min(self.cores, tasks))
@@ -0,0 +1,513 @@
+"""
+predictor: compiled scoring of new data with a fitted workflow path
+Corey Rayburn Yung <coreyrayburnyung@gmail.com>
+Copyright 2021, Corey Rayburn Yung
+License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+
+Contents:
+    Predictor (object): scores new rows with the fitted techniques of one
+        workflow path, flattened into operations on numpy arrays.
+
+"""
+from __future__ import annotations
+import copy
+import dataclasses
+import pathlib
+from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
+                    Optional, Sequence, Tuple, Type, Union)
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy import special
+import sklearn.impute
+import sklearn.linear_model
+import sklearn.preprocessing
+
+from . import dataset
+from . import externals
+
+
+@dataclasses.dataclass
+class Predictor(object):
+    """Scores new rows with a fitted path (e.g. fill, encode, scale, model).
+
+    Executing a path scores data by deep copying each component, wrapping
+    the data in DataBunch and DataFrame objects, and looking up each step. A
+    Predictor is compiled once from the fitted techniques instead:
+
+        - imputers, scalers, and feature selection are reduced to fill
+          values, multipliers and offsets, and column positions applied
+          directly to a numpy array;
+        - linear models are reduced to their coefficients;
+        - any other technique (e.g. an encoder) is called on a DataFrame
+          built from the array with the column names it was fit with, which
+          are recorded when compiling.
+
+    Compiling runs 'example' rows through both the compiled operations and
+    the fitted techniques and raises an error if they disagree.
+
+    Args:
+        columns (List[str]): names of the input columns, in order.
+        operations (List[Callable]): compiled operations, each taking and
+            returning an array.
+        model (Callable): compiled model, which takes an array and the name
+            of a method ('predict' or 'predict_proba').
+        numeric (bool): whether all input columns are numeric, in which case
+            input is converted to a float64 array. Defaults to True.
+
+    """
+    columns: List[str]
+    operations: List[Callable]
+    model: Callable
+    numeric: bool = True
+
+    """ Public Class Methods """
+
+    @classmethod
+    def from_techniques(cls,
+            techniques: Sequence[Any],
+            example: pd.DataFrame,
+            tolerance: float = 1e-6) -> Predictor:
+        """Compiles fitted 'techniques' into a Predictor.
+
+        Args:
+            techniques (Sequence[Any]): fitted techniques in the order they
+                are applied, ending with a model (e.g. a SklearnModel).
+            example (pd.DataFrame): unprocessed rows in the format that will
+                be scored, used to record column names and check the
+                compiled operations.
+            tolerance (float): maximum allowed difference between compiled
+                and uncompiled outputs for 'example'. Defaults to 1e-6.
+
+        Returns:
+            Predictor: compiled predictor.
+
+        Raises:
+            ValueError: if the last technique is not a model or the compiled
+                operations do not reproduce the techniques' output.
+
+        """
+        *transformers, model = techniques
+        if not isinstance(model, externals.SklearnModel):
+            raise ValueError('the last technique in a path must be a model')
+        columns = [str(c) for c in example.columns]
+        numeric = all(
+            pd.api.types.is_numeric_dtype(d) for d in example.dtypes)
+        predictor = cls(
+            columns = columns,
+            operations = [],
+            model = None,
+            numeric = numeric)
+        values = predictor.to_array(x = example)
+        frame = example
+        for technique in transformers:
+            operation = _compile_transformer(
+                technique = technique,
+                values = values,
+                columns = list(frame.columns))
+            frame = _execute_transformer(technique = technique, x = frame)
+            values = operation(values)
+            _check(
+                compiled = values,
+                executed = frame,
+                tolerance = tolerance,
+                name = getattr(technique, 'name', None))
+            frame = _as_frame(x = frame)
+            predictor.operations.append(operation)
+        predictor.model = _compile_model(
+            estimator = model.contents,
+            values = values)
+        method = 'predict'
+        if hasattr(model.contents, 'predict_proba'):
+            method = 'predict_proba'
+        _check(
+            compiled = predictor.model(values, method),
+            executed = getattr(model.contents, method)(frame),
+            tolerance = tolerance,
+            name = getattr(model, 'name', None))
+        return predictor
+
+    @classmethod
+    def from_workflow(cls,
+            workflow: Any,
+            path: Sequence[str],
+            example: pd.DataFrame,
+            tolerance: float = 1e-6) -> Predictor:
+        """Compiles the fitted components of 'path' in 'workflow'.
+
+        The workflow must have been executed without copying its components
+        so that they are fitted. Steps are replaced by the techniques they
+        wrap.
+
+        Args:
+            workflow (Any): executed Workflow.
+            path (Sequence[str]): names of the nodes in the path.
+            example (pd.DataFrame): unprocessed rows in the format that will
+                be scored.
+            tolerance (float): maximum allowed difference between compiled
+                and uncompiled outputs for 'example'. Defaults to 1e-6.
+
+        Returns:
+            Predictor: compiled predictor.
+
+        """
+        techniques = []
+        for node in path:
+            component = workflow.components[node]
+            while not hasattr(component, 'implement') or (
+                    hasattr(component.contents, 'implement')):
+                component = component.contents
+            techniques.append(component)
+        return cls.from_techniques(
+            techniques = techniques,
+            example = example,
+            tolerance = tolerance)
+
+    @classmethod
+    def load(cls, path: Union[str, pathlib.Path]) -> Predictor:
+        """Loads a Predictor saved with 'save'.
+
+        Args:
+            path (Union[str, pathlib.Path]): path of the saved Predictor.
+
+        Returns:
+            Predictor: loaded predictor.
+
+        Raises:
+            TypeError: if the file does not contain a Predictor.
+
+        """
+        predictor = joblib.load(pathlib.Path(path))
+        if not isinstance(predictor, cls):
+            raise TypeError(f'{path} does not contain a {cls.__name__}')
+        return predictor
+
+    """ Public Methods """
+
+    def save(self, path: Union[str, pathlib.Path]) -> None:
+        """Saves the Predictor so it can be loaded for scoring elsewhere.
+
+        Args:
+            path (Union[str, pathlib.Path]): path of the file to create.
+
+        """
+        joblib.dump(self, pathlib.Path(path))
+        return
+
+    def predict(self,
+            x: Union[pd.DataFrame, np.ndarray, Mapping[str, Any]]) -> (
+                np.ndarray):
+        """Returns predictions for 'x'.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray, Mapping[str, Any]]): rows to
+                score, in any form accepted by 'to_array'.
+
+        Returns:
+            np.ndarray: predicted labels or values.
+
+        """
+        values = self.to_array(x = x)
+        for operation in self.operations:
+            values = operation(values)
+        return self.model(values, 'predict')
+
+    def predict_proba(self,
+            x: Union[pd.DataFrame, np.ndarray, Mapping[str, Any]]) -> (
+                np.ndarray):
+        """Returns class probabilities for 'x'.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray, Mapping[str, Any]]): rows to
+                score, in any form accepted by 'predict'.
+
+        Returns:
+            np.ndarray: probability of each class.
+
+        """
+        values = self.to_array(x = x)
+        for operation in self.operations:
+            values = operation(values)
+        return self.model(values, 'predict_proba')
+
+    def to_array(self,
+            x: Union[pd.DataFrame, np.ndarray, Mapping[str, Any],
+                     Sequence[Mapping[str, Any]]]) -> np.ndarray:
+        """Returns 'x' as a 2-dimensional array with columns in order.
+
+        Args:
+            x (Union[pd.DataFrame, np.ndarray, Mapping[str, Any], 
+                Sequence[Mapping[str, Any]]]): rows to score, as a DataFrame, 
+                an array with columns in the order of 'columns', a single row 
+                as a mapping of column names to values, or a sequence of such 
+                mappings.
+
+        Returns:
+            np.ndarray: rows with columns in the order of 'columns'.
+
+        Raises:
+            KeyError: if a column is missing from 'x'.
+
+        """
+        dtype = np.float64 if self.numeric else object
+        if isinstance(x, pd.DataFrame):
+            return x[self.columns].to_numpy(dtype = dtype)
+        elif isinstance(x, Mapping):
+            x = [x]
+        if len(x) > 0 and isinstance(x[0], Mapping):
+            return np.asarray(
+                [[row[c] for c in self.columns] for row in x], 
+                dtype = dtype)
+        x = np.asarray(x, dtype = dtype)
+        return x.reshape(1, -1) if x.ndim == 1 else x
+
+    """ Dunder Methods """
+
+    def __call__(self,
+            x: Union[pd.DataFrame, np.ndarray, Mapping[str, Any]]) -> (
+                np.ndarray):
+        return self.predict(x = x)
+
+
+@dataclasses.dataclass
+class _Affine(object):
+    """Multiplies and offsets every column (e.g. a fitted scaler)."""
+    multiply: np.ndarray
+    add: np.ndarray
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return x * self.multiply + self.add
+
+
+@dataclasses.dataclass
+class _Fill(object):
+    """Replaces missing values in each column with a fitted value."""
+    values: np.ndarray
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        missing = np.isnan(x)
+        if missing.any():
+            x = np.where(missing, self.values, x)
+        return x
+
+
+@dataclasses.dataclass
+class _Frame(object):
+    """Calls a fitted technique on a DataFrame with the fitted column names."""
+    technique: Any
+    columns: List[str]
+
+    def __call__(self,
+            x: Union[np.ndarray, sparse.spmatrix]) -> Union[
+                np.ndarray, sparse.spmatrix]:
+        if sparse.issparse(x):
+            x = pd.DataFrame.sparse.from_spmatrix(x, columns = self.columns)
+        else:
+            x = pd.DataFrame(x, columns = self.columns)
+        return _as_input(
+            _execute_transformer(technique = self.technique, x = x))
+
+
+@dataclasses.dataclass
+class _Linear(object):
+    """Scores a fitted linear model from its coefficients."""
+    coefficients: np.ndarray
+    intercept: np.ndarray
+    classes: Optional[np.ndarray] = None
+
+    def __call__(self, x: np.ndarray, method: str) -> np.ndarray:
+        scores = x @ self.coefficients + self.intercept
+        if self.classes is None:
+            return scores.ravel() if scores.shape[1] == 1 else scores
+        elif method in ['predict_proba']:
+            if scores.shape[1] == 1:
+                positive = special.expit(scores)
+                return np.hstack([1 - positive, positive])
+            return special.softmax(scores, axis = 1)
+        elif scores.shape[1] == 1:
+            return self.classes[(scores[:, 0] > 0).astype(np.intp)]
+        return self.classes[np.argmax(scores, axis = 1)]
+
+
+@dataclasses.dataclass
+class _Model(object):
+    """Calls a fitted model whose column names were checked when compiling."""
+    estimator: Any
+
+    def __call__(self,
+            x: Union[np.ndarray, sparse.spmatrix],
+            method: str) -> np.ndarray:
+        return getattr(self.estimator, method)(x)
+
+
+@dataclasses.dataclass
+class _Select(object):
+    """Keeps the columns at fitted positions."""
+    positions: np.ndarray
+
+    def __call__(self,
+            x: Union[np.ndarray, sparse.spmatrix]) -> Union[
+                np.ndarray, sparse.spmatrix]:
+        return x[:, self.positions]
+
+
+def _as_frame(x: Union[pd.DataFrame, dataset.DataBunch]) -> pd.DataFrame:
+    """Returns technique output as a DataFrame (sparse output is kept)."""
+    if isinstance(x, pd.DataFrame):
+        return x
+    return pd.DataFrame.sparse.from_spmatrix(x)
+
+def _as_input(x: Union[pd.DataFrame, np.ndarray, sparse.spmatrix]) -> Union[
+        np.ndarray, sparse.spmatrix]:
+    """Returns technique output as an array or CSR matrix."""
+    if sparse.issparse(x):
+        return x.tocsr()
+    elif isinstance(x, pd.DataFrame):
+        if any(isinstance(d, pd.SparseDtype) for d in x.dtypes):
+            return sparse.csr_matrix(x.sparse.to_coo())
+        x = x.to_numpy()
+    if x.dtype == object:
+        try:
+            return x.astype(np.float64)
+        except (TypeError, ValueError):
+            return x
+    return x
+
+def _check(compiled: Union[np.ndarray, sparse.spmatrix],
+        executed: Union[pd.DataFrame, np.ndarray, sparse.spmatrix],
+        tolerance: float,
+        name: Optional[str]) -> None:
+    """Raises ValueError if compiled and executed outputs disagree."""
+    compiled, executed = _as_input(compiled), _as_input(executed)
+    if sparse.issparse(compiled):
+        compiled = compiled.toarray()
+    if sparse.issparse(executed):
+        executed = executed.toarray()
+    if compiled.shape != executed.shape:
+        raise ValueError(
+            f'compiled {name} output has shape {compiled.shape} instead of '
+            f'{executed.shape}')
+    if compiled.dtype.kind in ['f', 'i', 'u'] and (
+            executed.dtype.kind in ['f', 'i', 'u']):
+        if not np.allclose(
+                compiled,
+                executed,
+                atol = tolerance,
+                rtol = 0,
+                equal_nan = True):
+            raise ValueError(f'compiled {name} output does not match')
+    elif not (compiled == executed).all():
+        raise ValueError(f'compiled {name} output does not match')
+    return
+
+def _compile_model(estimator: Any,
+        values: Union[np.ndarray, sparse.spmatrix]) -> Callable:
+    """Returns a compiled model for 'estimator'.
+
+    Args:
+        estimator (Any): fitted model.
+        values (Union[np.ndarray, sparse.spmatrix]): example model input.
+
+    Returns:
+        Callable: compiled model.
+
+    """
+    linear = isinstance(estimator, (
+        sklearn.linear_model.LinearRegression,
+        sklearn.linear_model.Ridge,
+        sklearn.linear_model.Lasso,
+        sklearn.linear_model.ElasticNet,
+        sklearn.linear_model.LogisticRegression))
+    if linear and not sparse.issparse(values):
+        coefficients = np.atleast_2d(estimator.coef_).T
+        return _Linear(
+            coefficients = np.ascontiguousarray(coefficients),
+            intercept = np.atleast_1d(estimator.intercept_),
+            classes = getattr(estimator, 'classes_', None))
+    return _Model(estimator = _without_names(estimator))
+
+def _compile_transformer(technique: Any,
+        values: Union[np.ndarray, sparse.spmatrix],
+        columns: List[str]) -> Callable:
+    """Returns a compiled operation for a fitted transformer technique.
+
+    Args:
+        technique (Any): fitted technique whose 'contents' is a fitted
+            transformer.
+        values (Union[np.ndarray, sparse.spmatrix]): example input as the
+            compiled operation will receive it.
+        columns (List[str]): names of the input columns.
+
+    Returns:
+        Callable: compiled operation.
+
+    """
+    fitted = technique.contents
+    width = values.shape[1]
+    dense = isinstance(values, np.ndarray) and values.dtype.kind == 'f'
+    if hasattr(fitted, 'get_support'):
+        support = fitted.get_support()
+        if len(support) == width:
+            return _Select(positions = np.flatnonzero(support))
+    if dense and _fits(fitted, width):
+        if isinstance(fitted, sklearn.impute.SimpleImputer):
+            statistics = np.asarray(fitted.statistics_, dtype = np.float64)
+            # 'missing_values' may also be pd.NA, None, or a str, for which 
+            # np.isnan fails or is ambiguous.
+            if (not fitted.add_indicator
+                    and not np.isnan(statistics).any()
+                    and isinstance(fitted.missing_values, float)
+                    and np.isnan(fitted.missing_values)):
+                return _Fill(values = statistics)
+        elif isinstance(fitted, sklearn.preprocessing.StandardScaler):
+            scale = fitted.scale_ if fitted.scale_ is not None else 1.0
+            mean = fitted.mean_ if fitted.with_mean else 0.0
+            return _Affine(
+                multiply = np.ones(width) / scale,
+                add = -np.ones(width) * mean / scale)
+        elif isinstance(fitted, sklearn.preprocessing.MinMaxScaler):
+            if not fitted.clip:
+                return _Affine(multiply = fitted.scale_, add = fitted.min_)
+        elif isinstance(fitted, sklearn.preprocessing.MaxAbsScaler):
+            return _Affine(
+                multiply = 1.0 / fitted.scale_,
+                add = np.zeros(width))
+        elif isinstance(fitted, sklearn.preprocessing.RobustScaler):
+            scale = fitted.scale_ if fitted.scale_ is not None else 1.0
+            center = fitted.center_ if fitted.center_ is not None else 0.0
+            return _Affine(
+                multiply = np.ones(width) / scale,
+                add = -np.ones(width) * center / scale)
+    return _Frame(technique = technique, columns = columns)
+
+def _execute_transformer(technique: Any, x: pd.DataFrame) -> Union[
+        pd.DataFrame, sparse.spmatrix]:
+    """Applies a fitted technique to 'x' as executing the path would."""
+    if hasattr(technique, 'transform_batch'):
+        return technique.transform_batch(x = x)
+    result = technique.contents.transform(x)
+    if isinstance(result, np.ndarray):
+        if result.shape[1] == x.shape[1]:
+            columns = x.columns
+        else:
+            columns = technique.contents.get_feature_names_out()
+        result = pd.DataFrame(result, columns = columns, index = x.index)
+    return result
+
+def _fits(fitted: Any, width: int) -> bool:
+    """Returns whether 'fitted' was fit to 'width' columns."""
+    return getattr(fitted, 'n_features_in_', None) == width
+
+def _without_names(estimator: Any) -> Any:
+    """Returns a shallow copy of 'estimator' which does not check names.
+
+    Column names were checked when compiling, so arrays are passed without
+    them and scikit-learn would otherwise warn on every call.
+
+    """
+    if hasattr(estimator, 'feature_names_in_'):
+        estimator = copy.copy(estimator)
+        del estimator.feature_names_in_
+    return estimator
@@ -0,0 +1,512 @@
+"""
+server: local scoring service for a compiled Predictor
+Corey Rayburn Yung <coreyrayburnyung@gmail.com>
+Copyright 2021, Corey Rayburn Yung
+License: Apache-2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+
+Contents:
+    ScoringMetrics (object): counts, throughput, and latency percentiles of
+        scored requests.
+    ScoringServer (object): asyncio HTTP server which coalesces concurrent
+        requests into micro-batches for a Predictor.
+
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import collections
+import dataclasses
+import json
+import pathlib
+import time
+from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping,
+                    Optional, Sequence, Tuple, Type, Union)
+
+import numpy as np
+
+from . import caches
+from . import predictor
+
+
+@dataclasses.dataclass
+class ScoringMetrics(object):
+    """Counts, throughput, and latency percentiles of scored requests.
+
+    Args:
+        window (int): number of most recent requests used for latency
+            percentiles. Defaults to 10000.
+
+    """
+    window: int = 10000
+    requests: int = 0
+    rows: int = 0
+    batches: int = 0
+    errors: int = 0
+    started: float = dataclasses.field(default_factory = time.perf_counter)
+    latencies: collections.deque = dataclasses.field(default = None)
+    batch_rows: collections.deque = dataclasses.field(default = None)
+
+    def __post_init__(self) -> None:
+        self.latencies = collections.deque(maxlen = self.window)
+        self.batch_rows = collections.deque(maxlen = self.window)
+        return
+
+    """ Public Methods """
+
+    def record_batch(self, rows: int, latencies: Sequence[float]) -> None:
+        """Records a scored batch and the latency of each of its requests.
+
+        Args:
+            rows (int): number of rows in the batch.
+            latencies (Sequence[float]): seconds from receiving to scoring
+                each request in the batch.
+
+        """
+        self.batches += 1
+        self.rows += rows
+        self.requests += len(latencies)
+        self.batch_rows.append(rows)
+        self.latencies.extend(latencies)
+        return
+
+    def report(self) -> Dict[str, float]:
+        """Returns current metrics.
+
+        Returns:
+            Dict[str, float]: counts, rows and requests per second since the
+                server started, mean rows per batch, and latency percentiles
+                in milliseconds.
+
+        """
+        elapsed = time.perf_counter() - self.started
+        report = {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'errors': self.errors,
+            'uptime': elapsed,
+            'requests_per_second': self.requests / elapsed,
+            'rows_per_second': self.rows / elapsed}
+        if self.batch_rows:
+            report['mean_batch_rows'] = float(np.mean(self.batch_rows))
+        if self.latencies:
+            percentiles = np.percentile(
+                np.asarray(self.latencies) * 1000, [50, 95, 99])
+            for name, value in zip(['p50_ms', 'p95_ms', 'p99_ms'], percentiles):
+                report[name] = float(value)
+            report['max_ms'] = float(max(self.latencies) * 1000)
+        return report
+
+
+@dataclasses.dataclass
+class ScoringServer(object):
+    """Asyncio HTTP server which scores rows with a Predictor.
+
+    Each request is converted to an array when it arrives, so malformed
+    requests are rejected on their own. Requests are then queued and
+    coalesced into a single batch until 'max_batch' rows are waiting or the
+    first request in the batch has waited 'max_delay' seconds. Batches are
+    scored in a worker thread, so the next batch fills while the current one
+    is scored.
+
+    Endpoints:
+        POST /predict: body is JSON with 'rows', a list of rows which are
+            either mappings of column names to values or lists of values in
+            the order of the predictor's 'columns'. Missing values may be
+            null. Responds with JSON with 'predictions'.
+        GET /metrics: responds with JSON from ScoringMetrics.report.
+        GET /health: responds with JSON with the predictor's 'columns'.
+
+    Args:
+        predictor (predictor.Predictor): compiled predictor.
+        method (str): Predictor method used to score rows, either 'predict'
+            or 'predict_proba'. Defaults to 'predict'.
+        max_batch (int): number of rows at which a batch is scored without
+            waiting. Defaults to 256.
+        max_delay (float): maximum seconds a request waits for other requests
+            to join its batch. Defaults to 0.002.
+        max_body (int): maximum bytes in a request body. Defaults to
+            16777216.
+        metrics (ScoringMetrics): metrics of scored requests. Defaults to a
+            new ScoringMetrics instance.
+
+    """
+    predictor: predictor.Predictor
+    method: str = 'predict'
+    max_batch: int = 256
+    max_delay: float = 0.002
+    max_body: int = 16777216
+    metrics: ScoringMetrics = dataclasses.field(
+        default_factory = ScoringMetrics)
+    statuses: ClassVar[Mapping[int, str]] = {
+        200: 'OK',
+        400: 'Bad Request',
+        404: 'Not Found',
+        405: 'Method Not Allowed',
+        413: 'Payload Too Large',
+        500: 'Internal Server Error'}
+
+    def __post_init__(self) -> None:
+        if self.method not in ['predict', 'predict_proba']:
+            raise ValueError('method must be predict or predict_proba')
+        self.queue = None
+        self.batcher = None
+        self.server = None
+        self.connections = set()
+        return
+
+    """ Public Class Methods """
+
+    @classmethod
+    def from_file(cls, path: Union[str, pathlib.Path],
+                  **kwargs) -> ScoringServer:
+        """Creates a server for a Predictor saved with 'Predictor.save'.
+
+        Args:
+            path (Union[str, pathlib.Path]): path of the saved Predictor.
+            kwargs: other arguments passed to the server.
+
+        Returns:
+            ScoringServer: server for the loaded predictor.
+
+        """
+        return cls(predictor = predictor.Predictor.load(path), **kwargs)
+
+    @classmethod
+    def from_store(cls, folder: Union[str, pathlib.Path], name: str,
+                   **kwargs) -> ScoringServer:
+        """Creates a server for a Predictor saved in a ModelStore.
+
+        The Predictor's large arrays are memory-mapped, so several server
+        processes scoring with the same store share one copy of them.
+
+        Args:
+            folder (Union[str, pathlib.Path]): folder of the ModelStore.
+            name (str): name the Predictor was saved as.
+            kwargs: other arguments passed to the server.
+
+        Returns:
+            ScoringServer: server for the loaded predictor.
+
+        Raises:
+            TypeError: if 'name' is not a Predictor.
+
+        """
+        loaded = caches.ModelStore(folder = folder).load(name = name)
+        if not isinstance(loaded, predictor.Predictor):
+            raise TypeError(f'{name} is not a Predictor')
+        return cls(predictor = loaded, **kwargs)
+
+    """ Public Methods """
+
+    async def start(self,
+            host: str = '127.0.0.1',
+            port: int = 8080,
+            path: Optional[Union[str, pathlib.Path]] = None) -> None:
+        """Starts accepting connections and scoring batches.
+
+        Args:
+            host (str): address to listen on. Defaults to '127.0.0.1'.
+            port (int): port to listen on, or 0 for any free port. Defaults
+                to 8080.
+            path (Optional[Union[str, pathlib.Path]]): path of a unix socket
+                to listen on instead of 'host' and 'port'. Defaults to None.
+
+        """
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.get_running_loop().create_task(self._batch())
+        if path is None:
+            self.server = await asyncio.start_server(
+                self._handle,
+                host = host,
+                port = port)
+        else:
+            self.server = await asyncio.start_unix_server(
+                self._handle,
+                path = str(path))
+        return
+
+    async def stop(self) -> None:
+        """Stops accepting connections and scoring batches."""
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+        return
+
+    async def serve(self,
+            host: str = '127.0.0.1',
+            port: int = 8080,
+            path: Optional[Union[str, pathlib.Path]] = None) -> None:
+        """Starts the server and runs until it is cancelled.
+
+        Args:
+            host (str): address to listen on. Defaults to '127.0.0.1'.
+            port (int): port to listen on. Defaults to 8080.
+            path (Optional[Union[str, pathlib.Path]]): path of a unix socket
+                to listen on instead of 'host' and 'port'. Defaults to None.
+
+        """
+        await self.start(host = host, port = port, path = path)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+        return
+
+    @property
+    def address(self) -> Union[Tuple[str, int], str]:
+        """Returns the address the server is listening on."""
+        return self.server.sockets[0].getsockname()
+
+    async def score(self, rows: Any) -> np.ndarray:
+        """Queues 'rows' to be scored in the next batch.
+
+        Args:
+            rows (Any): rows in any form accepted by 'Predictor.to_array'.
+
+        Returns:
+            np.ndarray: scores for 'rows'.
+
+        Raises:
+            KeyError: if a column is missing from 'rows'.
+            ValueError: if 'rows' is empty or has the wrong number of 
+                columns.
+
+        """
+        return await self._submit(values = self._to_array(rows = rows))
+
+    """ Private Methods """
+
+    def _to_array(self, rows: Any) -> np.ndarray:
+        """Returns 'rows' as an array, checking its shape."""
+        if len(rows) == 0:
+            raise ValueError('no rows to score')
+        values = self.predictor.to_array(x = rows)
+        if values.ndim != 2 or values.shape[1] != len(self.predictor.columns):
+            raise ValueError(
+                f'rows must have {len(self.predictor.columns)} columns')
+        return values
+
+    async def _submit(self, values: np.ndarray) -> np.ndarray:
+        """Queues 'values' and returns their scores once batched."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((values, future, time.perf_counter()))
+        return await future
+
+    async def _batch(self) -> None:
+        """Scores queued requests in batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        score = getattr(self.predictor, self.method)
+        while True:
+            pending = [await self.queue.get()]
+            rows = len(pending[0][0])
+            deadline = loop.time() + self.max_delay
+            while rows < self.max_batch:
+                try:
+                    if self.queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        item = await asyncio.wait_for(
+                            self.queue.get(),
+                            timeout = timeout)
+                    else:
+                        item = self.queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+            values = [item[0] for item in pending]
+            try:
+                if len(values) == 1:
+                    results = [await loop.run_in_executor(
+                        None, score, values[0])]
+                else:
+                    scores = await loop.run_in_executor(
+                        None, score, np.concatenate(values))
+                    stops = np.cumsum([len(batch) for batch in values])
+                    results = np.split(scores, stops[:-1])
+            except Exception as error:
+                if len(values) == 1:
+                    results = [error]
+                else:
+                    # Scores each request on its own so that one bad request
+                    # does not fail the others coalesced into its batch.
+                    results = await loop.run_in_executor(
+                        None, self._score_each, score, values)
+            finished = time.perf_counter()
+            scored = 0
+            latencies = []
+            for (batch, future, received), result in zip(pending, results):
+                if isinstance(result, Exception):
+                    self.metrics.errors += 1
+                    if not future.done():
+                        future.set_exception(result)
+                else:
+                    scored += len(batch)
+                    latencies.append(finished - received)
+                    if not future.done():
+                        future.set_result(result)
+            if latencies:
+                self.metrics.record_batch(rows = scored, latencies = latencies)
+
+    @staticmethod
+    def _score_each(
+            score: Callable[[np.ndarray], np.ndarray],
+            values: Sequence[np.ndarray]) -> List[
+                Union[np.ndarray, Exception]]:
+        """Returns scores, or the error raised, for each array in 'values'."""
+        results = []
+        for batch in values:
+            try:
+                results.append(score(batch))
+            except Exception as error:
+                results.append(error)
+        return results
+
+    async def _handle(self,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter) -> None:
+        """Answers HTTP/1.1 requests on one connection until it closes."""
+        self.connections.add(writer)
+        try:
+            while True:
+                request = await self._read_request(reader = reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, response = await self._route(
+                    method = method,
+                    target = target,
+                    body = body)
+                keep = headers.get('connection', '').lower() != 'close'
+                await self._write_response(
+                    writer = writer,
+                    status = status,
+                    response = response,
+                    keep = keep)
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as error:
+            await self._write_response(
+                writer = writer,
+                status = 413 if 'too large' in str(error) else 400,
+                response = {'error': str(error)},
+                keep = False)
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+        return
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[
+            Tuple[str, str, Dict[str, str], bytes]]:
+        """Returns the method, target, headers, and body of a request.
+
+        Returns None if the connection closed before a new request.
+
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise ValueError('malformed request line')
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in [b'\r\n', b'\n', b'']:
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > self.max_body:
+            raise ValueError('request body is too large')
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def _route(self,
+            method: str,
+            target: str,
+            body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Returns the status and JSON response for a request."""
+        target = target.split('?', 1)[0]
+        if target == '/predict':
+            if method != 'POST':
+                return 405, {'error': 'use POST'}
+            try:
+                values = self._to_array(rows = json.loads(body)['rows'])
+            except (KeyError, TypeError, ValueError) as error:
+                self.metrics.errors += 1
+                return 400, {'error': f'invalid rows: {error!r}'}
+            try:
+                scores = await self._submit(values = values)
+            except Exception as error:
+                return 500, {'error': repr(error)}
+            return 200, {'predictions': scores.tolist()}
+        elif method != 'GET':
+            return 405, {'error': 'use GET'}
+        elif target == '/metrics':
+            return 200, self.metrics.report()
+        elif target == '/health':
+            return 200, {'columns': self.predictor.columns}
+        return 404, {'error': f'{target} not found'}
+
+    async def _write_response(self,
+            writer: asyncio.StreamWriter,
+            status: int,
+            response: Dict[str, Any],
+            keep: bool) -> None:
+        """Writes a JSON response."""
+        body = json.dumps(response).encode()
+        head = (
+            f'HTTP/1.1 {status} {self.statuses[status]}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+        return
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description = 'scores rows with a saved Predictor')
+    parser.add_argument('predictor', 
+                        help = 'path of a saved Predictor or ModelStore')
+    parser.add_argument('--name', default = None,
+                        help = 'name of the Predictor in a ModelStore')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8080)
+    parser.add_argument('--socket', default = None,
+                        help = 'unix socket path used instead of a port')
+    parser.add_argument('--method', default = 'predict',
+                        choices = ['predict', 'predict_proba'])
+    parser.add_argument('--max-batch', type = int, default = 256)
+    parser.add_argument('--max-delay', type = float, default = 0.002)
+    arguments = parser.parse_args()
+    options = {
+        'method': arguments.method,
+        'max_batch': arguments.max_batch,
+        'max_delay': arguments.max_delay}
+    if arguments.name is None:
+        server = ScoringServer.from_file(
+            path = arguments.predictor, 
+            **options)
+    else:
+        server = ScoringServer.from_store(
+            folder = arguments.predictor,
+            name = arguments.name,
+            **options)
+    asyncio.run(server.serve(
+        host = arguments.host,
+        port = arguments.port,
+        path = arguments.socket))
@@ -20,6 +20,7 @@ import more_itertools
 
 import sourdough
 from . import base
+from ..utilities import memory
 
 
 @dataclasses.dataclass
@@ -304,6 +305,8 @@ class Workflow(base.Stage, sourdough.Graph):
                                      path = path, 
                                      copy_components = copy_components, 
                                      **kwargs)  
+            if memory.is_conserving(data):
+                memory.collect()
         return data
 
     def execute_path(self, data: Any, path: Sequence[str], 
@@ -392,5 +395,7 @@ class Summary(sourdough.types.Lexicon, base.Stage):
             summary.contents[key] = workflow.execute_path(data = to_use,
                                                           path = path,
                                                           **kwargs)
+            if memory.is_conserving(data):
+                memory.collect()
         return summary
         
\ No newline at end of file
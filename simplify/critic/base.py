@@ -318,7 +318,7 @@ class CriticScholar(Scholar):
         # Creates 'Parallelizer' instance to apply 'Chapter' instances, if the
         # option to parallelize has been selected.
         if self.parallelize:
-            self.parallelizer = Parallelizer(idea = self.idea)
+            self.parallelizer = simplify.core.Parallelizer(settings = self.idea)
         return self
 
 
@@ -38,26 +38,32 @@ def namify(process: Callable) -> Callable:
     return wrapped
 
 def numpy_shield(process: Callable) -> Callable:
-    """[summary]
+    """Wraps numpy array results of 'process' in a DataFrame like 'x'.
+
+    Results are only converted when 'x' is a DataFrame and the result has the
+    same shape, so its index and columns can be reused. Sparse matrices and 
+    results with a different number of rows or columns (e.g. from an encoder)
+    are returned unchanged so that they are never densified.
 
     Args:
-        process (Callable): [description]
+        process (Callable): method or function with an 'x' argument.
 
     Returns:
-        Callable: [description]
+        Callable: with numpy array results converted to DataFrames.
+        
     """   
      
     @functools.wraps(process)
     def wrapper(*args, **kwargs):
         call_signature = inspect.signature(process)
         arguments = dict(call_signature.bind(*args, **kwargs).arguments)
-        try:
-            x_columns = list(arguments['x'].columns.values)
-            result = process(*args, **kwargs)
-            if isinstance(result, np.ndarray):
-                result = pd.DataFrame(result, columns = x_columns)
-        except KeyError:
-            result = process(*args, **kwargs)
+        x = arguments.get('x')
+        result = process(*args, **kwargs)
+        if (isinstance(x, pd.DataFrame)
+                and isinstance(result, np.ndarray)
+                and result.ndim == 2
+                and result.shape == x.shape):
+            result = pd.DataFrame(result, columns = x.columns, index = x.index)
         return result
     return wrapper
     
@@ -7,9 +7,15 @@
 """
 from __future__ import annotations
 import dataclasses
+import gc
 from typing import (Any, Callable, ClassVar, Dict, Iterable, List, Mapping, 
                     Optional, Sequence, Tuple, Type, Union)
 
+import more_itertools
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
 
 def add_slots(cls) -> object:
     """Adds slots to dataclass with default values.
@@ -41,3 +47,128 @@ def add_slots(cls) -> object:
         if qualname is not None:
             cls.__qualname__ = qualname
     return cls
+
+
+def is_conserving(item: Any) -> bool:
+    """Returns whether the 'conserve_memory' setting is activated.
+
+    Args:
+        item (Any): a Settings instance or an object with a 'settings'
+            attribute (e.g. a Project or Dataset).
+
+    Returns:
+        bool: value of 'conserve_memory' in the 'general' section of settings
+            or False if it cannot be found.
+        
+    """
+    # Dataset returns None for missing attributes instead of raising an
+    # AttributeError, so None is treated as missing.
+    settings = getattr(item, 'settings', None)
+    if settings is None:
+        settings = item
+    try:
+        return bool(settings['general']['conserve_memory'])
+    except (KeyError, TypeError, AttributeError):
+        return False
+
+
+def collect() -> int:
+    """Runs the garbage collector.
+
+    Returns:
+        int: number of unreachable objects found.
+        
+    """
+    return gc.collect()
+
+
+def release(item: object, attributes: Union[str, Sequence[str]]) -> object:
+    """Sets 'attributes' of 'item' to None so their contents can be freed.
+
+    Args:
+        item (object): object with attributes to release.
+        attributes (Union[str, Sequence[str]]): names of attributes to release.
+
+    Returns:
+        object: 'item' with 'attributes' set to None.
+        
+    """
+    for attribute in more_itertools.always_iterable(attributes):
+        if hasattr(item, attribute):
+            setattr(item, attribute, None)
+    return item
+
+
+def shrink(data: pd.DataFrame) -> pd.DataFrame:
+    """Downcasts numeric columns of 'data' to smaller types.
+
+    Integers are downcast to the smallest integer type that holds their range 
+    and 64-bit floats are downcast to float32 (which loses precision beyond
+    about seven significant digits).
+
+    Args:
+        data (pd.DataFrame): data to downcast.
+
+    Returns:
+        pd.DataFrame: with downcast columns.
+        
+    """
+    for column in data.columns:
+        if pd.api.types.is_bool_dtype(data[column]):
+            continue
+        elif pd.api.types.is_integer_dtype(data[column]):
+            data[column] = pd.to_numeric(data[column], downcast = 'integer')
+        elif pd.api.types.is_float_dtype(data[column]):
+            data[column] = pd.to_numeric(data[column], downcast = 'float')
+    return data
+
+
+def to_matrix(x: Union[pd.DataFrame, np.ndarray, sparse.spmatrix],
+        sparse_format: str = 'csr',
+        dtype: Optional[Any] = None) -> Union[np.ndarray, sparse.spmatrix]:
+    """Returns 'x' as an array or a sparse matrix.
+
+    Arrays (and DataFrames whose values are already an array of 'dtype') are
+    returned without a copy.
+
+    Args:
+        x (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): features.
+        sparse_format (str): scipy format of sparse output, such as 'csr' for
+            row access or 'csc' for column access. Defaults to 'csr'.
+        dtype (Optional[Any]): numpy dtype of dense output. Defaults to None,
+            in which case the dtype of 'x' is kept.
+
+    Returns:
+        Union[np.ndarray, sparse.spmatrix]: array, or sparse matrix in 
+            'sparse_format' if 'x' is sparse.
+        
+    """
+    if sparse.issparse(x):
+        return x.asformat(sparse_format)
+    elif isinstance(x, pd.DataFrame):
+        return x.to_numpy(dtype = dtype)
+    return np.asarray(x, dtype = dtype)
+
+
+def to_float32(x: Union[pd.DataFrame, np.ndarray, sparse.spmatrix]) -> Union[
+        pd.DataFrame, np.ndarray, sparse.spmatrix]:
+    """Converts 64-bit float data in 'x' to float32.
+
+    Non-float data is returned unchanged.
+
+    Args:
+        x (Union[pd.DataFrame, np.ndarray, sparse.spmatrix]): features.
+
+    Returns:
+        Union[pd.DataFrame, np.ndarray, sparse.spmatrix]: with float32 instead
+            of float64 values.
+        
+    """
+    if isinstance(x, pd.DataFrame):
+        floats = x.select_dtypes(include = ['float64']).columns
+        if len(floats) > 0:
+            x = x.astype({column: np.float32 for column in floats})
+    elif (isinstance(x, np.ndarray) or sparse.issparse(x)) and (
+            x.dtype == np.float64):
+        x = x.astype(np.float32)
+    return x
@@ -0,0 +1,128 @@
+"""
+.. module:: test caches
+:synopsis: tests shared caches
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import numpy as np
+import pandas as pd
+import sklearn.model_selection
+import sklearn.neighbors
+import sklearn.preprocessing
+
+from simplify.core.caches import (ModelStore, SplitRegistry, 
+                                  TransformerCache, TrialStore, trial_store)
+
+
+def test_split_registry(tmp_path):
+    x = pd.DataFrame({'a': range(20)})
+    y = pd.Series([0, 1] * 10)
+    registry = SplitRegistry(folder = tmp_path)
+    splitter = sklearn.model_selection.StratifiedKFold(
+        n_splits = 4, 
+        shuffle = True, 
+        random_state = 7)
+    folds = registry.get(splitter = splitter, x = x, y = y)
+    assert len(folds) == 4
+    assert folds[0][0].dtype == np.int32
+    assert registry.get(splitter = splitter, x = x, y = y) is folds
+    reloaded = SplitRegistry(folder = tmp_path).get(
+        splitter = splitter, 
+        x = x, 
+        y = y)
+    assert isinstance(reloaded[0][1], np.memmap)
+    assert all(
+        np.array_equal(a[1], b[1]) for a, b in zip(folds, reloaded))
+    assert not list(tmp_path.glob('*.tmp'))
+    return
+
+def test_split_registry_key():
+    x = pd.DataFrame({'a': range(20)})
+    registry = SplitRegistry()
+    def create(seed):
+        return sklearn.model_selection.KFold(
+            n_splits = 4, 
+            shuffle = True, 
+            random_state = seed)
+    assert (registry.key(splitter = create(3), x = x) 
+            == registry.key(splitter = create(3), x = x))
+    assert (registry.key(splitter = create(3), x = x) 
+            != registry.key(splitter = create(4), x = x))
+    first = create(np.random.RandomState(1))
+    second = create(np.random.RandomState(2))
+    assert (registry.key(splitter = first, x = x) 
+            != registry.key(splitter = second, x = x))
+    assert (registry.key(splitter = first, x = x) 
+            == registry.key(splitter = create(np.random.RandomState(1)), x = x))
+    return
+
+def test_transformer_cache():
+    cache = TransformerCache(max_entries = 2)
+    scaler = sklearn.preprocessing.StandardScaler
+    key = cache.key(
+        transformer = scaler, 
+        parameters = {'with_mean': True}, 
+        fold = 0, 
+        upstream = 'data')
+    assert key == cache.key(
+        transformer = scaler(), 
+        parameters = {'with_mean': True}, 
+        fold = 0, 
+        upstream = 'data')
+    assert key != cache.key(
+        transformer = scaler, 
+        parameters = {'with_mean': True}, 
+        fold = 1, 
+        upstream = 'data')
+    assert cache.get(key = key) is None
+    cache.add(key = key, value = 'fitted')
+    cache.add(key = 'second', value = 'second')
+    assert cache.get(key = key) == 'fitted'
+    cache.add(key = 'third', value = 'third')
+    assert cache.get(key = 'second') is None
+    assert list(cache.contents.keys()) == [key, 'third']
+    return
+
+def test_model_store(tmp_path):
+    generator = np.random.default_rng(0)
+    x = generator.normal(size = (500, 4))
+    y = (x[:, 0] > 0).astype(int)
+    neighbors = sklearn.neighbors.KNeighborsClassifier().fit(x, y)
+    store = ModelStore(folder = tmp_path, minimum = 1024)
+    store.save(name = 'neighbors', model = neighbors)
+    arrays = sorted(tmp_path.joinpath('arrays').glob('*.npy'))
+    store.save(name = 'copy', model = neighbors)
+    assert store.names() == ['copy', 'neighbors']
+    assert sorted(tmp_path.joinpath('arrays').glob('*.npy')) == arrays
+    loaded = ModelStore(folder = tmp_path, minimum = 1024).load('neighbors')
+    assert isinstance(loaded._fit_X, np.memmap)
+    assert (loaded.predict_proba(x) == neighbors.predict_proba(x)).all()
+    return
+
+def test_trial_store_models(tmp_path):
+    store = TrialStore.from_settings(
+        settings = {'general': {'trial_folder': tmp_path, 'max_models': 2}})
+    assert store.folder == tmp_path and store.max_models == 2
+    assert TrialStore.from_settings(settings = None) is trial_store
+    for i in range(4):
+        store.add_model(key = 'fold', model = {'model': i})
+    assert store.load_models(key = 'fold') == [{'model': 2}, {'model': 3}]
+    assert len(list(tmp_path.glob('fold_model_*.joblib'))) == 2
+    reloaded = TrialStore(folder = tmp_path, max_models = 2)
+    assert reloaded.load_models(key = 'fold') == [{'model': 2}, {'model': 3}]
+    memory = TrialStore(max_models = 3)
+    for i in range(5):
+        memory.add_model(key = 'fold', model = i)
+    assert memory.load_models(key = 'fold') == [2, 3, 4]
+    return
+
+if __name__ == '__main__':
+    import pathlib
+    import tempfile
+    test_split_registry(pathlib.Path(tempfile.mkdtemp()))
+    test_split_registry_key()
+    test_transformer_cache()
+    test_model_store(pathlib.Path(tempfile.mkdtemp()))
+    test_trial_store_models(pathlib.Path(tempfile.mkdtemp()))
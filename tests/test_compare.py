@@ -0,0 +1,106 @@
+"""
+.. module:: test compare
+:synopsis: tests scoring cleaves on shared matrices
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn.linear_model
+import sklearn.model_selection
+
+from simplify.analyst.compare import CleaveEvaluator, evaluate_cleaves
+from simplify.core.dataset import Dataset
+
+
+def create_data(shuffle_test: bool = False) -> Dataset:
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame(
+        generator.normal(size = (400, 5)),
+        columns = ['signal', 'noise', 'color_red', 'color_blue', 'other'])
+    df['label'] = (df['signal'] + 0.5 * df['color_red'] > 0).astype(int)
+    if shuffle_test:
+        df.loc[300:, 'label'] = generator.integers(0, 2, size = 100)
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(300), np.arange(300, 400)),)
+    data.split()
+    return data
+
+def create_evaluator() -> CleaveEvaluator:
+    return CleaveEvaluator(
+        estimator = sklearn.linear_model.LogisticRegression(),
+        cleaves = {
+            'signal': ['signal'], 
+            'noise': ['noise'], 
+            'color': ['color'],
+            'other': ['other']})
+
+def test_cleave_evaluator():
+    data = create_data()
+    evaluator = create_evaluator().prepare(data = data)
+    scores = evaluator.evaluate()
+    expected = sklearn.model_selection.cross_val_score(
+        sklearn.linear_model.LogisticRegression(),
+        data.x_train[['signal']],
+        data.y_train,
+        cv = 3).mean()
+    assert np.isclose(scores['signal'], expected)
+    assert scores['color'] > scores['noise']
+    shuffled = create_evaluator().prepare(data = create_data(True)).evaluate()
+    assert np.allclose(scores, shuffled)
+    selected, _ = evaluator.forward()
+    assert selected[:2] == ['signal', 'color']
+    return
+
+def test_cleave_columns():
+    evaluator = create_evaluator().prepare(data = create_data())
+    assert list(evaluator._get_columns(subset = ['color'])) == [2, 3]
+    assert list(evaluator._get_columns(subset = ['signal', 'color'])) == [
+        0, 2, 3]
+    missing = create_evaluator()
+    missing.cleaves['missing'] = ['size']
+    with pytest.raises(ValueError):
+        missing.prepare(data = create_data())
+    return
+
+def test_evaluate_cleaves():
+    data = create_data()
+    cleaves = create_evaluator().cleaves
+    expected = create_evaluator().prepare(data = data)
+    settings = {'general': {'parallelize': True, 
+                            'parallel_backend': 'thread',
+                            'cores': 2}}
+    scores = evaluate_cleaves(
+        data = data,
+        estimator = sklearn.linear_model.LogisticRegression(),
+        cleaves = cleaves,
+        settings = settings)
+    assert np.allclose(scores, expected.evaluate())
+    for search in ['forward', 'backward']:
+        selected, score = evaluate_cleaves(
+            data = data,
+            estimator = sklearn.linear_model.LogisticRegression(),
+            cleaves = cleaves,
+            search = search,
+            settings = settings)
+        assert (selected, score) == getattr(expected, search)()
+        assert 'signal' in selected and 'color' in selected
+    with pytest.raises(ValueError):
+        evaluate_cleaves(
+            data = data,
+            estimator = sklearn.linear_model.LogisticRegression(),
+            cleaves = cleaves,
+            search = 'sideways')
+    return
+
+
+if __name__ == '__main__':
+    test_cleave_evaluator()
+    test_cleave_columns()
+    test_evaluate_cleaves()
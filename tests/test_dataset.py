@@ -6,11 +6,14 @@
 :license: Apache-2.0
 """
 
-from pathlib import pathlib.Path
+import pathlib
 
+import numpy as np
 import pandas as pd
+import pytest
+from scipy import sparse
 
-from simplify.core.dataset import Dataset
+from simplify.core.dataset import ChunkedDataset, DataBunch, Dataset
 
 
 def test_dataset():
@@ -28,5 +31,152 @@ def test_dataset():
     return
 
 
+def test_iter_batches():
+    df = pd.DataFrame({'name': ['a', 'b', 'c', 'd', 'e'], 'age': range(5)})
+    data = Dataset.create(data = df)
+    batches = list(data.iter_batches(size = 2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    records = list(data.iter_batches(size = 3, columns = 'age', 
+                                     as_records = True))
+    assert records[1]['age'].tolist() == [3, 4]
+    assert [row.age for row in data] == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        list(data.iter_batches(size = 0))
+    return
+
+
+def test_snapshots():
+    df = pd.DataFrame({'name': ['a', 'b', 'c'], 'age': [1, 2, 3]})
+    data = Dataset.create(data = df)
+    raw = data.states.snapshot('raw')
+    data['age'] = data['age'] * 10
+    data.states.change('interim')
+    interim = data.states.snapshot()
+    assert interim.shared(raw) == ['name']
+    data.states.rollback()
+    assert data['age'].tolist() == [1, 2, 3]
+    assert data.states.current == 'raw'
+    return
+
+
+def test_state_changes():
+    df = pd.DataFrame({'name': ['a', 'b', 'c'], 'age': [1, 2, 3]})
+    data = Dataset.create(data = df)
+    raw = data.states.snapshot('raw')
+    data.states.change('interim')
+    data['age'] = data['age'] * 10
+    assert data.states.written == {'age'}
+    interim = data.states.snapshot()
+    assert interim.shared(raw) == ['name']
+    data['name'] = data['name'].str.upper()
+    data.states.change('raw')
+    assert data['age'].tolist() == [1, 2, 3]
+    assert data['name'].tolist() == ['a', 'b', 'c']
+    assert not data.states.dirty
+    data.states.change('interim')
+    assert data['age'].tolist() == [10, 20, 30]
+    assert data['name'].tolist() == ['A', 'B', 'C']
+    return
+
+
+def test_sparse_bunch():
+    x = sparse.random(10, 4, density = 0.2, format = 'coo')
+    bunch = DataBunch(name = 'full', x = x, columns = ['a', 'b', 'c', 'd'])
+    assert bunch.is_sparse
+    assert sparse.isspmatrix_csr(bunch.x)
+    bunch.x = bunch.x[:, :2]
+    bunch.columns = ['a', 'b']
+    assert bunch.dropped_columns == ['c', 'd']
+    return
+
+
+def test_bunch_selection():
+    x = pd.DataFrame({'a': range(3), 'b': range(3), 'c': range(3)})
+    bunch = DataBunch(name = 'full', x = x)
+    view = bunch.view(columns = [True, False, True])
+    assert view.x is bunch.x
+    assert view.feature_names == ['a', 'c']
+    assert bunch.feature_names == ['a', 'b', 'c']
+    view.select(columns = ['c']).materialize()
+    assert view.x.columns.tolist() == ['c']
+    assert view.selected is None
+    return
+
+
+def test_bunch_resample():
+    x = pd.DataFrame({'a': range(4), 'b': range(4)})
+    bunch = DataBunch(name = 'training', x = x, y = pd.Series([0, 0, 0, 1]))
+    bunch.resample(rows = [0, 1, 2, 3, 3, 3])
+    assert bunch.x.shape == (4, 2)
+    batches = list(bunch.iter_batches(size = 4))
+    assert [len(y) for _, y, _ in batches] == [4, 2]
+    bunch.materialize()
+    assert bunch.y.tolist() == [0, 0, 0, 1, 1, 1]
+    assert bunch.rows is None
+    return
+
+
+def test_sample_view():
+    df = pd.DataFrame({
+        'value': range(1000), 
+        'label': [i % 10 == 0 for i in range(1000)]})
+    data = Dataset.create(data = df)
+    data.batch_size = 64
+    sample = data.sample_view(n = 100, stratify = 'label', seed = 3)
+    assert len(sample) == 100
+    assert sample['label'].sum() == 10
+    assert sample['value'].is_monotonic_increasing
+    assert len(data.sample_view(n = 5000)) == 1000
+    df['group'] = [np.nan if i % 4 == 0 else 'a' for i in range(1000)]
+    data = Dataset.create(data = df)
+    data.batch_size = 64
+    sample = data.sample_view(n = 100, stratify = 'group', seed = 3)
+    assert len(sample) == 100
+    assert sample['group'].isna().sum() == 25
+    return
+
+
+def test_split():
+    df = pd.DataFrame({'value': range(10), 'label': [0, 1] * 5})
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(8), np.arange(8, 10)),)
+    data.split()
+    assert data.x_train['value'].tolist() == list(range(8))
+    assert data.y_test.tolist() == [0, 1]
+    assert data.fold == 0
+    return
+
+def test_chunked_training(tmp_path):
+    path = tmp_path.joinpath('data.csv')
+    pd.DataFrame({'value': range(25), 'label': [0, 1] * 12 + [0]}).to_csv(
+        path, 
+        index = False)
+    data = ChunkedDataset(source = path, batch_size = 10)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(7), np.arange(7, 10)),)
+    data.split()
+    values = pd.concat(
+        [x['value'] for x, _ in data.iter_xy(size = 4, training = True)])
+    assert values.tolist() == list(range(7)) + list(range(10, 25))
+    labels = pd.concat(
+        [y for _, y in data.iter_xy(size = 4, training = True)])
+    assert labels.index.equals(values.index)
+    assert sum(len(x) for x, _ in data.iter_xy(size = 4)) == 25
+    with pytest.raises(ValueError):
+        list(data.iter_batches(size = 0))
+    return
+
+
 if __name__ == '__main__':
-    test_dataset()
\ No newline at end of file
+    test_dataset()
+    test_iter_batches()
+    test_snapshots()
+    test_state_changes()
+    test_sparse_bunch()
+    test_bunch_selection()
+    test_bunch_resample()
+    test_sample_view()
+    test_split()
+    import tempfile
+    test_chunked_training(pathlib.Path(tempfile.mkdtemp()))
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+.. module:: test encode
+:synopsis: tests sparse and grouped category encoding
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import pickle
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from simplify.analyst.encode import CategoryEncoder
+from simplify.core.caches import transformer_cache
+from simplify.core.dataset import Dataset
+
+
+def create_project(df: pd.DataFrame, 
+        categoricals: list = None, 
+        settings: dict = None) -> types.SimpleNamespace:
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(150), np.arange(150, 200)),)
+    data.split()
+    data.categoricals = categoricals or ['level']
+    transformer_cache.clear()
+    return types.SimpleNamespace(data = data, settings = settings or {})
+
+def test_sparse_encoder():
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'level': generator.integers(0, 50, size = 200).astype(str),
+        'value': generator.normal(size = 200),
+        'label': generator.integers(0, 2, size = 200)})
+    project = create_project(df = df)
+    CategoryEncoder(
+        name = 'one_hot',
+        sparse_threshold = 10).implement(project)
+    train = project.data.x_train
+    assert sparse.issparse(train)
+    assert train.shape[1] == df['level'][:150].nunique() + 1
+    assert project.data.train.feature_names[-1] == 'value'
+    assert np.allclose(train[:, -1].toarray().ravel(), df['value'][:150])
+    project = create_project(df = df)
+    CategoryEncoder(
+        name = 'hashing',
+        sparse_threshold = 10,
+        n_components = 32).implement(project)
+    assert project.data.x_train.shape[1] == 33
+    df['note'] = 'text'
+    with pytest.raises(TypeError):
+        CategoryEncoder(
+            name = 'one_hot',
+            sparse_threshold = 10).implement(create_project(df = df))
+    return
+
+def test_group_encoder():
+    generator = np.random.default_rng(0)
+    levels = [f'level_{i}' for i in range(5)]
+    df = pd.DataFrame({
+        column: generator.integers(0, 20, size = 200).astype(str) 
+        for column in levels})
+    df['value'] = generator.normal(size = 200)
+    df['label'] = generator.integers(0, 2, size = 200)
+    whole = create_project(df = df, categoricals = levels)
+    CategoryEncoder(
+        name = 'one_hot',
+        sparse_threshold = 10).implement(whole)
+    grouped = create_project(
+        df = df, 
+        categoricals = levels,
+        settings = {'general': {
+            'parallelize': True, 
+            'parallel_backend': 'thread'}})
+    encoder = CategoryEncoder(
+        name = 'one_hot',
+        sparse_threshold = 10,
+        group_size = 2)
+    encoder.implement(grouped)
+    assert len(encoder.contents) == 3
+    assert sparse.issparse(grouped.data.x_train)
+    assert (grouped.data.x_train != whole.data.x_train).nnz == 0
+    assert (grouped.data.x_test != whole.data.x_test).nnz == 0
+    assert grouped.data.train.feature_names == whole.data.train.feature_names
+    assert not hasattr(encoder, '_parallelizer')
+    pickle.loads(pickle.dumps(encoder))
+    hashed = create_project(df = df, categoricals = levels)
+    CategoryEncoder(
+        name = 'hashing',
+        sparse_threshold = 10,
+        n_components = 16,
+        group_size = 2).implement(hashed)
+    assert hashed.data.x_train.shape[1] == 3 * 16 + 1
+    df['note'] = 'text'
+    with pytest.raises(TypeError):
+        CategoryEncoder(
+            name = 'one_hot',
+            sparse_threshold = 10,
+            group_size = 2).implement(
+                create_project(df = df, categoricals = levels))
+    return
+
+
+if __name__ == '__main__':
+    test_sparse_encoder()
+    test_group_encoder()
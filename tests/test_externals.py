@@ -0,0 +1,67 @@
+"""
+.. module:: test externals
+:synopsis: tests wrappers for external transformers
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.preprocessing
+
+from simplify.core.caches import transformer_cache
+from simplify.core.dataset import Dataset
+from simplify.core.externals import SklearnTransformer
+
+
+def create_project(settings: dict = None) -> types.SimpleNamespace:
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'a': generator.normal(size = 100),
+        'b': generator.normal(size = 100),
+        'label': generator.integers(0, 2, size = 100)})
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(80), np.arange(80, 100)),)
+    data.split()
+    return types.SimpleNamespace(data = data, settings = settings or {})
+
+def test_transformer_cache_copies():
+    transformer_cache.clear()
+    first = create_project()
+    SklearnTransformer(
+        name = 'scaler',
+        contents = sklearn.preprocessing.StandardScaler).implement(first)
+    expected = first.data.x_train.copy()
+    first.data.x_train.iloc[:, :] = 0.0
+    second = create_project()
+    SklearnTransformer(
+        name = 'scaler',
+        contents = sklearn.preprocessing.StandardScaler).implement(second)
+    assert len(transformer_cache.contents) == 1
+    assert np.allclose(second.data.x_train, expected)
+    second.data.x_train.iloc[:, :] = 1.0
+    third = create_project()
+    SklearnTransformer(
+        name = 'scaler',
+        contents = sklearn.preprocessing.StandardScaler).implement(third)
+    assert np.allclose(third.data.x_train, expected)
+    return
+
+def test_transformer_cache_conserving():
+    transformer_cache.clear()
+    project = create_project(settings = {'general': {'conserve_memory': True}})
+    SklearnTransformer(
+        name = 'scaler',
+        contents = sklearn.preprocessing.StandardScaler).implement(project)
+    assert len(transformer_cache.contents) == 0
+    assert np.allclose(project.data.x_train.mean(), 0.0)
+    return
+
+
+if __name__ == '__main__':
+    test_transformer_cache_copies()
+    test_transformer_cache_conserving()
@@ -0,0 +1,65 @@
+"""
+.. module:: test fill
+:synopsis: tests approximate nearest neighbors imputation
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn.impute
+
+from simplify.analyst.fill import ApproximateKNNImputer
+from simplify.core.parallel import Parallelizer
+
+
+def create_data(rows: int = 2000) -> tuple:
+    generator = np.random.default_rng(0)
+    factors = generator.normal(size = (rows, 3))
+    full = factors @ generator.normal(size = (3, 6))
+    full += 0.1 * generator.normal(size = full.shape)
+    missing = generator.random(full.shape) < 0.05
+    x = full.copy()
+    x[missing] = np.nan
+    return pd.DataFrame(x), full, missing
+
+def test_approximate_knn_imputer():
+    x, full, missing = create_data()
+    expected = sklearn.impute.KNNImputer(n_neighbors = 5).fit_transform(x)
+    imputer = ApproximateKNNImputer(n_neighbors = 5).fit(x)
+    filled = imputer.transform(x)
+    assert isinstance(filled, pd.DataFrame)
+    assert not filled.isna().any().any()
+    assert np.allclose(filled.to_numpy()[~missing], full[~missing])
+    # Only complete rows are neighbors, so values differ from KNNImputer, but
+    # the filled values should be at least as accurate.
+    error = np.sqrt(((filled.to_numpy() - full)[missing] ** 2).mean())
+    reference = np.sqrt(((expected - full)[missing] ** 2).mean())
+    assert error < 1.1 * reference
+    threaded = ApproximateKNNImputer(
+        n_neighbors = 5,
+        batch_size = 50,
+        parallelizer = Parallelizer(backend = 'thread', cores = 2)).fit(x)
+    assert np.allclose(threaded.transform(x.to_numpy()), filled)
+    return
+
+def test_approximate_knn_imputer_trees():
+    x, _, _ = create_data()
+    imputer = ApproximateKNNImputer(max_patterns = 2, sample_size = 10).fit(x)
+    trees = dict(imputer.trees_)
+    assert trees
+    assert sum(key[1] for key in trees) == len(trees) - 2
+    other = x.copy()
+    other.iloc[:5, [0, 1, 2]] = np.nan
+    imputer.transform(other)
+    assert imputer.trees_ == trees
+    with pytest.raises(ValueError):
+        ApproximateKNNImputer(n_neighbors = 5, sample_size = 3).fit(x)
+    return
+
+
+if __name__ == '__main__':
+    test_approximate_knn_imputer()
+    test_approximate_knn_imputer_trees()
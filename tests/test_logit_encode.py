@@ -0,0 +1,45 @@
+"""
+.. module:: test logit encode
+:synopsis: tests vectorized and out-of-fold logit encoding
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import numpy as np
+import pandas as pd
+
+from simplify.analyst.logit_encode import LogitEncoder
+
+
+def test_logit_encoder():
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame({'level': generator.choice(list('abcde'), size = 2000)})
+    rate = np.where(x['level'] == 'a', 0.8, 0.3)
+    y = pd.Series(generator.random(2000) < rate)
+    encoder = LogitEncoder(threshold = 0, smoothing = 0, folds = 0)
+    encoded = encoder.fit_transform(x, y)
+    prior = y.mean()
+    rate = y.groupby(x['level']).mean()
+    expected = (np.log(rate / (1 - rate)) - np.log(prior / (1 - prior)))
+    assert np.allclose(
+        encoded['coef_level'], 
+        x['level'].map(expected).to_numpy())
+    unseen = encoder.transform(pd.DataFrame({'level': ['z', 'a']}))
+    assert unseen['coef_level'].iloc[0] == encoder.encodings_['level'][-1]
+    return
+
+def test_out_of_fold():
+    x = pd.DataFrame({'level': ['a'] * 10 + ['b'] * 10})
+    y = pd.Series([1] * 10 + [0] * 10)
+    encoder = LogitEncoder(threshold = 0, folds = 2, seed = 0)
+    out_of_fold = encoder.fit_transform(x, y)['coef_level']
+    in_fold = encoder.transform(x)['coef_level']
+    assert not np.allclose(in_fold, out_of_fold)
+    assert (out_of_fold[:10] > 0).all() and (out_of_fold[10:] < 0).all()
+    return
+
+
+if __name__ == '__main__':
+    test_logit_encoder()
+    test_out_of_fold()
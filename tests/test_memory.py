@@ -0,0 +1,84 @@
+"""
+.. module:: test memory
+:synopsis: tests memory conservation utilities
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from simplify.core.dataset import Dataset
+from simplify.utilities import memory
+
+
+def test_is_conserving():
+    settings = {'general': {'conserve_memory': True}}
+    assert memory.is_conserving(settings)
+    assert not memory.is_conserving({'general': {}})
+    assert not memory.is_conserving(None)
+    project = types.SimpleNamespace(settings = settings)
+    assert memory.is_conserving(project)
+    df = pd.DataFrame({'a': [1, 2, 3]})
+    assert memory.is_conserving(Dataset.create(data = df, settings = settings))
+    assert not memory.is_conserving(Dataset.create(data = df))
+    return
+
+def test_shrink():
+    df = pd.DataFrame({
+        'small': [1, 2, 3],
+        'large': [1, 2, 2 ** 40],
+        'negative': [-1, 0, 1],
+        'float': [0.5, 1.5, 2.5],
+        'flag': [True, False, True],
+        'name': ['a', 'b', 'c']})
+    shrunk = memory.shrink(df.copy())
+    assert shrunk.dtypes.to_dict() == {
+        'small': np.dtype('int8'),
+        'large': np.dtype('int64'),
+        'negative': np.dtype('int8'),
+        'float': np.dtype('float32'),
+        'flag': np.dtype('bool'),
+        'name': df['name'].dtype}
+    assert np.allclose(shrunk['float'], df['float'])
+    assert shrunk['large'].tolist() == df['large'].tolist()
+    settings = {'general': {'conserve_memory': True}}
+    data = Dataset.create(data = df.copy(), settings = settings)
+    assert data['small'].dtype == np.int8
+    return
+
+def test_to_float32():
+    df = pd.DataFrame({'a': [0.5, 1.5], 'b': [1, 2]})
+    converted = memory.to_float32(df)
+    assert converted['a'].dtype == np.float32
+    assert converted['b'].dtype == np.int64
+    assert df['a'].dtype == np.float64
+    assert memory.to_float32(np.ones((2, 2))).dtype == np.float32
+    integers = np.ones((2, 2), dtype = np.int64)
+    assert memory.to_float32(integers) is integers
+    matrix = memory.to_float32(sparse.csr_matrix(np.eye(3)))
+    assert sparse.isspmatrix_csr(matrix)
+    assert matrix.dtype == np.float32
+    return
+
+def test_release():
+    item = types.SimpleNamespace(x = np.ones(3), y = np.ones(3), name = 'a')
+    assert memory.release(item, ['x', 'y', 'missing']) is item
+    assert item.x is None and item.y is None
+    assert item.name == 'a'
+    memory.release(item, 'name')
+    assert item.name is None
+    assert not hasattr(item, 'missing')
+    assert isinstance(memory.collect(), int)
+    return
+
+
+if __name__ == '__main__':
+    test_is_conserving()
+    test_shrink()
+    test_to_float32()
+    test_release()
@@ -0,0 +1,88 @@
+"""
+.. module:: test mix
+:synopsis: tests screened pairwise interactions
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.preprocessing
+from scipy import sparse
+
+from simplify.analyst.mix import InteractionMix, InteractionMixer
+from simplify.core.caches import transformer_cache
+from simplify.core.dataset import Dataset
+
+
+def create_data(rows: int = 500) -> tuple:
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame(
+        generator.normal(size = (rows, 6)),
+        columns = ['a', 'b', 'c', 'd', 'e', 'f'])
+    y = x['a'] * x['d'] + 0.1 * generator.normal(size = rows)
+    return x, y
+
+def test_interaction_mixer():
+    x, y = create_data()
+    mixer = InteractionMixer(screen = None, block_size = 4).fit(x)
+    expected = sklearn.preprocessing.PolynomialFeatures(
+        interaction_only = True,
+        include_bias = False).fit(x)
+    assert len(mixer.pairs_) == 15
+    assert np.allclose(mixer.transform(x), expected.transform(x))
+    assert list(mixer.get_feature_names_out()) == [
+        name.replace(' ', '*') for name in expected.get_feature_names_out()]
+    squares = InteractionMixer(
+        screen = None,
+        interaction_only = False,
+        include_original = False).fit(x)
+    assert squares.transform(x).shape == (500, 21)
+    limited = InteractionMixer(screen = None, max_interactions = 5).fit(x)
+    assert len(limited.pairs_) == 5
+    return
+
+def test_interaction_mixer_screen():
+    x, y = create_data()
+    mixer = InteractionMixer(max_interactions = 3, block_size = 4).fit(x, y)
+    assert mixer.pairs_.shape == (3, 2)
+    assert tuple(mixer.pairs_[0]) == (0, 3)
+    assert mixer.get_feature_names_out()[6] == 'a*d'
+    assert np.allclose(mixer.transform(x)[:, 6], x['a'] * x['d'])
+    blocked = InteractionMixer(
+        max_interactions = 3, 
+        block_size = 256).fit(x, y)
+    assert np.array_equal(blocked.pairs_, mixer.pairs_)
+    threshold = InteractionMixer(threshold = 0.5).fit(x, y)
+    assert [tuple(pair) for pair in threshold.pairs_] == [(0, 3)]
+    matrix = sparse.csr_matrix(x.where(x.abs() > 0.5, 0.0).to_numpy())
+    dense = InteractionMixer(max_interactions = 4).fit(matrix.toarray(), y)
+    mixed = InteractionMixer(max_interactions = 4).fit(matrix, y)
+    assert np.array_equal(mixed.pairs_, dense.pairs_)
+    output = mixed.transform(matrix)
+    assert sparse.isspmatrix_csr(output)
+    assert np.allclose(output.toarray(), dense.transform(matrix.toarray()))
+    return
+
+def test_interaction_mix():
+    x, y = create_data()
+    df = x.assign(label = y)
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(400), np.arange(400, 500)),)
+    data.split()
+    transformer_cache.clear()
+    project = types.SimpleNamespace(data = data, settings = {})
+    InteractionMix(parameters = {'max_interactions': 2}).implement(project)
+    assert project.data.x_train.shape == (400, 8)
+    assert list(project.data.x_test.columns)[6] == 'a*d'
+    return
+
+
+if __name__ == '__main__':
+    test_interaction_mixer()
+    test_interaction_mixer_screen()
+    test_interaction_mix()
@@ -0,0 +1,138 @@
+"""
+.. module:: test model
+:synopsis: tests xgboost models and searching with fit_candidates
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import dataclasses
+import gc
+import tempfile
+import types
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn.linear_model
+
+from simplify.analyst.model import XGBoostModel
+from simplify.analyst.search import FoldSearch, SuccessiveHalving
+from simplify.core.caches import matrix_cache
+from simplify.core.dataset import ChunkedDataset, Dataset
+
+
+@dataclasses.dataclass
+class CandidateModel(object):
+    """Model technique which records its calls to 'fit_candidates'."""
+    parameters: Dict[str, Any] = dataclasses.field(default_factory = dict)
+
+    def __post_init__(self) -> None:
+        self.calls = []
+        return self
+
+    def fit_candidates(self,
+            data: Dataset,
+            candidates: Sequence[Mapping[str, Any]],
+            settings: Optional[Mapping[str, Any]] = None) -> List[Any]:
+        self.calls.append((data.fold, len(candidates)))
+        return [
+            sklearn.linear_model.Ridge(**c).fit(data.x_train, data.y_train)
+            for c in candidates]
+
+
+def create_df(rows: int = 300) -> pd.DataFrame:
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame(
+        generator.normal(size = (rows, 4)),
+        columns = ['a', 'b', 'c', 'd'])
+    df['label'] = df['a'] - df['b'] + generator.normal(size = rows)
+    return df
+
+def create_project() -> types.SimpleNamespace:
+    data = Dataset.create(data = create_df())
+    data.create_xy(label = 'label')
+    positions = np.arange(300)
+    data.splits = tuple(
+        (np.setdiff1d(positions, test), test)
+        for test in np.array_split(positions, 3))
+    data.split()
+    matrix_cache.clear()
+    return types.SimpleNamespace(data = data, settings = {})
+
+def test_fit_candidates_search():
+    project = create_project()
+    model = CandidateModel(parameters = {'alpha': 1.0, 'fit_intercept': False})
+    search = FoldSearch(
+        contents = SuccessiveHalving,
+        estimator = model,
+        space = {'alpha': [0.01, 1.0, 1000.0]},
+        parameters = {'resource': 'folds', 'candidates': 3})
+    search.implement(project)
+    assert model.calls == [(0, 3), (1, 1), (2, 1)]
+    assert search.contents.best_params['alpha'] != 1000.0
+    assert model.parameters['alpha'] == search.contents.best_params['alpha']
+    assert model.parameters['fit_intercept'] is False
+    with pytest.raises(ValueError):
+        FoldSearch(
+            contents = SuccessiveHalving,
+            estimator = CandidateModel(),
+            space = {'alpha': [0.01, 1.0, 1000.0]},
+            parameters = {'resource': 'rows', 'candidates': 3}).implement(
+                project)
+    return
+
+def test_xgboost_search():
+    pytest.importorskip('xgboost')
+    project = create_project()
+    model = XGBoostModel(
+        contents = 'XGBRegressor',
+        parameters = {'n_estimators': 20, 'random_state': 0})
+    search = FoldSearch(
+        contents = SuccessiveHalving,
+        estimator = model,
+        space = {'max_depth': [2, 3, 4], 'learning_rate': [0.1, 0.3]},
+        parameters = {
+            'resource': 'n_estimators',
+            'min_resource': 5,
+            'candidates': 3,
+            'seed': 0})
+    misses = matrix_cache.misses
+    search.implement(project)
+    assert matrix_cache.misses - misses == 3
+    assert model.parameters['max_depth'] in [2, 3, 4]
+    assert search.contents.best_score > 0.3
+    return
+
+def test_external_memory_folder(tmp_path):
+    pytest.importorskip('xgboost')
+    path = tmp_path.joinpath('data.csv')
+    create_df().to_csv(path, index = False)
+    data = ChunkedDataset(source = path, batch_size = 100)
+    data.create_xy(label = 'label')
+    folder = tmp_path.joinpath('temp')
+    folder.mkdir()
+    previous = tempfile.tempdir
+    tempfile.tempdir = str(folder)
+    try:
+        matrix_cache.clear()
+        model = XGBoostModel(
+            contents = 'XGBRegressor',
+            quantile = False,
+            external_memory = True)
+        model.fit_candidates(data = data, candidates = [{'n_estimators': 5}])
+        assert len(list(folder.iterdir())) == 1
+        matrix_cache.clear()
+        gc.collect()
+        assert not list(folder.iterdir())
+    finally:
+        tempfile.tempdir = previous
+    return
+
+
+if __name__ == '__main__':
+    import pathlib
+    test_fit_candidates_search()
+    test_xgboost_search()
+    test_external_memory_folder(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,36 @@
+"""
+.. module:: test parallel
+:synopsis: tests settings-driven parallel execution
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import pytest
+
+from simplify.core.parallel import Parallelizer
+
+
+def add(shared, value):
+    return shared + value
+
+def test_parallelizer():
+    serial = Parallelizer(settings = {'general': {'parallelize': False}})
+    assert serial.backend == 'serial'
+    assert serial.workers(tasks = 8) == 1
+    threads = Parallelizer(
+        settings = {'general': {'parallelize': True, 
+                                'parallel_backend': 'thread',
+                                'cores': 2}})
+    assert threads.workers(tasks = 8) == 2
+    assert threads.threads_per_task(tasks = 8) == 1
+    for parallelizer in [serial, threads]:
+        assert parallelizer.map(add, range(5), shared = 10) == [
+            10, 11, 12, 13, 14]
+    with pytest.raises(ValueError):
+        Parallelizer(backend = 'cluster')
+    return
+
+
+if __name__ == '__main__':
+    test_parallelizer()
@@ -0,0 +1,98 @@
+"""
+.. module:: test predictor
+:synopsis: tests compiled scoring of fitted paths
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.impute
+import sklearn.linear_model
+import sklearn.preprocessing
+
+from simplify.analyst.reduce import UnivariateReduce
+from simplify.core.caches import transformer_cache
+from simplify.core.dataset import Dataset
+from simplify.core.externals import SklearnModel, SklearnTransformer
+from simplify.core.predictor import Predictor
+
+
+def create_df(rows: int = 300) -> pd.DataFrame:
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame(
+        generator.normal(5, 2, size = (rows, 5)),
+        columns = ['a', 'b', 'c', 'd', 'e'])
+    df['label'] = (df['a'] - df['c'] > 0).astype(int)
+    df = df.mask(generator.random(df.shape) < 0.05)
+    df['label'] = df['label'].fillna(0).astype(int)
+    return df
+
+def fit_path(df: pd.DataFrame, imputer: object) -> list:
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    transformer_cache.clear()
+    project = types.SimpleNamespace(data = data, settings = {})
+    techniques = [
+        SklearnTransformer(name = 'fill', contents = imputer),
+        SklearnTransformer(
+            name = 'scale',
+            contents = sklearn.preprocessing.StandardScaler),
+        UnivariateReduce(parameters = {'k': 3}),
+        SklearnModel(
+            name = 'model',
+            contents = sklearn.linear_model.LogisticRegression)]
+    for technique in techniques:
+        project = technique.implement(project)
+    return techniques
+
+def test_predictor(tmp_path):
+    df = create_df()
+    techniques = fit_path(df = df, imputer = sklearn.impute.SimpleImputer)
+    example = df.drop(columns = 'label').iloc[:50]
+    predictor = Predictor.from_techniques(
+        techniques = techniques,
+        example = example)
+    assert [type(o).__name__ for o in predictor.operations] == [
+        '_Fill', '_Affine', '_Select']
+    assert type(predictor.model).__name__ == '_Linear'
+    rows = df.drop(columns = 'label').iloc[100:]
+    x = rows
+    for technique in techniques[:-1]:
+        x = technique.transform_batch(x = x)
+    expected = techniques[-1].contents.predict_proba(x)
+    assert np.allclose(predictor.predict_proba(rows), expected)
+    assert np.array_equal(
+        predictor.predict(rows.to_dict('records')),
+        techniques[-1].contents.predict(x))
+    path = tmp_path.joinpath('predictor.joblib')
+    predictor.save(path)
+    loaded = Predictor.load(path)
+    assert np.allclose(loaded.predict_proba(rows), expected)
+    assert np.allclose(
+        loaded(rows.iloc[0].to_dict()), 
+        predictor(rows.iloc[:1]))
+    return
+
+def test_predictor_missing_values():
+    df = create_df()
+    features = df.drop(columns = 'label')
+    techniques = fit_path(
+        df = df,
+        imputer = lambda: sklearn.impute.SimpleImputer(missing_values = pd.NA))
+    predictor = Predictor.from_techniques(
+        techniques = techniques,
+        example = features.iloc[:50])
+    assert type(predictor.operations[0]).__name__ == '_Frame'
+    assert predictor.predict(features.iloc[100:]).shape == (200,)
+    return
+
+
+if __name__ == '__main__':
+    import pathlib
+    import tempfile
+    test_predictor(pathlib.Path(tempfile.mkdtemp()))
+    test_predictor_missing_values()
@@ -0,0 +1,148 @@
+"""
+.. module:: test reduce
+:synopsis: tests feature selection without intermediate copies
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.datasets
+import sklearn.feature_selection
+import sklearn.linear_model
+from scipy import sparse
+
+from simplify.analyst.reduce import (CrossValidatedReduce, RecursiveReduce,
+                                     UnivariateReduce, 
+                                     _permutation_importance)
+from simplify.core.caches import score_cache, transformer_cache
+from simplify.core.dataset import Dataset
+from simplify.core.parallel import Parallelizer
+
+
+def create_df() -> pd.DataFrame:
+    x, y = sklearn.datasets.make_classification(
+        n_samples = 600,
+        n_features = 20,
+        n_informative = 5,
+        random_state = 0)
+    df = pd.DataFrame(x, columns = [f'c{i}' for i in range(20)])
+    df['label'] = y
+    return df
+
+def create_project(df: pd.DataFrame) -> types.SimpleNamespace:
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(480), np.arange(480, 600)),)
+    data.split()
+    return types.SimpleNamespace(data = data, settings = {})
+
+def test_univariate_reduce():
+    df = create_df()
+    transformer_cache.clear()
+    score_cache.clear()
+    features = df.drop(columns = 'label')
+    for k in [4, 8]:
+        project = create_project(df = df)
+        UnivariateReduce(parameters = {'k': k}).implement(project)
+        assert project.data.test.selected is not None
+        expected = sklearn.feature_selection.SelectKBest(
+            sklearn.feature_selection.f_classif,
+            k = k).fit(features.iloc[:480], df['label'].iloc[:480])
+        names = list(expected.get_feature_names_out())
+        assert list(project.data.x_train.columns) == names
+        assert list(project.data.x_test.columns) == names
+        assert project.data.test.selected is None
+    project = create_project(df = df)
+    UnivariateReduce(parameters = {'k': 8}).implement(project)
+    assert list(project.data.x_test.columns) == names
+    return
+
+def test_recursive_reduce():
+    df = create_df()
+    transformer_cache.clear()
+    features = df.drop(columns = 'label')
+    project = create_project(df = df)
+    reducer = RecursiveReduce(
+        estimator = sklearn.linear_model.LogisticRegression(max_iter = 500),
+        parameters = {'n_features_to_select': 6, 'step': 3})
+    reducer.implement(project)
+    expected = sklearn.feature_selection.RFE(
+        sklearn.linear_model.LogisticRegression(max_iter = 500),
+        n_features_to_select = 6,
+        step = 3).fit(features.iloc[:480], df['label'].iloc[:480])
+    assert np.array_equal(reducer.contents.ranking, expected.ranking_)
+    assert list(project.data.x_test.columns) == list(
+        expected.get_feature_names_out())
+    project = create_project(df = df)
+    RecursiveReduce(
+        estimator = sklearn.linear_model.LogisticRegression(max_iter = 500),
+        importance = 'permutation',
+        seed = 0,
+        parameters = {'n_features_to_select': 6, 'step': 3},
+        parallelizer = Parallelizer(backend = 'thread', cores = 2)).implement(
+            project)
+    assert project.data.x_train.shape == (480, 6)
+    return
+
+def test_cross_validated_reduce():
+    df = create_df()
+    transformer_cache.clear()
+    features = df.drop(columns = 'label')
+    expected = sklearn.feature_selection.RFECV(
+        sklearn.linear_model.LogisticRegression(max_iter = 500),
+        step = 3,
+        min_features_to_select = 2,
+        cv = 4).fit(features.iloc[:480], df['label'].iloc[:480])
+    for parallelizer in [None, Parallelizer(backend = 'thread', cores = 2)]:
+        project = create_project(df = df)
+        reducer = CrossValidatedReduce(
+            estimator = sklearn.linear_model.LogisticRegression(
+                max_iter = 500),
+            cv = 4,
+            parameters = {'min_features_to_select': 2, 'step': 3},
+            parallelizer = parallelizer)
+        reducer.implement(project)
+        scores = reducer.contents.scores
+        assert sorted(scores) == list(expected.cv_results_['n_features'])
+        assert np.allclose(
+            [scores[c] for c in sorted(scores)],
+            expected.cv_results_['mean_test_score'])
+        assert project.data.x_train.shape == (480, expected.n_features_)
+        assert list(project.data.x_test.columns) == list(
+            expected.get_feature_names_out())
+    return
+
+def test_permutation_importance():
+    df = create_df()
+    x = np.array(df.drop(columns = 'label'))
+    x[np.abs(x) < 1.0] = 0.0
+    y = df['label'].to_numpy()
+    estimator = sklearn.linear_model.LogisticRegression(max_iter = 500)
+    estimator.fit(x, y)
+    columns = np.arange(20)
+    original = x.copy()
+    dense = _permutation_importance(
+        (estimator, x, y, None, 3, 0, True),
+        columns)
+    assert np.array_equal(x, original)
+    matrix = sparse.csr_matrix(x)
+    data = matrix.data.copy()
+    assert np.allclose(
+        _permutation_importance(
+            (estimator, matrix, y, None, 3, 0, False),
+            columns),
+        dense)
+    assert np.array_equal(matrix.data, data)
+    assert np.argmax(dense) in np.argsort(np.abs(estimator.coef_[0]))[-5:]
+    return
+
+
+if __name__ == '__main__':
+    test_univariate_reduce()
+    test_recursive_reduce()
+    test_cross_validated_reduce()
+    test_permutation_importance()
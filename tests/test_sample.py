@@ -0,0 +1,122 @@
+"""
+.. module:: test sample
+:synopsis: tests resampling and weighting of the training data
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.datasets
+import sklearn.feature_selection
+import sklearn.linear_model
+
+from simplify.analyst.reduce import RecursiveReduce
+from simplify.analyst.sample import (ChunkedSMOTE, RandomOverSample, 
+                                     RandomUnderSample, WeightSample)
+from simplify.core.caches import transformer_cache
+from simplify.core.dataset import Dataset
+
+
+def create_project() -> types.SimpleNamespace:
+    x, y = sklearn.datasets.make_classification(
+        n_samples = 500,
+        n_features = 12,
+        n_informative = 4,
+        weights = [0.8, 0.2],
+        random_state = 0)
+    df = pd.DataFrame(x, columns = [f'c{i}' for i in range(12)])
+    df['label'] = y
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    data.splits = ((np.arange(400), np.arange(400, 500)),)
+    data.split()
+    transformer_cache.clear()
+    return types.SimpleNamespace(data = data, settings = {})
+
+def create_reducer() -> RecursiveReduce:
+    return RecursiveReduce(
+        estimator = sklearn.linear_model.LogisticRegression(max_iter = 500),
+        parameters = {'n_features_to_select': 4, 'step': 2})
+
+def create_rfe() -> sklearn.feature_selection.RFE:
+    return sklearn.feature_selection.RFE(
+        sklearn.linear_model.LogisticRegression(max_iter = 500),
+        n_features_to_select = 4,
+        step = 2)
+
+def test_index_sample():
+    project = create_project()
+    x_train = project.data.x_train.copy()
+    y_train = project.data.y_train.copy()
+    RandomUnderSample(
+        parameters = {'random_state': 0}).implement(project)
+    counts = np.unique(project.data.y_train, return_counts = True)[1]
+    assert counts[0] == counts[1]
+    assert len(project.data.x_train) == counts.sum()
+    assert len(project.data.x_test) == 100
+    project = create_project()
+    RandomOverSample(
+        parameters = {'random_state': 0}).implement(project)
+    rows = project.data.train.rows
+    reducer = create_reducer()
+    reducer.implement(project)
+    expected = create_rfe().fit(x_train.iloc[rows], y_train.iloc[rows])
+    assert np.array_equal(reducer.contents.ranking, expected.ranking_)
+    assert len(project.data.x_train) == len(rows)
+    assert (project.data.x_train.columns
+            == expected.get_feature_names_out()).all()
+    return
+
+def test_weight_sample():
+    project = create_project()
+    x_train = project.data.x_train.copy()
+    y_train = project.data.y_train.copy()
+    WeightSample().implement(project)
+    weights = project.data.train.weights
+    assert np.isclose(
+        weights[y_train.to_numpy() == 0].sum(),
+        weights[y_train.to_numpy() == 1].sum())
+    reducer = create_reducer()
+    reducer.implement(project)
+    expected = create_rfe().fit(x_train, y_train, sample_weight = weights)
+    unweighted = create_rfe().fit(x_train, y_train)
+    assert np.array_equal(reducer.contents.ranking, expected.ranking_)
+    assert not np.array_equal(expected.ranking_, unweighted.ranking_)
+    assert len(project.data.x_train) == 400
+    return
+
+def test_chunked_smote():
+    project = create_project()
+    x_train = project.data.x_train.copy()
+    ChunkedSMOTE(
+        parameters = {'random_state': 0}, 
+        batch_size = 50).implement(project)
+    y = project.data.y_train.to_numpy()
+    counts = np.unique(y, return_counts = True)[1]
+    assert counts[0] == counts[1]
+    assert len(project.data.x_train) == len(y) == counts.sum()
+    assert project.data.train.weights is None
+    assert np.allclose(project.data.x_train.iloc[:400], x_train)
+    project = create_project()
+    WeightSample().implement(project)
+    original = project.data.train.weights.copy()
+    ChunkedSMOTE(parameters = {'random_state': 0}).implement(project)
+    weights = project.data.train.weights
+    y = project.data.y_train.to_numpy()
+    assert len(weights) == len(y) == len(project.data.x_train)
+    assert np.array_equal(weights[:400], original)
+    for label in [0, 1]:
+        assert np.allclose(
+            weights[400:][y[400:] == label], 
+            original[y[:400] == label][0])
+    return
+
+
+if __name__ == '__main__':
+    test_index_sample()
+    test_weight_sample()
+    test_chunked_smote()
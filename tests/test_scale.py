@@ -0,0 +1,95 @@
+"""
+.. module:: test scale
+:synopsis: tests streaming and sketch scalers
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+import warnings
+
+import numpy as np
+import pandas as pd
+import sklearn.preprocessing
+
+from simplify.analyst.scale import QuantileScale, StandardScale
+from simplify.core.caches import transformer_cache
+from simplify.core.dataset import ChunkedDataset, Dataset
+
+
+def create_df() -> pd.DataFrame:
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame(
+        generator.normal(5, 3, size = (300, 4)),
+        columns = ['a', 'b', 'c', 'd'])
+    df['label'] = generator.integers(0, 2, size = 300)
+    return df
+
+def create_project(df: pd.DataFrame) -> types.SimpleNamespace:
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    transformer_cache.clear()
+    return types.SimpleNamespace(data = data, settings = {})
+
+def test_standard_scale():
+    df = create_df()
+    project = create_project(df = df)
+    scaler = StandardScale(
+        contents = sklearn.preprocessing.StandardScaler,
+        parameters = {},
+        streaming = True,
+        batch_size = 64)
+    scaler.implement(project)
+    features = df.drop(columns = 'label')
+    expected = sklearn.preprocessing.StandardScaler().fit_transform(features)
+    assert project.data.x.dtypes.eq(np.float32).all()
+    assert np.allclose(project.data.x, expected, atol = 1e-4)
+    batch = features.to_numpy(dtype = np.float32)
+    original = batch.copy()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        transformed = scaler.transform_batch(batch)
+    assert transformed is not batch
+    assert np.array_equal(batch, original)
+    assert np.allclose(transformed, expected, atol = 1e-4)
+    return
+
+def test_quantile_scale():
+    df = create_df()
+    project = create_project(df = df)
+    QuantileScale(
+        contents = sklearn.preprocessing.QuantileTransformer,
+        parameters = {'n_quantiles': 50},
+        streaming = True,
+        batch_size = 64,
+        sketch_size = 1000,
+        seed = 0).implement(project)
+    expected = sklearn.preprocessing.QuantileTransformer(
+        n_quantiles = 50).fit_transform(df.drop(columns = 'label'))
+    assert np.allclose(project.data.x, expected, atol = 1e-4)
+    return
+
+def test_chunked_scale(tmp_path):
+    df = create_df()
+    path = tmp_path.joinpath('data.csv')
+    df.to_csv(path, index = False)
+    data = ChunkedDataset(source = path, batch_size = 100)
+    data.create_xy(label = 'label')
+    transformer_cache.clear()
+    project = types.SimpleNamespace(data = data, settings = {})
+    scaler = StandardScale(
+        contents = sklearn.preprocessing.StandardScaler,
+        parameters = {})
+    scaler.implement(project)
+    assert scaler.batched
+    assert project.data.x.dtypes.eq(np.float32).all()
+    return
+
+
+if __name__ == '__main__':
+    import pathlib
+    import tempfile
+    test_standard_scale()
+    test_quantile_scale()
+    test_chunked_scale(pathlib.Path(tempfile.mkdtemp()))
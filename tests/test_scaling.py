@@ -0,0 +1,144 @@
+"""
+.. module:: test scaling
+:synopsis: tests substitution of scalable estimators
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import types
+
+import numpy as np
+import pandas as pd
+import sklearn.cluster
+import sklearn.decomposition
+import sklearn.ensemble
+import sklearn.preprocessing
+import sklearn.svm
+
+from simplify.analyst.scaling import ScalingPolicy
+from simplify.core.dataset import ChunkedDataset, Dataset
+
+
+def create_technique(name: str, algorithm: object) -> types.SimpleNamespace:
+    return types.SimpleNamespace(name = name, algorithm = algorithm)
+
+def create_data(rows: int, features: int = 4) -> Dataset:
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame(
+        generator.normal(3, 2, size = (rows, features)),
+        columns = [f'c{i}' for i in range(features)])
+    df['label'] = generator.integers(0, 2, size = rows)
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    return data
+
+def test_scaling_policy():
+    policy = ScalingPolicy(rows = 100, features = 10)
+    small = create_data(rows = 50)
+    large = create_data(rows = 200)
+    boosting = create_technique(
+        name = 'xgb',
+        algorithm = sklearn.ensemble.GradientBoostingClassifier(
+            n_estimators = 20,
+            learning_rate = 0.2))
+    policy.apply(technique = boosting, data = small)
+    assert isinstance(
+        boosting.algorithm, sklearn.ensemble.GradientBoostingClassifier)
+    policy.apply(technique = boosting, data = large)
+    assert isinstance(
+        boosting.algorithm, sklearn.ensemble.HistGradientBoostingClassifier)
+    assert boosting.algorithm.max_iter == 20
+    assert boosting.algorithm.learning_rate == 0.2
+    kept = create_technique(
+        name = 'gb',
+        algorithm = sklearn.ensemble.GradientBoostingClassifier())
+    ScalingPolicy(
+        idea = {'analyst': {'scaling_rows': 100, 'gb_scaling': 'none'}}).apply(
+            technique = kept,
+            data = large)
+    assert isinstance(
+        kept.algorithm, sklearn.ensemble.GradientBoostingClassifier)
+    return
+
+def test_scaling_policy_svm():
+    policy = ScalingPolicy(rows = 100, components = 50)
+    data = create_data(rows = 200)
+    technique = create_technique(
+        name = 'svm',
+        algorithm = sklearn.svm.SVC(kernel = 'rbf', C = 2.0))
+    policy.apply(technique = technique, data = data)
+    nystroem, model = [step for _, step in technique.algorithm.steps]
+    assert nystroem.n_components == 50
+    assert np.isclose(model.alpha, 1 / (2.0 * 200))
+    technique.algorithm.fit(data.x, data.y)
+    assert np.isclose(nystroem.gamma_, 1 / (4 * data.x.to_numpy().var()))
+    technique = create_technique(
+        name = 'svr',
+        algorithm = sklearn.svm.SVR(gamma = 'auto'))
+    policy.apply(technique = technique, data = data)
+    technique.algorithm.fit(data.x, data.y)
+    assert technique.algorithm.steps[0][1].gamma_ == 0.25
+    return
+
+def test_scaling_policy_encoded():
+    policy = ScalingPolicy(rows = 100, components = 20)
+    data = create_data(rows = 200)
+    data.x['color'] = pd.Categorical(['red', 'green', 'blue', 'red'] * 50)
+    technique = create_technique(name = 'svm', algorithm = sklearn.svm.SVC())
+    policy.apply(technique = technique, data = data)
+    encoded = sklearn.preprocessing.OneHotEncoder(
+        sparse_output = False).fit_transform(data.x[['color']])
+    encoded = np.hstack([data.x.drop(columns = 'color').to_numpy(), encoded])
+    technique.algorithm.fit(encoded, data.y)
+    nystroem = technique.algorithm.steps[0][1]
+    assert np.isclose(nystroem.gamma_, 1 / (7 * encoded.var()))
+    assert technique.algorithm.predict(encoded).shape == (200,)
+    return
+
+def test_scaling_policy_chunked(tmp_path):
+    path = tmp_path.joinpath('data.csv')
+    pd.DataFrame({'value': range(250), 'label': [0, 1] * 125}).to_csv(
+        path, 
+        index = False)
+    data = ChunkedDataset(source = path, batch_size = 10)
+    data.create_xy(label = 'label')
+    technique = create_technique(
+        name = 'kmeans', 
+        algorithm = sklearn.cluster.KMeans(n_clusters = 2))
+    ScalingPolicy(rows = 100).apply(technique = technique, data = data)
+    assert isinstance(technique.algorithm, sklearn.cluster.MiniBatchKMeans)
+    return
+
+def test_scaling_policy_pca():
+    policy = ScalingPolicy(rows = 100, features = 10)
+    data = create_data(rows = 200)
+    for components in [0.9, 'mle']:
+        technique = create_technique(
+            name = 'pca',
+            algorithm = sklearn.decomposition.PCA(n_components = components))
+        policy.apply(technique = technique, data = data)
+        assert isinstance(technique.algorithm, sklearn.decomposition.PCA)
+    technique = create_technique(
+        name = 'pca',
+        algorithm = sklearn.decomposition.PCA(n_components = 2))
+    policy.apply(technique = technique, data = data)
+    assert isinstance(
+        technique.algorithm, sklearn.decomposition.IncrementalPCA)
+    assert technique.algorithm.n_components == 2
+    technique = create_technique(
+        name = 'pca',
+        algorithm = sklearn.decomposition.PCA(n_components = 2))
+    policy.apply(technique = technique, data = create_data(50, 20))
+    assert technique.algorithm.svd_solver == 'randomized'
+    return
+
+
+if __name__ == '__main__':
+    import pathlib
+    import tempfile
+    test_scaling_policy()
+    test_scaling_policy_svm()
+    test_scaling_policy_pca()
+    test_scaling_policy_encoded()
+    test_scaling_policy_chunked(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,242 @@
+"""
+.. module:: test search
+:synopsis: tests successive halving and hyperband searches
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+import scipy.stats
+import sklearn.base
+import sklearn.ensemble
+import sklearn.linear_model
+import sklearn.model_selection
+import sklearn.neural_network
+
+from simplify.analyst.search import (BayesianSearch, Hyperband, 
+                                     SuccessiveHalving, WarmStarter, tune)
+from simplify.core.caches import TrialStore
+from simplify.core.dataset import Dataset
+
+
+def test_successive_halving():
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame(generator.normal(size = (300, 4)))
+    y = pd.Series(x[0] + generator.normal(scale = 0.5, size = 300) > 0)
+    search = SuccessiveHalving(
+        estimator = sklearn.linear_model.LogisticRegression,
+        space = {'C': [0.0001, 0.01, 1.0, 100.0]},
+        resource = 'folds',
+        min_resource = 1,
+        max_resource = 4,
+        factor = 2,
+        cv = 4,
+        seed = 0)
+    search.search(x = x, y = y)
+    assert [r['resource'] for r in search.results].count(1) == 4
+    assert [r['resource'] for r in search.results].count(4) == 1
+    assert search.best_params['C'] != 0.0001
+    assert 0.5 < search.best_score <= 1.0
+    return
+
+def test_hyperband_brackets():
+    search = Hyperband(factor = 3)
+    assert search._get_brackets(minimum = 1, maximum = 81) == [
+        (81, 1), (34, 3), (15, 9), (8, 27), (5, 81)]
+    return
+
+def test_bayesian_search(tmp_path):
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame(generator.normal(size = (200, 3)))
+    y = pd.Series(x[0] + generator.normal(scale = 0.5, size = 200) > 0)
+    space = {'C': list(np.logspace(-4, 2, 13))}
+    search = BayesianSearch(
+        estimator = sklearn.linear_model.LogisticRegression,
+        space = space,
+        trials = 6,
+        initial = 3,
+        batch_size = 2,
+        seed = 0,
+        store = TrialStore(folder = tmp_path))
+    search.search(x = x, y = y)
+    assert len(search.results) == 6
+    assert len({r['parameters']['C'] for r in search.results}) == 6
+    resumed = BayesianSearch(
+        estimator = sklearn.linear_model.LogisticRegression,
+        space = space,
+        trials = 8,
+        initial = 3,
+        batch_size = 2,
+        seed = 0,
+        store = TrialStore(folder = tmp_path))
+    resumed.search(x = x, y = y)
+    assert resumed.results[:6] == search.results
+    assert len(resumed.results) == 8
+    return
+
+def test_bayesian_search_discrete(tmp_path):
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame(generator.normal(size = (200, 3)))
+    y = pd.Series(x[0] + generator.normal(scale = 0.5, size = 200))
+    space = {
+        'hidden_layer_sizes': [(4,), (8,), (4, 4)],
+        'alpha': [1e-4, 1e-2]}
+    def create(trials):
+        return BayesianSearch(
+            estimator = sklearn.neural_network.MLPRegressor(
+                max_iter = 50, 
+                random_state = 0),
+            space = space,
+            trials = trials,
+            initial = 2,
+            batch_size = 2,
+            seed = 0,
+            store = TrialStore(folder = tmp_path))
+    search = create(trials = 4)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        search.search(x = x, y = y)
+        resumed = create(trials = 20)
+        resumed.store = TrialStore(folder = tmp_path)
+        resumed.search(x = x, y = y)
+    assert len(resumed.results) == 6
+    assert resumed.best_params['hidden_layer_sizes'] in space[
+        'hidden_layer_sizes']
+    assert isinstance(resumed.best_params['hidden_layer_sizes'], tuple)
+    return
+
+def test_bayesian_search_key():
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame(generator.normal(size = (60, 3)))
+    y = pd.Series(x[0] > 0)
+    fold_data = [(x, y, x, y)]
+    def accuracy(estimator, x, y):
+        return estimator.score(x, y)
+    def create():
+        return BayesianSearch(
+            estimator = sklearn.linear_model.LogisticRegression(
+                random_state = np.random.RandomState(0)),
+            space = {'C': scipy.stats.loguniform(1e-4, 1e2)},
+            scoring = accuracy)
+    assert create()._get_key(fold_data) == create()._get_key(fold_data)
+    changed = create()
+    changed.space = {'C': scipy.stats.loguniform(1e-3, 1e2)}
+    assert changed._get_key(fold_data) != create()._get_key(fold_data)
+    return
+
+def test_bayesian_search_resume(tmp_path):
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame(generator.normal(size = (100, 3)))
+    y = pd.Series(x[0] + generator.normal(scale = 0.5, size = 100) > 0)
+    def create(trials):
+        return BayesianSearch(
+            estimator = sklearn.linear_model.LogisticRegression,
+            space = {'C': [0.001, 0.1, 10.0, 1000.0]},
+            trials = trials,
+            initial = 4,
+            batch_size = 1,
+            seed = 0,
+            store = TrialStore(folder = tmp_path))
+    create(trials = 2).search(x = x, y = y)
+    resumed = create(trials = 4)
+    resumed.search(x = x, y = y)
+    assert sorted(r['parameters']['C'] for r in resumed.results) == [
+        0.001, 0.1, 10.0, 1000.0]
+    return
+
+def test_warm_starter(tmp_path):
+    generator = np.random.default_rng(0)
+    x = pd.DataFrame(generator.normal(size = (200, 3)))
+    y = pd.Series(x[0] + generator.normal(scale = 0.5, size = 200) > 0)
+    starter = WarmStarter(store = TrialStore(folder = tmp_path))
+    starter.prepare(
+        estimator = sklearn.ensemble.GradientBoostingClassifier(),
+        fold_data = [(x, y, x, y)])
+    small = sklearn.ensemble.GradientBoostingClassifier(
+        n_estimators = 5, 
+        random_state = 0)
+    starter.add(model = starter.fit(model = small, x = x, y = y, fold = 0),
+                fold = 0)
+    large = sklearn.ensemble.GradientBoostingClassifier(
+        n_estimators = 10, 
+        random_state = 0)
+    previous, distance = starter.nearest(
+        parameters = large.get_params(),
+        models = starter.store.load_models(key = starter.key(fold = 0)))
+    assert previous.n_estimators == 5 and distance == 0.5
+    started = starter.fit(model = large, x = x, y = y, fold = 0)
+    expected = sklearn.base.clone(large).fit(x, y)
+    assert np.allclose(
+        started.predict_proba(x), expected.predict_proba(x))
+    deeper = sklearn.base.clone(large).set_params(max_depth = 5)
+    assert starter.nearest(
+        parameters = deeper.get_params(),
+        models = starter.store.load_models(key = starter.key(fold = 0)))[0] is None
+    reloaded = TrialStore(folder = tmp_path).load_models(
+        key = starter.key(fold = 0))
+    assert len(reloaded) == 1
+    return
+
+def check_tune(searcher):
+    generator = np.random.default_rng(0)
+    df = pd.DataFrame(generator.normal(size = (300, 3)))
+    df['label'] = df[0] + generator.normal(scale = 0.5, size = 300) > 0
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    splitter = sklearn.model_selection.KFold(
+        n_splits = 3, 
+        shuffle = True, 
+        random_state = 0)
+    data.splits = tuple(splitter.split(data.x))
+    model = sklearn.linear_model.LogisticRegression()
+    tuned = tune(searcher = searcher, estimator = model, data = data)
+    assert tuned is model and searcher.estimator is model
+    assert searcher.results
+    assert model.C == searcher.best_params['C'] != 0.0001
+    return
+
+def test_tune_halving():
+    check_tune(SuccessiveHalving(
+        space = {'C': [0.0001, 0.01, 1.0, 100.0]},
+        resource = 'folds',
+        min_resource = 1,
+        max_resource = 3,
+        seed = 0))
+    return
+
+def test_tune_hyperband():
+    check_tune(Hyperband(
+        space = {'C': [0.0001, 0.01, 1.0, 100.0]},
+        resource = 'folds',
+        min_resource = 1,
+        max_resource = 3,
+        seed = 0))
+    return
+
+def test_tune_bayes():
+    check_tune(BayesianSearch(
+        space = {'C': [0.0001, 0.01, 1.0, 100.0]},
+        trials = 4,
+        initial = 2,
+        batch_size = 2,
+        seed = 0))
+    return
+
+
+if __name__ == '__main__':
+    import pathlib
+    import tempfile
+    test_successive_halving()
+    test_hyperband_brackets()
+    test_bayesian_search(pathlib.Path(tempfile.mkdtemp()))
+    test_bayesian_search_discrete(pathlib.Path(tempfile.mkdtemp()))
+    test_bayesian_search_key()
+    test_bayesian_search_resume(pathlib.Path(tempfile.mkdtemp()))
+    test_warm_starter(pathlib.Path(tempfile.mkdtemp()))
+    test_tune_halving()
+    test_tune_hyperband()
+    test_tune_bayes()
@@ -0,0 +1,83 @@
+"""
+.. module:: test server
+:synopsis: tests micro-batched scoring over HTTP
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import asyncio
+import dataclasses
+import json
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from simplify.core.server import ScoringServer
+
+
+@dataclasses.dataclass
+class SumPredictor(object):
+    """Predictor which sums each row and fails on negative values."""
+    columns: List[str] = dataclasses.field(
+        default_factory = lambda: ['a', 'b'])
+
+    def to_array(self, x: Any) -> np.ndarray:
+        return np.asarray(x, dtype = np.float64)
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        if (x < 0).any():
+            raise ValueError('negative values')
+        return x.sum(axis = 1)
+
+
+async def request(address: Tuple[str, int], method: str, target: str,
+                  body: Any = None) -> Tuple[int, Any]:
+    reader, writer = await asyncio.open_connection(*address[:2])
+    content = b'' if body is None else json.dumps(body).encode()
+    writer.write(
+        f'{method} {target} HTTP/1.1\r\n'
+        f'Content-Length: {len(content)}\r\n'
+        f'Connection: close\r\n\r\n'.encode('latin-1') + content)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ')[1]), json.loads(payload)
+
+async def run_server() -> None:
+    server = ScoringServer(predictor = SumPredictor(), max_delay = 0.2)
+    await server.start(port = 0)
+    try:
+        address = server.address
+        assert address[1] != 0
+        status, response = await request(address, 'GET', '/health')
+        assert (status, response) == (200, {'columns': ['a', 'b']})
+        responses = await asyncio.gather(
+            request(address, 'POST', '/predict', {'rows': [[1, 2], [3, 4]]}),
+            request(address, 'POST', '/predict', {'rows': [[1, -2]]}),
+            request(address, 'POST', '/predict', {'rows': [[5, 6]]}))
+        assert responses[0] == (200, {'predictions': [3.0, 7.0]})
+        assert responses[1][0] == 500
+        assert 'negative values' in responses[1][1]['error']
+        assert responses[2] == (200, {'predictions': [11.0]})
+        status, response = await request(
+            address, 'POST', '/predict', {'rows': [[1, 2, 3]]})
+        assert status == 400
+        status, response = await request(address, 'GET', '/metrics')
+        assert status == 200
+        assert response['batches'] == 1
+        assert response['requests'] == 2
+        assert response['rows'] == 3
+        assert response['errors'] == 2
+    finally:
+        await server.stop()
+    return
+
+def test_scoring_server():
+    asyncio.run(run_server())
+    return
+
+
+if __name__ == '__main__':
+    test_scoring_server()
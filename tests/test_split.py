@@ -0,0 +1,134 @@
+"""
+.. module:: test split
+:synopsis: tests applying techniques to folds as independent tasks
+:author: Corey Rayburn Yung
+:copyright: 2021
+:license: Apache-2.0
+"""
+
+import dataclasses
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn.datasets
+import sklearn.ensemble
+import sklearn.linear_model
+import sklearn.model_selection
+import sklearn.pipeline
+import sklearn.preprocessing
+
+from simplify.analyst.scaling import ScalingPolicy
+from simplify.analyst.split import apply_folds
+from simplify.core.dataset import Dataset
+
+
+@dataclasses.dataclass
+class Scale(object):
+    """Technique which standardizes features in place on its fold."""
+    name: str = 'scale'
+    algorithm: Any = dataclasses.field(
+        default_factory = sklearn.preprocessing.StandardScaler)
+
+    def apply(self, data: Dataset) -> Dataset:
+        self.algorithm.fit(data.x_train)
+        for bunch in [data.train, data.test]:
+            bunch.x = pd.DataFrame(
+                self.algorithm.transform(bunch.x),
+                columns = bunch.x.columns,
+                index = bunch.x.index)
+        return data
+
+
+@dataclasses.dataclass
+class Fit(object):
+    """Technique which fits a logistic regression on its fold."""
+    name: str = 'model'
+    algorithm: Any = dataclasses.field(
+        default_factory = sklearn.linear_model.LogisticRegression)
+
+    def apply(self, data: Dataset) -> Dataset:
+        self.algorithm.fit(data.x_train, data.y_train)
+        return data
+
+
+def create_data() -> Dataset:
+    x, y = sklearn.datasets.make_classification(
+        n_samples = 200,
+        n_features = 6,
+        random_state = 0)
+    df = pd.DataFrame(x * 10, columns = [f'c{i}' for i in range(6)])
+    df['label'] = y
+    data = Dataset.create(data = df)
+    data.create_xy(label = 'label')
+    splitter = sklearn.model_selection.KFold(
+        n_splits = 4, 
+        shuffle = True, 
+        random_state = 0)
+    data.splits = tuple(splitter.split(data.x))
+    return data
+
+def test_apply_folds():
+    data = create_data()
+    pipeline = sklearn.pipeline.make_pipeline(
+        sklearn.preprocessing.StandardScaler(),
+        sklearn.linear_model.LogisticRegression())
+    expected = sklearn.model_selection.cross_val_predict(
+        pipeline, 
+        data.x, 
+        data.y, 
+        cv = data.splits)
+    scores = sklearn.model_selection.cross_val_score(
+        pipeline, 
+        data.x, 
+        data.y, 
+        cv = data.splits)
+    x = data.x.copy()
+    for settings in [
+            None, 
+            {'general': {'parallelize': True, 
+                         'parallel_backend': 'thread',
+                         'cores': 2}}]:
+        techniques = [Scale(), Fit()]
+        results, predictions, summary = apply_folds(
+            data = data,
+            techniques = techniques,
+            settings = settings)
+        assert [r.fold for r in results] == [0, 1, 2, 3]
+        assert predictions.index.equals(data.x.index)
+        assert np.array_equal(predictions.to_numpy(), expected)
+        assert np.allclose(summary['folds'], scores)
+        assert np.isclose(summary['mean'], scores.mean())
+        assert not hasattr(techniques[-1].algorithm, 'coef_')
+        assert data.fold == 3
+        assert data.x.equals(x)
+    with pytest.raises(ValueError):
+        data.splits = None
+        apply_folds(data = data, techniques = [Fit()])
+    return
+
+def test_apply_folds_scaling():
+    data = create_data()
+    technique = Fit(
+        algorithm = sklearn.ensemble.GradientBoostingClassifier(
+            n_estimators = 5))
+    results, _, summary = apply_folds(
+        data = data,
+        techniques = [technique],
+        policy = ScalingPolicy(rows = 100))
+    assert isinstance(
+        technique.algorithm, sklearn.ensemble.GradientBoostingClassifier)
+    assert all(r.score is not None for r in results)
+    expected = sklearn.model_selection.cross_val_score(
+        sklearn.ensemble.HistGradientBoostingClassifier(max_iter = 5),
+        data.x, 
+        data.y, 
+        cv = data.splits)
+    assert np.allclose(summary['folds'], expected)
+    return
+
+
+if __name__ == '__main__':
+    test_apply_folds()
+    test_apply_folds_scaling()